@@ -1,10 +1,16 @@
-import asyncio
 import random
-import json
 import os
+import time
 import discord
-from discord.ext import commands, tasks
-from datetime import datetime
+from discord.ext import commands
+from datetime import datetime, timedelta
+from psycopg2.extras import Json
+
+from regions import get_user_region
+from async_db import run_db
+from db_connection import get_cursor
+from data_registry import registry
+from scheduler import scheduler
 
 # -----------------------
 # CONFIGURATION ACTU
@@ -13,8 +19,14 @@ from datetime import datetime
 ACTU_CHANNEL_ID   = int(os.getenv("ACTU"))   # ID du salon texte actu
 ACTU_HOUR_MIN     = 20             # heure min de publication (20h)
 ACTU_HOUR_MAX     = 24              # heure max de publication (00h)
+ACTU_DAYS         = (4, 5, 6)      # vendredi, samedi, dimanche
+ACTU_WINDOW_JOB   = "actu_window"  # ouverture / fermeture de la fenêtre (scheduler)
 EXPLORE_DURATION_MIN = 15 * 60     # 15 minutes en secondes
 EXPLORE_DURATION_MAX = 20 * 60     # 20 minutes en secondes
+EXPLORE_TICK      = 60             # un tirage par minute
+EXPLORE_JOB       = "explore:"     # une tâche de l'ordonnanceur par exploration en cours
+EXPLORE_RETRY     = 30             # nouvel essai (s) si la progression n'a pas pu être enregistrée
+EMBEDS_PER_MESSAGE = 10            # limite Discord d'embeds par message (DM groupés)
 POKEMON_RATE = 0.3  #POKEMON_RATE = 0.30
 ITEM_RATE    = 0.3    #ITEM_RATE    = 0.30
 NOTHING_RATE= 0.4 #NOTHING_RATE = 0.40 
@@ -70,6 +82,9 @@ LIEUX = {
 # Joueurs actuellement en exploration  { user_id: lieu_key }
 exploring: dict[int, str] = {}
 
+# Explorations en cours  { user_id (str): session } — copie en mémoire de la table explorations
+_explorations: dict[str, dict] = {}
+
 # Suivi de l'exploration par jour  { user_id: date_iso }
 explored_today: dict[int, str] = {}
 
@@ -79,49 +94,53 @@ actu_lieu_du_jour: str | None = None
 # Flag d'activation du système actu (géré par !actu_on / !actu_off)
 actu_enabled: bool = True
 
+# Actu déjà publiée dans la fenêtre en cours (remis à zéro à sa fermeture)
+actu_published_today: bool = False
+
 
 # -----------------------
-# CHARGEMENT JSON
+# CHARGEMENT JSON (registre partagé : lu une fois, rechargé si modifié)
 # -----------------------
 
 def load_actu_messages() -> list[dict]:
     filepath = os.path.join(ACTU_DIR, "message.json")
-    try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
+    messages = registry.get(filepath, None)
+    if messages is None:
         print(f"[ACTU] Fichier introuvable : {filepath}")
         return []
+    return messages
 
 
 def load_lieu_pokemon(lieu_key: str, shiny: bool = False) -> list[dict]:
     cfg  = LIEUX.get(lieu_key, {})
     path = cfg.get("pokemon_shiny" if shiny else "pokemon_normal", "")
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
+    return registry.get(path, []) if path else []
 
 
 def load_lieu_objets(lieu_key: str) -> list[dict]:
     cfg  = LIEUX.get(lieu_key, {})
     path = cfg.get("objets", "")
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
+    return registry.get(path, []) if path else []
 
 
 # -----------------------
 # HELPERS
 # -----------------------
 
-def get_user_region(cur, user_id: str) -> str | None:
-    cur.execute("SELECT region FROM user_regions WHERE user_id = %s", (user_id,))
-    row = cur.fetchone()
-    return row[0] if row else None
+def in_actu_window(now: datetime) -> bool:
+    return now.weekday() in ACTU_DAYS and ACTU_HOUR_MIN <= now.hour < ACTU_HOUR_MAX
+
+
+def next_actu_window(now: datetime) -> tuple[datetime, datetime]:
+    """(début, fin) de la fenêtre en cours, sinon de la prochaine (début = now si déjà ouverte)."""
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    for offset in range(8):
+        date = day + timedelta(days=offset)
+        start = date + timedelta(hours=ACTU_HOUR_MIN)
+        end = date + timedelta(hours=ACTU_HOUR_MAX)
+        if date.weekday() in ACTU_DAYS and now < end:
+            return max(start, now), end
+    raise ValueError("ACTU_DAYS vide")
 
 
 def weighted_choice(pool: list[dict]) -> dict | None:
@@ -224,129 +243,273 @@ def item_embed(item: dict, lieu_name: str) -> tuple[discord.Embed, discord.File
 
 
 # -----------------------
-# BOUCLE D'EXPLORATION
+# PERSISTANCE DES EXPLORATIONS
+# -----------------------
+
+def save_exploration(user_id: str, lieu_key: str, duration: int, schedule: list[dict], explored_on) -> float:
+    """Enregistre une nouvelle exploration (remplace la précédente du joueur) ; retourne son début (timestamp)."""
+    with get_cursor() as cur:
+        cur.execute("""
+            INSERT INTO explorations (user_id, lieu_key, started_at, duration, schedule, next_step, explored_on)
+            VALUES (%s, %s, now(), %s, %s, 0, %s)
+            ON CONFLICT (user_id) DO UPDATE SET
+                lieu_key    = EXCLUDED.lieu_key,
+                started_at  = EXCLUDED.started_at,
+                duration    = EXCLUDED.duration,
+                schedule    = EXCLUDED.schedule,
+                next_step   = 0,
+                explored_on = EXCLUDED.explored_on
+            RETURNING EXTRACT(EPOCH FROM started_at)
+        """, (user_id, lieu_key, duration, Json(schedule), explored_on))
+        return float(cur.fetchone()[0])
+
+
+def advance_exploration(user_id: str, next_step: int):
+    with get_cursor() as cur:
+        cur.execute("UPDATE explorations SET next_step = %s WHERE user_id = %s", (next_step, user_id))
+
+
+def load_explorations(today) -> list[dict]:
+    """Explorations du jour et explorations pas terminées (reprise au démarrage)."""
+    with get_cursor() as cur:
+        cur.execute("""
+            SELECT user_id, lieu_key, EXTRACT(EPOCH FROM started_at), duration, schedule, next_step, explored_on
+            FROM explorations
+            WHERE explored_on = %s OR next_step < jsonb_array_length(schedule)
+        """, (today,))
+        rows = cur.fetchall()
+    return [
+        {"user_id": uid, "lieu": lieu, "started": float(started), "duration": duration,
+         "schedule": schedule, "next": next_step, "explored_on": explored_on, "owned": None}
+        for uid, lieu, started, duration, schedule, next_step, explored_on in rows
+    ]
+
+
+# -----------------------
+# MOTEUR D'EXPLORATION
 # -----------------------
 
-async def run_exploration(dm: discord.DMChannel, user_id: str, lieu_key: str, duration: int):
+def build_exploration_schedule(duration: int) -> list[dict]:
     """
-    Tourne minute par minute pendant `duration` secondes.
+    Tirages de toute l'exploration, faits au départ : un par minute.
     30 % pokémon | 30 % objet | 40 % rien.
+    Le Pokémon ou l'objet précis est choisi à l'émission (objets déjà possédés exclus).
     """
-    cfg       = LIEUX[lieu_key]
-    lieu_name = cfg["name"]
-    elapsed   = 0
-    tick      = 60  # toutes les minutes
+    schedule = []
+    for at in range(EXPLORE_TICK, duration + EXPLORE_TICK, EXPLORE_TICK):
+        roll = random.random()
+        if roll < POKEMON_RATE:
+            kind = "pokemon"
+        elif roll < POKEMON_RATE + ITEM_RATE:
+            kind = "item"
+        else:
+            kind = "rien"
+        schedule.append({"at": at, "kind": kind, "shiny": kind == "pokemon" and random.random() < SHINY_RATE})
+    return schedule
 
-    while elapsed < duration:
-        await asyncio.sleep(tick)
-        elapsed += tick
 
-        remaining = duration - elapsed
-        roll      = random.random()
+async def start_exploration(bot: commands.Bot, user_id: str, lieu_key: str, duration: int, explored_on):
+    schedule = build_exploration_schedule(duration)
+    started = await run_db(save_exploration, user_id, lieu_key, duration, schedule, explored_on)
+    session = {"user_id": user_id, "lieu": lieu_key, "started": started, "duration": duration,
+               "schedule": schedule, "next": 0, "explored_on": explored_on, "owned": None}
+    _explorations[user_id] = session
+    _schedule_next_step(bot, session)
 
-        # --- Pokémon ---
-        if roll < POKEMON_RATE:
-            is_shiny    = random.random() < SHINY_RATE
-            shiny_pool  = load_lieu_pokemon(lieu_key, shiny=True)
-            normal_pool = load_lieu_pokemon(lieu_key, shiny=False)
 
-            if is_shiny and shiny_pool:
-                pokemon = weighted_choice(shiny_pool)
-            else:
-                is_shiny = False
-                pokemon  = weighted_choice(normal_pool)
-
-            if pokemon:
-                ivs, final_stats = save_pokemon_capture(user_id, pokemon, is_shiny)
-                embed     = pokemon_embed(pokemon, is_shiny, lieu_name, ivs, final_stats)
-                time_left = f"{remaining // 60}min {remaining % 60}s"
-                await dm.send(
-                    f"👁️ *Quelque chose bouge dans le {lieu_name}…* (encore {time_left})",
-                    embed=embed,
-                )
+def _schedule_next_step(bot: commands.Bot, session: dict):
+    due = session["started"] + session["schedule"][session["next"]]["at"]
+    scheduler.call_at(due, emit_exploration, bot, session["user_id"], name=f"{EXPLORE_JOB}{session['user_id']}")
 
-        # --- Objet ---
-        elif roll < POKEMON_RATE + ITEM_RATE:
-            objets = load_lieu_objets(lieu_key)
-            owned = get_user_item_names(user_id)
-            objets_dispo = [o for o in objets if o["item_name"] not in owned]
-
-            if not objets_dispo:
-                time_left = f"{remaining // 60}min {remaining % 60}s"
-                # Dans le bloc "Objet" quand objets_dispo est vide, et dans le bloc "Rien"
-                msgs = cfg.get("messages_ambiance", [
-                    f"🌫️ *Un silence pesant règne dans le {lieu_name}…* (encore {{time_left}})",
-                ])
-                await dm.send(random.choice(msgs).format(time_left=time_left))
-            else:
-                item = weighted_choice(objets_dispo)
-                if item:
-                    add_item_to_inventory(user_id, item)
-                    embed, file = item_embed(item, lieu_name)
-                    time_left = f"{remaining // 60}min {remaining % 60}s"
-                    await dm.send(
-                        f"🔦 *Tu fouilles le {lieu_name}…* (encore {time_left})",
-                        embed=embed,
-                        file=file if file else discord.utils.MISSING,
-                    )
-
-        # --- Rien ---
+
+async def _exploration_outcome(session: dict, step: dict) -> tuple | None:
+    """(ligne, embed, fichier) d'un tirage ; None si rien à envoyer."""
+    user_id   = session["user_id"]
+    lieu_key  = session["lieu"]
+    cfg       = LIEUX[lieu_key]
+    lieu_name = cfg["name"]
+    remaining = max(0, session["duration"] - step["at"])
+    time_left = f"{remaining // 60}min {remaining % 60}s"
+
+    # --- Pokémon ---
+    if step["kind"] == "pokemon":
+        is_shiny    = step["shiny"]
+        shiny_pool  = load_lieu_pokemon(lieu_key, shiny=True)
+        normal_pool = load_lieu_pokemon(lieu_key, shiny=False)
+
+        if is_shiny and shiny_pool:
+            pokemon = weighted_choice(shiny_pool)
         else:
-            time_left = f"{remaining // 60}min {remaining % 60}s"
-            msgs = [
-                f"🕯️ *Un courant d'air froid traverse le {lieu_name}…* (encore {time_left})",
-                f"🦇 *Des chauves-souris s'envolent dans l'obscurité…* (encore {time_left})",
-                f"🌫️ *Un silence pesant règne dans le {lieu_name}…* (encore {time_left})",
-                f"👣 *Tu entends des pas… mais personne n'est là.* (encore {time_left})",
-            ]
-            await dm.send(random.choice(msgs))
-
-    # Fin de l'exploration
-    exploring.pop(int(user_id), None)
-    await dm.send(
-        f"🚪 **Tu quittes le {lieu_name}.**\n"
-        f"L'exploration est terminée. Reviens quand une nouvelle actu t'y invite !"
-    )
+            is_shiny = False
+            pokemon  = weighted_choice(normal_pool)
+
+        if not pokemon:
+            return None
+        ivs, final_stats = await run_db(save_pokemon_capture, user_id, pokemon, is_shiny)
+        embed = pokemon_embed(pokemon, is_shiny, lieu_name, ivs, final_stats)
+        return f"👁️ *Quelque chose bouge dans le {lieu_name}…* (encore {time_left})", embed, None
+
+    # --- Objet ---
+    if step["kind"] == "item":
+        # Inventaire lu une fois par exploration, puis tenu à jour avec les trouvailles
+        if session["owned"] is None:
+            session["owned"] = await run_db(get_user_item_names, user_id)
+        objets_dispo = [o for o in load_lieu_objets(lieu_key) if o["item_name"] not in session["owned"]]
+
+        if not objets_dispo:
+            msgs = cfg.get("messages_ambiance", [
+                f"🌫️ *Un silence pesant règne dans le {lieu_name}…* (encore {{time_left}})",
+            ])
+            return random.choice(msgs).format(time_left=time_left), None, None
+
+        item = weighted_choice(objets_dispo)
+        if not item:
+            return None
+        await run_db(add_item_to_inventory, user_id, item)
+        session["owned"].add(item["item_name"])
+        embed, file = item_embed(item, lieu_name)
+        return f"🔦 *Tu fouilles le {lieu_name}…* (encore {time_left})", embed, file
+
+    # --- Rien ---
+    msgs = [
+        f"🕯️ *Un courant d'air froid traverse le {lieu_name}…* (encore {time_left})",
+        f"🦇 *Des chauves-souris s'envolent dans l'obscurité…* (encore {time_left})",
+        f"🌫️ *Un silence pesant règne dans le {lieu_name}…* (encore {time_left})",
+        f"👣 *Tu entends des pas… mais personne n'est là.* (encore {time_left})",
+    ]
+    return random.choice(msgs), None, None
+
+
+async def _send_batched(dm: discord.abc.Messageable, outcomes: list[tuple]):
+    """Envoie les tirages dus en un minimum de DM (10 embeds et 2000 caractères par message)."""
+    lines, embeds, files = [], [], []
+
+    async def flush():
+        if lines or embeds:
+            await dm.send(
+                "\n".join(lines) or None,
+                embeds=list(embeds) or discord.utils.MISSING,
+                files=list(files) or discord.utils.MISSING,
+            )
+        lines.clear()
+        embeds.clear()
+        files.clear()
+
+    for line, embed, file in outcomes:
+        if len(embeds) >= EMBEDS_PER_MESSAGE or sum(len(l) + 1 for l in lines) + len(line) > 2000:
+            await flush()
+        lines.append(line)
+        if embed is not None:
+            embeds.append(embed)
+        if file is not None:
+            files.append(file)
+    await flush()
+
+
+async def emit_exploration(bot: commands.Bot, user_id: str):
+    """Échéance d'une exploration : émet tous les tirages dus (plusieurs après un redémarrage) en DM groupés."""
+    session = _explorations.get(user_id)
+    if session is None:
+        return
+    schedule = session["schedule"]
+    elapsed  = time.time() - session["started"] + 1   # marge d'une seconde sur le réveil
+
+    next_step = session["next"]
+    while next_step < len(schedule) and schedule[next_step]["at"] <= elapsed:
+        next_step += 1
+    due = schedule[session["next"]:next_step]
+    finished = next_step >= len(schedule)
+
+    # Progression enregistrée avant les récompenses : un tirage n'est jamais donné deux fois
+    try:
+        await run_db(advance_exploration, user_id, next_step)
+    except Exception as e:
+        print(f"[ACTU] ❌ Progression de l'exploration de {user_id} non enregistrée, nouvel essai dans {EXPLORE_RETRY}s : {e}")
+        scheduler.call_later(EXPLORE_RETRY, emit_exploration, bot, user_id, name=f"{EXPLORE_JOB}{user_id}")
+        return
+    session["next"] = next_step
+
+    outcomes = []
+    for step in due:
+        try:
+            outcome = await _exploration_outcome(session, step)
+        except Exception as e:
+            print(f"[ACTU] ❌ Tirage {step['kind']} de {user_id} : {e}")
+            continue
+        if outcome:
+            outcomes.append(outcome)
+
+    if finished:
+        # Fin de l'exploration
+        lieu_name = LIEUX[session["lieu"]]["name"]
+        outcomes.append((
+            f"🚪 **Tu quittes le {lieu_name}.**\n"
+            f"L'exploration est terminée. Reviens quand une nouvelle actu t'y invite !",
+            None, None,
+        ))
+        _explorations.pop(user_id, None)
+        exploring.pop(int(user_id), None)
+    else:
+        _schedule_next_step(bot, session)
+
+    try:
+        user = bot.get_user(int(user_id)) or await bot.fetch_user(int(user_id))
+        dm = user.dm_channel or await user.create_dm()
+        await _send_batched(dm, outcomes)
+    except discord.HTTPException as e:
+        print(f"[ACTU] DM d'exploration impossible pour {user_id} : {e}")
+
+
+async def resume_explorations(bot: commands.Bot) -> int:
+    """Recharge les explorations du jour et relance celles qui étaient en cours (démarrage)."""
+    today = datetime.now().date()
+    resumed = 0
+    for session in await run_db(load_explorations, today):
+        uid = int(session["user_id"])
+        if session["explored_on"] == today:
+            explored_today[uid] = today.isoformat()
+        if session["next"] < len(session["schedule"]) and session["lieu"] in LIEUX:
+            _explorations[session["user_id"]] = session
+            exploring[uid] = session["lieu"]
+            _schedule_next_step(bot, session)
+            resumed += 1
+    return resumed
 
 
 # -----------------------
 # SETUP : COMMANDES + TÂCHE ACTU
 # -----------------------
 
-def setup_actu(bot: commands.Bot, cur):
+def setup_actu(bot: commands.Bot):
     global actu_enabled
 
-    # ---- Tâche quotidienne d'actu ----
-    @tasks.loop(minutes=1)
-    async def check_actu_time():
-        global actu_lieu_du_jour
-
-        if not actu_enabled:
-            return
-
-        now = datetime.now()
-
-        # Vendredi (4), Samedi (5), Dimanche (6)
-        is_allowed_day = now.weekday() in (4, 5, 6)
-        is_allowed_hour = ACTU_HOUR_MIN <= now.hour < ACTU_HOUR_MAX
-
-        if is_allowed_day and is_allowed_hour:
-            if not check_actu_time._published_today:
-                check_actu_time._published_today = True
-                await send_daily_actu(bot)
-
-        else:
-            # reset quand on sort de la fenêtre ou du bon jour
-            check_actu_time._published_today = False
-            actu_lieu_du_jour = None
-
-    check_actu_time._published_today = False
+    # ---- Fenêtre d'actu (ordonnanceur : un réveil à l'ouverture, un à la fermeture) ----
+    def plan_actu_window(after: datetime | None = None):
+        start, end = next_actu_window(after or datetime.now())
+        scheduler.call_at(start, open_actu_window, end, name=ACTU_WINDOW_JOB)
+
+    async def open_actu_window(end: datetime):
+        global actu_published_today
+        scheduler.call_at(end, close_actu_window, end, name=ACTU_WINDOW_JOB)
+        if actu_enabled and not actu_published_today:
+            actu_published_today = True
+            await send_daily_actu(bot)
+
+    async def close_actu_window(end: datetime):
+        global actu_published_today, actu_lieu_du_jour
+        # reset quand on sort de la fenêtre ou du bon jour
+        actu_published_today = False
+        actu_lieu_du_jour = None
+        plan_actu_window(after=max(end, datetime.now()))
 
     @bot.listen("on_ready")
     async def start_actu_task():
-        if not check_actu_time.is_running():
-            check_actu_time.start()
-            print("[ACTU] Tâche d'actu démarrée.")
+        if scheduler.get(ACTU_WINDOW_JOB) is None:
+            plan_actu_window()
+            print(f"[ACTU] Prochaine fenêtre d'actu : {next_actu_window(datetime.now())[0]:%d/%m %Hh%M}")
+            resumed = await resume_explorations(bot)
+            if resumed:
+                print(f"[ACTU] {resumed} exploration(s) reprise(s) après redémarrage.")
 
     # ---- Envoi de l'actu (par ID de salon) ----
     async def send_daily_actu(bot: commands.Bot, channel_override: discord.TextChannel = None):
@@ -395,12 +558,13 @@ def setup_actu(bot: commands.Bot, cur):
     @is_croco()
     async def actu_on(ctx):
         """Active les publications d'actu automatiques."""
-        global actu_enabled
+        global actu_enabled, actu_published_today
         if actu_enabled:
             await ctx.send("✅ Les actus sont déjà **activées**.", delete_after=6)
             return
         actu_enabled = True
-        check_actu_time._published_today = False
+        actu_published_today = False
+        plan_actu_window()
         await ctx.send("✅ Les actus automatiques sont maintenant **activées**.", delete_after=6)
 
     @bot.command(name="actu_off")
@@ -419,7 +583,7 @@ def setup_actu(bot: commands.Bot, cur):
     async def actu_status(ctx):
         """Affiche l'état actuel du système d'actu."""
         etat   = "✅ Activées" if actu_enabled else "⛔ Désactivées"
-        publie = "Oui" if check_actu_time._published_today else "Non"
+        publie = "Oui" if actu_published_today else "Non"
         embed  = discord.Embed(title="📊 Statut du système Actu", color=discord.Color.blurple())
         embed.add_field(name="État",                   value=etat,   inline=True)
         embed.add_field(name="Publiée aujourd'hui ?",  value=publie, inline=True)
@@ -451,7 +615,7 @@ def setup_actu(bot: commands.Bot, cur):
     def make_command(lk, lcfg):
         @bot.command(name=lcfg["command"])
         async def explore_command(ctx, _lk=lk, _lcfg=lcfg):
-            global actu_lieu_du_jour, exploring, explored_today
+            global actu_lieu_du_jour, actu_published_today, exploring, explored_today
 
             user_id     = ctx.author.id
             user_id_str = str(user_id)
@@ -460,8 +624,8 @@ def setup_actu(bot: commands.Bot, cur):
             now = datetime.now()
 
             # 4 = vendredi, 5 = samedi, 6 = dimanche
-            if now.weekday() not in (4, 5, 6):
-                check_actu_time._published_today = False
+            if now.weekday() not in ACTU_DAYS:
+                actu_published_today = False
                 actu_lieu_du_jour = None
                 return
             if not (ACTU_HOUR_MIN <= now.hour < ACTU_HOUR_MAX):
@@ -509,7 +673,7 @@ def setup_actu(bot: commands.Bot, cur):
                 return
 
             # Vérif région
-            region   = get_user_region(cur, user_id_str)
+            region   = await run_db(get_user_region, user_id_str)
             required = _lcfg.get("region")
             if required and region != required:
                 await ctx.send(
@@ -537,7 +701,7 @@ def setup_actu(bot: commands.Bot, cur):
                 f"Toutes les minutes, quelque chose pourrait se passer…"
             )
 
-            asyncio.create_task(run_exploration(dm, user_id_str, _lk, duration))
+            await start_exploration(bot, user_id_str, _lk, duration, now.date())
 
         return explore_command
 
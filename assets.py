@@ -0,0 +1,123 @@
+"""Registre des ressources statiques du rendu : polices, fonds, images fixes.
+
+Chaque image est décodée, convertie en RGBA et redimensionnée une seule
+fois par (chemin, taille), puis gardée en mémoire (LRU borné à
+ASSETS_MAX_MB) ; une police est ouverte une seule fois par taille. Un
+fichier modifié sur disque (date changée) est rechargé.
+
+Les images du registre sont partagées : image() les rend en lecture seule
+(source d'un paste, d'un crop…), canvas() en donne une copie sur laquelle
+dessiner. preload() charge d'avance les fonds connus (cards.preload_assets,
+appelé avant le fork des workers de rendu : ceux-ci héritent du registre
+déjà rempli).
+
+    font(20)                                   → police DejaVuSans-Bold 20
+    canvas("images/fond_pokedex.png", (850, 600))
+    memory_report()                            → {"images", "bytes", "fonts", …}
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageFont
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+FONT_BOLD = os.path.join(script_dir, "fonts", "DejaVuSans-Bold.ttf")
+
+ASSETS_MAX_BYTES = int(os.getenv("ASSETS_MAX_MB", "128")) * 1024 * 1024
+
+_images: "OrderedDict[tuple, tuple]" = OrderedDict()   # (chemin, taille, filtre) → (image, date, octets)
+_fonts: dict[tuple, object] = {}
+_bytes = 0
+_lock = threading.RLock()   # rendus en mode thread
+
+stats = {"hits": 0, "loads": 0, "reloads": 0, "evictions": 0}
+
+
+def _image_bytes(img: Image.Image) -> int:
+    return img.width * img.height * len(img.getbands())
+
+
+def font(size: int, path: str = FONT_BOLD):
+    """Police ouverte une seule fois par (fichier, taille) ; police par défaut si illisible."""
+    key = (path, size)
+    with _lock:
+        loaded = _fonts.get(key)
+        if loaded is None:
+            try:
+                loaded = ImageFont.truetype(path, size)
+            except Exception:
+                loaded = ImageFont.load_default()
+            _fonts[key] = loaded
+        return loaded
+
+
+def image(path: str, size: tuple | None = None, resample=Image.Resampling.LANCZOS) -> Image.Image:
+    """Image RGBA partagée (ne pas la modifier). Lève OSError si le fichier est illisible.
+
+    resample=None : filtre par défaut de Image.resize.
+    """
+    global _bytes
+    key = (path, size, resample)
+    mtime = os.stat(path).st_mtime_ns
+    with _lock:
+        entry = _images.get(key)
+        if entry is not None and entry[1] == mtime:
+            _images.move_to_end(key)
+            stats["hits"] += 1
+            return entry[0]
+
+        with Image.open(path) as src:
+            img = src.convert("RGBA")
+        if size is not None and img.size != tuple(size):
+            img = img.resize(size) if resample is None else img.resize(size, resample)
+
+        if entry is not None:
+            _bytes -= entry[2]
+            stats["reloads"] += 1
+        else:
+            stats["loads"] += 1
+        size_bytes = _image_bytes(img)
+        _images[key] = (img, mtime, size_bytes)
+        _bytes += size_bytes
+        while _bytes > ASSETS_MAX_BYTES and len(_images) > 1:
+            _, (_, _, old_bytes) = _images.popitem(last=False)
+            _bytes -= old_bytes
+            stats["evictions"] += 1
+        return img
+
+
+def canvas(path: str, size: tuple | None = None) -> Image.Image:
+    """Copie modifiable d'une image du registre (fond sur lequel dessiner)."""
+    return image(path, size).copy()
+
+
+def preload(entries, font_sizes=()) -> dict:
+    """Charge d'avance [(chemin, taille), …] ; les fichiers absents sont ignorés."""
+    for size in font_sizes:
+        font(size)
+    for path, size in entries:
+        try:
+            image(path, size)
+        except OSError as e:
+            print(f"[ASSETS] Préchargement impossible de {os.path.basename(path)} : {e}")
+    report = memory_report()
+    print(f"[ASSETS] {report['images']} image(s), {report['bytes'] / (1024 * 1024):.1f} Mo, "
+          f"{report['fonts']} police(s)")
+    return report
+
+
+def memory_report() -> dict:
+    with _lock:
+        return {
+            "images":    len(_images),
+            "bytes":     _bytes,
+            "max_bytes": ASSETS_MAX_BYTES,
+            "fonts":     len(_fonts),
+            "largest":   sorted(
+                ((os.path.basename(path), size or img.size, nbytes)
+                 for (path, size, _), (img, _, nbytes) in _images.items()),
+                key=lambda e: -e[2],
+            )[:5],
+            **stats,
+        }
@@ -0,0 +1,78 @@
+"""Couche d'accès aux données asynchrone.
+
+Les modules *_db restent synchrones (psycopg2 + pool de db_connection) ;
+ce module expose leurs fonctions en version awaitable, exécutées dans un
+executor dédié et borné à la taille du pool : un appel lent à PostgreSQL
+ne bloque plus la boucle discord.py (heartbeats, boutons, autres serveurs).
+
+    from async_db import get_balance, add_money
+    balance = await get_balance(user_id)
+
+Pour une fonction bloquante qui n'a pas d'équivalent ici :
+    result = await run_db(fonction, arg1, arg2)
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import new_db
+import money_db
+import inventory_db
+import badge_db
+from db_connection import DB_POOL_MAX
+
+# Un thread par connexion du pool : au-delà, les appels attendent dans la file
+DB_EXECUTOR = ThreadPoolExecutor(max_workers=DB_POOL_MAX, thread_name_prefix="db")
+
+
+async def run_db(func, *args, **kwargs):
+    """Exécute une fonction bloquante dans l'executor base de données."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(DB_EXECUTOR, functools.partial(func, *args, **kwargs))
+
+
+def _awaitable(func):
+    """Transforme une fonction *_db synchrone en coroutine du même nom."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_db(func, *args, **kwargs)
+    return wrapper
+
+
+# ───────────────────────────────────────────────────────────────
+# 📦 new_db
+# ───────────────────────────────────────────────────────────────
+save_new_capture    = _awaitable(new_db.save_new_capture)
+get_new_captures    = _awaitable(new_db.get_new_captures)
+delete_capture      = _awaitable(new_db.delete_capture)
+increase_pokemon_iv = _awaitable(new_db.increase_pokemon_iv)
+add_xp              = _awaitable(new_db.add_xp)
+set_evo             = _awaitable(new_db.set_evo)
+set_attacks         = _awaitable(new_db.set_attacks)
+set_xp_evo          = _awaitable(new_db.set_xp_evo)
+evolve_pokemon      = _awaitable(new_db.evolve_pokemon)
+
+# ───────────────────────────────────────────────────────────────
+# 💰 money_db
+# ───────────────────────────────────────────────────────────────
+get_balance    = _awaitable(money_db.get_balance)
+add_money      = _awaitable(money_db.add_money)
+remove_money   = _awaitable(money_db.remove_money)
+set_money      = _awaitable(money_db.set_money)
+transfer_money = _awaitable(money_db.transfer_money)
+get_richest    = _awaitable(money_db.get_richest)
+
+# ───────────────────────────────────────────────────────────────
+# 🎒 inventory_db
+# ───────────────────────────────────────────────────────────────
+add_item         = _awaitable(inventory_db.add_item)
+get_inventory    = _awaitable(inventory_db.get_inventory)
+delete_inventory = _awaitable(inventory_db.delete_inventory)
+use_item         = _awaitable(inventory_db.use_item)
+get_items        = _awaitable(inventory_db.get_items)
+
+# ───────────────────────────────────────────────────────────────
+# 🏅 badge_db
+# ───────────────────────────────────────────────────────────────
+give_badge      = _awaitable(badge_db.give_badge)
+get_user_badges = _awaitable(badge_db.get_user_badges)
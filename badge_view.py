@@ -2,16 +2,26 @@
 import discord
 from discord.ext import commands
 from discord.ui import View, Button
-from PIL import Image
 import io, os, requests, json
-from badge_db import give_badge, get_user_badges
+from async_db import give_badge, get_user_badges
 from utils import is_croco
+from cache import ByteLRUCache, CACHE_DIR, MB
+from cards import MosaicJob
+from data_registry import registry
+from render_service import render
+from encoding import filename_for
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 images_dir = os.path.join(script_dir, "json")  # dossier pour fallback si image introuvable
 
 # --- Cache ---
-BADGE_CACHE = {}  # { user_id: { "mosaic": bytes, "badge_ids": [] } }
+# user_id → PNG de la mosaïque, valable pour la liste de badges qui l'a produite
+BADGE_CACHE = ByteLRUCache(
+    "badges",
+    max_bytes=int(os.getenv("BADGE_CACHE_MB", "16")) * MB,
+    ttl=24 * 3600,
+    spill_dir=os.path.join(CACHE_DIR, "badges"),
+)
 
 # --- Buttons ---
 class BadgeInfoButton(Button):
@@ -36,55 +46,48 @@ class BadgeInfoButton(Button):
 
 
 async def create_badge_mosaic(badges):
-    images = []
+    fallback_path = os.path.join(images_dir, "default.png")
+    paths = []
     nb_ignores = 0
 
     for badge in badges:
-        try:
-            # Nouveau chemin vers l'image locale
-            img_path = os.path.join(script_dir, badge["image"])
-            img = Image.open(img_path).convert("RGBA").resize((64,64))
-            images.append(img)
-        except Exception as e:
-            print(f"[IGNORÉ] Badge {badge['name']} : {e}")
-            try:
-                fallback_path = os.path.join(images_dir, "default.png")
-                fallback = Image.open(fallback_path).convert("RGBA").resize((64,64))
-                images.append(fallback)
-            except Exception as e2:
-                print(f"[ERREUR] Image par défaut manquante : {e2}")
-                nb_ignores += 1
-
-    if not images:
-        return None, 0
+        # Nouveau chemin vers l'image locale
+        img_path = os.path.join(script_dir, badge["image"])
+        if os.path.exists(img_path):
+            paths.append(img_path)
+        elif os.path.exists(fallback_path):
+            print(f"[IGNORÉ] Badge {badge['name']} : image introuvable ({img_path})")
+            paths.append(fallback_path)
+        else:
+            print(f"[ERREUR] Image par défaut manquante : {fallback_path}")
+            nb_ignores += 1
 
-    cols = 5
-    rows = (len(images) + cols - 1) // cols
-    mosaic = Image.new("RGBA", (cols*64, rows*64), (255,255,255,0))
-    for i, img in enumerate(images):
-        x = (i % cols) * 64
-        y = (i // cols) * 64
-        mosaic.paste(img, (x, y), img)
+    if not paths:
+        return None, 0
 
-    output = io.BytesIO()
-    mosaic.save(output, "PNG")
-    output.seek(0)
-    return output, len(images)
+    png = await render(MosaicJob(
+        count=len(paths),
+        tiles=tuple(enumerate(paths)),
+        masked=True,
+        fallback_path=fallback_path,
+        background=(255, 255, 255, 0),
+    ))
+    return io.BytesIO(png), len(paths)
 
 
 
 # --- Setup du module ---
-def setup_badges(bot, full_badge_data):
+def setup_badges(bot):
     @is_croco()
     @bot.command()
     async def givebadge(ctx, badge_id: int, user: discord.Member = None):
         """Attribue un badge à un utilisateur"""
         user = user or ctx.author
-        badge = next((b for b in full_badge_data if b["id"] == badge_id), None)
+        badge = next((b for b in registry.get("badges.json") if b["id"] == badge_id), None)
         if not badge:
             await ctx.send("❌ Badge introuvable.")
             return
-        if give_badge(user.id, badge_id):
+        if await give_badge(user.id, badge_id):
             await ctx.send(f"✅ Badge **{badge['name']}** attribué à {user.display_name}.")
         else:
             await ctx.send("❌ Impossible d'attribuer le badge.")
@@ -92,8 +95,8 @@ def setup_badges(bot, full_badge_data):
     @bot.command()
     async def badge(ctx, generation: int = None):
         user_id = str(ctx.author.id)
-        user_badge_ids = get_user_badges(user_id)
-        user_badges = [b for b in full_badge_data if b["id"] in user_badge_ids]
+        user_badge_ids = await get_user_badges(user_id)
+        user_badges = [b for b in registry.get("badges.json") if b["id"] in user_badge_ids]
 
         if generation:
             user_badges = [b for b in user_badges if b["generation"] == generation]
@@ -103,11 +106,11 @@ def setup_badges(bot, full_badge_data):
             return
 
         # ----- Vérification cache -----
-        cache = BADGE_CACHE.get(user_id)
         badge_ids = [b["id"] for b in user_badges]
+        cached_mosaic = BADGE_CACHE.get(user_id, fingerprint=badge_ids)
 
-        if cache and cache["badge_ids"] == badge_ids:
-            mosaic_img = io.BytesIO(cache["mosaic"])
+        if cached_mosaic is not None:
+            mosaic_img = io.BytesIO(cached_mosaic)
             mosaic_img.seek(0)
             print(f"[CACHE] Badge mosaic envoyé depuis le cache pour {ctx.author.display_name}")
         else:
@@ -115,15 +118,15 @@ def setup_badges(bot, full_badge_data):
             if mosaic_img is None:
                 await ctx.send("Erreur lors de la création de la mosaïque.")
                 return
-            BADGE_CACHE[user_id] = {"badge_ids": badge_ids, "mosaic": mosaic_img.getvalue()}
+            BADGE_CACHE.put(user_id, mosaic_img.getvalue(), fingerprint=badge_ids)
 
-        file = discord.File(mosaic_img, filename="badge_mosaic.png")
+        file = discord.File(mosaic_img, filename=filename_for(mosaic_img.getvalue(), "badge_mosaic"))
         embed = discord.Embed(
             title=f"🏅 Badges de {ctx.author.display_name}",
             description=f"Mosaïque de {len(user_badges)} badges",
             color=0xFFD700
         )
-        embed.set_image(url="attachment://badge_mosaic.png")
+        embed.set_image(url=f"attachment://{file.filename}")
 
         view = View()
         for b in user_badges:
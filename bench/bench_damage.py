@@ -0,0 +1,126 @@
+"""Micro-benchmark de combat.utils.calculate_damage.
+
+Compare l'implémentation historique (parcours linéaire des attaques, _norm
+et listes TYPE_CHART à chaque coup) à la version compilée (index d'attaques,
+ids de types, matrice d'efficacité), vérifie qu'elles donnent exactement les
+mêmes résultats à graine égale, puis mesure le coût par coup.
+
+    python bench/bench_damage.py [nb_coups]
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from combat.utils import (  # noqa: E402
+    TYPE_CHART, _norm, all_attacks, calculate_damage, describe_effectiveness,
+)
+from catalog import catalog  # noqa: E402
+
+
+# ───────────────────────────────────────────────────────────────
+# Implémentation historique (référence)
+# ───────────────────────────────────────────────────────────────
+def legacy_get_attack_info(name):
+    for attack in all_attacks:
+        if attack.get("name", "").lower() == str(name).lower():
+            return attack
+    return None
+
+
+def legacy_type_effectiveness(attack_type, defender_types):
+    chart = TYPE_CHART.get(_norm(attack_type), {"x2": [], "x0.5": [], "x0": []})
+    mult = 1.0
+    for t in defender_types or []:
+        dt = _norm(t)
+        if dt in chart["x0"]:
+            return 0.0
+        if dt in chart["x2"]:
+            mult *= 2.0
+        elif dt in chart["x0.5"]:
+            mult *= 0.5
+    return mult
+
+
+def legacy_calculate_damage(attacker, defender, attack_name, return_details=False, rng=random):
+    attack_info = legacy_get_attack_info(attack_name)
+    if not attack_info:
+        dmg = rng.randint(5, 10)
+        if not return_details:
+            return dmg
+        return {
+            "damage": dmg, "crit": False, "eff_multiplier": 1.0, "eff_label": "efficacité normale",
+            "stab": False, "variance": 1.0, "category": "", "power": 0, "attack_type": "normal"
+        }
+
+    raw_cat = (attack_info.get("category") or attack_info.get("categorie") or "").lower()
+    category = "physique" if raw_cat == "physique" else ("speciale" if raw_cat in ("speciale", "special") else "")
+    try:
+        power = int(attack_info.get("damage", 50))
+    except (TypeError, ValueError):
+        power = 50
+    attack_type = _norm(attack_info.get("type", "normal"))
+
+    if category == "physique" or (not category and power >= 60):
+        atk_stat = attacker["stats"].get("attack", 50)
+        def_stat = defender["stats"].get("defense", 50)
+    else:
+        atk_stat = attacker["stats"].get("special_attack", 50)
+        def_stat = defender["stats"].get("special_defense", 50)
+
+    stab_flag = attack_type in [_norm(t) for t in (attacker.get("type") or [])]
+    stab = 1.5 if stab_flag else 1.0
+    eff = legacy_type_effectiveness(attack_type, defender.get("type") or [])
+    crit_flag = (rng.randint(1, 16) == 1)
+    crit = 1.5 if crit_flag else 1.0
+    variance = rng.uniform(0.85, 1.00)
+
+    level = 50
+    core = (((2 * level / 5 + 2) * power * (atk_stat / max(1, def_stat))) / 50) + 2
+    dmg = 0 if eff == 0.0 else int(max(1, core * stab * eff * crit * variance))
+    if not return_details:
+        return dmg
+    return {
+        "damage": dmg, "crit": bool(crit_flag), "eff_multiplier": float(eff),
+        "eff_label": describe_effectiveness(eff), "stab": stab_flag, "variance": float(variance),
+        "category": category or ("physique" if power >= 60 else "speciale"),
+        "power": power, "attack_type": attack_type,
+    }
+
+
+# ───────────────────────────────────────────────────────────────
+# Jeu de coups
+# ───────────────────────────────────────────────────────────────
+def build_hits(n, seed=42):
+    rng = random.Random(seed)
+    pokemons = catalog.normal
+    hits = []
+    for _ in range(n):
+        attacker = rng.choice(pokemons)
+        defender = rng.choice(pokemons)
+        attack = rng.choice(attacker.get("attacks") or ["Charge"])
+        hits.append((attacker, defender, attack))
+    return hits
+
+
+def run(impl, hits, seed=7):
+    rng = random.Random(seed)
+    return [impl(a, d, atk, True, rng) for a, d, atk in hits]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    hits = build_hits(n)
+
+    assert run(legacy_calculate_damage, hits) == run(calculate_damage, hits), "résultats différents !"
+    print(f"✅ Résultats identiques sur {n} coups")
+
+    for label, impl in (("historique", legacy_calculate_damage), ("compilée", calculate_damage)):
+        best = min(timeit.repeat(lambda: run(impl, hits), number=1, repeat=5))
+        print(f"{label:>10} : {best / n * 1e6:6.2f} µs / coup")
+
+
+if __name__ == "__main__":
+    main()
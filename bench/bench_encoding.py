@@ -0,0 +1,95 @@
+"""Banc d'essai de l'encodage des images (encoding.py).
+
+Rend nos vraies cartes (spawn, fiches pokédex des deux mises en page,
+fiches objet de chaque thème, mosaïques de badges) puis, pour chaque
+politique candidate, mesure le temps d'encodage et la taille envoyée à
+discord. La politique retenue par défaut pour le type est marquée d'un ★.
+
+    python bench/bench_encoding.py [répétitions]
+    ENCODING_SPAWN="format=webp,quality=75" python bench/bench_encoding.py
+"""
+import glob
+import os
+import sys
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from PIL import Image  # noqa: E402
+
+import cards  # noqa: E402
+import encoding  # noqa: E402
+from encoding import EncodingPolicy  # noqa: E402
+
+images_dir = cards.images_dir
+BADGES = sorted(glob.glob(os.path.join(images_dir, "badges", "*.png")))
+SPRITE = os.path.join(images_dir, "marche_noir", "oeuf.png")
+
+CANDIDATES = [
+    EncodingPolicy("png"),                                     # historique
+    EncodingPolicy("png", compress_level=1),
+    EncodingPolicy("png-palette"),
+    EncodingPolicy("webp", quality=90, method=2),
+    EncodingPolicy("webp", quality=85, method=4),
+    EncodingPolicy("webp", quality=75, method=4),
+    EncodingPolicy("webp-lossless", quality=0, method=0, exact=True),
+    EncodingPolicy("webp-lossless", quality=50, method=4, exact=True),
+]
+
+
+def build_jobs() -> list:
+    stats = {key: 31 for key in cards.STAT_KEYS}
+    jobs = [("spawn bg_feu", cards.SpawnCardJob(os.path.join(images_dir, "bg_feu.png"), SPRITE))]
+    for layout in cards.POKEDEX_LAYOUTS:
+        jobs.append((f"fiche {layout}", cards.PokedexCardJob(
+            layout=layout, title="Dracaufeu", types=(("Feu", None), ("Vol", None)),
+            ivs=stats, stats=stats, current_xp=120, xp_evo=300, sprite_path=SPRITE,
+            attacks=(("Lance-Flammes", None), ("Cru-Aile", None)),
+        )))
+    for theme in cards.ITEM_THEMES:
+        jobs.append((f"objet {theme}", cards.ItemCardJob(
+            theme=theme, name="Super Bonbon", rarity="rare",
+            description="Fait monter un Pokémon d'un niveau. À consommer sans modération.",
+            quantity=3, price=500, balance=1200, image_path=SPRITE,
+        )))
+    tiles = tuple(enumerate(BADGES))
+    jobs.append((f"mosaïque {len(tiles)} badges", cards.MosaicJob(
+        count=len(tiles), tiles=tiles, masked=True, background=(255, 255, 255, 0))))
+    jobs.append(("mosaïque pokédex 40", cards.MosaicJob(count=40, tiles=tuple(enumerate(BADGES[:40])))))
+    return jobs
+
+
+def rendered_image(job) -> Image.Image:
+    """Image brute du job : rendu encodé sans perte puis relu."""
+    saved = encoding.POLICIES
+    encoding.POLICIES = {}   # FALLBACK_POLICY : PNG sans perte
+    try:
+        return Image.open(BytesIO(cards.render_job(job))).convert("RGBA")
+    finally:
+        encoding.POLICIES = saved
+
+
+def measure(img: Image.Image, kind: str, policy: EncodingPolicy, repeat: int) -> tuple[float, int]:
+    best, data = float("inf"), b""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = encoding.encode(img, kind, policy)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, len(data)
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    for label, job in build_jobs():
+        img = rendered_image(job)
+        current = encoding.policy_for(job.kind)
+        print(f"\n── {label} ({job.kind}, {img.width}×{img.height})")
+        for policy in dict.fromkeys([current, *CANDIDATES]):
+            ms, size = measure(img, job.kind, policy, repeat)
+            mark = "★" if policy == current else " "
+            print(f" {mark} {policy.describe():<32} {ms:8.1f} ms  {size / 1024:8.1f} Ko")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Banc d'essai du chargement des données au démarrage.
+
+Lance plusieurs interpréteurs neufs et mesure, dans chacun, le temps de
+chargement des données du bot : registre (data_registry), index des
+attaques (combat.utils), catalogue (catalog) et fichiers lus par bot.py à
+l'import. Deux modes sont comparés : JSON seul (DATA_SNAPSHOT=0) et
+instantané compilé (json/snapshot.bin, reconstruit au début du banc).
+L'import de discord, commun aux deux modes, est exclu de la mesure.
+
+    python bench/bench_startup.py [nb_lancements]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, root)
+
+import data_snapshot  # noqa: E402
+
+# Exécuté dans chaque interpréteur neuf : affiche {"total_ms": …, "files": …}
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+import discord.ext.tasks   # hors mesure
+start = time.perf_counter()
+from data_registry import registry
+import combat.utils
+from catalog import catalog
+for name in ("pokemon_type_sprites.json", "item_capture.json", "badges.json", "item.json", "images.json",
+             "marche_noir.json", "receleur.json", "questions.json"):
+    registry.get(name, None)
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"total_ms": elapsed, "files": registry.report()["files"]}}))
+"""
+
+
+def probe(snapshot: bool) -> dict:
+    env = dict(os.environ, DATA_SNAPSHOT="1" if snapshot else "0")
+    out = subprocess.run([sys.executable, "-c", PROBE.format(root=os.path.abspath(root))],
+                         env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+
+    from data_pipeline import snapshot_indexes
+    report = data_snapshot.build_snapshot(indexes=snapshot_indexes())
+    print(f"Instantané : {report['files']} fichiers, {report['indexes']} index, "
+          f"{report['bytes'] / 1024:.0f} Ko (build {report['elapsed'] * 1000:.0f} ms)")
+
+    for label, snapshot in (("JSON", False), ("instantané", True)):
+        results = [probe(snapshot) for _ in range(runs)]
+        times = [r["total_ms"] for r in results]
+        print(f"{label:>11} : médiane {statistics.median(times):6.1f} ms · min {min(times):6.1f} ms · "
+              f"{results[0]['files']} fichier(s) en mémoire")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord.ui import View, Button, Select
 import random, asyncio, os, json
 from dotenv import load_dotenv
@@ -11,7 +11,6 @@ from combat.menu_combat import SelectionView
 
 import stat
 
-import requests
 import io
 import uuid
 from croco_event import setup_croco_event
@@ -33,7 +32,7 @@ from dupont_event import run_interaction_personnage
 
 from dupont_event import setup_dupont_command
 
-from combat.utils import normalize_text
+from combat.utils import normalize_text, ATTACK_ALIASES
 
 from pokedex import setup_pokedex
 from new_pokedex import setup_new_pokedex
@@ -43,7 +42,21 @@ from new_pokedex import setup_new_pokedex
 from io import BytesIO
 
 from db import save_capture, get_captures
-from new_db import save_new_capture, get_new_captures, setupxp
+from new_db import setupxp
+from async_db import save_new_capture, get_new_captures, run_db
+from loop_watchdog import start_loop_watchdog
+from migrate import check_schema
+from sprites import close_session
+from render_service import setup_render_service, start_render_service, stop_render_service
+from encoding import filename_for
+from spawn_cards import get_spawn_card, setup_spawn_cards
+from prewarm import setup_prewarm
+from cache import setup_cache_commands, flush_all as flush_caches
+from catalog import catalog
+from data_registry import registry, setup_data_registry
+from scheduler import scheduler, setup_scheduler
+from presence import presence, setup_presence, LEAVE
+from dm_timers import setup_dm_timers, is_dm_spawning, DM_SPAWN_JOB
 
 from inventory_view import setup_inventory
 from utils import is_croco
@@ -52,10 +65,9 @@ from money_db import add_money
 from shop_view import setup_shop
 
 from badge_view import setup_badges
-from regions import setup_regions, setup_region # region_command
+from regions import setup_region, get_user_region # region_command
 
 import os
-import psycopg2
 import discord
 from discord.ui import Select, View
 from dotenv import load_dotenv
@@ -63,30 +75,9 @@ from dotenv import load_dotenv
 from fishing import setup_fishing
 
 
-# ──────────────────────────────────────────────────────────────────────────────
-# CHENIL — Configuration
-# ──────────────────────────────────────────────────────────────────────────────
-SECONDES_PAR_TRANCHE = 120   # Secondes de vocal pour gagner de l'XP
-TICK_MINUTES         = 1     # Fréquence du tick chenil (en minutes)
-
-# Tracking vocal en mémoire : user_id (int) → timestamp d'entrée
-_vocal_start: dict[int, float] = {}
-
-# Timestamp du dernier tick chenil
-_last_chenil_tick: float = 0.0
-
-
 load_dotenv()
-
-DATABASE_URL = os.getenv("DATABASE_URL")
-
-conn = psycopg2.connect(DATABASE_URL, sslmode="require")
-cur = conn.cursor()
 #
 
-# Ici, déclare la constante globale :
-CHECK_VOICE_CHANNEL_INTERVAL = 120  # secondes
-
 allowed_user = {}  # dictionnaire global : guild_id -> user_id autorisé à capturer
 
 # Chargement du .env
@@ -111,10 +102,6 @@ DEFAULT_SHINY_RATE = 64
 
 bot = commands.Bot(command_prefix="!", intents=intents)
 
-dm_spawn_tasks = {}  # { member_id: asyncio.Task }
-dm_spawn_tasks = {}           # { member_id: asyncio.Task }
-dm_spawn_remaining_time = {}  # { member_id: int (secondes restantes) }
-
 
 # Chargement des données Pokémon (chemin absolu du script)
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -125,88 +112,21 @@ images_dir = os.path.join(script_dir, "images")
 
 
 
-# --- Fonds par type (fichiers à mettre dans /images)
-TYPE_BACKGROUNDS = {
-    "feu": "bg_feu.png",
-    "eau": "bg_eau.png",
-    "plante": "bg_plante.png",
-    "electrique": "bg_electrique.png",  # (clé sans accent pour simplifier)
-    "roche": "bg_roche.png",
-    "sol": "bg_sol.png",
-    "glace": "bg_glace.png",
-    "psy": "bg_psy.png",
-    "spectre": "bg_spectre.png",
-    "dragon": "bg_dragon.png",
-
-    "acier": "bg_acier.png",
-    "fee": "bg_fee.png",
-    "poison": "bg_poison.png",
-    "combat": "bg_combat.png",
-    "insecte": "bg_insecte.png",
-    "vol": "bg_vol.png",
-    
-    "tenebres": "bg_tenebres.png",
-    "normal": "bg_normal.png",
-}
-DEFAULT_BACKGROUND = "arriere_plan_herbe.png"
-
-def _norm(s: str) -> str:
-    # normalise pour matcher les clés ci-dessus (sans accents)
-    return (s or "").lower()\
-        .replace("é","e").replace("è","e").replace("ê","e")\
-        .replace("à","a").replace("ù","u").replace("ï","i").replace("ô","o")
-
-from PIL import Image  # déjà importé plus haut, OK
-
-def get_background_image_for_pokemon(pokemon) -> Image.Image:
-    """
-    Retourne une Image PIL en fonction du premier type uniquement.
-    Repli sur DEFAULT_BACKGROUND si fichier manquant ou aucun type.
-    """
-    types = pokemon.get("type") or []
-    if not isinstance(types, list):
-        types = [types]
-
-    # On ne garde que le premier type s'il existe
-    first_type = _norm(types[0]) if types else None
-
-    # Résolution du fichier de fond
-    if first_type:
-        filename = TYPE_BACKGROUNDS.get(first_type, DEFAULT_BACKGROUND)
-    else:
-        filename = DEFAULT_BACKGROUND
-
-    path = os.path.join(images_dir, filename)
-    if not os.path.exists(path):
-        path = os.path.join(images_dir, DEFAULT_BACKGROUND)
+full_attack_data = registry.get("attack_data.json")
 
-    return Image.open(path).convert("RGBA")
 
 
 
+# Dictionnaire de type → sprite (mis à jour sur place si le fichier est modifié)
+def refresh_type_sprites(type_sprite_data):
+    type_sprites.update({entry["type"].lower(): entry["image"] for entry in type_sprite_data})
 
+type_sprites = {}
+refresh_type_sprites(registry.get("pokemon_type_sprites.json"))
+registry.subscribe("pokemon_type_sprites.json", refresh_type_sprites)
 
 
-with open(os.path.join(json_dir, "attack_data.json"), "r", encoding="utf-8") as f:
-    full_attack_data = json.load(f)
-
-
-
-
-# Charger les données des sprites de types
-type_sprite_path = os.path.join(json_dir, "pokemon_type_sprites.json")
-
-with open(type_sprite_path, "r", encoding="utf-8") as f:
-    type_sprite_data = json.load(f)
-
-# Dictionnaire de type → sprite
-type_sprites = {entry["type"].lower(): entry["image"] for entry in type_sprite_data}
-
-
-item_file_path = os.path.join(json_dir, "item_capture.json")
-
-with open(item_file_path, "r", encoding="utf-8") as f:
-    items_data = json.load(f)
+items_data = registry.get("item_capture.json")
 
 pokeball_url = next((item["image"] for item in items_data if item["name"].lower() == "pokéball"), None)
 
@@ -217,124 +137,30 @@ pokeball_url = next((item["image"] for item in items_data if item["name"].lower(
 
 
 #####################################
-# --- 🔥 GEN 1 — KANTO ---
-#####################################
-pokemon_file_path = os.path.join(json_dir, "pokemon_gen1_normal.json")
-with open(pokemon_file_path, "r", encoding="utf-8") as f:
-    kanto_pokemon_data = json.load(f)
-
-with open(os.path.join(json_dir, "pokemon_gen1_shiny.json"), "r", encoding="utf-8") as f:
-    kanto_shiny_data = json.load(f)
-
-#####################################
-# --- 🔥 GEN 2 — JOHTO ---
-#####################################
-johto_pokemon_data = []
-johto_shiny_data = []
-
-gen2_normal_path = os.path.join(json_dir, "pokemon_gen2_normal.json")
-if os.path.exists(gen2_normal_path):
-    with open(gen2_normal_path, "r", encoding="utf-8") as f:
-        johto_pokemon_data = json.load(f)
-
-gen2_shiny_path = os.path.join(json_dir, "pokemon_gen2_shiny.json")
-if os.path.exists(gen2_shiny_path):
-    with open(gen2_shiny_path, "r", encoding="utf-8") as f:
-        johto_shiny_data = json.load(f)
-
-#####################################
-# --- 🔥 GEN 3 — HOENN ---
+# --- 🔥 DONNÉES PAR RÉGION (catalogue indexé, chargé une fois) ---
 #####################################
-hoenn_pokemon_data = []
-hoenn_shiny_data = []
-
-gen3_normal_path = os.path.join(json_dir, "pokemon_gen3_normal.json")
-if os.path.exists(gen3_normal_path):
-    with open(gen3_normal_path, "r", encoding="utf-8") as f:
-        hoenn_pokemon_data = json.load(f)
-
-gen3_shiny_path = os.path.join(json_dir, "pokemon_gen3_shiny.json")
-if os.path.exists(gen3_shiny_path):
-    with open(gen3_shiny_path, "r", encoding="utf-8") as f:
-        hoenn_shiny_data = json.load(f)
-
-#####################################
-# --- 🔥 GEN 4 — SINNOH ---
-#####################################
-sinnoh_pokemon_data = []
-sinnoh_shiny_data = []
-
-gen4_normal_path = os.path.join(json_dir, "pokemon_gen4_normal.json")
-if os.path.exists(gen4_normal_path):
-    with open(gen4_normal_path, "r", encoding="utf-8") as f:
-        sinnoh_pokemon_data = json.load(f)
-
-gen4_shiny_path = os.path.join(json_dir, "pokemon_gen4_shiny.json")
-if os.path.exists(gen4_shiny_path):
-    with open(gen4_shiny_path, "r", encoding="utf-8") as f:
-        sinnoh_shiny_data = json.load(f)
-
-#####################################
-# --- 🔥 GEN 5 — UNYS ---
-#####################################
-unys_pokemon_data = []
-unys_shiny_data = []
-
-gen5_normal_path = os.path.join(json_dir, "pokemon_gen5_normal.json")
-if os.path.exists(gen5_normal_path):
-    with open(gen5_normal_path, "r", encoding="utf-8") as f:
-        unys_pokemon_data = json.load(f)
-
-gen5_shiny_path = os.path.join(json_dir, "pokemon_gen5_shiny.json")
-if os.path.exists(gen5_shiny_path):
-    with open(gen5_shiny_path, "r", encoding="utf-8") as f:
-        unys_shiny_data = json.load(f)
-
-
+kanto_pokemon_data,  kanto_shiny_data  = catalog.regions["Kanto"]
+johto_pokemon_data,  johto_shiny_data  = catalog.regions["Johto"]
+hoenn_pokemon_data,  hoenn_shiny_data  = catalog.regions["Hoenn"]
+sinnoh_pokemon_data, sinnoh_shiny_data = catalog.regions["Sinnoh"]
+unys_pokemon_data,   unys_shiny_data   = catalog.regions["Unys"]
 
 #####################################
 # --- 🔥 POOLS GLOBAUX (toutes régions) ---
 #####################################
-full_pokemon_data = (
-    kanto_pokemon_data +
-   johto_pokemon_data +
-    hoenn_pokemon_data +
-    sinnoh_pokemon_data +
-    unys_pokemon_data
-)
-
-full_pokemon_shiny_data = (
-    kanto_shiny_data +
-    johto_shiny_data +
-    hoenn_shiny_data +
-    sinnoh_shiny_data +
-    unys_shiny_data
-)
+full_pokemon_data       = catalog.normal
+full_pokemon_shiny_data = catalog.shiny
 
 #####################################
 # --- 🔥 MAPPING RÉGION → VARIABLES ---
 #####################################
-REGION_DATA_MAP = {
-    "Kanto": (kanto_pokemon_data, kanto_shiny_data),
-    "Johto": (johto_pokemon_data, johto_shiny_data),
-    "Hoenn": (hoenn_pokemon_data, hoenn_shiny_data),
-    "Sinnoh": (sinnoh_pokemon_data, sinnoh_shiny_data),
-    "Unys": (unys_pokemon_data, unys_shiny_data),
-    
-
+REGION_DATA_MAP = catalog.regions
 
-}
-        
 full_pokedex = full_pokemon_data.copy() 
         #####################################
 # --- MEGA ---
 #####################################
-
-mega_path = os.path.join(json_dir, "mega.json")
-if os.path.exists(mega_path):
-    with open(mega_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-        full_pokedex.extend(data)
+full_pokedex.extend(catalog.file_entries("mega.json") or [])
 ##############################################################
 ##############################################################
 
@@ -369,7 +195,17 @@ def clean_text(text):
     return ''.join(c for c in text if c.isascii())
 
 
-attack_type_map = {normalize_text(attack["name"]): attack["type"].lower() for attack in full_attack_data}
+def refresh_attack_type_map(attacks):
+    # Nom exact (fiches normalisées par data_pipeline.py) + forme sans accents
+    # pour les captures enregistrées avant la normalisation
+    attack_type_map.update({normalize_text(attack["name"]): attack["type"] for attack in attacks})
+    attack_type_map.update({attack["name"]: attack["type"] for attack in attacks})
+    attack_type_map.update({alias: attack_type_map[name] for alias, name in ATTACK_ALIASES.items()
+                            if name in attack_type_map})
+
+attack_type_map = {}
+refresh_attack_type_map(full_attack_data)
+registry.subscribe("attack_data.json", refresh_attack_type_map)
 
 
 def generate_ivs():
@@ -407,34 +243,25 @@ async def spawn_pokemon(channel, force=False, author=None, target_user: discord.
     # -----------------------
     # FILTRAGE PAR RÉGION
     # -----------------------
-    region_pokemon_data = full_pokemon_data
-    region_shiny_data = full_pokemon_shiny_data
-
+    user_region = None
     if dm_user:
-        cur.execute("SELECT region FROM user_regions WHERE user_id = %s", (str(dm_user.id),))
-        row = cur.fetchone()
-        user_region = row[0] if row else None
+        user_region = await run_db(get_user_region, dm_user.id)
 
-        if user_region and user_region in REGION_DATA_MAP:
-            region_pokemon_data, region_shiny_data = REGION_DATA_MAP[user_region]
-
-            # Sécurité : si la liste est vide, fallback sur le pool global
-            if not region_pokemon_data:
-                region_pokemon_data = full_pokemon_data
-                region_shiny_data = full_pokemon_shiny_data
+    # Région inconnue ou vide → pool global
+    region_pokemon_data, region_shiny_data = catalog.region_pools(user_region)
 
     # -----------------------
     # CHOIX DU POKÉMON
     # -----------------------
     if pokemon_name:
-        pokemon = next((p for p in region_pokemon_data if p["name"].lower() == pokemon_name.lower()), None)
+        pokemon = catalog.find_in_region(user_region, pokemon_name)
         if not pokemon:
             await channel.send(f"❌ Le Pokémon `{pokemon_name}` est introuvable dans cette région.")
             return
 
         is_shiny = (random.randint(1, shiny_rate) == 1)
         if is_shiny:
-            shiny_match = next((p for p in region_shiny_data if p["name"].lower().replace("_shiny", "") == pokemon_name.lower()), None)
+            shiny_match = catalog.find_in_region(user_region, pokemon_name, shiny=True)
             if shiny_match:
                 pokemon = shiny_match
 
@@ -513,24 +340,14 @@ async def spawn_pokemon(channel, force=False, author=None, target_user: discord.
     composed_file_bytes = None
 
     try:
-        background = get_background_image_for_pokemon(pokemon)
         poke_url = pokemon.get("image", "")
 
         if not poke_url.startswith("http"):
             await channel.send("❌ Erreur : image du Pokémon invalide.")
             return
 
-        response = requests.get(poke_url, timeout=15)
-        pokemon_img = Image.open(BytesIO(response.content)).convert("RGBA").resize((392, 392))
-
-        composed = background.copy()
-        x = (background.width - pokemon_img.width) // 2
-        y = (background.height - pokemon_img.height) // 2
-        composed.paste(pokemon_img, (x, y), pokemon_img)
-
-        output = BytesIO()
-        composed.save(output, format="PNG")
-        composed_file_bytes = output.getvalue()
+        # Carte précomposée par espèce / shiny / fond (rendue une seule fois)
+        composed_file_bytes = await get_spawn_card(pokemon)
 
     except Exception as e:
         await channel.send("❌ Erreur lors de la création de l'image.")
@@ -543,9 +360,8 @@ async def spawn_pokemon(channel, force=False, author=None, target_user: discord.
     if not dm_user:
         try:
             channel_embed = discord.Embed(title=title, description=description, color=color)
-            channel_embed.set_image(url="attachment://spawn.png")
-
-            file_channel = discord.File(fp=BytesIO(composed_file_bytes), filename="spawn.png")
+            file_channel = discord.File(fp=BytesIO(composed_file_bytes), filename=filename_for(composed_file_bytes, "spawn"))
+            channel_embed.set_image(url=f"attachment://{file_channel.filename}")
             content = f"<@&{ROLE_ID}>"
             await channel.send(content=content, embed=channel_embed, file=file_channel)
 
@@ -558,7 +374,7 @@ async def spawn_pokemon(channel, force=False, author=None, target_user: discord.
     if dm_user:
         try:
             dm_embed = discord.Embed(title=title, description=description, color=color)
-            dm_embed.set_image(url="attachment://spawn.png")
+            dm_embed.set_image(url=f"attachment://{filename_for(composed_file_bytes, 'spawn')}")
 
             if target_user:
                 dm_embed.add_field(
@@ -567,7 +383,7 @@ async def spawn_pokemon(channel, force=False, author=None, target_user: discord.
                     inline=False
                 )
 
-            file_dm = discord.File(fp=BytesIO(composed_file_bytes), filename="spawn.png")
+            file_dm = discord.File(fp=BytesIO(composed_file_bytes), filename=filename_for(composed_file_bytes, "spawn"))
             await dm_user.send(embed=dm_embed, file=file_dm)
 
         except discord.Forbidden:
@@ -587,104 +403,13 @@ async def spawn_pokemon(channel, force=False, author=None, target_user: discord.
 ####################################################################################################################        
 
 
-## Intervalle spawn MP
-MIN_SPAWN = 14400 #4h
-MAX_SPAWN = 18000 #5h
-
-@tasks.loop(seconds=120)
-async def check_voice_channel():
-    print(f"[DEBUG] check_voice_channel exécutée")  # ← à ajouter temporairement
-    bot.last_check_voice_time = time.time()
-    vc = bot.get_channel(VOICE_CHANNEL_ID)
-    channel = bot.get_channel(TEXT_CHANNEL_ID)
-    if channel is None or vc is None:
+async def on_voice_presence(event, member: discord.Member, voice_channel):
+    """Arrivée dans le salon vocal (presence) : arme l'activité du vocal (spawns DM : dm_timers)."""
+    if event == LEAVE:
         return
-
-    guild_id = channel.guild.id
-    members_in_vc = [m for m in vc.members if not m.bot]
-
-    if len(members_in_vc) > 0:
-        # Lance une tâche individuelle pour chaque membre qui n'en a pas encore
-        for member in members_in_vc:
-            if member.id not in dm_spawn_tasks or dm_spawn_tasks[member.id] is None or dm_spawn_tasks[member.id].done():
-                wait_time = random.randint(MIN_SPAWN, MAX_SPAWN) #### Premier spawn
-                minutes, seconds = divmod(wait_time, 60)
-                ###
-
-                hours, remainder = divmod(wait_time, 3600)
-                minutes, seconds = divmod(remainder, 60)
-
-                if hours > 0:
-                    print(f"[INFO] Spawn DM prévu pour {member.display_name} dans {hours}h {minutes} min {seconds} sec.")
-                else:
-                    print(f"[INFO] Spawn DM prévu pour {member.display_name} dans {minutes} min {seconds} sec.")
-
-                ##
-                dm_spawn_tasks[member.id] = asyncio.create_task(
-                    wait_and_spawn_dm(wait_time, channel, member)
-                )
-    else:
-        # Plus personne en vocal : on annule toutes les tâches DM en cours
-        for member_id, task in list(dm_spawn_tasks.items()):
-            if task is not None and not task.done():
-                task.cancel()
-                print(f"[INFO] Tâche DM annulée pour le membre {member_id} (vocal vide).")
-            dm_spawn_tasks[member_id] = None
-    # ← AJOUTE ICI
-    @check_voice_channel.before_loop
-    async def before_check_voice():
-        await bot.wait_until_ready()
-
-      
-async def wait_and_spawn_dm(wait_time, channel, member: discord.Member):
-    try:
-        dm_spawn_remaining_time[member.id] = wait_time
-
-        for remaining in range(wait_time, 0, -1):
-            await asyncio.sleep(1)
-            dm_spawn_remaining_time[member.id] = remaining - 1
-
-            # Print toutes les 60 secondes
-            if remaining % 60 == 0 and remaining > 0:
-                hours, remainder = divmod(remaining, 3600)
-                minutes, seconds = divmod(remainder, 60)
-                if hours > 0:
-                    print(f"[DM SPAWN] {member.display_name} — spawn dans {hours}h {minutes} min {seconds} sec.")
-                else:
-                    print(f"[DM SPAWN] {member.display_name} — spawn dans {minutes} min {seconds} sec.")
-
-            # Si le membre a quitté le vocal entre-temps, on arrête
-            vc = bot.get_channel(VOICE_CHANNEL_ID)
-            if vc is None or member not in vc.members:
-                print(f"[INFO] {member.display_name} a quitté le vocal, spawn DM annulé.")
-                return
-
-        # Spawn dans les DM du membre, shiny rate = 1/32
-        await spawn_pokemon(channel=channel, dm_user=member, shiny_rate=32)
-        print(f"[INFO] Pokémon spawné en DM pour {member.display_name}.")
-
-        # Relance automatiquement un nouveau compteur
-        vc = bot.get_channel(VOICE_CHANNEL_ID)
-        if vc and member in vc.members:
-            new_wait = random.randint(MIN_SPAWN, MAX_SPAWN)
-            hours, remainder = divmod(new_wait, 3600)
-            minutes, seconds = divmod(remainder, 60)
-            if hours > 0:
-                print(f"[INFO] Prochain spawn DM pour {member.display_name} dans {hours}h {minutes} min {seconds} sec.")
-            else:
-                print(f"[INFO] Prochain spawn DM pour {member.display_name} dans {minutes} min {seconds} sec.")
-            dm_spawn_tasks[member.id] = asyncio.create_task(
-                wait_and_spawn_dm(new_wait, channel, member)
-            )
-        else:
-            dm_spawn_tasks[member.id] = None
-
-    except asyncio.CancelledError:
-        pass
-    except Exception as e:
-        print(f"[ERREUR wait_and_spawn_dm] {e}")
-    finally:
-        dm_spawn_remaining_time.pop(member.id, None)
+    channel = bot.get_channel(TEXT_CHANNEL_ID)
+    if channel is not None:
+        start_voice_activity(channel, voice_channel)
 
 
 
@@ -693,6 +418,10 @@ async def wait_and_spawn_dm(wait_time, channel, member: discord.Member):
 @is_croco()
 async def shutdown(ctx):
     await ctx.send("⏹️ Bot en cours d'arrêt...")
+    await scheduler.shutdown()
+    await close_session()
+    flush_caches()
+    stop_render_service()
     await bot.close()
 
 
@@ -858,7 +587,7 @@ async def catch(ctx):
         if vc is None:
             await ctx.send("❌ Salon vocal introuvable.")
             return
-        if ctx.author.id != TARGET_USER_ID_CROCO and ctx.author not in vc.members:
+        if ctx.author.id != TARGET_USER_ID_CROCO and not presence.in_voice(ctx.author.id, VOICE_CHANNEL_ID):
             await ctx.send("❌ Tu dois être dans le salon vocal pour capturer un Pokémon.")
             ctx.command.reset_cooldown(ctx) # On reset pour qu'il puisse retenter dès qu'il rejoint le vocal
             return
@@ -899,7 +628,7 @@ async def catch(ctx):
 
         ivs = pokemon_data.get("ivs", {})
         stats_with_iv = pokemon_data.get("stats_iv", pokemon_data["stats"])
-        save_new_capture(ctx.author.id, pokemon_name, ivs, stats_with_iv, pokemon_data)
+        await save_new_capture(ctx.author.id, pokemon_name, ivs, stats_with_iv, pokemon_data)
 
         embed_captured = discord.Embed(
             description=(
@@ -973,7 +702,7 @@ async def capture(ctx):
         # Sauvegarde
         ivs = pokemon_data.get("ivs", {})
         stats_with_iv = pokemon_data.get("stats_iv", pokemon_data["stats"])
-        save_new_capture(ctx.author.id, pokemon_name, ivs, stats_with_iv, pokemon_data)
+        await save_new_capture(ctx.author.id, pokemon_name, ivs, stats_with_iv, pokemon_data)
 
         embed_captured = discord.Embed(
             description=(
@@ -1060,20 +789,10 @@ async def spawn(ctx, *args):
 @is_croco()
 async def timecheck(ctx):
     """
-    Indique dans combien de temps la prochaine exécution de la tâche check_voice_channel aura lieu.
+    Indique l'état du suivi du canal vocal (mis à jour à chaque arrivée / départ).
     Usage réservé à l'utilisateur Croco.
     """
-    if not hasattr(bot, 'last_check_voice_time'):
-        await ctx.send("Aucune donnée de dernière vérification disponible.")
-        return
-
-    now = time.time()
-    elapsed = now - bot.last_check_voice_time
-
-    remaining = max(0, int(CHECK_VOICE_CHANNEL_INTERVAL - elapsed))
-    minutes, seconds = divmod(remaining, 60)
-
-    await ctx.send(f"⏰ Prochaine vérification du canal vocal dans {minutes} min {seconds} sec.")
+    await ctx.send(f"🎧 Canal vocal suivi en temps réel : {presence.count(VOICE_CHANNEL_ID)} membre(s) présent(s).")
 
 
 
@@ -1084,7 +803,7 @@ async def tempspawn(ctx):
     if vc is None:
         await ctx.send("❌ Impossible de trouver le salon vocal.")
         return
-    members_in_vc = [m for m in vc.members if not m.bot]
+    members_in_vc = presence.members(VOICE_CHANNEL_ID)
     if not members_in_vc:
         await ctx.send("❌ Aucun membre en vocal actuellement.")
         return
@@ -1096,31 +815,23 @@ async def tempspawn(ctx):
         color=0x00FF00
     )
     for member in members_in_vc:
-        task = dm_spawn_tasks.get(member.id)
-        if task is None or task.done():
+        job = scheduler.get(f"{DM_SPAWN_JOB}{member.id}")
+        if is_dm_spawning(member.id):
+            status = "🔄 Spawn en cours..."
+        elif job is None:
             status = "❌ Aucune tâche en cours"
         else:
-            remaining = dm_spawn_remaining_time.get(member.id)
-            if remaining is not None and remaining > 0:
-                minutes, seconds = divmod(remaining, 60)
-                status = f"🕐 **{minutes} min {seconds} sec**"
-            else:
-                status = "🔄 Démarrage en cours..."
+            minutes, seconds = divmod(int(job.remaining()), 60)
+            status = f"🕐 **{minutes} min {seconds} sec**"
         embed.add_field(name=member.display_name, value=status, inline=False)
     await ctx.send(embed=embed)
 
 
 
-@check_voice_channel.before_loop
-async def before_check_voice():
-    await bot.wait_until_ready()
-
 @bot.event
 async def on_ready():
     print(f"[BOT] Connecté en tant que {bot.user} ({bot.user.id})")
-    asyncio.ensure_future(auto_event_loop())
-    if not check_voice_channel.is_running():
-        check_voice_channel.start()
+    start_loop_watchdog()
 
 @bot.event
 async def on_message(message):
@@ -1137,17 +848,12 @@ setup_money(bot)
 setup_shop(bot)
 
 
-badges_file = os.path.join(script_dir, "json", "badges.json")
-
-# Charger les données des badges depuis le JSON
-with open(badges_file, "r", encoding="utf-8") as f:
-    full_badge_data = json.load(f)
 
 # Setup du module badge
-setup_badges(bot, full_badge_data)
+setup_badges(bot)
 
 from actu import setup_actu
-setup_actu(bot,cur)
+setup_actu(bot)
 
 
 setupxp(bot)
@@ -1159,6 +865,15 @@ setup_casino(bot)
 bot.is_under_ban = is_under_ban
 setup_pokedex(bot, full_pokemon_shiny_data, full_pokemon_data, type_sprites, attack_type_map, json_dir)
 setup_new_pokedex(bot, full_pokemon_shiny_data, full_pokedex, type_sprites, attack_type_map, json_dir)
+setup_prewarm(bot)
+setup_cache_commands(bot)
+setup_render_service(bot)
+setup_data_registry(bot)
+setup_scheduler(bot)
+setup_presence(bot)
+presence.subscribe(on_voice_presence, VOICE_CHANNEL_ID)
+setup_dm_timers(bot, TEXT_CHANNEL_ID, VOICE_CHANNEL_ID, spawn_pokemon)
+setup_spawn_cards(bot)
 
 print("[DEBUG] Ready to run bot...")
 
@@ -1198,7 +913,7 @@ async def battle(ctx):
     # Incrémenter le compteur de tentatives
     increment_daily_attempts(user_id)
     '''
-    captures = get_new_captures(user_id)
+    captures = await get_new_captures(user_id)
 
     if not captures:
         await ctx.send("Tu n'as aucun Pokémon à utiliser en combat.")
@@ -1206,7 +921,7 @@ async def battle(ctx):
 
     pokemons = [entry["name"] for entry in captures]
     try :
-        view = SelectionView(pokemons, full_pokemon_data, user_id=str(ctx.author.id))
+        view = await SelectionView.create(pokemons, full_pokemon_data, str(ctx.author.id))
     except ValueError as e:
         await ctx.send(f"❌ {e}\nUtilise la commande pour choisir ta région d'abord.")
         return
@@ -1237,9 +952,8 @@ setup_inventory(bot)
 from receleur import setup_receleur
 setup_receleur(bot)
 setup_region(bot)
-setup_regions()
 
-setup_fishing(bot, cur)
+setup_fishing(bot)
 
 setup_dupont_command(bot)
 
@@ -1336,113 +1050,89 @@ async def auto_event_loop():
  '''
 
 
-from chenil import tick_chenil_xp
-
-# dict persistant entre les tours de boucle  { user_id (int): nb_checks (int) }
-chenil_xp_counters: dict[int, int] = {}
-
 from chenil import setup_chenil 
 
-setup_chenil(bot,TEXT_CHANNEL_ID)
+# XP du chenil réglée à partir du temps de vocal (presence), plus de tick par minute
+setup_chenil(bot, TEXT_CHANNEL_ID, VOICE_CHANNEL_ID)
 riche_or_not = False;
-async def auto_event_loop():
-    await bot.wait_until_ready()
+
+AUTO_EVENT_JOB  = "auto_event"
+EVENT_TIMEOUT   = 15 * 60  # durée max d'un événement en secondes
+
+AUTO_EVENT_NAMES = {
+    "quiz":        "🧠 Quiz Pokémon",
+    "devine":      "🔍 Devine le Pokémon",
+    "spawn":       "✨ Spawn Pokémon",
+    "dupont":      "🕵️ Événement Dupont",
+    "marche_noir": "🌙 Événement Marché Noir",
+}
+
+
+def start_voice_activity(text_channel, voice_channel):
+    """Vocal occupé : arme le prochain événement automatique s'il ne l'est pas."""
+    if scheduler.get(AUTO_EVENT_JOB) is None:
+        plan_auto_event(text_channel, voice_channel)
+
+
+# ── Planification de l'événement ─────────────────────────────────────────
+def plan_auto_event(text_channel, voice_channel):
     global next_event_time, next_event_name
 
-    text_channel  = bot.get_channel(TEXT_CHANNEL_ID)
-    voice_channel = bot.get_channel(VOICE_CHANNEL_ID)
+    EVENT_INTERVAL = random.randint(20, 25) * 60
 
-    if text_channel is None:
-        print(f"[ERREUR] Salon texte introuvable (id={TEXT_CHANNEL_ID}).")
-        return
-    if voice_channel is None:
-        print(f"[ERREUR] Salon vocal introuvable (id={VOICE_CHANNEL_ID}).")
-        return
+    # Ajoute marche_noir aux choix seulement s'il est disponible
+    if is_marche_noir_available():
+        available_events = ["marche_noir", "spawn", "dupont", "devine", "spawn"]
+    else:
+        available_events = ["spawn", "dupont", "devine", "spawn"]
+    chosen = random.choice(available_events)
 
-    while not bot.is_closed():
-        EVENT_INTERVAL = random.randint(20, 25) * 60
+    next_event_name = AUTO_EVENT_NAMES[chosen]
+    next_event_time = datetime.now(TIMEZONE) + timedelta(seconds=EVENT_INTERVAL)
 
-        # ── Personne dans le vocal ────────────────────────────────────────
-        if len(voice_channel.members) == 0:
-            next_event_time = None
-            next_event_name = None
-            chenil_xp_counters.clear()   # reset des compteurs si vocal vide
-            await asyncio.sleep(60)
-            continue
+    print(
+        f"[AUTO] {presence.count(voice_channel.id)} joueur(s) dans le vocal — "
+        f"Prochain événement : {next_event_name} "
+        f"— dans {EVENT_INTERVAL // 60} min "
+        f"(à {next_event_time.strftime('%H:%M:%S')})"
+    )
+    scheduler.call_later(EVENT_INTERVAL, run_auto_event, chosen, text_channel, voice_channel, name=AUTO_EVENT_JOB)
 
-        # ── Tick chenil (1 check par minute) ────────────────────────────
-        members_humans = [m for m in voice_channel.members if not m.bot]
-        await tick_chenil_xp(members_humans, chenil_xp_counters)
 
-        # ── Planification de l'événement ─────────────────────────────────
-        # Ajoute marche_noir aux choix seulement s'il est disponible
-        if is_marche_noir_available():
-            available_events = ["marche_noir", "spawn", "dupont", "devine", "spawn"]
-        else:
-            available_events = ["spawn", "dupont", "devine", "spawn"]
-        chosen = random.choice(available_events)
+async def run_auto_event(chosen, text_channel, voice_channel):
+    global next_event_time, next_event_name
 
+    # ── Vérif finale avant lancement ─────────────────────────────────
+    if presence.count(voice_channel.id) == 0:
+        next_event_time = None
+        next_event_name = None
+        print(f"[AUTO] Plus personne dans le vocal, événement annulé.")
+        return   # replanifié à l'arrivée d'un joueur (on_voice_presence)
+
+    print(f"[AUTO] Lancement de : {next_event_name} ({presence.count(voice_channel.id)} joueur(s) présent(s))")
+    # Exécution protégée de l'événement : timeout et gestion des erreurs
+    try:
         if chosen == "quiz":
-            next_event_name = "🧠 Quiz Pokémon"
+            await asyncio.wait_for(bot.run_quiz(text_channel), timeout=EVENT_TIMEOUT)
         elif chosen == "devine":
-            next_event_name = "🔍 Devine le Pokémon"
+            await asyncio.wait_for(bot.run_devine(text_channel), timeout=EVENT_TIMEOUT)
         elif chosen == "spawn":
-            next_event_name = "✨ Spawn Pokémon"
+            await asyncio.wait_for(spawn_pokemon(text_channel), timeout=EVENT_TIMEOUT)
         elif chosen == "dupont":
-            next_event_name = "🕵️ Événement Dupont"
+            await asyncio.wait_for(run_interaction_personnage(text_channel, riche_or_not), timeout=EVENT_TIMEOUT)
         elif chosen == "marche_noir":
-            next_event_name = "🌙 Événement Marché Noir"
-
-        next_event_time = datetime.now(TIMEZONE) + timedelta(seconds=EVENT_INTERVAL)
-
-        print(
-            f"[AUTO] {len(voice_channel.members)} joueur(s) dans le vocal — "
-            f"Prochain événement : {next_event_name} "
-            f"— dans {EVENT_INTERVAL // 60} min "
-            f"(à {next_event_time.strftime('%H:%M:%S')})"
-        )
-
-        # ── Attente minute par minute (chenil tick toutes les 60 s) ──────
-        elapsed = 0
-        while elapsed < EVENT_INTERVAL:
-            await asyncio.sleep(60)
-            elapsed += 60
-
-            members_humans = [m for m in voice_channel.members if not m.bot]
-            if members_humans:
-                await tick_chenil_xp(members_humans, chenil_xp_counters)
-            else:
-                chenil_xp_counters.clear()
-
-        # ── Vérif finale avant lancement ─────────────────────────────────
-        if len(voice_channel.members) == 0:
-            next_event_time = None
-            next_event_name = None
-            print(f"[AUTO] Plus personne dans le vocal, événement annulé.")
-            await asyncio.sleep(60)
-            continue
+            await asyncio.wait_for(run_marche_noir(text_channel), timeout=EVENT_TIMEOUT)
+    except asyncio.TimeoutError:
+        print(f"[AUTO] L'événement {next_event_name} a dépassé le timeout et a été annulé.")
+    except Exception as e:
+        # Ne pas lever l'exception pour que les événements continuent
+        print(f"[AUTO] Erreur lors de l'événement {next_event_name}: {e}")
 
-        print(f"[AUTO] Lancement de : {next_event_name} ({len(voice_channel.members)} joueur(s) présent(s))")
-        # Exécution protégée de l'événement : timeout et gestion des erreurs
-        EVENT_TIMEOUT = 15 * 60  # durée max d'un événement en secondes
-        try:
-            if chosen == "quiz":
-                await asyncio.wait_for(bot.run_quiz(text_channel), timeout=EVENT_TIMEOUT)
-            elif chosen == "devine":
-                await asyncio.wait_for(bot.run_devine(text_channel), timeout=EVENT_TIMEOUT)
-            elif chosen == "spawn":
-                await asyncio.wait_for(spawn_pokemon(text_channel), timeout=EVENT_TIMEOUT)
-            elif chosen == "dupont":
-                await asyncio.wait_for(run_interaction_personnage(text_channel, riche_or_not), timeout=EVENT_TIMEOUT)
-            elif chosen == "marche_noir":
-                await asyncio.wait_for(run_marche_noir(text_channel), timeout=EVENT_TIMEOUT)
-        except asyncio.TimeoutError:
-            print(f"[AUTO] L'événement {next_event_name} a dépassé le timeout et a été annulé.")
-        except Exception as e:
-            print(f"[AUTO] Erreur lors de l'événement {next_event_name}: {e}")
-            # Ne pas lever l'exception pour que la boucle continue
-            await asyncio.sleep(5)
-            continue
+    if presence.count(voice_channel.id) == 0:
+        next_event_time = None
+        next_event_name = None
+    else:
+        plan_auto_event(text_channel, voice_channel)
 
 
 
@@ -1463,7 +1153,7 @@ setup_marche_noir(bot)
 @bot.command()
 async def police(ctx):
     global riche_or_not
-    preuves = get_preuves(ctx.author.id)
+    preuves = await run_db(get_preuves, ctx.author.id)
     nombre_preuves = len(preuves)
     
     if nombre_preuves >= 3:
@@ -1503,12 +1193,12 @@ async def police(ctx):
 async def timeevent(ctx):
     global next_event_time, next_event_name
 
-    if next_event_time is None or next_event_name is None:
+    job = scheduler.get(AUTO_EVENT_JOB)
+    if job is None or next_event_time is None or next_event_name is None:
         await ctx.send("⏸️ Aucun événement prévu — le vocal est vide.")
         return
 
-    remaining = next_event_time - datetime.now()
-    total_seconds = int(remaining.total_seconds())
+    total_seconds = int(job.remaining())
 
     if total_seconds <= 0:
         await ctx.send("⚡ Un événement est sur le point de se lancer !")
@@ -1523,4 +1213,10 @@ async def timeevent(ctx):
         f"(à {next_event_time.strftime('%H:%M:%S')})"
     )
 
+# Workers de rendu forkés avant que le bot ne démarre ses threads
+start_render_service()
+
+# Aucun DDL au démarrage : on signale seulement les migrations en attente
+check_schema()
+
 bot.run(TOKEN)
\ No newline at end of file
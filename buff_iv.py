@@ -1,7 +1,7 @@
 # buff_iv.py
 import discord
 from discord.ui import View, Button
-from new_db import increase_pokemon_iv
+from async_db import increase_pokemon_iv
 
 # Mapping extra → clé de stat
 EXTRA_TO_STAT = {
@@ -65,7 +65,7 @@ class BuffPokemonButton(Button):
     async def callback(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
 
-        success = increase_pokemon_iv(
+        success = await increase_pokemon_iv(
             self.user_id,
             self.pokemon_name,
             self.iv_increase,
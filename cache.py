@@ -0,0 +1,362 @@
+"""Cache d'octets borné (LRU + TTL) avec un étage disque optionnel.
+
+Remplace les dicts de module jamais vidés (mosaïques PNG du pokédex, des
+badges…) : chaque cache a un budget en octets, évince les entrées les moins
+récemment utilisées, expire après `ttl` secondes et compte ses hits, misses
+et évictions.
+
+Avec `spill_dir`, une entrée évincée de la mémoire est écrite sur disque
+(budget `disk_max_bytes`, évincé par ancienneté) au lieu d'être perdue, et
+`flush()` (appelé à l'arrêt du bot) y recopie le contenu mémoire : le cache
+survit aux redémarrages. Une entrée débordée quitte le disque quand elle
+remonte en mémoire ; une entrée écrite par `put_disk` (pré-calculs) y reste,
+elle n'est donc pas perdue si le bot s'arrête sans flush.
+
+Chaque entrée porte une empreinte (`fingerprint`) des données qui l'ont
+produite : une lecture avec une autre empreinte est un miss.
+
+    MOSAIC_CACHE = ByteLRUCache("pokedex", max_bytes=32 * MB, ttl=24 * 3600, spill_dir=...)
+    png = MOSAIC_CACHE.get(user_id, fingerprint=pokemons)
+    MOSAIC_CACHE.put(user_id, png, fingerprint=pokemons)
+
+    !cache_stats → commande admin (tous les caches enregistrés, sprites, assets)
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from utils import is_croco
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(script_dir, "images", "cache")
+
+MB = 1024 * 1024
+
+_registry: "OrderedDict[str, ByteLRUCache]" = OrderedDict()
+
+
+def fingerprint(obj) -> str:
+    """Empreinte stable d'une valeur JSON (liste de noms, ids…)."""
+    raw = json.dumps(obj, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _atomic_write(path: str, data: bytes):
+    """Écrit via un fichier temporaire unique du même dossier (écritures concurrentes sans collision)."""
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class ByteLRUCache:
+    def __init__(self, name: str, max_bytes: int, ttl: float | None = None,
+                 spill_dir: str | None = None, disk_max_bytes: int = 256 * MB):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.spill_dir = spill_dir
+        self.disk_max_bytes = disk_max_bytes
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()   # clé → (octets, empreinte, expire_at)
+        self._bytes = 0
+        self._disk: "OrderedDict[str, int] | None" = None          # fichier → taille (plus ancien d'abord)
+        self._disk_bytes = 0
+        self._lock = threading.RLock()   # invalidations depuis les threads de la base
+
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0,
+                      "expired": 0, "spilled": 0, "disk_evictions": 0}
+        _registry[name] = self
+
+    # ── Mémoire ──────────────────────────────────────────────────────────────
+    def get(self, key, fingerprint=None) -> bytes | None:
+        """Octets en cache pour `key`, None si absent, expiré ou d'une autre empreinte."""
+        key = str(key)
+        wanted = _digest(fingerprint)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                data, digest, expires_at = entry
+                if expires_at is not None and expires_at < time.time():
+                    self._drop(key)
+                    self.stats["expired"] += 1
+                elif digest != wanted:
+                    self.stats["misses"] += 1
+                    return None
+                else:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return data
+
+            data = self._disk_get(key, wanted)
+            if data is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["disk_hits"] += 1
+            self._insert(key, data, wanted)
+            return data
+
+    def put(self, key, data: bytes, fingerprint=None):
+        key = str(key)
+        with self._lock:
+            self._drop(key)
+            self._disk_remove(key)
+            if len(data) > self.max_bytes:
+                return   # plus gros que tout le budget : pas mis en cache
+            self._insert(key, data, _digest(fingerprint))
+
+    def contains(self, key, fingerprint=None) -> bool:
+        """True si `key` est en cache (mémoire ou disque) avec cette empreinte, sans le charger."""
+        key = str(key)
+        wanted = _digest(fingerprint)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                _, digest, expires_at = entry
+                if expires_at is None or expires_at >= time.time():
+                    return digest == wanted
+            meta = self._disk_header(key)
+            return (meta is not None and meta.get("fingerprint") == wanted
+                    and (meta.get("expires_at") is None or meta["expires_at"] >= time.time()))
+
+    def put_disk(self, key, data: bytes, fingerprint=None, evict: bool = True) -> bool:
+        """Écrit directement sur disque, sans passer par la mémoire (pré-calculs en masse).
+
+        evict=False : refuse (False) plutôt que d'évincer d'autres entrées du disque.
+        """
+        key = str(key)
+        if not self.spill_dir:
+            return False
+        with self._lock:
+            self._drop(key)
+            self._disk_remove(key)
+            self._disk_index()
+            if not evict and self._disk_bytes + len(data) > self.disk_max_bytes:
+                return False
+            expires_at = time.time() + self.ttl if self.ttl else None
+            spilled = self.stats["spilled"]
+            self._spill(key, data, _digest(fingerprint), expires_at, keep=True)
+            return self.stats["spilled"] > spilled
+
+    def invalidate(self, key) -> bool:
+        """Supprime `key` (mémoire et disque). True si une entrée existait."""
+        key = str(key)
+        with self._lock:
+            found = self._drop(key)
+            return self._disk_remove(key) or found
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+            for filename in list(self._disk_index()):
+                self._disk_unlink(filename)
+
+    def _insert(self, key, data, digest):
+        expires_at = time.time() + self.ttl if self.ttl else None
+        self._entries[key] = (data, digest, expires_at)
+        self._bytes += len(data)
+        while self._bytes > self.max_bytes and self._entries:
+            old_key, (old_data, old_digest, old_expires) = self._entries.popitem(last=False)
+            self._bytes -= len(old_data)
+            self.stats["evictions"] += 1
+            self._spill(old_key, old_data, old_digest, old_expires)
+
+    def _drop(self, key) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= len(entry[0])
+        return True
+
+    # ── Disque ───────────────────────────────────────────────────────────────
+    def _disk_path(self, key) -> str:
+        return os.path.join(self.spill_dir, hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+    def _disk_index(self) -> "OrderedDict[str, int]":
+        """Index des fichiers du disque, construit au premier accès (scan du dossier)."""
+        if self._disk is None:
+            self._disk = OrderedDict()
+            if self.spill_dir and os.path.isdir(self.spill_dir):
+                files = []
+                for filename in os.listdir(self.spill_dir):
+                    if filename.endswith(".tmp"):
+                        continue
+                    st = os.stat(os.path.join(self.spill_dir, filename))
+                    files.append((st.st_mtime, filename, st.st_size))
+                for _, filename, size in sorted(files):
+                    self._disk[filename] = size
+                    self._disk_bytes += size
+        return self._disk
+
+    def _spill(self, key, data, digest, expires_at, keep: bool = False):
+        """Écrit l'entrée sur disque. keep : gardée sur disque quand elle remonte en mémoire."""
+        if not self.spill_dir or (expires_at is not None and expires_at < time.time()):
+            return
+        path = self._disk_path(key)
+        index = self._disk_index()
+        if os.path.basename(path) in index:
+            return   # copie gardée par put_disk (un put() l'aurait supprimée) : déjà à jour
+        header = json.dumps({"key": key, "fingerprint": digest, "expires_at": expires_at,
+                             "keep": keep}).encode("utf-8")
+        blob = header + b"\n" + data
+        if len(blob) > self.disk_max_bytes:
+            return
+        try:
+            _atomic_write(path, blob)
+        except OSError as e:
+            print(f"[CACHE] {self.name} : écriture disque impossible ({e})")
+            return
+        filename = os.path.basename(path)
+        index[filename] = len(blob)
+        self._disk_bytes += len(blob)
+        self.stats["spilled"] += 1
+        while self._disk_bytes > self.disk_max_bytes and index:
+            self._disk_unlink(next(iter(index)))
+            self.stats["disk_evictions"] += 1
+
+    def _disk_header(self, key) -> dict | None:
+        if not self.spill_dir:
+            return None
+        filename = os.path.basename(self._disk_path(key))
+        if filename not in self._disk_index():
+            return None
+        try:
+            with open(os.path.join(self.spill_dir, filename), "rb") as f:
+                meta = json.loads(f.readline())
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get("key") == key else None
+
+    def _disk_get(self, key, digest) -> bytes | None:
+        if not self.spill_dir:
+            return None
+        filename = os.path.basename(self._disk_path(key))
+        if filename not in self._disk_index():
+            return None
+        try:
+            with open(os.path.join(self.spill_dir, filename), "rb") as f:
+                header, data = f.read().split(b"\n", 1)
+            meta = json.loads(header)
+        except (OSError, ValueError):
+            self._disk_unlink(filename)
+            return None
+        if meta.get("key") != key or meta.get("fingerprint") != digest:
+            self._disk_unlink(filename)
+            return None
+        if meta.get("expires_at") is not None and meta["expires_at"] < time.time():
+            self._disk_unlink(filename)
+            self.stats["expired"] += 1
+            return None
+        # Remonte en mémoire : un fichier débordé n'est plus nécessaire, un pré-calcul reste
+        if not meta.get("keep"):
+            self._disk_unlink(filename)
+        return data
+
+    def _disk_remove(self, key) -> bool:
+        if not self.spill_dir:
+            return False
+        filename = os.path.basename(self._disk_path(key))
+        if filename not in self._disk_index():
+            return False
+        self._disk_unlink(filename)
+        return True
+
+    def _disk_unlink(self, filename):
+        size = self._disk_index().pop(filename, 0)
+        self._disk_bytes -= size
+        try:
+            os.remove(os.path.join(self.spill_dir, filename))
+        except FileNotFoundError:
+            pass
+
+    def flush(self):
+        """Recopie les entrées mémoire sur disque (arrêt du bot)."""
+        if not self.spill_dir:
+            return
+        with self._lock:
+            for key, (data, digest, expires_at) in self._entries.items():
+                self._spill(key, data, digest, expires_at)
+
+    # ── Statistiques ─────────────────────────────────────────────────────────
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            return {
+                "name":       self.name,
+                "entries":    len(self._entries),
+                "bytes":      self._bytes,
+                "max_bytes":  self.max_bytes,
+                "disk_entries": len(self._disk) if self._disk is not None else None,
+                "disk_bytes": self._disk_bytes if self._disk is not None else None,
+                "hit_rate":   (self.stats["hits"] + self.stats["disk_hits"]) / lookups if lookups else 0.0,
+                **self.stats,
+            }
+
+
+def _digest(value) -> str | None:
+    return None if value is None else fingerprint(value)
+
+
+def all_caches() -> list:
+    return list(_registry.values())
+
+
+def flush_all():
+    for cache in _registry.values():
+        try:
+            cache.flush()
+        except Exception as e:
+            print(f"[CACHE] Flush de {cache.name} impossible : {e}")
+
+
+# ───────────────────────────────────────────────────────────────
+# 🛠️ Commande admin
+# ───────────────────────────────────────────────────────────────
+def _fmt_bytes(n) -> str:
+    if n is None:
+        return "—"
+    return f"{n / MB:.1f} Mo" if n >= MB else f"{n / 1024:.0f} Ko"
+
+
+def setup_cache_commands(bot):
+
+    @bot.command(name="cache_stats")
+    @is_croco()
+    async def cache_stats(ctx):
+        lines = ["📦 **Caches**"]
+        for cache in all_caches():
+            s = cache.snapshot()
+            lines.append(
+                f"**{s['name']}** : {s['entries']} entrées, {_fmt_bytes(s['bytes'])} / {_fmt_bytes(s['max_bytes'])}"
+                f" | disque {_fmt_bytes(s['disk_bytes'])}\n"
+                f"  hits {s['hits']} (+{s['disk_hits']} disque) · misses {s['misses']} · "
+                f"taux {s['hit_rate']:.0%} · évictions {s['evictions']} · expirées {s['expired']}"
+            )
+
+        from sprites import stats as sprite_stats
+        lines.append(
+            "**sprites** : " + " · ".join(f"{k} {v}" for k, v in sprite_stats.items())
+        )
+
+        from assets import memory_report
+        a = memory_report()
+        lines.append(
+            f"**assets** : {a['images']} images, {_fmt_bytes(a['bytes'])} / {_fmt_bytes(a['max_bytes'])}, "
+            f"{a['fonts']} polices · hits {a['hits']} · chargements {a['loads']} · évictions {a['evictions']}\n"
+            + "\n".join(f"  {name} {w}×{h} : {_fmt_bytes(n)}" for name, (w, h), n in a["largest"])
+        )
+        await ctx.send("\n".join(lines)[:2000])
@@ -2,7 +2,7 @@
 import discord
 from discord.ui import View, Button
 import random
-from money_db import get_balance, add_money, remove_money
+from async_db import get_balance, add_money, remove_money
 
 class CardColorGame(View):
     def __init__(self, user_id, bet_amount=10, win_amount=100):
@@ -55,9 +55,9 @@ class CardColorGame(View):
         
         # Première partie : vérifier le solde et retirer la mise
         if not self.game_started:
-            current_balance = get_balance(self.user_id)
-            
-            if current_balance < self.bet_amount:
+            # Retire la mise (refusé par la base si le solde est insuffisant)
+            if not await remove_money(self.user_id, self.bet_amount, reason="casino_mise"):
+                current_balance = await get_balance(self.user_id)
                 embed = discord.Embed(
                     title="❌ Solde insuffisant",
                     description=f"Vous avez besoin de **{self.bet_amount} 💰🐊** pour jouer.\n"
@@ -70,9 +70,6 @@ class CardColorGame(View):
                 
                 await interaction.response.edit_message(embed=embed, view=self)
                 return
-            
-            # Retire la mise
-            remove_money(self.user_id, self.bet_amount)
             self.game_started = True
         
         # Tire une carte au hasard
@@ -88,8 +85,8 @@ class CardColorGame(View):
             # Vérifie s'il a gagné la partie complète
             if self.correct_guesses >= self.target_guesses:
                 # VICTOIRE TOTALE
-                add_money(self.user_id, self.win_amount)
-                new_balance = get_balance(self.user_id)
+                await add_money(self.user_id, self.win_amount, reason="casino_gain")
+                new_balance = await get_balance(self.user_id)
                 
                 embed = discord.Embed(
                     title="🎉🎉 JACKPOT ! 🎉🎉",
@@ -125,8 +122,8 @@ class CardColorGame(View):
             # DÉFAITE - mais on rembourse si 2 bonnes réponses
             if self.correct_guesses >= 2:
                 # Remboursement de la mise
-                add_money(self.user_id, self.bet_amount)
-                new_balance = get_balance(self.user_id)
+                await add_money(self.user_id, self.bet_amount, reason="casino_remboursement")
+                new_balance = await get_balance(self.user_id)
                 
                 embed = discord.Embed(
                     title="😅 Presque gagné !",
@@ -143,7 +140,7 @@ class CardColorGame(View):
                 )
             else:
                 # Perte totale
-                new_balance = get_balance(self.user_id)
+                new_balance = await get_balance(self.user_id)
                 
                 embed = discord.Embed(
                     title="💔 Perdu !",
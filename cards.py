@@ -0,0 +1,523 @@
+"""Rendus PIL des cartes du bot, en fonctions pures.
+
+Chaque carte est décrite par un job (dataclass) qui ne contient que des
+données simples — textes, nombres, chemins d'images sur disque — et
+render_job(job) retourne les octets encodés selon la politique du type de
+job (encoding.py : WebP ou PNG). Aucun accès réseau, base ou
+discord ici : les images sont récupérées en amont (sprites.fetch_sprite_path,
+fetch_sprite_variant_path) et un job peut donc partir dans un processus du
+pool de render_service.
+
+    SpawnCardJob    → fond du type + sprite 392 px (apparition)
+    PokedexCardJob  → fiche détaillée d'un Pokémon (pokedex / new_pokedex)
+    ItemCardJob     → fiche d'objet (boutique, marché noir, receleur, inventaire)
+    MosaicJob       → grille de tuiles (pokédex, badges)
+"""
+import os
+from dataclasses import dataclass
+from io import BytesIO
+from typing import ClassVar
+
+from PIL import Image, ImageDraw
+
+import assets
+import encoding
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+images_dir = os.path.join(script_dir, "images")
+DEFAULT_IMAGE = os.path.join(images_dir, "default.png")
+
+
+# ───────────────────────────────────────────────────────────────
+# 🧰 Utilitaires
+# ───────────────────────────────────────────────────────────────
+def _font(size: int):
+    return assets.font(size)
+
+
+def _open(path: str) -> Image.Image:
+    with Image.open(path) as img:
+        return img.convert("RGBA")
+
+
+def _open_or_none(path: str | None) -> Image.Image | None:
+    if not path:
+        return None
+    try:
+        return _open(path)
+    except Exception:
+        return None
+
+
+def _asset_or_none(path: str | None, size: tuple | None = None, **kwargs) -> Image.Image | None:
+    """Image fixe du registre (partagée : à ne pas modifier)."""
+    if not path:
+        return None
+    try:
+        return assets.image(path, size, **kwargs)
+    except Exception:
+        return None
+
+
+def _background(path: str | None, size: tuple, fallbacks: tuple, color: tuple, tag: str) -> Image.Image:
+    """Premier fond lisible parmi `path` puis `fallbacks`, redimensionné ; sinon fond uni."""
+    for i, candidate in enumerate((path, *fallbacks)):
+        if not candidate:
+            continue
+        try:
+            return assets.canvas(candidate, size)
+        except Exception as e:
+            print(f"[{tag}] Fond {'téléchargé' if i == 0 else 'local'} illisible : {e}")
+    return Image.new("RGBA", size, color)
+
+
+def _keep_aspect(img: Image.Image, max_size: int) -> Image.Image:
+    w, h = img.size
+    ratio = min(max_size / w, max_size / h)
+    return img.resize((int(w * ratio), int(h * ratio)), Image.Resampling.LANCZOS)
+
+
+def wrap_estimate(text: str, max_width: int) -> list[str]:
+    """Découpe en lignes d'après une largeur estimée (10 px par caractère)."""
+    words, lines, current_line = text.split(), [], ""
+    for word in words:
+        test = current_line + word + " "
+        if len(test) * 10 < max_width:
+            current_line = test
+        else:
+            if current_line:
+                lines.append(current_line.strip())
+            current_line = word + " "
+    if current_line:
+        lines.append(current_line.strip())
+    return lines
+
+
+def draw_multiline_text(draw, text, position, font, max_width, fill=(0, 0, 0)):
+    """Texte découpé d'après la largeur réelle des mots dans la police."""
+    words = text.split()
+    lines = []
+    current_line = ""
+    for word in words:
+        test_line = current_line + " " + word if current_line else word
+        bbox = font.getbbox(test_line)
+        w = bbox[2] - bbox[0]
+        if w <= max_width:
+            current_line = test_line
+        else:
+            lines.append(current_line)
+            current_line = word
+    if current_line:
+        lines.append(current_line)
+
+    x, y = position
+    line_height = font.getbbox("A")[3] - font.getbbox("A")[1] + 10
+    for line in lines:
+        draw.text((x, y), line, font=font, fill=fill)
+        y += line_height
+
+
+# ───────────────────────────────────────────────────────────────
+# 🌿 Apparition
+# ───────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class SpawnCardJob:
+    kind: ClassVar[str] = "spawn"
+    background_path: str
+    sprite_path: str
+
+
+def render_spawn_card(job: SpawnCardJob) -> bytes:
+    composed = assets.canvas(job.background_path)
+    sprite = _open(job.sprite_path)
+    x = (composed.width - sprite.width) // 2
+    y = (composed.height - sprite.height) // 2
+    composed.paste(sprite, (x, y), sprite)
+    return encoding.encode(composed, job.kind)
+
+
+# ───────────────────────────────────────────────────────────────
+# 📘 Fiche Pokémon
+# ───────────────────────────────────────────────────────────────
+STAT_KEYS = ("hp", "attack", "defense", "special_attack", "special_defense", "speed")
+
+POKEDEX_LAYOUTS = {
+    # !ex_pokedex (pokedex.py)
+    "pokedex": {
+        "background":  "fond_pokedex.png",
+        "name":        (90, 70),
+        "ivs":         (90, 270),
+        "stats":       (90, 420),
+        "sprite":      (520, 40),
+        "attacks":     (535, 340),
+        "xp":          None,
+        "type_icon":   70,
+        "sprite_size": 250,
+        "attack_icon": 80,
+        "attacks_gap": 40,
+        "attack_step": 40,
+        "ivs_lines": (
+            "PV : {hp}",
+            "Atk : {attack} | AtkSpé : {special_attack}",
+            "Def : {defense} | DefSpé : {special_defense} | Vit : {speed}",
+        ),
+        "stats_lines": (
+            "PV : {hp}",
+            "Atk : {attack} | AtkSpé : {special_attack}",
+            "Def : {defense} | DefSpé : {special_defense}",
+            "Vit : {speed}",
+        ),
+    },
+    # !pokedex (new_pokedex.py)
+    "new_pokedex": {
+        "background":  "fond_pokedex_3.png",
+        "name":        (75, 140),
+        "ivs":         (75, 275),
+        "stats":       (80, 385),
+        "sprite":      (550, 165),
+        "attacks":     (590, 365),
+        "xp":          (450, 365),
+        "type_icon":   70,
+        "sprite_size": 150,
+        "attack_icon": 50,
+        "attacks_gap": 30,
+        "attack_step": 20,
+        "ivs_lines": (
+            "PV : {hp}  Atk : {attack}   AtkSpé : {special_attack}",
+            "Def : {defense}   DefSpé : {special_defense}   Vit : {speed}",
+        ),
+        "stats_lines": (
+            "PV : {hp}  Atk : {attack}   AtkSpé : {special_attack}",
+            "Def : {defense}   DefSpé : {special_defense}   Vit : {speed}",
+        ),
+    },
+}
+
+
+@dataclass(frozen=True)
+class PokedexCardJob:
+    kind: ClassVar[str] = "pokedex_card"
+    layout: str
+    title: str
+    types: tuple = ()            # ((type, chemin de l'icône ou None), …)
+    ivs: dict | None = None
+    stats: dict | None = None
+    current_xp: int = 0
+    xp_evo: int = 0
+    sprite_path: str | None = None
+    attacks: tuple = ()          # ((attaque, chemin de l'icône ou None), …)
+
+
+def _stat_values(values: dict | None) -> dict:
+    values = values or {}
+    return {key: values.get(key, "?") for key in STAT_KEYS}
+
+
+def render_pokedex_card(job: PokedexCardJob) -> bytes:
+    layout = POKEDEX_LAYOUTS[job.layout]
+    width, height = 850, 600
+    image = _background(None, (width, height), (os.path.join(images_dir, layout["background"]),),
+                        (245, 245, 245, 255), "POKEDEX")
+    draw = ImageDraw.Draw(image)
+    font, font_bold = _font(15), _font(20)
+
+    # --- Nom + Types ---
+    x, y = layout["name"]
+    draw.text((x, y), job.title, font=font_bold, fill="black")
+    y += 30
+    for type_name, icon_path in job.types:
+        icon = _open_or_none(icon_path)
+        if icon is not None:
+            image.paste(icon, (x, y), icon)
+            draw.text((x + icon.width + 5, y), type_name.capitalize(), font=font_bold, fill="black")
+            y += icon.height + 5
+        else:
+            draw.text((x, y), type_name.capitalize(), font=font, fill="black")
+            y += 20
+
+    # --- IVs ---
+    x, y = layout["ivs"]
+    draw.text((x, y), "IVs :", font=font_bold, fill="black")
+    y += 25
+    ivs = _stat_values(job.ivs)
+    for line in layout["ivs_lines"]:
+        draw.text((x, y), line.format(**ivs), font=font, fill="black")
+        y += 25
+
+    # --- XP ---
+    if layout["xp"] is not None:
+        xp_x, xp_y = layout["xp"]
+        if job.xp_evo == -1:
+            draw.text((xp_x, xp_y),      "XP actuel :", font=font_bold, fill="black")
+            draw.text((xp_x, xp_y + 25), "Pas d'évo",   font=font,      fill="black")
+        elif job.xp_evo > 0:
+            draw.text((xp_x, xp_y),      "XP actuel :",                      font=font_bold, fill="black")
+            draw.text((xp_x, xp_y + 25), f"{job.current_xp} / {job.xp_evo}", font=font,      fill="black")
+        else:
+            draw.text((xp_x, xp_y),      "Pas d'évo", font=font_bold, fill="black")
+
+    # --- Stats ---
+    x, y = layout["stats"]
+    draw.text((x, y), "Stats :", font=font_bold, fill="black")
+    y += 30
+    stats = _stat_values(job.stats)
+    for line in layout["stats_lines"]:
+        draw.text((x, y), line.format(**stats), font=font, fill="black")
+        y += 25
+
+    # --- Sprite ---
+    sprite = _open_or_none(job.sprite_path)
+    if sprite is not None:
+        image.paste(sprite, layout["sprite"], sprite)
+
+    # --- Attaques ---
+    x, y = layout["attacks"]
+    draw.text((x, y), "Attaques :", font=font_bold, fill="black")
+    y += layout["attacks_gap"]
+    for atk_name, icon_path in job.attacks:
+        icon = _open_or_none(icon_path)
+        if icon is not None:
+            image.paste(icon, (x, y), icon)
+            draw.text((x + icon.width + 8, y), atk_name, font=font, fill="black")
+        else:
+            draw.text((x, y), atk_name, font=font, fill="black")
+        y += layout["attack_step"]
+
+    return encoding.encode(image, job.kind)
+
+
+# ───────────────────────────────────────────────────────────────
+# 🛒 Fiche objet
+# ───────────────────────────────────────────────────────────────
+RARITY_COLORS = {
+    "common":    (200, 200, 200),
+    "uncommon":  (50, 205, 50),
+    "rare":      (30, 144, 255),
+    "epic":      (138, 43, 226),
+    "legendary": (255, 215, 0),
+}
+
+ITEM_THEMES = {
+    "shop": {
+        "tag":        "SHOP",
+        "background": os.path.join(images_dir, "shop_item.png"),
+        "color":      (245, 245, 245, 255),
+        "ink":        "black",
+        "balance_ok": (34, 139, 34),
+    },
+    "marche_noir": {
+        "tag":        "MARCHE NOIR",
+        "background": os.path.join(images_dir, "marche_noir", "marche_noir.png"),
+        "color":      (20, 20, 20, 255),
+        "ink":        "white",
+        "balance_ok": (50, 205, 50),
+    },
+    "receleur": {
+        "tag":        "RECELEUR",
+        "background": os.path.join(images_dir, "receleur", "receleur.png"),
+        "color":      (30, 20, 10, 255),
+        "ink":        "white",
+        "balance_ok": (50, 205, 50),
+    },
+    "inventory": {
+        "tag":        "INVENTAIRE",
+        "background": os.path.join(images_dir, "image_item.png"),
+        "color":      (245, 245, 245, 255),
+        "ink":        "black",
+    },
+}
+
+
+@dataclass(frozen=True)
+class ItemCardJob:
+    kind: ClassVar[str] = "item_card"
+    theme: str
+    name: str
+    rarity: str = "common"
+    description: str = "Aucune description."
+    quantity: int | None = None
+    price: int | None = None             # prix d'achat, ou de rachat pour le receleur
+    balance: int | None = None
+    background_path: str | None = None   # fond téléchargé (images.json), sinon celui du thème
+    image_path: str | None = None
+    fallback_image_path: str | None = None
+
+
+def rarity_color(rarity: str) -> tuple:
+    return RARITY_COLORS.get((rarity or "common").lower(), (200, 200, 200))
+
+
+def _item_rows(job: ItemCardJob, theme: dict) -> tuple[list, tuple]:
+    """Lignes (y, texte, couleur) sous l'image, puis (y, interligne titre, lignes max, interligne) de la description."""
+    rarity = job.rarity.lower().capitalize()
+    balance_ok = theme["balance_ok"]
+    if job.theme == "receleur":
+        rows = [
+            (320, f"Rareté : {rarity}",                            theme["ink"]),
+            (360, f"Quantité possédée : {job.quantity}",           theme["ink"]),
+            (400, f"Rachat : {job.price:,} Croco dollars",         (255, 215, 0)),
+            (440, f"Votre solde : {job.balance:,} Croco dollars",  balance_ok),
+        ]
+        return rows, (480, 28, 3, 24)
+
+    balance_color = balance_ok if job.balance >= job.price else (255, 69, 0)
+    rows = [
+        (340, f"Rareté : {rarity}",                            theme["ink"]),
+        (380, f"Prix : {job.price:,} Croco dollars",           theme["ink"]),
+        (420, f"Votre solde : {job.balance:,} Croco dollars",  balance_color),
+    ]
+    return rows, (460, 30, 4, 25)
+
+
+def _render_merchant_card(job: ItemCardJob, theme: dict) -> bytes:
+    width, height = 850, 600
+    background = _background(job.background_path, (width, height), (theme["background"],),
+                             theme["color"], theme["tag"])
+    draw = ImageDraw.Draw(background)
+    font_title, font_normal, font_small = _font(28), _font(18), _font(16)
+    ink = theme["ink"]
+
+    # ── Textes ──────────────────────────────────────────────────────────────
+    draw.text((540, 115), job.name, font=font_title, fill=ink)
+    rows, (y, title_gap, max_lines, step) = _item_rows(job, theme)
+    for row_y, text, fill in rows:
+        draw.text((450, row_y), text, font=font_normal, fill=fill)
+
+    # Description multi-lignes
+    x = 450
+    draw.text((x, y), "Description :", font=font_normal, fill=ink)
+    y += title_gap
+    for line in wrap_estimate(job.description, 350)[:max_lines]:
+        draw.text((x, y), line, font=font_small, fill=ink)
+        y += step
+
+    # ── Image de l'item ─────────────────────────────────────────────────────
+    item_img = _open_or_none(job.image_path)
+    if item_img is not None:
+        item_img = _keep_aspect(item_img, 200)
+        background.paste(item_img, (530 + (200 - item_img.width) // 2, 140), item_img)
+    else:
+        if job.image_path:
+            print(f"[{theme['tag']}] Image de l'item illisible : {job.image_path}")
+        default_img = _asset_or_none(job.fallback_image_path)
+        if default_img is not None:
+            default_img = _keep_aspect(default_img, 150)
+            background.paste(default_img, (530, 140), default_img)
+
+    return encoding.encode(background, job.kind)
+
+
+def _render_inventory_card(job: ItemCardJob, theme: dict) -> bytes:
+    width, height = 600, 400
+    card = _background(job.background_path, (width, height), (theme["background"],),
+                       theme["color"], theme["tag"])
+    draw = ImageDraw.Draw(card)
+    font, font_small = _font(22), _font(18)
+
+    draw.text((70, 130), f"{job.name}", fill="black", font=font)
+    draw.text((70, 180), f"Quantité : {job.quantity}", fill="black", font=font_small)
+    draw_multiline_text(draw, job.description or "Aucune description.", (70, 230), font_small, max_width=240)
+
+    item_img = _open_or_none(job.image_path)
+    if item_img is not None:
+        item_img = item_img.resize((100, 100), Image.Resampling.LANCZOS)
+        card.paste(item_img, (385, 120), item_img)
+    elif job.image_path:
+        print(f"[{theme['tag']}] Image de l'item illisible : {job.image_path}")
+
+    return encoding.encode(card, job.kind)
+
+
+def render_item_card(job: ItemCardJob) -> bytes:
+    theme = ITEM_THEMES[job.theme]
+    if job.theme == "inventory":
+        return _render_inventory_card(job, theme)
+    return _render_merchant_card(job, theme)
+
+
+# ───────────────────────────────────────────────────────────────
+# 🧩 Mosaïques
+# ───────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class MosaicJob:
+    """Tuiles `tiles` ((index, chemin), …) recollées sur la grille `base_png`.
+
+    Une tuile illisible est remplacée par `fallback_path`, sinon laissée vide.
+    `masked` : collage avec transparence (badges) plutôt que remplacement de la case.
+    """
+    kind: ClassVar[str] = "mosaic"
+    count: int
+    tiles: tuple
+    base_png: bytes | None = None
+    tile: int = 64
+    cols: int = 5
+    masked: bool = False
+    fallback_path: str | None = None
+    background: tuple = (0, 0, 0, 0)
+
+
+def _tile_image(path: str | None, job: MosaicJob) -> Image.Image:
+    img = _open_or_none(path) or _asset_or_none(job.fallback_path, (job.tile, job.tile), resample=None)
+    if img is None:
+        return Image.new("RGBA", (job.tile, job.tile))
+    if img.size != (job.tile, job.tile):
+        img = img.resize((job.tile, job.tile))
+    return img
+
+
+def render_mosaic(job: MosaicJob) -> bytes:
+    tile, cols = job.tile, job.cols
+    rows = (job.count + cols - 1) // cols
+    size = (cols * tile, max(rows, 1) * tile)
+    canvas = Image.new("RGBA", size, job.background)
+    if job.base_png is not None:
+        old = Image.open(BytesIO(job.base_png)).convert("RGBA")
+        canvas.paste(old.crop((0, 0, size[0], min(old.height, size[1]))), (0, 0))
+        # Cases vidées par un raccourcissement de la liste
+        blank = Image.new("RGBA", (tile, tile))
+        for i in range(job.count, rows * cols):
+            canvas.paste(blank, ((i % cols) * tile, (i // cols) * tile))
+
+    for i, path in job.tiles:
+        img = _tile_image(path, job)
+        x, y = (i % cols) * tile, (i // cols) * tile
+        if job.masked:
+            canvas.paste(img, (x, y), img)
+        else:
+            canvas.paste((0, 0, 0, 0), (x, y, x + tile, y + tile))
+            canvas.paste(img, (x, y))
+
+    return encoding.encode(canvas, job.kind)
+
+
+# ───────────────────────────────────────────────────────────────
+# 🚚 Aiguillage
+# ───────────────────────────────────────────────────────────────
+_RENDERERS = {
+    SpawnCardJob:   render_spawn_card,
+    PokedexCardJob: render_pokedex_card,
+    ItemCardJob:    render_item_card,
+    MosaicJob:      render_mosaic,
+}
+
+
+def render_job(job) -> bytes:
+    """Point d'entrée des workers : job → octets encodés (encoding.encode)."""
+    return _RENDERERS[type(job)](job)
+
+
+def preload_assets() -> dict:
+    """Fonds des fiches et image par défaut, chargés à leur taille d'affichage."""
+    entries = [(os.path.join(images_dir, layout["background"]), (850, 600)) for layout in POKEDEX_LAYOUTS.values()]
+    entries += [(theme["background"], (600, 400) if name == "inventory" else (850, 600))
+                for name, theme in ITEM_THEMES.items()]
+    assets.preload(entries, font_sizes=(15, 16, 18, 20, 22, 28))
+    # Tuile par défaut des mosaïques (filtre de Image.resize par défaut)
+    _asset_or_none(DEFAULT_IMAGE, (64, 64), resample=None)
+    return assets.memory_report()
+
+
+def warmup() -> int:
+    """Démarrage d'un worker : registre déjà hérité du processus principal."""
+    _font(15)
+    return os.getpid()
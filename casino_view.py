@@ -3,7 +3,7 @@ import discord
 from discord.ui import View, Button
 from card_game import CardColorGame
 from slot_machine import SlotMachine
-from money_db import get_balance
+from async_db import get_balance
 from plus_ou_moins import DiceGame
 from roue import WheelButton
 
@@ -28,7 +28,7 @@ class DiceGameButton(Button):
         super().__init__(label="🎲 Jeu de Dés", style=discord.ButtonStyle.danger, emoji="🎲")
 
     async def callback(self, interaction: discord.Interaction):
-        balance = get_balance(interaction.user.id)
+        balance = await get_balance(interaction.user.id)
         view = DiceGame(user_id=interaction.user.id)
         embed = discord.Embed(
             title="🎲 Jeu de Dés",
@@ -52,7 +52,7 @@ class CardGameButton(Button):
     
     async def callback(self, interaction: discord.Interaction):
         # Vérifie le solde du joueur
-        balance = get_balance(interaction.user.id)
+        balance = await get_balance(interaction.user.id)
         
         # Lance le jeu de cartes
         game_view = CardColorGame(user_id=interaction.user.id)
@@ -89,7 +89,7 @@ class SlotMachineButton(Button):
     
     async def callback(self, interaction: discord.Interaction):
         # Vérifie le solde du joueur
-        balance = get_balance(interaction.user.id)
+        balance = await get_balance(interaction.user.id)
         
         # Lance la machine à sous
         slot_view = SlotMachine(user_id=interaction.user.id)
@@ -120,7 +120,7 @@ def setup_casino(bot):
     @bot.command(name="casino")
     async def casino(ctx):
         """Ouvre le menu du casino avec tous les jeux disponibles."""
-        balance = get_balance(ctx.author.id)
+        balance = await get_balance(ctx.author.id)
         
         embed = discord.Embed(
             title="🎰 Bienvenue au Casino ! 🎰",
@@ -0,0 +1,212 @@
+"""Catalogue Pokémon indexé, construit une seule fois au démarrage.
+
+Remplace les parcours linéaires `next(p for p in ...)` par des index
+(dictionnaires) sur le nom normalisé (sans accents, minuscules) :
+
+    catalog.find("Pikachu_shiny2")            → fiche (nom exact, sinon nom sans le numéro final)
+    catalog.find_in_region("Kanto", "pikachu")
+    catalog.shiny_of("Pikachu")               → fiche « Pikachu_shiny »
+    catalog.by_type("feu")                    → fiches de type feu
+    catalog.evolves_into("Raichu")            → fiches qui évoluent en Raichu
+    catalog.region_of("Germignon")            → "Johto"
+    catalog.find_in_file("mega.json", "...")  → fiche d'un fichier précis (chargé une fois)
+
+Les fiches retournées sont les dicts partagés du registre (data_registry) :
+ne pas les modifier. Un fichier de région modifié sur disque reconstruit
+tous les index.
+"""
+import os
+
+from combat.utils import normalize_text
+from data_registry import registry
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+json_dir = os.path.join(script_dir, "json")
+
+# Région → (fichier normal, fichier shiny)
+REGION_FILES = {
+    "Kanto":  ("pokemon_gen1_normal.json", "pokemon_gen1_shiny.json"),
+    "Johto":  ("pokemon_gen2_normal.json", "pokemon_gen2_shiny.json"),
+    "Hoenn":  ("pokemon_gen3_normal.json", "pokemon_gen3_shiny.json"),
+    "Sinnoh": ("pokemon_gen4_normal.json", "pokemon_gen4_shiny.json"),
+    "Unys":   ("pokemon_gen5_normal.json", "pokemon_gen5_shiny.json"),
+}
+# Fichiers indexés en plus des régions pour find() (formes spéciales)
+EXTRA_FILES = ("mega.json",)
+
+SHINY_SUFFIX = "_shiny"
+
+
+def catalog_key(name: str) -> str:
+    """Clé d'index : sans accents, minuscules, sans espaces autour."""
+    return normalize_text(str(name or "")).lower().strip()
+
+
+def base_key(name: str) -> str:
+    """Clé sans le numéro final (pikachu_shiny2 → pikachu_shiny)."""
+    return catalog_key(name).rstrip("0123456789")
+
+
+def _index_entries(entries: list) -> dict:
+    """{clé: fiche} d'un fichier ; la première occurrence l'emporte."""
+    index = {}
+    for p in entries:
+        index.setdefault(catalog_key(p["name"]), p)
+    return index
+
+
+def _entry_keys(entries: list) -> list[str]:
+    """Clé de chaque fiche d'un fichier, dans l'ordre."""
+    return [catalog_key(p["name"]) for p in entries]
+
+
+def _index_shiny_entries(entries: list) -> dict:
+    """{clé sans _shiny: fiche} d'un fichier shiny ; la première occurrence l'emporte."""
+    index = {}
+    for p in entries:
+        index.setdefault(catalog_key(p["name"]).replace(SHINY_SUFFIX, ""), p)
+    return index
+
+
+# Index précalculés dans l'instantané json/snapshot.bin (data_snapshot.py)
+SNAPSHOT_INDEXES = {
+    _entry_keys: [f for files in REGION_FILES.values() for f in files] + list(EXTRA_FILES),
+    _index_entries: [f for files in REGION_FILES.values() for f in files] + list(EXTRA_FILES),
+    _index_shiny_entries: [shiny_file for _, shiny_file in REGION_FILES.values()],
+}
+
+
+class PokemonCatalog:
+    def __init__(self):
+        self.regions: dict[str, tuple] = {}        # région → (normaux, shiny)
+        self._region_index: dict[str, tuple] = {}  # région → ({clé: fiche}, {clé sans _shiny: fiche})
+
+        self.normal: list = []                     # pool global (toutes régions)
+        self.shiny: list = []
+        self._by_name: dict[str, dict] = {}        # normal + shiny + formes spéciales
+        self._normal_by_name: dict[str, dict] = {} # pool global normal uniquement
+        self._shiny_of: dict[str, dict] = {}       # clé du normal → fiche shiny
+        self._shiny_names: set[str] = set()
+        self._by_type: dict[str, list] = {}
+        self._evolves_into: dict[str, list] = {}   # clé de l'évolution → fiches sources
+        self._region_of: dict[str, str] = {}       # clé (normal ou shiny) → région
+
+        self._build()
+        for normal_file, shiny_file in REGION_FILES.values():
+            registry.subscribe(normal_file, self._rebuild)
+            registry.subscribe(shiny_file, self._rebuild)
+        for filename in EXTRA_FILES:
+            registry.subscribe(filename, self._rebuild)
+
+    # ── Fichiers ─────────────────────────────────────────────────────────────
+    def file_entries(self, filename: str) -> list | None:
+        """Fiches d'un fichier json/ (registre partagé : chargé une seule fois). None si absent."""
+        return registry.get(filename, None)
+
+    def find_in_file(self, filename: str, name: str) -> dict | None:
+        if self.file_entries(filename) is None:
+            return None
+        return registry.derived(filename, _index_entries).get(catalog_key(name))
+
+    # ── Construction ─────────────────────────────────────────────────────────
+    def _build(self):
+        """Construit tous les index à part, puis les met en place d'un coup."""
+        def keyed(filename):
+            # (fiche, clé) ; les clés sont précalculées dans l'instantané (SNAPSHOT_INDEXES)
+            return list(zip(self.file_entries(filename) or [], registry.derived(filename, _entry_keys, [])))
+
+        regions, region_index, region_of = {}, {}, {}
+        normal_pool, shiny_pool, shiny_names = [], [], set()
+        normal_keyed, shiny_keyed = [], []
+        for region, (normal_file, shiny_file) in REGION_FILES.items():
+            normal = self.file_entries(normal_file) or []
+            shiny = self.file_entries(shiny_file) or []
+            regions[region] = (normal, shiny)
+            region_index[region] = (
+                registry.derived(normal_file, _index_entries, []),
+                registry.derived(shiny_file, _index_shiny_entries, []),
+            )
+            normal_pool += normal
+            shiny_pool += shiny
+            region_normal, region_shiny = keyed(normal_file), keyed(shiny_file)
+            normal_keyed += region_normal
+            shiny_keyed += region_shiny
+            shiny_names.update(key for _, key in region_shiny)
+            for _, key in region_normal + region_shiny:
+                region_of.setdefault(key, region)
+
+        extras_keyed = [pair for f in EXTRA_FILES for pair in keyed(f)]
+
+        # Premier trouvé prioritaire (même ordre que les anciens `next(...)`)
+        normal_by_name, by_name, shiny_of = {}, {}, {}
+        for p, key in normal_keyed:
+            normal_by_name.setdefault(key, p)
+        for p, key in normal_keyed + shiny_keyed + extras_keyed:
+            by_name.setdefault(key, p)
+            if key.endswith(SHINY_SUFFIX):
+                shiny_of.setdefault(key[: -len(SHINY_SUFFIX)], p)
+
+        by_type, evolves_into, type_keys = {}, {}, {}
+        for p, _ in normal_keyed + extras_keyed:
+            for t in p.get("type") or []:
+                type_key = type_keys.get(t) or type_keys.setdefault(t, catalog_key(t))
+                by_type.setdefault(type_key, []).append(p)
+            evo = p.get("evo") or {}
+            if evo.get("name") and evo.get("name") != "pas evo":
+                evolves_into.setdefault(catalog_key(evo["name"]), []).append(p)
+
+        self.regions, self._region_index, self._region_of = regions, region_index, region_of
+        self._normal_by_name, self._by_name, self._shiny_of = normal_by_name, by_name, shiny_of
+        self._shiny_names, self._by_type, self._evolves_into = shiny_names, by_type, evolves_into
+        # Pools globaux mis à jour sur place : les modules qui les ont reçus au démarrage voient la nouvelle version
+        self.normal[:] = normal_pool
+        self.shiny[:] = shiny_pool
+
+        print(f"[CATALOG] {len(self._by_name)} fiches indexées ({len(self.regions)} régions)")
+
+    def _rebuild(self, _data):
+        self._build()
+
+    # ── Recherche ────────────────────────────────────────────────────────────
+    def get(self, name: str) -> dict | None:
+        """Nom exact (normalisé) uniquement."""
+        return self._by_name.get(catalog_key(name))
+
+    def find(self, name: str) -> dict | None:
+        """Nom exact, sinon nom sans le numéro final (doublons capturés : pikachu2)."""
+        return self._by_name.get(catalog_key(name)) or self._by_name.get(base_key(name))
+
+    def is_shiny(self, name: str) -> bool:
+        return catalog_key(name) in self._shiny_names
+
+    def shiny_of(self, name: str) -> dict | None:
+        return self._shiny_of.get(catalog_key(name).replace(SHINY_SUFFIX, ""))
+
+    def find_in_region(self, region: str | None, name: str, shiny: bool = False) -> dict | None:
+        """Recherche limitée à une région (inconnue ou vide → pool global)."""
+        if region not in self._region_index or not self.regions[region][0]:
+            return self.shiny_of(name) if shiny else self._normal_by_name.get(catalog_key(name))
+        normal_index, shiny_index = self._region_index[region]
+        if shiny:
+            return shiny_index.get(catalog_key(name).replace(SHINY_SUFFIX, ""))
+        return normal_index.get(catalog_key(name))
+
+    def region_of(self, name: str) -> str | None:
+        """Région d'origine (nom exact, sinon sans le numéro final). None pour les formes spéciales."""
+        return self._region_of.get(catalog_key(name)) or self._region_of.get(base_key(name))
+
+    def region_pools(self, region: str | None) -> tuple:
+        """(normaux, shiny) d'une région, pool global si inconnue ou vide."""
+        normal, shiny = self.regions.get(region, ((), ()))
+        if not normal:
+            return self.normal, self.shiny
+        return normal, shiny
+
+    def by_type(self, type_name: str) -> list:
+        return self._by_type.get(catalog_key(type_name), [])
+
+    def evolves_into(self, name: str) -> list:
+        return self._evolves_into.get(catalog_key(name), [])
+
+
+catalog = PokemonCatalog()
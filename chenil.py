@@ -1,50 +1,27 @@
-import asyncio
 import os
-import json
 import random
-import psycopg2
-from psycopg2.extras import Json
-from dotenv import load_dotenv
 from discord.ext import commands
 import discord
 
-from new_db import get_new_captures, add_xp, evolve_pokemon
-from inventory_db import use_item
-
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
-
-conn = psycopg2.connect(DATABASE_URL, sslmode="require")
-cur  = conn.cursor()
+from db_connection import get_cursor
+from async_db import get_new_captures, add_xp, evolve_pokemon, use_item, run_db
+from data_registry import registry
+from presence import presence, JOIN
+from scheduler import scheduler
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 
 # ──────────────────────────────────────────────
-# TABLE
+# CONFIGURATION XP
 # ──────────────────────────────────────────────
-
-cur.execute("""
-CREATE TABLE IF NOT EXISTS chenil (
-    user_id      TEXT PRIMARY KEY,
-    pokemon_name TEXT NOT NULL,
-    is_egg       BOOLEAN DEFAULT FALSE,
-    egg_xp       INTEGER DEFAULT 0,
-    egg_xp_evo   INTEGER DEFAULT 400
-);
-""")
-
-# Ajout des colonnes si elles n'existent pas encore (migration douce)
-for col, definition in [
-    ("is_egg",     "BOOLEAN DEFAULT FALSE"),
-    ("egg_xp",     "INTEGER DEFAULT 0"),
-    ("egg_xp_evo", "INTEGER DEFAULT 400"),
-]:
-    try:
-        cur.execute(f"ALTER TABLE chenil ADD COLUMN IF NOT EXISTS {col} {definition};")
-        conn.commit()
-    except Exception:
-        conn.rollback()
-
+# L'XP n'est plus comptée minute par minute : chenil.voice_since garde le début
+# du temps de vocal pas encore crédité, réglé au départ du vocal, à l'affichage
+# (!chenil) et par un règlement groupé périodique.
+CHENIL_TRANCHE_SECONDS = 30 * 60   # temps de vocal pour une tranche d'XP
+CHENIL_XP_POKEMON      = 5         # XP par tranche pour un Pokémon
+CHENIL_XP_EGG          = 30        # XP par tranche pour un œuf
+CHENIL_SETTLE_INTERVAL = 10 * 60   # règlement groupé des sessions ouvertes (secondes)
+CHENIL_SETTLE_JOB      = "chenil_settle"
 
 # ──────────────────────────────────────────────
 # FONCTIONS INTERNES
@@ -52,11 +29,12 @@ for col, definition in [
 
 def get_chenil_pokemon(user_id: str) -> dict | None:
     """Retourne un dict avec toutes les infos du chenil, ou None s'il est vide."""
-    cur.execute(
-        "SELECT pokemon_name, is_egg, egg_xp, egg_xp_evo FROM chenil WHERE user_id = %s",
-        (user_id,)
-    )
-    row = cur.fetchone()
+    with get_cursor() as cur:
+        cur.execute(
+            "SELECT pokemon_name, is_egg, egg_xp, egg_xp_evo FROM chenil WHERE user_id = %s",
+            (user_id,)
+        )
+        row = cur.fetchone()
     if not row:
         return None
     return {
@@ -67,24 +45,30 @@ def get_chenil_pokemon(user_id: str) -> dict | None:
     }
 
 
-def set_chenil_pokemon(user_id: str, pokemon_name: str, is_egg: bool = False, egg_xp_evo: int = 400):
-    """Place un Pokémon ou un œuf dans le chenil (upsert)."""
-    cur.execute("""
-        INSERT INTO chenil (user_id, pokemon_name, is_egg, egg_xp, egg_xp_evo)
-        VALUES (%s, %s, %s, 0, %s)
-        ON CONFLICT (user_id) DO UPDATE SET
-            pokemon_name = EXCLUDED.pokemon_name,
-            is_egg       = EXCLUDED.is_egg,
-            egg_xp       = 0,
-            egg_xp_evo   = EXCLUDED.egg_xp_evo
-    """, (user_id, pokemon_name, is_egg, egg_xp_evo))
-    conn.commit()
+def set_chenil_pokemon(user_id: str, pokemon_name: str, is_egg: bool = False, egg_xp_evo: int = 400,
+                       in_voice: bool = False):
+    """Place un Pokémon ou un œuf dans le chenil (upsert).
+
+    in_voice : le joueur est en vocal, son temps compte dès maintenant
+    (une session déjà ouverte est conservée).
+    """
+    with get_cursor() as cur:
+        cur.execute("""
+            INSERT INTO chenil (user_id, pokemon_name, is_egg, egg_xp, egg_xp_evo, voice_since)
+            VALUES (%s, %s, %s, 0, %s, CASE WHEN %s THEN now() END)
+            ON CONFLICT (user_id) DO UPDATE SET
+                pokemon_name = EXCLUDED.pokemon_name,
+                is_egg       = EXCLUDED.is_egg,
+                egg_xp       = 0,
+                egg_xp_evo   = EXCLUDED.egg_xp_evo,
+                voice_since  = COALESCE(chenil.voice_since, EXCLUDED.voice_since)
+        """, (user_id, pokemon_name, is_egg, egg_xp_evo, in_voice))
 
 
 def remove_chenil_pokemon(user_id: str):
     """Retire le Pokémon ou l'œuf du chenil."""
-    cur.execute("DELETE FROM chenil WHERE user_id = %s", (user_id,))
-    conn.commit()
+    with get_cursor() as cur:
+        cur.execute("DELETE FROM chenil WHERE user_id = %s", (user_id,))
 
 
 def add_egg_xp(user_id: str, amount: int) -> bool:
@@ -92,28 +76,123 @@ def add_egg_xp(user_id: str, amount: int) -> bool:
     Ajoute de l'XP à l'œuf en chenil.
     Retourne True si l'œuf est prêt à éclore (egg_xp >= egg_xp_evo).
     """
-    cur.execute(
-        "UPDATE chenil SET egg_xp = egg_xp + %s WHERE user_id = %s",
-        (amount, user_id)
-    )
-    conn.commit()
-    cur.execute(
-        "SELECT egg_xp, egg_xp_evo FROM chenil WHERE user_id = %s",
-        (user_id,)
-    )
-    row = cur.fetchone()
+    with get_cursor() as cur:
+        cur.execute(
+            "UPDATE chenil SET egg_xp = egg_xp + %s WHERE user_id = %s RETURNING egg_xp, egg_xp_evo",
+            (amount, user_id)
+        )
+        row = cur.fetchone()
     return bool(row and row[0] >= row[1])
 
 
+def get_egg_progress(user_id: str) -> tuple[int, int]:
+    """Retourne (egg_xp, egg_xp_evo) de l'œuf en chenil, (0, 400) par défaut."""
+    with get_cursor() as cur:
+        cur.execute(
+            "SELECT egg_xp, egg_xp_evo FROM chenil WHERE user_id = %s",
+            (user_id,)
+        )
+        row = cur.fetchone()
+    return row if row else (0, 400)
+
+
+def open_chenil_session(user_id: str):
+    """Arrivée en vocal : le temps compte à partir de maintenant.
+
+    Une session déjà ouverte est gardée (resynchro au redémarrage) : le temps
+    pas encore réglé n'est pas perdu.
+    """
+    with get_cursor() as cur:
+        cur.execute("UPDATE chenil SET voice_since = COALESCE(voice_since, now()) WHERE user_id = %s", (user_id,))
+
+
+def close_stale_chenil_sessions(present_ids: list[str]) -> int:
+    """Ferme les sessions des joueurs qui ne sont plus en vocal (départs manqués pendant un arrêt du bot)."""
+    with get_cursor() as cur:
+        cur.execute(
+            "UPDATE chenil SET voice_since = NULL WHERE voice_since IS NOT NULL AND NOT (user_id = ANY(%s))",
+            (present_ids,)
+        )
+        return cur.rowcount
+
+
+def settle_chenil_xp(user_ids: list[str] | None = None, close: bool = False) -> list[dict]:
+    """
+    Crédite en une requête les tranches de vocal écoulées (tous les joueurs en session si user_ids est None).
+
+    - Œuf : egg_xp += tranches × CHENIL_XP_EGG
+    - Pokémon : new_captures.current_xp += tranches × CHENIL_XP_POKEMON (sauf XP bloquée)
+    - voice_since avance d'autant de tranches (le reste d'une tranche entamée est gardé),
+      ou passe à NULL si close (départ du vocal : la tranche entamée est perdue)
+
+    Retourne une ligne par joueur crédité, pour les messages, éclosions et évolutions.
+    """
+    with get_cursor() as cur:
+        cur.execute("""
+            WITH due AS (
+                SELECT user_id,
+                       FLOOR(EXTRACT(EPOCH FROM now() - voice_since) / %(tranche)s)::int AS tranches
+                FROM chenil
+                WHERE voice_since IS NOT NULL
+                  AND (%(all)s OR user_id = ANY(%(users)s))
+                FOR UPDATE
+            ), credited AS (
+                UPDATE chenil c
+                SET voice_since = CASE WHEN %(close)s THEN NULL
+                                       ELSE c.voice_since + d.tranches * make_interval(secs => %(tranche)s) END,
+                    egg_xp      = c.egg_xp + CASE WHEN c.is_egg THEN d.tranches * %(egg_xp)s ELSE 0 END
+                FROM due d
+                WHERE c.user_id = d.user_id AND (%(close)s OR d.tranches > 0)
+                RETURNING c.user_id, c.pokemon_name, c.is_egg, d.tranches, c.egg_xp, c.egg_xp_evo
+            ), pokemon_xp AS (
+                UPDATE new_captures n
+                SET current_xp = n.current_xp + c.tranches * %(pokemon_xp)s
+                FROM credited c
+                WHERE NOT c.is_egg AND c.tranches > 0
+                  AND n.user_id = c.user_id AND lower(n.name) = lower(c.pokemon_name)
+                  AND n.xp_evo <> -1
+                RETURNING n.user_id, n.name, n.current_xp, n.xp_evo, n.ivs, n.evo
+            )
+            SELECT c.user_id, c.pokemon_name, c.is_egg, c.tranches, c.egg_xp, c.egg_xp_evo,
+                   p.name, p.current_xp, p.xp_evo, p.ivs, p.evo
+            FROM credited c
+            LEFT JOIN pokemon_xp p ON p.user_id = c.user_id
+            WHERE c.tranches > 0
+        """, {
+            "tranche":    CHENIL_TRANCHE_SECONDS,
+            "all":        user_ids is None,
+            "users":      list(user_ids or []),
+            "close":      close,
+            "egg_xp":     CHENIL_XP_EGG,
+            "pokemon_xp": CHENIL_XP_POKEMON,
+        })
+        rows = cur.fetchall()
+
+    settled = {}
+    for uid, name, is_egg, tranches, egg_xp, egg_xp_evo, p_name, p_xp, p_xp_evo, p_ivs, p_evo in rows:
+        if uid in settled:
+            continue   # doublon de nom dans new_captures : une seule ligne par joueur
+        settled[uid] = {
+            "user_id":    uid,
+            "name":       name,
+            "is_egg":     is_egg,
+            "tranches":   tranches,
+            "egg_xp":     egg_xp,
+            "egg_xp_evo": egg_xp_evo,
+            # None si le Pokémon n'est plus dans new_captures ou si son XP est bloquée
+            "pokemon":    {"name": p_name, "current_xp": p_xp, "xp_evo": p_xp_evo,
+                           "ivs": p_ivs or {}, "evo": p_evo or {}} if p_name else None,
+        }
+    return list(settled.values())
+
+
 def get_random_egg_pokemon() -> str | None:
     """
     Tire aléatoirement un Pokémon dans /json/marche_noir/oeuf.json.
     Retourne le nom du Pokémon, ou None si le fichier est introuvable.
     """
-    oeuf_json_path = os.path.join(script_dir, "json", "marche_noir", "oeuf.json")
     try:
-        with open(oeuf_json_path, "r", encoding="utf-8") as f:
-            pool = json.load(f)
+        pool = registry.get("marche_noir/oeuf.json")
         if not pool:
             print("[CHENIL] oeuf.json est vide.")
             return None
@@ -137,15 +216,13 @@ def hatch_egg_with_shiny_check() -> tuple[str | None, dict | None, bool]:
     import random as _random
     
     # Charge marche_noir.json pour obtenir le shiny_rate
-    marche_noir_path = os.path.join(script_dir, "json", "marche_noir.json")
     shiny_rate = 16  # valeur par défaut
     try:
-        with open(marche_noir_path, "r", encoding="utf-8") as f:
-            marche_noir_data = json.load(f)
-            if isinstance(marche_noir_data, list) and marche_noir_data:
-                shiny_rate = marche_noir_data[0].get("shiny_rate", 16)
-            elif isinstance(marche_noir_data, dict):
-                shiny_rate = marche_noir_data.get("shiny_rate", 16)
+        marche_noir_data = registry.get("marche_noir.json")
+        if isinstance(marche_noir_data, list) and marche_noir_data:
+            shiny_rate = marche_noir_data[0].get("shiny_rate", 16)
+        elif isinstance(marche_noir_data, dict):
+            shiny_rate = marche_noir_data.get("shiny_rate", 16)
     except Exception as e:
         print(f"[CHENIL] Erreur lecture marche_noir.json : {e}")
     
@@ -154,11 +231,8 @@ def hatch_egg_with_shiny_check() -> tuple[str | None, dict | None, bool]:
     
     # Charge le bon fichier JSON selon shiny ou pas
     file_name = "oeuf_shiny.json" if is_shiny else "oeuf.json"
-    oeuf_json_path = os.path.join(script_dir, "json", "marche_noir", file_name)
-    
     try:
-        with open(oeuf_json_path, "r", encoding="utf-8") as f:
-            pool = json.load(f)
+        pool = registry.get(f"marche_noir/{file_name}")
         if not pool:
             print(f"[CHENIL] {file_name} est vide.")
             return None, None, is_shiny
@@ -175,167 +249,150 @@ def hatch_egg_with_shiny_check() -> tuple[str | None, dict | None, bool]:
 # GLOBALS (injectés par setup_chenil)
 # ──────────────────────────────────────────────
 
-_bot             = None
-_text_channel_id = None
+_bot              = None
+_text_channel_id  = None
+_voice_channel_id = None
 
 
 # ──────────────────────────────────────────────
-# BOUCLE PRINCIPALE
+# RÈGLEMENT DE L'XP
 # ──────────────────────────────────────────────
 
-async def tick_chenil_xp(
-    members_in_vc: list,
-    xp_counters:   dict,
-    xp_amount:     int = 5,
-    xp_amount_eggs: int =30,
-    threshold:     int = 30,
-):
-    """
-    À appeler chaque minute depuis auto_event_loop.
-
-    - members_in_vc : liste des discord.Member présents dans le vocal (sans bots)
-    - xp_counters   : dict { user_id (int): nb_checks (int) } — modifié en place
-    - xp_amount     : XP à donner quand le seuil est atteint
-    - threshold     : nombre de checks avant de donner l'XP (1 check = 1 min)
-    """
-    channel = _bot.get_channel(_text_channel_id)
-    ids_presents = {m.id for m in members_in_vc}
-
-    # Retire les utilisateurs qui ont quitté le vocal
-    for uid in list(xp_counters.keys()):
-        if uid not in ids_presents:
-            print(f"[CHENIL] {uid} a quitté le vocal — retiré du compteur.")
-            del xp_counters[uid]
-
-    # Incrémente les compteurs
-    for member in members_in_vc:
-        xp_counters[member.id] = xp_counters.get(member.id, 0) + 1
-        print(f"[CHENIL] {member.display_name} — checks: {xp_counters[member.id]}/{threshold}")
-
-    # Vérifie si quelqu'un atteint le seuil
-    for uid, checks in list(xp_counters.items()):
-        if checks < threshold:
-            continue
-
-        xp_counters[uid] = 0  # reset
-
-        chenil_data = get_chenil_pokemon(str(uid))
-        if not chenil_data:
-            print(f"[CHENIL] {uid} aurait pu gagner {xp_amount} XP mais n'a pas de Pokémon dans le chenil.")
-            continue
-
-        # ── Œuf ──────────────────────────────────────────────────────────────
-        if chenil_data["is_egg"]:
-            ready = add_egg_xp(str(uid), xp_amount_eggs)
-
-            # Relit les valeurs fraîches
-            cur.execute(
-                "SELECT egg_xp, egg_xp_evo FROM chenil WHERE user_id = %s",
-                (str(uid),)
-            )
-            row = cur.fetchone()
-            current_xp, xp_evo = row if row else (0, 400)
-
-            await channel.send(
-                f"🥚 **+{xp_amount_eggs} XP** pour l'œuf de <@{uid}> ! "
-                f"(`{current_xp}/{xp_evo}`)"
-            )
-
-            if ready:
-                # Récupère le nom de l'œuf avant de le retirer du chenil
-                egg_item_name = chenil_data["name"]
-                remove_chenil_pokemon(str(uid))
-                
-                # Éclosion avec vérification shiny
-                pokemon_name, chosen_data, is_shiny = hatch_egg_with_shiny_check()
-
-                if not pokemon_name:
-                    await channel.send(
-                        f"🥚 L'œuf de <@{uid}> a éclos... mais rien n'en est sorti. "
-                        f"(Erreur dans les fichiers JSON)"
-                    )
-                    continue
-
-                # Ajout via save_new_capture avec IVs et stats
-                from new_db import save_new_capture
-                import random as _random
-
-                if chosen_data:
-                    base_stats = chosen_data.get("stats", {})
-                    ivs = {stat: _random.randint(0, 31) for stat in base_stats}
-                    final_stats = {stat: base_stats[stat] + ivs[stat] for stat in base_stats}
-                    save_new_capture(str(uid), pokemon_name, ivs, final_stats, chosen_data)
-                else:
-                    # Fallback minimal si données introuvables
-                    ivs = {"hp": 15, "attack": 15, "defense": 15,
-                           "special_attack": 15, "special_defense": 15, "speed": 15}
-                    final_stats = ivs.copy()
-                    save_new_capture(str(uid), pokemon_name, ivs, final_stats, {})
-
-                shiny_emoji = "✨" if is_shiny else ""
-                await channel.send(
-                    f"🎉 L'œuf de <@{uid}> a éclos ! "
-                    f"Un **{pokemon_name}** {shiny_emoji} en est sorti !"
-                )
-                
-                # Supprime l'œuf de l'inventaire
-                use_item(str(uid), egg_item_name, 1)
-                
-                # Remet le Pokémon éclos dans le chenil automatiquement
-                set_chenil_pokemon(str(uid), pokemon_name)
-
-            continue  # ne pas tomber dans le bloc Pokémon normal
-
-        # ── Pokémon normal ────────────────────────────────────────────────────
-        pokemon_name = chenil_data["name"]
-        captures = get_new_captures(str(uid))
-        pokemon  = next(
-            (p for p in captures if p["name"].lower() == pokemon_name.lower()),
-            None
-        )
-
-        if not pokemon:
-            print(f"[CHENIL] Pokémon '{pokemon_name}' de {uid} introuvable dans new_captures.")
-            continue
-
-        can_evolve = add_xp(str(uid), pokemon["name"], xp_amount)
-        print(f"[CHENIL] +{xp_amount} XP pour {pokemon['name']} de {uid}.")
-        await channel.send(
-            f"🏠 **+{xp_amount} XP** pour **{pokemon['name']}** de <@{uid}> grâce au chenil !"
-        )
-
-        if can_evolve:
-            result = evolve_pokemon(str(uid), pokemon)
-            if result["success"]:
-                print(f"[CHENIL] {pokemon['name']} de {uid} a évolué en {result['evo_name']} !")
-                set_chenil_pokemon(str(uid), result["evo_name"])
-                await channel.send(
-                    f"🎉 **{pokemon['name']}** de <@{uid}> a évolué en "
-                    f"**{result['evo_name']}** grâce au chenil !"
-                )
-                # Le Pokémon évolué recommence avec 0 XP, donc on ne continue pas
-                # pour éviter de lui ajouter du XP deux fois
-                continue
-            else:
-                print(f"[CHENIL] Évolution impossible : {result['reason']}")
+async def _hatch_chenil_egg(uid: str, egg_item_name: str) -> list[str]:
+    """Éclosion d'un œuf prêt : capture, retrait de l'œuf, Pokémon éclos remis au chenil."""
+    await run_db(remove_chenil_pokemon, uid)
+
+    # Éclosion avec vérification shiny
+    pokemon_name, chosen_data, is_shiny = hatch_egg_with_shiny_check()
+    if not pokemon_name:
+        return [f"🥚 L'œuf de <@{uid}> a éclos... mais rien n'en est sorti. (Erreur dans les fichiers JSON)"]
+
+    # Ajout via save_new_capture avec IVs et stats
+    from async_db import save_new_capture
+
+    if chosen_data:
+        base_stats = chosen_data.get("stats", {})
+        ivs = {stat: random.randint(0, 31) for stat in base_stats}
+        final_stats = {stat: base_stats[stat] + ivs[stat] for stat in base_stats}
+        await save_new_capture(uid, pokemon_name, ivs, final_stats, chosen_data)
+    else:
+        # Fallback minimal si données introuvables
+        ivs = {"hp": 15, "attack": 15, "defense": 15,
+               "special_attack": 15, "special_defense": 15, "speed": 15}
+        await save_new_capture(uid, pokemon_name, ivs, ivs.copy(), {})
+
+    # Supprime l'œuf de l'inventaire
+    await use_item(uid, egg_item_name, 1)
+
+    # Remet le Pokémon éclos dans le chenil automatiquement (le temps de vocal continue de compter)
+    await run_db(set_chenil_pokemon, uid, pokemon_name, in_voice=presence.in_voice(int(uid), _voice_channel_id))
+
+    shiny_emoji = "✨" if is_shiny else ""
+    return [f"🎉 L'œuf de <@{uid}> a éclos ! Un **{pokemon_name}** {shiny_emoji} en est sorti !"]
+
+
+async def _reward(entry: dict) -> list[str]:
+    """Messages (et éclosion / évolution) d'un joueur crédité par settle_chenil_xp."""
+    uid = entry["user_id"]
+
+    # ── Œuf ──────────────────────────────────────────────────────────────
+    if entry["is_egg"]:
+        lines = [f"🥚 **+{entry['tranches'] * CHENIL_XP_EGG} XP** pour l'œuf de <@{uid}> ! "
+                 f"(`{entry['egg_xp']}/{entry['egg_xp_evo']}`)"]
+        if entry["egg_xp"] >= entry["egg_xp_evo"]:
+            lines += await _hatch_chenil_egg(uid, entry["name"])
+        return lines
+
+    # ── Pokémon normal ────────────────────────────────────────────────────
+    pokemon = entry["pokemon"]
+    if pokemon is None:
+        print(f"[CHENIL] Pokémon '{entry['name']}' de {uid} introuvable dans new_captures (ou XP bloquée).")
+        return []
+
+    xp = entry["tranches"] * CHENIL_XP_POKEMON
+    print(f"[CHENIL] +{xp} XP pour {pokemon['name']} de {uid}.")
+    lines = [f"🏠 **+{xp} XP** pour **{pokemon['name']}** de <@{uid}> grâce au chenil !"]
+
+    if pokemon["xp_evo"] > 0 and pokemon["current_xp"] >= pokemon["xp_evo"]:
+        result = await evolve_pokemon(uid, pokemon)
+        if result["success"]:
+            print(f"[CHENIL] {pokemon['name']} de {uid} a évolué en {result['evo_name']} !")
+            await run_db(set_chenil_pokemon, uid, result["evo_name"])
+            lines.append(f"🎉 **{pokemon['name']}** de <@{uid}> a évolué en "
+                         f"**{result['evo_name']}** grâce au chenil !")
+        else:
+            print(f"[CHENIL] Évolution impossible : {result['reason']}")
+    return lines
+
+
+async def settle_chenil(user_ids: list[str] | None = None, close: bool = False) -> int:
+    """Règle l'XP du chenil (une requête pour tous les joueurs) puis annonce les gains en un message."""
+    settled = await run_db(settle_chenil_xp, user_ids, close)
+    lines = []
+    for entry in settled:
+        try:
+            lines += await _reward(entry)
+        except Exception as e:
+            print(f"[CHENIL] ❌ Récompense de {entry['user_id']} : {e}")
+
+    channel = _bot.get_channel(_text_channel_id) if _bot else None
+    if channel and lines:
+        message = ""
+        for line in lines:
+            if len(message) + len(line) + 1 > 2000:
+                await channel.send(message)
+                message = ""
+            message = f"{message}\n{line}" if message else line
+        await channel.send(message)
+    return len(settled)
+
+
+async def on_chenil_presence(event, member, voice_channel):
+    """Arrivée : le temps de vocal compte ; départ : les tranches complètes sont créditées."""
+    if event == JOIN:
+        await run_db(open_chenil_session, str(member.id))
+    else:
+        await settle_chenil([str(member.id)], close=True)
+
+
+async def settle_chenil_batch():
+    """Règlement groupé : sessions des joueurs partis fermées, tranches écoulées créditées."""
+    present = [str(m.id) for m in presence.members(_voice_channel_id)]
+    closed = await run_db(close_stale_chenil_sessions, present)
+    if closed:
+        print(f"[CHENIL] {closed} session(s) fermée(s) (joueurs plus en vocal).")
+    if present:
+        await settle_chenil()
 
 
 # ──────────────────────────────────────────────
 # COMMANDES DISCORD
 # ──────────────────────────────────────────────
 
-def setup_chenil(bot, channel_id):
-    global _bot, _text_channel_id
-    _bot             = bot
-    _text_channel_id = channel_id
+def setup_chenil(bot, channel_id, voice_channel_id):
+    global _bot, _text_channel_id, _voice_channel_id
+    _bot              = bot
+    _text_channel_id  = channel_id
+    _voice_channel_id = voice_channel_id
+
+    presence.subscribe(on_chenil_presence, voice_channel_id)
+
+    @bot.listen("on_ready")
+    async def start_chenil_settle():
+        if scheduler.get(CHENIL_SETTLE_JOB) is None:
+            scheduler.every(CHENIL_SETTLE_INTERVAL, settle_chenil_batch, name=CHENIL_SETTLE_JOB)
 
     @bot.command(name="chenil")
-    async def chenil_cmd(ctx, pokemon_name: str):
-        """!chenil <nom> — Place un Pokémon ou un œuf dans le chenil."""
+    async def chenil_cmd(ctx, pokemon_name: str = None):
+        """!chenil [nom] — Place un Pokémon ou un œuf dans le chenil (sans nom : progression)."""
         uid = str(ctx.author.id)
 
-        # Vérifie qu'il n'y a rien déjà dans le chenil
-        current = get_chenil_pokemon(uid)
+        # Vérifie qu'il n'y a rien déjà dans le chenil (XP réglée avant l'affichage)
+        await settle_chenil([uid])
+        current = await run_db(get_chenil_pokemon, uid)
+        if not current and pokemon_name is None:
+            await ctx.send("❌ Tu n'as pas de Pokémon dans le chenil. Utilise `!chenil <nom>`.")
+            return
         if current:
             if current["is_egg"]:
                 # Affiche l'info pour un œuf
@@ -346,7 +403,7 @@ def setup_chenil(bot, channel_id):
                 )
             else:
                 # Affiche l'info pour un Pokémon normal
-                captures = get_new_captures(uid)
+                captures = await get_new_captures(uid)
                 pokemon = next(
                     (p for p in captures if p["name"].lower() == current["name"].lower()),
                     None
@@ -365,8 +422,8 @@ def setup_chenil(bot, channel_id):
             return
 
         # Cherche d'abord un œuf dans l'inventaire
-        from inventory_db import get_inventory
-        inventory = get_inventory(uid)
+        from async_db import get_inventory
+        inventory = await get_inventory(uid)
         egg_item  = next(
             (i for i in inventory
              if i["name"].lower() == pokemon_name.lower()
@@ -374,9 +431,11 @@ def setup_chenil(bot, channel_id):
             None
         )
 
+        in_voice = presence.in_voice(ctx.author.id, _voice_channel_id)
         if egg_item:
             xp_evo = egg_item.get("xp_evo", 400)
-            set_chenil_pokemon(uid, egg_item["name"], is_egg=True, egg_xp_evo=xp_evo)
+            await run_db(set_chenil_pokemon, uid, egg_item["name"], is_egg=True, egg_xp_evo=xp_evo,
+                         in_voice=in_voice)
             await ctx.send(
                 f"🥚 **{egg_item['name']}** a été placé dans le chenil ! "
                 f"Il accumulera de l'XP tant que tu seras dans le vocal. "
@@ -385,7 +444,7 @@ def setup_chenil(bot, channel_id):
             return
 
         # Sinon cherche dans les captures Pokémon normales
-        captures = get_new_captures(uid)
+        captures = await get_new_captures(uid)
         pokemon  = next(
             (p for p in captures if p["name"].lower() == pokemon_name.lower()),
             None
@@ -397,7 +456,7 @@ def setup_chenil(bot, channel_id):
             )
             return
 
-        set_chenil_pokemon(uid, pokemon["name"])
+        await run_db(set_chenil_pokemon, uid, pokemon["name"], in_voice=in_voice)
         await ctx.send(
             f"🏠 **{pokemon['name']}** a été placé dans le chenil ! "
             f"Il gagnera de l'XP tant que tu seras dans le salon vocal."
@@ -407,13 +466,14 @@ def setup_chenil(bot, channel_id):
     async def retirer_chenil_cmd(ctx):
         """!retirer_chenil — Retire votre Pokémon ou œuf du chenil."""
         uid     = str(ctx.author.id)
-        current = get_chenil_pokemon(uid)
+        await settle_chenil([uid])   # crédite le temps de vocal déjà passé
+        current = await run_db(get_chenil_pokemon, uid)
 
         if not current:
             await ctx.send("❌ Tu n'as pas de Pokémon dans le chenil.")
             return
 
-        remove_chenil_pokemon(uid)
+        await run_db(remove_chenil_pokemon, uid)
         nom = current["name"]
         if current["is_egg"]:
             await ctx.send(
@@ -428,7 +488,7 @@ def setup_chenil(bot, channel_id):
     async def add_chenil_xp_cmd(ctx, member: discord.Member, xp: int):
         """!add_chenil_xp @utilisateur <xp> — (Admin) Ajoute manuellement de l'XP au chenil."""
         uid         = str(member.id)
-        chenil_data = get_chenil_pokemon(uid)
+        chenil_data = await run_db(get_chenil_pokemon, uid)
 
         if not chenil_data:
             await ctx.send(f"❌ {member.mention} n'a pas de Pokémon dans le chenil.")
@@ -436,12 +496,8 @@ def setup_chenil(bot, channel_id):
 
         # ── Œuf ──────────────────────────────────────────────────────────────
         if chenil_data["is_egg"]:
-            ready = add_egg_xp(uid, xp)
-            cur.execute(
-                "SELECT egg_xp, egg_xp_evo FROM chenil WHERE user_id = %s", (uid,)
-            )
-            row = cur.fetchone()
-            current_xp, xp_evo = row if row else (0, 400)
+            ready = await run_db(add_egg_xp, uid, xp)
+            current_xp, xp_evo = await run_db(get_egg_progress, uid)
 
             if not ready:
                 await ctx.send(
@@ -450,45 +506,14 @@ def setup_chenil(bot, channel_id):
                 )
                 return
 
-            # Éclosion forcée avec vérification shiny
-            # Récupère le nom de l'œuf avant de le retirer du chenil
-            egg_item_name = chenil_data["name"]
-            remove_chenil_pokemon(uid)
-            pokemon_name, chosen_data, is_shiny = hatch_egg_with_shiny_check()
-            
-            if not pokemon_name:
-                await ctx.send(f"🥚 L'œuf de {member.mention} a éclos mais rien n'en est sorti (erreur JSON).")
-                return
-
-            from new_db import save_new_capture
-
-            if chosen_data:
-                import random as _random
-                base_stats  = chosen_data.get("stats", {})
-                ivs         = {stat: _random.randint(0, 31) for stat in base_stats}
-                final_stats = {stat: base_stats[stat] + ivs[stat] for stat in base_stats}
-                save_new_capture(uid, pokemon_name, ivs, final_stats, chosen_data)
-            else:
-                ivs = {"hp": 15, "attack": 15, "defense": 15,
-                       "special_attack": 15, "special_defense": 15, "speed": 15}
-                save_new_capture(uid, pokemon_name, ivs, ivs.copy(), {})
-
-            shiny_emoji = "✨" if is_shiny else ""
-            await ctx.send(
-                f"🎉 L'œuf de {member.mention} a éclos ! "
-                f"Un **{pokemon_name}** {shiny_emoji} en est sorti !"
-            )
-            
-            # Supprime l'œuf de l'inventaire
-            use_item(uid, egg_item_name, 1)
-            
-            # Remet le Pokémon éclos dans le chenil automatiquement
-            set_chenil_pokemon(uid, pokemon_name)
+            # Éclosion forcée : même chemin que le règlement (le Pokémon éclos reprend le temps de vocal)
+            for line in await _hatch_chenil_egg(uid, chenil_data["name"]):
+                await ctx.send(line)
             return
 
         # ── Pokémon normal ────────────────────────────────────────────────────
         pokemon_name = chenil_data["name"]
-        captures = get_new_captures(uid)
+        captures = await get_new_captures(uid)
         pokemon  = next(
             (p for p in captures if p["name"].lower() == pokemon_name.lower()),
             None
@@ -498,11 +523,12 @@ def setup_chenil(bot, channel_id):
             await ctx.send(f"❌ Pokémon **{pokemon_name}** introuvable dans new_captures.")
             return
 
-        can_evolve = add_xp(uid, pokemon["name"], xp)
+        can_evolve = await add_xp(uid, pokemon["name"], xp)
 
         if not can_evolve:
+            captures   = await get_new_captures(uid)
             updated    = next(
-                (p for p in get_new_captures(uid) if p["name"] == pokemon["name"]),
+                (p for p in captures if p["name"] == pokemon["name"]),
                 None
             )
             current_xp = updated["current_xp"] if updated else "?"
@@ -513,9 +539,9 @@ def setup_chenil(bot, channel_id):
             )
             return
 
-        result = evolve_pokemon(uid, pokemon)
+        result = await evolve_pokemon(uid, pokemon)
         if result["success"]:
-            set_chenil_pokemon(uid, result["evo_name"])
+            await run_db(set_chenil_pokemon, uid, result["evo_name"])
             await ctx.send(
                 f"🎉 **{pokemon['name']}** de {member.mention} a évolué en "
                 f"**{result['evo_name']}** !\n"
@@ -1,12 +1,12 @@
-import json
 import os
 
+from data_registry import registry
+
 script_dir = os.path.dirname(os.path.abspath(__file__))
 ADVERSAIRES_FILE = os.path.join(script_dir, "../json/adversaires.json")  # ton fichier JSON
 
 def get_all_adversaires():
-    with open(ADVERSAIRES_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return registry.get(ADVERSAIRES_FILE)
 
 def get_adversaire_by_name(name: str):
     adversaires = get_all_adversaires()
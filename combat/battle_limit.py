@@ -1,40 +1,7 @@
 # battle_limit.py
-import os
-import psycopg2
 from datetime import datetime, date
-from dotenv import load_dotenv
 
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
-
-
-def _get_connection():
-    """Crée une nouvelle connexion à la base de données."""
-    return psycopg2.connect(DATABASE_URL, sslmode="require")
-
-
-def _init_table():
-    """Initialise la table des tentatives de combat."""
-    try:
-        conn = _get_connection()
-        cur = conn.cursor()
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS battle_attempts (
-            user_id TEXT NOT NULL,
-            attempt_date DATE NOT NULL,
-            attempt_count INTEGER DEFAULT 0,
-            PRIMARY KEY (user_id, attempt_date)
-        );
-        """)
-        conn.commit()
-        cur.close()
-        conn.close()
-    except Exception as e:
-        print(f"Erreur lors de l'initialisation de la table: {e}")
-
-
-# Initialiser la table au démarrage
-_init_table()
+from db_connection import get_cursor
 
 
 def get_daily_attempts(user_id: str) -> int:
@@ -42,24 +9,18 @@ def get_daily_attempts(user_id: str) -> int:
     user_id = str(user_id)
     today = date.today()
     
-    conn = None
     try:
-        conn = _get_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT attempt_count FROM battle_attempts
-            WHERE user_id = %s AND attempt_date = %s
-        """, (user_id, today))
-        
-        row = cur.fetchone()
-        cur.close()
+        with get_cursor() as cur:
+            cur.execute("""
+                SELECT attempt_count FROM battle_attempts
+                WHERE user_id = %s AND attempt_date = %s
+            """, (user_id, today))
+            
+            row = cur.fetchone()
         return row[0] if row else 0
     except Exception as e:
         print(f"Erreur lors de la récupération des tentatives: {e}")
         return 0
-    finally:
-        if conn:
-            conn.close()
 
 
 def increment_daily_attempts(user_id: str) -> int:
@@ -67,32 +28,22 @@ def increment_daily_attempts(user_id: str) -> int:
     user_id = str(user_id)
     today = date.today()
     
-    conn = None
     try:
-        conn = _get_connection()
-        cur = conn.cursor()
-        
-        cur.execute("""
-            INSERT INTO battle_attempts (user_id, attempt_date, attempt_count)
-            VALUES (%s, %s, 1)
-            ON CONFLICT (user_id, attempt_date) DO UPDATE SET
-                attempt_count = battle_attempts.attempt_count + 1
-            RETURNING battle_attempts.attempt_count
-        """, (user_id, today))
-        
-        
-        row = cur.fetchone()
-        conn.commit()
-        cur.close()
+        # Le pool fait le rollback si la requête échoue
+        with get_cursor() as cur:
+            cur.execute("""
+                INSERT INTO battle_attempts (user_id, attempt_date, attempt_count)
+                VALUES (%s, %s, 1)
+                ON CONFLICT (user_id, attempt_date) DO UPDATE SET
+                    attempt_count = battle_attempts.attempt_count + 1
+                RETURNING battle_attempts.attempt_count
+            """, (user_id, today))
+            
+            row = cur.fetchone()
         return row[0] if row else 1
     except Exception as e:
-        if conn:
-            conn.rollback()
         print(f"Erreur lors de l'incrémentation des tentatives: {e}")
         return 0
-    finally:
-        if conn:
-            conn.close()
 
 
 def can_battle(user_id: str, max_attempts: int = 3) -> tuple[bool, int]:
@@ -123,4 +74,4 @@ def increment_daily_victories(user_id: str) -> int:
     Alias pour incrémenter les victoires du jour.
     Réutilise la même table battle_attempts.
     """
-    return increment_daily_attempts(user_id)
\ No newline at end of file
+    return increment_daily_attempts(user_id)
@@ -8,18 +8,15 @@ import json
 from combat.battle_state import BattleState
 from combat.views_attack import AttackOrSwitchView, SwitchSelectView
 from combat.utils import calculate_damage  # <-- on garde
+from data_registry import registry
 
-from badge_db import give_badge, get_user_badges
-from money_db import add_money
+from async_db import give_badge, get_user_badges, add_money, run_db
 
 
-from new_db import get_new_captures, add_xp, evolve_pokemon
+from async_db import get_new_captures, add_xp, evolve_pokemon
 
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
-badges_path = os.path.join(script_dir, "..", "json", "badges.json")
-with open(badges_path, "r", encoding="utf-8") as f:
-    BADGE_DATA = json.load(f)
 
 # Dictionnaire qui lie le nom de l'adversaire à l'ID du badge
 BADGES_ADVERSAIRES = {
@@ -82,18 +79,18 @@ async def handle_victory(interaction, adversaire_name, state, repliques=None):
     
     # Incrémenter les victoires quotidiennes
     from combat.battle_limit import increment_daily_victories
-    new_count = increment_daily_victories(user_id)
+    new_count = await run_db(increment_daily_victories, user_id)
     
     if badge_id:
-        user_badges = get_user_badges(user_id)
-        badge_info = next((b for b in BADGE_DATA if b["id"] == badge_id), None)
+        user_badges = await get_user_badges(user_id)
+        badge_info = next((b for b in registry.get("badges.json") if b["id"] == badge_id), None)
         if badge_info:
             badge_image_path = os.path.join(script_dir, "..", badge_info["image"])
             file = discord.File(badge_image_path, filename="badge.png")
             if badge_id not in user_badges:
-                give_badge(user_id, badge_id)
+                await give_badge(user_id, badge_id)
                 reward = 500
-                add_money(user_id, reward)
+                await add_money(user_id, reward, reason="combat_badge")
                 emb = discord.Embed(
                     title=f"🏅 Nouveau Badge : {badge_info['name']}",
                     description=f"{badge_info.get('description','')}\n💰 Vous gagnez **{reward}** Croco dollars !",
@@ -103,7 +100,7 @@ async def handle_victory(interaction, adversaire_name, state, repliques=None):
                 await interaction.channel.send(file=file, embed=emb)
             else:
                 reward = 10
-                add_money(user_id, reward)
+                await add_money(user_id, reward, reason="combat_victoire")
                 await interaction.channel.send(
                     f"🎉 Tu as déjà le badge **{badge_info['name']}**.\n"
                     f"💰 Tu reçois **{reward}** Croco dollars."
@@ -112,10 +109,10 @@ async def handle_victory(interaction, adversaire_name, state, repliques=None):
     # ── XP de victoire pour les Pokémons du combat ────────────────────────
     xp_victoire = 20
     for pokemon in state.player_team:
-        can_evolve = add_xp(user_id, pokemon["name"], xp_victoire)
+        can_evolve = await add_xp(user_id, pokemon["name"], xp_victoire)
         await interaction.channel.send(f"⚔️ **+{xp_victoire} XP** pour **{pokemon['name']}** !")
         if can_evolve:
-            result = evolve_pokemon(user_id, pokemon)
+            result = await evolve_pokemon(user_id, pokemon)
             if result["success"]:
                 await interaction.channel.send(f"🎉 **{pokemon['name']}** a évolué en **{result['evo_name']}** !")
             else:
@@ -1,9 +1,9 @@
 import discord
 from discord.ui import View, Select, Button
-from new_db_avantmodif import get_new_captures
-import json
+from async_db import get_new_captures, run_db
 import os
 from combat.logic_battle import start_battle_turn_based
+from data_registry import registry
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 from regions import get_user_region
@@ -15,11 +15,7 @@ PAGE_SIZE = 22  # + "(aucun)" + "Page suivante" = 25 max
 def get_adversaires_by_region(region: str):
     if not region:
         return []
-    filename = os.path.join(ADVERSAIRES_DIR, f"adversaires_{region.lower()}.json")
-    if not os.path.exists(filename):
-        return []
-    with open(filename, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return registry.get(os.path.join(ADVERSAIRES_DIR, f"adversaires_{region.lower()}.json"), [])
 
 def get_adversaire_by_name(name: str, region: str):
     adversaires = get_adversaires_by_region(region)
@@ -146,7 +142,7 @@ class ValidateButton(Button):
         )
 
         user_id = str(interaction.user.id)
-        all_captures = get_new_captures(user_id)
+        all_captures = await get_new_captures(user_id)
 
         captures_by_name = {}
         for p in all_captures:
@@ -245,7 +241,7 @@ class AdversaireSelect(Select):
 
 # ---- Vue principale (slots 1 à 4) ----
 class SelectionView(View):
-    def __init__(self, pokemons, full_pokemon_data, user_id: str):
+    def __init__(self, pokemons, full_pokemon_data, region: str | None):
         super().__init__(timeout=300)
         self.full_pokemon_data = full_pokemon_data
         self.chosen_adversaire = None
@@ -253,7 +249,7 @@ class SelectionView(View):
         self.slots = {i: "aucun" for i in range(1, 7)}
         self.slot_pages = {i: 0 for i in range(1, 7)}
 
-        region = get_user_region(user_id)
+        # La région est lue en amont, hors de la boucle (SelectionView.create)
         self.region = region
         self.adversaires = get_adversaires_by_region(region)
 
@@ -263,6 +259,12 @@ class SelectionView(View):
         self.clear_items()
         self.add_item(AdversaireSelect(self.adversaires, self))
 
+    @classmethod
+    async def create(cls, pokemons, full_pokemon_data, user_id: str) -> "SelectionView":
+        """Lit la région du joueur via run_db puis construit la vue (ValueError si aucun adversaire)."""
+        region = await run_db(get_user_region, user_id)
+        return cls(pokemons, full_pokemon_data, region)
+
     async def show_pokemon_select(self, interaction: discord.Interaction):
         self.clear_items()
         self.rebuild()
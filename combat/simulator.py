@@ -0,0 +1,282 @@
+# simulator.py
+"""Simulateur de combats sans Discord (équilibrage des champions d'arène).
+
+Reprend BattleState et calculate_damage, avec exactement le même déroulé de
+tour que start_battle_turn_based (ordre par vitesse, K.O. → remplaçant,
+fin de tour anticipée après un K.O. en première action), mais sans
+interaction ni asyncio.sleep : des milliers de combats par seconde et par
+cœur, répartis sur plusieurs processus.
+
+Reproductible : chaque lot de combats a sa propre graine dérivée de
+(--seed, champion, numéro de lot), le résultat ne dépend donc pas du
+nombre de processus.
+
+    python -m combat.simulator --region kanto --team "Bulbizarre,Salamèche,Carapuce" --fights 20000
+    python -m combat.simulator --region johto --random-team 4 --policy best --workers 8 --json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from combat.battle_state import BattleState
+from combat.utils import calculate_damage, get_attack_record, type_id, _effectiveness
+from data_registry import registry
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+ADVERSAIRES_DIR = os.path.join(script_dir, "..", "json")
+
+MAX_TURNS = 500          # garde-fou : au-delà, match nul
+CHUNK_SIZE = 2000        # combats par lot (une graine par lot)
+STATS = ("hp", "attack", "defense", "special_attack", "special_defense", "speed")
+
+
+# ───────────────────────────────────────────────────────────────
+# 🧠 Politiques de choix d'attaque
+# ───────────────────────────────────────────────────────────────
+def policy_random(attacker, defender, rng):
+    """Attaque au hasard (comportement du bot, et du joueur sans réponse)."""
+    return rng.choice(attacker["attacks"])
+
+
+def policy_best(attacker, defender, rng):
+    """Attaque au meilleur dégât attendu (puissance × STAB × efficacité × ratio de stats)."""
+    best, best_score = None, -1.0
+    attacker_types = {type_id(t) for t in attacker.get("type") or ()}
+    for name in attacker["attacks"]:
+        record = get_attack_record(name)
+        if record is None:
+            score = 7.5
+        else:
+            ratio = attacker["stats"].get(record.atk_key, 50) / max(1, defender["stats"].get(record.def_key, 50))
+            stab = 1.5 if record.type_id >= 0 and record.type_id in attacker_types else 1.0
+            score = record.power * ratio * stab * _effectiveness(record.type_id, defender.get("type"))
+        if score > best_score:
+            best, best_score = name, score
+    return best
+
+
+POLICIES = {"random": policy_random, "best": policy_best}
+
+
+# ───────────────────────────────────────────────────────────────
+# ⚔️ Combat
+# ───────────────────────────────────────────────────────────────
+def simulate_battle(player_team, bot_team, rng=random, player_policy=policy_random):
+    """Joue un combat complet.
+
+    Retourne {"winner": "player"|"bot"|"draw", "turns": int,
+              "player_hp": PV restants (équipe joueur), "bot_hp": PV restants (équipe bot)}.
+    """
+    state = BattleState(player_team, bot_team)
+
+    def attack(side):
+        """Une attaque de `side` ; True si le camp adverse n'a plus de Pokémon."""
+        if side == "player":
+            if state.is_player_ko():
+                return False
+            name = player_policy(state.active_player, state.active_bot, rng)
+            state.take_damage("bot", calculate_damage(state.active_player, state.active_bot, name, rng=rng))
+            return state.is_bot_ko() and not state.switch_bot()
+        if state.is_bot_ko():
+            return False
+        name = rng.choice(state.active_bot["attacks"])
+        state.take_damage("player", calculate_damage(state.active_bot, state.active_player, name, rng=rng))
+        return state.is_player_ko() and not state.switch_player()
+
+    def result(winner, turns):
+        return {
+            "winner":    winner,
+            "turns":     turns,
+            "player_hp": sum(state.player_hp_pool),
+            "bot_hp":    sum(state.bot_hp_pool),
+        }
+
+    for turn in range(1, MAX_TURNS + 1):
+        first, second = (
+            ("player", "bot")
+            if state.active_player["stats"]["speed"] >= state.active_bot["stats"]["speed"]
+            else ("bot", "player")
+        )
+        ko_before = (state.active_player_index, state.active_bot_index)
+
+        if attack(first):
+            return result(first, turn)
+        # Un K.O. en première action termine le tour (comme en jeu)
+        if (state.active_player_index, state.active_bot_index) != ko_before:
+            continue
+        if attack(second):
+            return result(second, turn)
+
+    return result("draw", MAX_TURNS)
+
+
+# ───────────────────────────────────────────────────────────────
+# 🧬 Équipes
+# ───────────────────────────────────────────────────────────────
+def build_pokemon(entry: dict, ivs: dict) -> dict:
+    """Pokémon de combat : stats de base de la fiche + IV (comme à la capture)."""
+    base = entry.get("stats", {})
+    return {
+        "name":    entry["name"],
+        "type":    entry.get("type", []),
+        "attacks": entry.get("attacks") or ["Charge"],
+        "stats":   {stat: base.get(stat, 0) + ivs.get(stat, 0) for stat in base},
+    }
+
+
+def roll_ivs(rng, fixed: int | None = None) -> dict:
+    if fixed is not None:
+        return {stat: fixed for stat in STATS}
+    return {stat: rng.randint(0, 31) for stat in STATS}
+
+
+def load_adversaires(region: str) -> list:
+    filename = "adversaires.json" if region == "all" else f"adversaires_{region.lower()}.json"
+    return registry.get(os.path.join(ADVERSAIRES_DIR, filename))
+
+
+def resolve_team(names: list[str]) -> list[dict]:
+    from catalog import catalog
+    entries = []
+    for name in names:
+        entry = catalog.find(name.strip())
+        if entry is None:
+            raise SystemExit(f"❌ Pokémon inconnu : {name}")
+        entries.append(entry)
+    return entries
+
+
+# ───────────────────────────────────────────────────────────────
+# 🎲 Monte-Carlo (multiprocessus)
+# ───────────────────────────────────────────────────────────────
+def _run_chunk(job):
+    """Exécuté dans un processus : un lot de combats contre un champion."""
+    (leader_index, chunk_index, n, seed, team_entries, pool_entries,
+     random_team_size, iv, policy_name, bot_team) = job
+    rng = random.Random(f"{seed}:{leader_index}:{chunk_index}")
+    policy = POLICIES[policy_name]
+
+    wins = draws = turns = hp_left = 0
+    for _ in range(n):
+        entries = team_entries or rng.sample(pool_entries, random_team_size)
+        team = [build_pokemon(e, roll_ivs(rng, iv)) for e in entries]
+        res = simulate_battle(team, bot_team, rng, policy)
+        turns += res["turns"]
+        if res["winner"] == "player":
+            wins += 1
+            hp_left += res["player_hp"]
+        elif res["winner"] == "draw":
+            draws += 1
+    return leader_index, n, wins, draws, turns, hp_left
+
+
+def run_simulation(adversaires, fights, seed=0, team_entries=None, pool_entries=None,
+                   random_team_size=3, iv=None, policy="random", workers=None):
+    """Simule `fights` combats par champion et retourne les statistiques agrégées."""
+    jobs = []
+    for leader_index, adv in enumerate(adversaires):
+        for chunk_index, start in enumerate(range(0, fights, CHUNK_SIZE)):
+            n = min(CHUNK_SIZE, fights - start)
+            jobs.append((leader_index, chunk_index, n, seed, team_entries, pool_entries,
+                         random_team_size, iv, policy, adv["pokemons"]))
+
+    totals = {i: [0, 0, 0, 0, 0] for i in range(len(adversaires))}
+    if workers == 1:
+        results = map(_run_chunk, jobs)
+    else:
+        pool = Pool(workers)
+        results = pool.imap_unordered(_run_chunk, jobs)
+    try:
+        for leader_index, n, wins, draws, turns, hp_left in results:
+            for i, value in enumerate((n, wins, draws, turns, hp_left)):
+                totals[leader_index][i] += value
+    finally:
+        if workers != 1:
+            pool.close()
+            pool.join()
+
+    report = []
+    for leader_index, adv in enumerate(adversaires):
+        n, wins, draws, turns, hp_left = totals[leader_index]
+        report.append({
+            "leader":          adv["name"],
+            "fights":          n,
+            "win_rate":        wins / n if n else 0.0,
+            "draw_rate":       draws / n if n else 0.0,
+            "avg_turns":       turns / n if n else 0.0,
+            "avg_hp_left_win": hp_left / wins if wins else 0.0,
+        })
+    return report
+
+
+# ───────────────────────────────────────────────────────────────
+# 🖥️ CLI
+# ───────────────────────────────────────────────────────────────
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulateur de combats PokeMouille (équilibrage des champions).")
+    parser.add_argument("--region", default="kanto", help="kanto, johto, hoenn, sinnoh, unys ou all (adversaires.json)")
+    parser.add_argument("--leader", help="ne simuler qu'un champion (nom exact)")
+    team = parser.add_mutually_exclusive_group(required=True)
+    team.add_argument("--team", help="équipe du joueur, noms séparés par des virgules")
+    team.add_argument("--random-team", type=int, metavar="N", help="équipe de N Pokémon tirés au hasard dans la région")
+    parser.add_argument("--iv", type=int, default=None, help="IV fixes (0-31) ; aléatoires par défaut")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random", help="choix d'attaque du joueur")
+    parser.add_argument("--fights", type=int, default=10000, help="combats par champion")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processus (1 = sans multiprocessing)")
+    parser.add_argument("--json", action="store_true", help="sortie JSON")
+    args = parser.parse_args(argv)
+    if args.fights <= 0:
+        parser.error("--fights doit être > 0")
+    if args.workers is not None and args.workers <= 0:
+        parser.error("--workers doit être > 0")
+
+    adversaires = load_adversaires(args.region)
+    if args.leader:
+        adversaires = [a for a in adversaires if a["name"].lower() == args.leader.lower()]
+        if not adversaires:
+            raise SystemExit(f"❌ Champion inconnu : {args.leader}")
+
+    team_entries = pool_entries = None
+    if args.team:
+        team_entries = resolve_team(args.team.split(","))
+    else:
+        from catalog import catalog
+        region = args.region.capitalize() if args.region != "all" else None
+        pool_entries = list(catalog.region_pools(region)[0])
+        if not 0 < args.random_team <= len(pool_entries):
+            parser.error(f"--random-team doit être entre 1 et {len(pool_entries)} (Pokémon de la région)")
+
+    start = time.perf_counter()
+    report = run_simulation(
+        adversaires, args.fights, seed=args.seed,
+        team_entries=team_entries, pool_entries=pool_entries,
+        random_team_size=args.random_team or 0, iv=args.iv,
+        policy=args.policy, workers=args.workers,
+    )
+    elapsed = time.perf_counter() - start
+    total = sum(r["fights"] for r in report)
+
+    if args.json:
+        print(json.dumps({"seed": args.seed, "elapsed": elapsed, "results": report}, ensure_ascii=False, indent=2))
+        return
+
+    team_label = args.team or f"{args.random_team} Pokémon aléatoires ({args.region})"
+    print(f"Équipe : {team_label} | IV : {args.iv if args.iv is not None else 'aléatoires'} | "
+          f"politique : {args.policy} | graine : {args.seed}")
+    print(f"{'Champion':<34} {'Victoires':>9} {'Nuls':>6} {'Tours':>6} {'PV restants':>12}")
+    for r in report:
+        print(f"{r['leader']:<34} {r['win_rate']:>8.1%} {r['draw_rate']:>6.1%} "
+              f"{r['avg_turns']:>6.1f} {r['avg_hp_left_win']:>12.1f}")
+    print(f"{total} combats en {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} combats/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,9 @@
 # utils.py
 import random
-import json
-import os
 import unicodedata
+from typing import NamedTuple
 
-# ------------ Chargement unique des données d'attaques ------------
-script_dir = os.path.dirname(os.path.abspath(__file__))
-attack_data_path = os.path.join(script_dir, "..", "json", "attack_data.json")
-
-with open(attack_data_path, encoding="utf-8") as f:
-    all_attacks = json.load(f)
+from data_registry import registry
 
 # ------------ Normalisation (sans accents, minuscule) ------------
 def _norm(s: str) -> str:
@@ -41,32 +35,129 @@ TYPE_CHART = {
     "fee":      {"x2": ["combat", "dragon", "tenebres"], "x0.5": ["feu", "poison", "acier"], "x0": []},
 }
 
+# ------------ Tables compilées (types → ids, matrice 18×18, attaques) ------------
+# Construites une seule fois au chargement : un calcul de dégâts ne fait plus
+# que quelques accès dictionnaire / liste (ni _norm, ni parcours de listes).
+TYPE_NAMES = tuple(TYPE_CHART)                        # id → nom normalisé
+TYPE_IDS = {name: i for i, name in enumerate(TYPE_NAMES)}
+NB_TYPES = len(TYPE_NAMES)
+
+# EFFECTIVENESS[atk_id * NB_TYPES + def_id] → 0 / 0.5 / 1 / 2
+EFFECTIVENESS = [1.0] * (NB_TYPES * NB_TYPES)
+for _atk, _chart in TYPE_CHART.items():
+    _row = TYPE_IDS[_atk] * NB_TYPES
+    for _mult, _key in ((2.0, "x2"), (0.5, "x0.5"), (0.0, "x0")):
+        for _def in _chart[_key]:
+            EFFECTIVENESS[_row + TYPE_IDS[_def]] = _mult
+
+_type_id_cache = {}
+
+def type_id(name) -> int:
+    """Id du type (chaîne brute, accents/majuscules tolérés), -1 si inconnu."""
+    tid = _type_id_cache.get(name)
+    if tid is None:
+        tid = _type_id_cache[name] = TYPE_IDS.get(_norm(name), -1)
+    return tid
+
+
+class AttackRecord(NamedTuple):
+    name: str
+    type_name: str      # type normalisé (tel que renvoyé dans les détails)
+    type_id: int        # -1 si type inconnu (efficacité neutre)
+    power: int
+    category: str       # 'physique' | 'speciale' | '' (catégorie brute)
+    resolved: str       # catégorie effective utilisée pour les stats
+    atk_key: str        # stat offensive de l'attaquant
+    def_key: str        # stat défensive du défenseur
+
+
+def _compile_attack(attack: dict) -> AttackRecord:
+    raw_cat = (attack.get("category") or attack.get("categorie") or "").lower()
+    category = "physique" if raw_cat == "physique" else ("speciale" if raw_cat in ("speciale", "special") else "")
+    try:
+        power = int(attack.get("damage", 50))
+    except (TypeError, ValueError):
+        power = 50
+    # Sans catégorie : puissance >= 60 → physique, sinon spéciale
+    resolved = category or ("physique" if power >= 60 else "speciale")
+    atk_key, def_key = (("attack", "defense") if resolved == "physique"
+                        else ("special_attack", "special_defense"))
+    attack_type = _norm(attack.get("type", "normal"))
+    return AttackRecord(attack.get("name", ""), attack_type, TYPE_IDS.get(attack_type, -1),
+                        power, category, resolved, atk_key, def_key)
+
+
+# Anciennes orthographes → nom exact dans attack_data.json. Les captures en base
+# gardent les attaques telles qu'elles ont été tirées : elles restent reconnues.
+ATTACK_ALIASES = {
+    "Bomb-Beurk":    "Bombe-Beurk",
+    "Chage":         "Charge",
+    "Coup dBoule":   "Coup d’Boule",
+    "Coup d'Boule":  "Coup d’Boule",
+    "KoudeKorne":    "Koud’Korne",
+    "Lance Flamme":  "Lance-Flammes",
+    "Meteore":       "Meteores",
+    "PPistolet a O": "Pistolet a O",
+    "Psykp":         "Psyko",
+}
+
+
+def _attack_tables(attacks: list) -> tuple[dict, dict]:
+    """Index nom (minuscules) → attaque et → AttackRecord ; la première occurrence l'emporte."""
+    by_name = {}
+    for attack in attacks:
+        by_name.setdefault(attack.get("name", "").lower(), attack)
+    for alias, name in ATTACK_ALIASES.items():
+        if name.lower() in by_name:
+            by_name.setdefault(alias.lower(), by_name[name.lower()])
+    return by_name, {key: _compile_attack(attack) for key, attack in by_name.items()}
+
+
+# Tables précalculées dans l'instantané json/snapshot.bin (data_pipeline.py)
+SNAPSHOT_INDEXES = {_attack_tables: ["attack_data.json"]}
+
+
+# ------------ Données d'attaques (registre partagé, rechargées à chaud) ------------
+def _index_attacks(attacks: list):
+    """Les deux index sont remplacés d'un coup quand attack_data.json est rechargé."""
+    global all_attacks, ATTACKS_BY_NAME, ATTACK_RECORDS
+    by_name, records = registry.derived("attack_data.json", _attack_tables)
+    all_attacks, ATTACKS_BY_NAME, ATTACK_RECORDS = attacks, by_name, records
+
+
+# Après AttackRecord : le bloc de l'instantané contient des AttackRecord déjà construits
+_index_attacks(registry.get("attack_data.json"))
+registry.subscribe("attack_data.json", _index_attacks)
+
+
 # ------------ Utilitaires attaques ------------
 def get_attack_info(name):
-    for attack in all_attacks:
-        if attack.get("name", "").lower() == str(name).lower():
-            return attack
-    return None
+    return ATTACKS_BY_NAME.get(str(name).lower())
 
-def _type_effectiveness(attack_type: str, defender_types):
-    """Renvoie un multiplicateur (0, 0.5, 1, 2, 4) en cumulant sur 1 ou 2 types."""
-    atk = _norm(attack_type)
-    chart = TYPE_CHART.get(atk, {"x2": [], "x0.5": [], "x0": []})
+def get_attack_record(name) -> AttackRecord | None:
+    return ATTACK_RECORDS.get(str(name).lower())
+
+def _effectiveness(atk_type_id: int, defender_types) -> float:
+    if atk_type_id < 0:
+        return 1.0
+    row = atk_type_id * NB_TYPES
     mult = 1.0
-    for t in defender_types or []:
-        dt = _norm(t)
-        if dt in chart["x0"]:
-            return 0.0
-        if dt in chart["x2"]:
-            mult *= 2.0
-        elif dt in chart["x0.5"]:
-            mult *= 0.5
+    for t in defender_types or ():
+        dt = type_id(t)
+        if dt >= 0:
+            mult *= EFFECTIVENESS[row + dt]
     return mult
 
+def _type_effectiveness(attack_type: str, defender_types):
+    """Renvoie un multiplicateur (0, 0.5, 1, 2, 4) en cumulant sur 1 ou 2 types."""
+    return _effectiveness(type_id(attack_type), defender_types)
+
 # ------------ Calcul des dégâts ------------
+LEVEL = 50
+_LEVEL_FACTOR = 2 * LEVEL / 5 + 2
 
 
-def calculate_damage(attacker, defender, attack_name, return_details: bool = False):
+def calculate_damage(attacker, defender, attack_name, return_details: bool = False, rng=random):
     """
     Si return_details=False (par défaut) -> int
     Si return_details=True  -> dict:
@@ -81,10 +172,11 @@ def calculate_damage(attacker, defender, attack_name, return_details: bool = Fal
           "power": int,
           "attack_type": str
         }
+    rng : générateur aléatoire (module random par défaut, random.Random(seed) pour rejouer)
     """
-    attack_info = get_attack_info(attack_name)
-    if not attack_info:
-        dmg = random.randint(5, 10)
+    record = ATTACK_RECORDS.get(str(attack_name).lower())
+    if record is None:
+        dmg = rng.randint(5, 10)
         if not return_details:
             return dmg
         return {
@@ -92,41 +184,28 @@ def calculate_damage(attacker, defender, attack_name, return_details: bool = Fal
             "stab": False, "variance": 1.0, "category": "", "power": 0, "attack_type": "normal"
         }
 
-    raw_cat = (attack_info.get("category") or attack_info.get("categorie") or "").lower()
-    category = "physique" if raw_cat == "physique" else ("speciale" if raw_cat in ("speciale", "special") else "")
-    try:
-        power = int(attack_info.get("damage", 50))
-    except (TypeError, ValueError):
-        power = 50
-
-    attack_type = _norm(attack_info.get("type", "normal"))
+    atk_stat = attacker["stats"].get(record.atk_key, 50)
+    def_stat = defender["stats"].get(record.def_key, 50)
 
-    if category == "physique":
-        atk_stat = attacker["stats"].get("attack", 50)
-        def_stat = defender["stats"].get("defense", 50)
-    elif category == "speciale":
-        atk_stat = attacker["stats"].get("special_attack", 50)
-        def_stat = defender["stats"].get("special_defense", 50)
+    atk_type_id = record.type_id
+    stab_flag = False
+    if atk_type_id >= 0:
+        for t in attacker.get("type") or ():
+            if type_id(t) == atk_type_id:
+                stab_flag = True
+                break
     else:
-        if power >= 60:
-            atk_stat = attacker["stats"].get("attack", 50)
-            def_stat = defender["stats"].get("defense", 50)
-        else:
-            atk_stat = attacker["stats"].get("special_attack", 50)
-            def_stat = defender["stats"].get("special_defense", 50)
-
-    attacker_types = [_norm(t) for t in (attacker.get("type") or [])]
-    stab_flag = attack_type in attacker_types
+        # Type d'attaque hors table : comparaison par nom (comportement historique)
+        stab_flag = record.type_name in [_norm(t) for t in (attacker.get("type") or [])]
     stab = 1.5 if stab_flag else 1.0
 
-    eff = _type_effectiveness(attack_type, defender.get("type") or [])
+    eff = _effectiveness(atk_type_id, defender.get("type"))
 
-    crit_flag = (random.randint(1, 16) == 1)
+    crit_flag = (rng.randint(1, 16) == 1)
     crit = 1.5 if crit_flag else 1.0
-    variance = random.uniform(0.85, 1.00)
+    variance = rng.uniform(0.85, 1.00)
 
-    level = 50
-    core = (((2 * level / 5 + 2) * power * (atk_stat / max(1, def_stat))) / 50) + 2
+    core = ((_LEVEL_FACTOR * record.power * (atk_stat / max(1, def_stat))) / 50) + 2
     modifier = stab * eff * crit * variance
 
     # Immunité: dégâts 0, mais on renvoie tout de même le breakdown cohérent
@@ -145,9 +224,9 @@ def calculate_damage(attacker, defender, attack_name, return_details: bool = Fal
         "eff_label": describe_effectiveness(eff),
         "stab": stab_flag,
         "variance": float(variance),
-        "category": category or ("physique" if power >= 60 else "speciale"),
-        "power": power,
-        "attack_type": attack_type
+        "category": record.resolved,
+        "power": record.power,
+        "attack_type": record.type_name
     }
 
 # (Optionnel) Utilitaire si tu veux afficher l’info d’efficacité/crit ailleurs
@@ -1,12 +1,18 @@
 # croco_event.py
-import time
 import discord
 import random
 
-from discord.ext import tasks, commands
+from discord.ext import commands
 from typing import Optional, Callable
 
-DEFAULT_INTERVAL = 60  # secours si rien n'est passé
+from presence import presence, JOIN
+from scheduler import scheduler
+
+FIRE_JOB = "croco_event"   # déclenchement (armé seulement quand Croco est en vocal)
+
+
+def _fire_delay() -> int:
+    return random.randint(1500, 2100)  # 25 à 35 min
 
 def setup_croco_event(
     bot: commands.Bot,
@@ -15,11 +21,9 @@ def setup_croco_event(
     target_user_id: int,
     spawn_func: Optional[Callable] = None,   # async def spawn_pokemon(channel, force=False, author=None, target_user=None, pokemon_name=None, shiny_rate=64)
     role_id: Optional[int] = None,
-    **kwargs  # ← accepte interval_seconds sans planter
+    **kwargs  # ← accepte interval_seconds sans planter (présence suivie par événements)
 ):
-    interval_seconds = int(max(1, kwargs.get("interval_seconds", DEFAULT_INTERVAL)))
-
-    # État partagé (évite doublons de tâche)
+    # État partagé (évite doublons d'abonnement)
     if not hasattr(bot, "_croco_event_state"):
         bot._croco_event_state = {"task_started": False}
     state = bot._croco_event_state
@@ -29,8 +33,6 @@ def setup_croco_event(
         "target_user_id": target_user_id,
         "spawn_func": spawn_func,
         "role_id": role_id,
-        "interval_seconds": interval_seconds,
-        "next_fire_ts": None,  # timestamp du prochain déclenchement (None si désarmé)
     })
 
     async def get_channels():
@@ -56,74 +58,57 @@ def setup_croco_event(
             return ctx.author.id == state["target_user_id"]
         return commands.check(predicate)
 
-    @tasks.loop(seconds=DEFAULT_INTERVAL)  # ajusté avant start via change_interval(...)
-    async def croco_minutely_event():
-        vc, channel = await get_channels()
-        if not vc or not hasattr(vc, "members"):
-            return
-        if not channel or not hasattr(channel, "send"):
-            return
-
-        # Croco en vocal ?
-        croco_in_vc = any(m.id == state["target_user_id"] for m in vc.members)
+    def croco_in_vc() -> bool:
+        return presence.in_voice(state["target_user_id"], state["voice_channel_id"])
 
-        # Pas en vocal → désarmer le timer
-        if not croco_in_vc:
-            state["next_fire_ts"] = None
+    async def croco_presence(event, member, voice_channel):
+        if member.id != state["target_user_id"] or voice_channel.id != state["voice_channel_id"]:
             return
 
-        now = time.time()
+        # Arrivée → armer (si pas déjà armé) ; départ → désarmer
+        if event != JOIN:
+            scheduler.cancel(FIRE_JOB)
+        elif scheduler.get(FIRE_JOB) is None:
+            scheduler.call_later(_fire_delay(), croco_fire, name=FIRE_JOB)
 
-        # En vocal mais pas armé → armer
-        if state["next_fire_ts"] is None:
-            state["next_fire_ts"] = now + random.randint(1500, 2100)  # 25 à 35 min
+    async def croco_fire():
+        vc, channel = await get_channels()
+        if not croco_in_vc() or not channel or not hasattr(channel, "send"):
+            return   # réarmé par croco_presence à son retour
 
+        croco_member = vc.guild.get_member(state["target_user_id"])
+        if not croco_member:
+            scheduler.call_later(_fire_delay(), croco_fire, name=FIRE_JOB)
             return
 
-        # L'heure est arrivée → déclenchement + réarmement
-        if now >= state["next_fire_ts"]:
-            croco_member = vc.guild.get_member(state["target_user_id"])
-            if not croco_member:
-                state["next_fire_ts"] = now + random.randint(1500, 2100)
-
-                return
-
-            # 1) Message flatteur public
-            try:
-                await channel.send(f"💎 {croco_member.mention} est le plus beau ! 😍")
-            except Exception:
-                pass
+        # 1) Message flatteur public
+        try:
+            await channel.send(f"💎 {croco_member.mention} est le plus beau ! 😍")
+        except Exception:
+            pass
 
-            # 2) Spawn (appel direct si fourni, sinon commande texte)
-            try:
-                if callable(state["spawn_func"]):
-                    await state["spawn_func"](
-                        channel=channel,
-                        force=True,
-                        author=croco_member,
-                        target_user=croco_member,
-                        shiny_rate=64
-                    )
-                else:
-                    await channel.send(f"!spawn {croco_member.mention}")
-            except Exception:
-                pass
+        # 2) Spawn (appel direct si fourni, sinon commande texte)
+        try:
+            if callable(state["spawn_func"]):
+                await state["spawn_func"](
+                    channel=channel,
+                    force=True,
+                    author=croco_member,
+                    target_user=croco_member,
+                    shiny_rate=64
+                )
+            else:
+                await channel.send(f"!spawn {croco_member.mention}")
+        except Exception:
+            pass
 
-            # Réarmer
-            state["next_fire_ts"] = now + random.randint(1500, 2100)
+        # Réarmer
+        scheduler.call_later(_fire_delay(), croco_fire, name=FIRE_JOB)
 
-    # Démarrage via listener (compatible discord.py v2+)
+    # Abonnement aux arrivées / départs du vocal (la synchro d'on_ready annonce Croco s'il est déjà là)
     if not state["task_started"]:
-        async def _on_ready():
-            if not state["task_started"]:
-                try:
-                    croco_minutely_event.change_interval(seconds=state["interval_seconds"])
-                except Exception:
-                    pass
-                croco_minutely_event.start()
-                state["task_started"] = True
-
-        bot.add_listener(_on_ready, "on_ready")
+        presence.subscribe(croco_presence)
+        state["task_started"] = True
 
     # ---------- Commandes ----------
     @bot.command(name="croco_now")
@@ -149,11 +134,9 @@ def setup_croco_event(
             await channel.send(f"!spawn {ctx.author.mention}")
 
         # Réarmement + DM
-        # Réarmement + DM
-        state["next_fire_ts"] = time.time() + random.randint(1500, 2100)
+        job = scheduler.call_later(_fire_delay(), croco_fire, name=FIRE_JOB)
 
-        remaining = max(0, int(state["next_fire_ts"] - time.time()))
-        m, s = divmod(remaining, 60)
+        m, s = divmod(int(job.remaining()), 60)
         await _send_dm_or_fallback(ctx, f"✅ Événement déclenché. Prochain dans ~{m} min {s:02d} s.")
 
 
@@ -167,21 +150,21 @@ def setup_croco_event(
         parts.append(f"🗣️ Vocal configuré : {'oui' if vc and hasattr(vc, 'members') else 'non'}")
         parts.append(f"💬 Texte configuré : {'oui' if channel and hasattr(channel, 'send') else 'non'}")
 
-        in_vc = bool(vc and hasattr(vc, 'members') and any(m.id == state['target_user_id'] for m in vc.members))
+        in_vc = croco_in_vc()
         parts.append(f"✅ Croco en vocal : {'oui' if in_vc else 'non'}")
 
         direct_call = callable(state["spawn_func"])
         parts.append(f"🎯 Mode spawn : {'appel direct à spawn_pokemon' if direct_call else 'commande texte !spawn'}")
-        parts.append(f"🕒 Vérification : toutes les {state['interval_seconds']} s")
+        parts.append("🕒 Présence : suivie en temps réel")
         parts.append("🎲 Fenêtre spawn : 25–35 min")
 
 
         # Compte à rebours
-        if not in_vc or state.get("next_fire_ts") is None:
+        job = scheduler.get(FIRE_JOB)
+        if not in_vc or job is None:
             parts.append("⏳ Prochain événement : — (désarmé : pas en vocal)")
         else:
-            remaining = max(0, int(state["next_fire_ts"] - time.time()))
-            m, s = divmod(remaining, 60)
+            m, s = divmod(int(job.remaining()), 60)
             parts.append(f"⏳ Prochain événement : dans {m} min {s:02d} s")
 
         await _send_dm_or_fallback(ctx, "\n".join(parts))
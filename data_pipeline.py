@@ -0,0 +1,565 @@
+"""Pipeline des données json/ : validation, normalisation, shiny, instantané.
+
+Remplace les scripts ponctuels de script_AIDE/ (anti_accent_attack,
+antiAccent_pokemon_data, normal_to_shiny, adapte_xp, check_tout_les_poke,
+attaque_ou_pas) par une seule commande, qui enchaîne :
+
+  1. Schéma        : chaque fichier se décode, ses fiches ont les champs attendus (SCHEMAS)
+  2. Normalisation : types et catégories en minuscules sans accents (électrik → electrique,
+                     "vol/poison" → ["vol", "poison"]), attaques des Pokémon écrites
+                     exactement comme dans attack_data.json (nom exact gardé, sinon
+                     ancienne orthographe ou variante accentuée), xp_evo = somme des stats
+  3. Shiny         : chaque *_shiny.json de SHINY_PAIRS redérivé de son fichier normal
+  4. Références    : chaque attaque existe dans attack_data.json, chaque évolution
+                     existe dans son fichier
+  5. Artefacts     : instantané json/snapshot.bin et ses index (data_snapshot), avec --snapshot
+
+Une fois les fichiers passés par le pipeline, le bot peut chercher une
+attaque ou un type par son nom exact, sans renormaliser à chaque rendu.
+
+    python data_pipeline.py                → vérification seule, aucun fichier écrit
+    python data_pipeline.py --write        → réécrit les fichiers à normaliser / shiny à redériver
+    python data_pipeline.py --snapshot     → reconstruit json/snapshot.bin si tout est propre
+"""
+import argparse
+import difflib
+import fnmatch
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+
+import data_snapshot
+from catalog import SHINY_SUFFIX, SNAPSHOT_INDEXES, REGION_FILES, catalog_key
+from combat.utils import ATTACK_ALIASES, TYPE_IDS, normalize_text
+from combat.utils import SNAPSHOT_INDEXES as ATTACK_INDEXES
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+json_dir = os.path.join(script_dir, "json")
+
+NO_EVO = "pas evo"
+
+# ───────────────────────────────────────────────────────────────
+# 📐 Schémas
+# ───────────────────────────────────────────────────────────────
+# Champ → (types acceptés, obligatoire). `open` : champs supplémentaires tolérés.
+POKEMON_SCHEMA = {
+    "fields": {
+        "name": (str, True), "type": (list, True), "image": (str, True),
+        "attacks": (list, True), "stats": (dict, True),
+        "current_xp": (int, False), "xp_evo": (int, False), "evo": (dict, False),
+        "probabilité": ((int, float), False),
+    },
+    "open": False,
+}
+ATTACK_SCHEMA = {
+    "fields": {
+        "name": (str, True), "type": (str, True), "damage": (int, True),
+        "category": (str, True), "effect": (str, False),
+    },
+    "open": False,
+}
+TRAINER_SCHEMA = {
+    "fields": {"id": (str, True), "name": (str, True), "repliques": (dict, True), "pokemons": (list, True)},
+    "open": False,
+}
+ITEM_SCHEMA = {
+    "fields": {
+        "item_name": (str, True), "rarity": (str, True), "description": (str, True),
+        "image": (str, True), "price": (int, True), "extra": (str, False),
+    },
+    "open": True,   # champs propres à l'usage (shiny_rate, probabilité, xp_evo…)
+}
+STAT_KEYS = ("hp", "attack", "defense", "special_attack", "special_defense", "speed")
+ATTACK_CATEGORIES = ("physique", "speciale", "statut")
+
+# Motif du chemin (relatif à json/) → nature du fichier ; les autres sont seulement décodés
+SCHEMAS = (
+    ("attack_data.json",           "attack"),
+    ("adversaires*.json",          "trainer"),
+    ("ensemble_adversaire*.json",  "trainer"),
+    ("pokemon_type_sprites.json",  None),
+    ("pokemon_*.json",             "pokemon"),
+    ("mega.json",                  "pokemon"),
+    ("marche_noir/oeuf*.json",     "pokemon"),
+    ("actu/*/pokemon_*.json",      "pokemon"),
+    ("item.json",                  "item"),
+    ("fishing_items.json",         "item"),
+    ("enquete.json",               "item"),
+    ("marche_noir.json",           "item"),
+    ("pêche/*.json",               "item"),
+    ("actu/*/objet_*.json",        "item"),
+)
+KIND_SCHEMAS = {"attack": ATTACK_SCHEMA, "trainer": TRAINER_SCHEMA, "pokemon": POKEMON_SCHEMA, "item": ITEM_SCHEMA}
+
+# Fichiers que le bot ne lit pas (brouillons, anciennes versions) : seulement décodés
+IGNORED = ("new_pokemons/*", "pokemons.json", "pokemons_shiny.json", "captures.json")
+
+# (fichier normal, fichier shiny dérivé). Les pools des pokéballs n'y sont pas :
+# leur version shiny est composée à la main (attaques différentes, une fiche en moins).
+SHINY_PAIRS = [*REGION_FILES.values(),
+               ("pokemon_legendaire_normal.json", "pokemon_legendaire_shiny.json"),
+               ("pokemon_rare_pokeball_normal.json", "pokemon_rare_pokeball_shiny.json"),
+               ("marche_noir/oeuf.json", "marche_noir/oeuf_shiny.json")]
+
+TYPE_ALIASES = {"electrik": "electrique"}
+CATEGORY_ALIASES = {"special": "speciale"}
+
+
+def _where(i: int, entry) -> str:
+    """Position d'une fiche dans les messages : « #12 Pikachu »."""
+    name = entry.get("name") or entry.get("item_name") if isinstance(entry, dict) else None
+    return f"#{i} {name}" if name else f"#{i}"
+
+
+def kind_of(label: str) -> str | None:
+    if any(fnmatch.fnmatch(label, pattern) for pattern in IGNORED):
+        return None
+    for pattern, kind in SCHEMAS:
+        if fnmatch.fnmatch(label, pattern):
+            return kind
+    return None
+
+
+def shiny_pairs(root: str = json_dir) -> list[tuple[str, str]]:
+    """SHINY_PAIRS + les fichiers des événements (actu/<lieu>/pokemon_<lieu>_normal.json)."""
+    pairs = list(SHINY_PAIRS)
+    for label, _ in data_snapshot._json_files(os.path.join(root, "actu")):
+        label = f"actu/{label.replace(os.sep, '/')}"
+        if fnmatch.fnmatch(label, "actu/*/pokemon_*_normal.json"):
+            pairs.append((label, label.replace("_normal.json", "_shiny.json")))
+    return pairs
+
+
+# ───────────────────────────────────────────────────────────────
+# 🔤 Normalisation
+# ───────────────────────────────────────────────────────────────
+def ascii_key(text: str) -> str:
+    """Sans accents, minuscules, sans espaces autour (électrik → electrik)."""
+    return normalize_text(str(text)).lower().strip()
+
+
+def canonical_types(types: list) -> list[str]:
+    """["Électrik", "vol/poison"] → ["electrique", "vol", "poison"]."""
+    result = []
+    for t in types:
+        for part in str(t).split("/"):
+            key = ascii_key(part)
+            result.append(TYPE_ALIASES.get(key, key))
+    return result
+
+
+def make_shiny(pokemon: dict) -> dict:
+    """Fiche shiny dérivée : nom_shiny, sprite shiny, évolution vers le shiny du fichier shiny."""
+    p = dict(pokemon)
+    p["name"] = p["name"] + SHINY_SUFFIX
+
+    image = p.get("image", "")
+    if "sprites/pokemon/" in image and "/shiny/" not in image:
+        p["image"] = image.replace("sprites/pokemon/", "sprites/pokemon/shiny/")
+
+    if "evo" in p:
+        evo = dict(p["evo"])
+        if evo.get("name") not in (None, NO_EVO):
+            evo["name"] = evo["name"] + SHINY_SUFFIX
+        if evo.get("file") not in (None, NO_EVO):
+            evo["file"] = evo["file"].replace("normal", "shiny")
+        p["evo"] = evo
+    return p
+
+
+# ───────────────────────────────────────────────────────────────
+# ✍️ Réécriture en place
+# ───────────────────────────────────────────────────────────────
+# Les fichiers json/ sont indentés à la main (souvent irrégulièrement) : plutôt que
+# de tout redumper, seules les valeurs modifiées sont remplacées dans le texte d'origine.
+_WS = re.compile(r"[ \t\r\n]*")
+_DECODER = json.JSONDecoder()
+
+
+def _parse_spans(text: str, idx: int = 0):
+    """Décode la valeur à `idx` → (valeur, début, fin, enfants) ; enfants : dict/list de nœuds."""
+    start = _WS.match(text, idx).end()
+    char = text[start:start + 1]
+    if char not in ("{", "["):
+        value, end = _DECODER.raw_decode(text, start)
+        return value, start, end, None
+
+    close = "}" if char == "{" else "]"
+    children = {} if char == "{" else []
+    idx = _WS.match(text, start + 1).end()
+    if text[idx:idx + 1] == close:
+        return ({} if char == "{" else []), start, idx + 1, children
+    while True:
+        if char == "{":
+            key, idx = _DECODER.raw_decode(text, idx)
+            idx = _WS.match(text, idx).end()
+            if text[idx:idx + 1] != ":":
+                raise ValueError(f"« : » attendu à la position {idx}")
+            children[key] = node = _parse_spans(text, idx + 1)
+        else:
+            children.append(node := _parse_spans(text, idx))
+        idx = _WS.match(text, node[2]).end()
+        if text[idx:idx + 1] == close:
+            break
+        if text[idx:idx + 1] != ",":
+            raise ValueError(f"« , » ou « {close} » attendu à la position {idx}")
+        idx = _WS.match(text, idx + 1).end()
+
+    if char == "{":
+        value = {key: node[0] for key, node in children.items()}
+    else:
+        value = [node[0] for node in children]
+    return value, start, idx + 1, children
+
+
+def _line_indent(text: str, pos: int) -> str:
+    line = text.rfind("\n", 0, pos) + 1
+    return _WS.match(text, line).group().lstrip("\r\n")
+
+
+def _dump_at(text: str, node, value, indent: int) -> str:
+    """`value` sérialisée pour remplacer `node` : sur une ligne si l'ancienne valeur l'était."""
+    _, start, end, _ = node
+    if "\n" not in text[start:end]:
+        return json.dumps(value, ensure_ascii=False)
+    dumped = json.dumps(value, ensure_ascii=False, indent=indent)
+    return dumped.replace("\n", "\n" + _line_indent(text, start))
+
+
+def _patch_list(text: str, node, new: list, edits: list, indent: int):
+    value, start, end, items = node
+    if len(items) == len(new):
+        for item, v in zip(items, new):
+            _patch(text, item, v, edits, indent)
+        return
+    if not items or not new:
+        edits.append((start, end, json.dumps(new, ensure_ascii=False, indent=indent) if new else "[]"))
+        return
+
+    # Séparateur du fichier entre deux éléments (", " ou ",\n    "…)
+    sep = text[items[0][2]:items[1][1]] if len(items) > 1 else ",\n" + _line_indent(text, items[0][1])
+    matcher = difflib.SequenceMatcher(
+        None, [json.dumps(v, sort_keys=True) for v in value],
+        [json.dumps(v, sort_keys=True) for v in new], autojunk=False)
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op == "equal":
+            continue
+        if op == "replace" and i2 - i1 == j2 - j1:
+            for item, v in zip(items[i1:i2], new[j1:j2]):
+                _patch(text, item, v, edits, indent)
+            continue
+        added = sep.join(_dump_at(text, items[min(i1, len(items) - 1)], v, indent) for v in new[j1:j2])
+        if op == "insert":
+            if i1 > 0:
+                edits.append((items[i1 - 1][2], items[i1 - 1][2], sep + added))
+            else:
+                edits.append((items[0][1], items[0][1], added + sep))
+        elif op == "delete":
+            if i1 > 0:
+                edits.append((items[i1 - 1][2], items[i2 - 1][2], ""))
+            else:
+                edits.append((items[0][1], items[i2][1], ""))
+        else:
+            edits.append((items[i1][1], items[i2 - 1][2], added))
+
+
+def _patch(text: str, node, new, edits: list, indent: int):
+    value, start, end, children = node
+    if value == new and type(value) is type(new):
+        return
+    if isinstance(value, dict) and isinstance(new, dict) and list(value) == list(new):
+        for key, v in new.items():
+            _patch(text, children[key], v, edits, indent)
+    elif isinstance(value, list) and isinstance(new, list):
+        _patch_list(text, node, new, edits, indent)
+    else:
+        edits.append((start, end, _dump_at(text, node, new, indent)))
+
+
+def patch_json(text: str, new, indent: int) -> str | None:
+    """`text` dont seules les valeurs différentes de `new` sont réécrites ; None si impossible."""
+    try:
+        edits = []
+        _patch(text, _parse_spans(text), new, edits, indent)
+    except ValueError:
+        return None
+    for start, end, replacement in sorted(edits, key=lambda e: (e[0], e[1]), reverse=True):
+        text = text[:start] + replacement + text[end:]
+    try:
+        return text if json.loads(text) == new else None
+    except ValueError:
+        return None
+
+
+# ───────────────────────────────────────────────────────────────
+# 🧪 Pipeline
+# ───────────────────────────────────────────────────────────────
+@dataclass
+class PipelineReport:
+    errors: list = field(default_factory=list)      # "fichier : message"
+    warnings: list = field(default_factory=list)
+    changed: dict = field(default_factory=dict)     # label → raisons des réécritures
+    written: list = field(default_factory=list)
+    snapshot: dict | None = None
+
+    def error(self, label: str, message: str):
+        self.errors.append(f"{label} : {message}")
+
+    def warn(self, label: str, message: str):
+        self.warnings.append(f"{label} : {message}")
+
+    def change(self, label: str, reason: str):
+        reasons = self.changed.setdefault(label, [])
+        if reason not in reasons:
+            reasons.append(reason)
+
+
+class DataPipeline:
+    def __init__(self, root: str = json_dir):
+        self.root = root
+        self.report = PipelineReport()
+        self.docs: dict[str, object] = {}       # label → données (normalisées en mémoire)
+        self.invalid: set[str] = set()          # fichiers au schéma invalide (ni normalisés ni réécrits)
+        self._raw: dict[str, bytes] = {}
+        self._attacks: dict[str, str] = {}      # clé ascii → nom exact dans attack_data.json
+        self._names: set[str] = set()           # noms exacts de attack_data.json
+
+    # ── Chargement et schéma ─────────────────────────────────────────────────
+    def load(self):
+        for label, path in data_snapshot._json_files(self.root):
+            label = label.replace(os.sep, "/")
+            with open(path, "rb") as f:
+                raw = f.read()
+            try:
+                self.docs[label] = json.loads(raw)
+            except ValueError as e:
+                self.report.error(label, f"JSON invalide : {e}")
+                continue
+            self._raw[label] = raw
+
+    def _check_fields(self, label: str, where: str, entry, schema: dict) -> bool:
+        if not isinstance(entry, dict):
+            self.report.error(label, f"{where} : fiche attendue, trouvé {type(entry).__name__}")
+            return False
+        ok = True
+        for name, (types, required) in schema["fields"].items():
+            if name not in entry:
+                if required:
+                    self.report.error(label, f"{where} : champ « {name} » manquant")
+                    ok = False
+            elif not isinstance(entry[name], types) or isinstance(entry[name], bool):
+                self.report.error(label, f"{where} : « {name} » de type {type(entry[name]).__name__}")
+                ok = False
+        if not schema["open"]:
+            for name in entry.keys() - schema["fields"].keys():
+                self.report.warn(label, f"{where} : champ inconnu « {name} »")
+        return ok
+
+    def _check_pokemon(self, label: str, where: str, p) -> bool:
+        if not self._check_fields(label, where, p, POKEMON_SCHEMA):
+            return False
+        missing = [k for k in STAT_KEYS if not isinstance(p["stats"].get(k), int)]
+        if missing:
+            self.report.error(label, f"{where} : stats manquantes ou invalides {missing}")
+            return False
+        evo = p.get("evo")
+        if evo is not None and not (isinstance(evo.get("name"), str) and isinstance(evo.get("file"), str)):
+            self.report.error(label, f"{where} : « evo » doit avoir name et file")
+            return False
+        return True
+
+    def entries(self, kind: str):
+        """(label, où, fiche) valides de chaque fichier de cette nature (Pokémon des dresseurs compris)."""
+        for label, data in self.docs.items():
+            if label in self.invalid:
+                continue
+            file_kind = kind_of(label)
+            if file_kind == kind:
+                for i, entry in enumerate(data):
+                    yield label, _where(i, entry), entry
+            elif kind == "pokemon" and file_kind == "trainer":
+                for trainer in data:
+                    for i, p in enumerate(trainer["pokemons"]):
+                        yield label, f"{trainer['name']} {_where(i, p)}", p
+
+    def check_schemas(self):
+        for label, data in self.docs.items():
+            kind = kind_of(label)
+            if kind is None:
+                continue
+            if not isinstance(data, list):
+                self.report.error(label, f"liste de fiches attendue, trouvé {type(data).__name__}")
+                self.invalid.add(label)
+                continue
+            if kind == "pokemon":
+                check = self._check_pokemon
+            else:
+                schema = KIND_SCHEMAS[kind]
+                check = lambda lbl, where, entry, schema=schema: self._check_fields(lbl, where, entry, schema)
+            ok = all([check(label, _where(i, entry), entry) for i, entry in enumerate(data)])
+            if ok and kind == "trainer":
+                ok = all([self._check_pokemon(label, f"{t['name']} {_where(i, p)}", p)
+                          for t in data for i, p in enumerate(t["pokemons"])])
+            if not ok:
+                self.invalid.add(label)
+
+    # ── Normalisation ────────────────────────────────────────────────────────
+    def normalize(self):
+        for label, where, attack in self.entries("attack"):
+            key = ascii_key(attack["type"])
+            attack_type = TYPE_ALIASES.get(key, key)
+            key = ascii_key(attack["category"])
+            category = CATEGORY_ALIASES.get(key, key)
+            if (attack_type, category) != (attack["type"], attack["category"]):
+                attack["type"], attack["category"] = attack_type, category
+                self.report.change(label, "types / catégories d'attaques")
+            if attack_type not in TYPE_IDS:
+                self.report.error(label, f"{where} : type inconnu « {attack_type} »")
+            if category not in ATTACK_CATEGORIES:
+                self.report.error(label, f"{where} : catégorie inconnue « {category} »")
+            name_key = catalog_key(attack["name"])
+            if name_key in self._attacks:
+                self.report.error(label, f"{where} : même nom que « {self._attacks[name_key]} » (doublon)")
+            else:
+                self._attacks[name_key] = attack["name"]
+                self._names.add(attack["name"])
+
+        for label, where, p in self.entries("pokemon"):
+            types = canonical_types(p["type"])
+            if types != p["type"]:
+                p["type"] = types
+                self.report.change(label, "types des Pokémon")
+            for t in types:
+                if t not in TYPE_IDS:
+                    self.report.error(label, f"{where} : type inconnu « {t} »")
+
+            attacks = [self._attack_name(a) for a in p["attacks"]]
+            if attacks != p["attacks"]:
+                p["attacks"] = attacks
+                self.report.change(label, "noms d'attaques")
+
+            if "xp_evo" in p and p["xp_evo"] != sum(p["stats"][k] for k in STAT_KEYS):
+                p["xp_evo"] = sum(p["stats"][k] for k in STAT_KEYS)
+                self.report.change(label, "xp_evo")
+
+    def derive_shiny(self):
+        for normal_file, shiny_file in shiny_pairs(self.root):
+            normal = self.docs.get(normal_file)
+            if normal is None or normal_file in self.invalid:
+                continue
+            derived = [make_shiny(p) for p in normal]
+            if self.docs.get(shiny_file) != derived:
+                self.docs[shiny_file] = derived
+                self.report.change(shiny_file, f"redérivé de {normal_file}")
+
+    # ── Références ───────────────────────────────────────────────────────────
+    def check_references(self):
+        keys = {}   # fichier → clés des Pokémon qu'il contient (fichiers invalides compris)
+        for label, data in self.docs.items():
+            if kind_of(label) == "pokemon" and isinstance(data, list):
+                keys[label] = {catalog_key(p["name"]) for p in data if isinstance(p, dict) and "name" in p}
+
+        derived = {shiny_file for normal_file, shiny_file in shiny_pairs(self.root)
+                   if normal_file in self.docs and normal_file not in self.invalid}
+        for label, where, p in self.entries("pokemon"):
+            if label in derived:
+                continue   # copie du fichier normal : ses erreurs y sont déjà signalées
+            for attack in p["attacks"]:
+                if self._attack_name(attack) not in self._names:
+                    self.report.error(label, f"{where} : attaque inconnue « {attack} »{self._suggest(attack)}")
+            evo = p.get("evo")
+            if not evo or evo["name"] == NO_EVO:
+                continue
+            targets = keys.get(evo["file"])
+            if targets is None:
+                self.report.error(label, f"{where} : fichier d'évolution introuvable « {evo['file']} »")
+            elif catalog_key(evo["name"]) not in targets:
+                self.report.error(label, f"{where} : évolution « {evo['name']} » absente de {evo['file']}")
+
+    def _attack_name(self, attack: str) -> str:
+        """Nom exact dans attack_data.json : tel quel, ancienne orthographe (ATTACK_ALIASES),
+        puis même nom aux accents / à la casse près ; inchangé si aucun ne correspond."""
+        if attack in self._names:
+            return attack
+        if ATTACK_ALIASES.get(attack) in self._names:
+            return ATTACK_ALIASES[attack]
+        return self._attacks.get(catalog_key(attack), attack)
+
+    def _suggest(self, attack: str) -> str:
+        close = difflib.get_close_matches(attack, sorted(set(self._attacks.values())), n=1, cutoff=0.75)
+        return f" (« {close[0]} » ?)" if close else ""
+
+    # ── Écriture et artefacts ────────────────────────────────────────────────
+    def write(self):
+        for label in self.report.changed:
+            path = os.path.join(self.root, label)
+            # Indentation des valeurs ajoutées : celle du fichier d'origine (2 ou 4 selon les fichiers)
+            indent = re.search(rb"\n( +)\S", self._raw.get(label, b"\n    x"))
+            indent = len(indent.group(1)) if indent else 4
+            # Seules les valeurs modifiées sont réécrites : le formatage à la main reste intact
+            text = patch_json(self._raw[label].decode("utf-8"), self.docs[label], indent) if label in self._raw else None
+            if text is None:
+                text = json.dumps(self.docs[label], ensure_ascii=False, indent=indent)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp, path)
+            self.report.written.append(label)
+
+    def run(self, write: bool = False, snapshot: bool = False) -> PipelineReport:
+        self.load()
+        self.check_schemas()
+        self.normalize()
+        self.derive_shiny()
+        self.check_references()
+        if write and self.report.changed:
+            self.write()
+        pending = self.report.changed and not write
+        if snapshot and not self.report.errors and not pending:
+            self.report.snapshot = data_snapshot.build_snapshot(self.root, indexes=snapshot_indexes())
+        return self.report
+
+
+def snapshot_indexes() -> dict:
+    """Index précalculés dans l'instantané : catalogue Pokémon + tables d'attaques."""
+    return {**SNAPSHOT_INDEXES, **ATTACK_INDEXES}
+
+
+# ───────────────────────────────────────────────────────────────
+# 🖥️ CLI
+# ───────────────────────────────────────────────────────────────
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Valide, normalise et compile les données json/.")
+    parser.add_argument("--write", action="store_true", help="réécrit les fichiers à normaliser et les shiny à redériver")
+    parser.add_argument("--snapshot", action="store_true", help="reconstruit json/snapshot.bin (si aucune erreur)")
+    parser.add_argument("--quiet", action="store_true", help="n'affiche pas les avertissements")
+    args = parser.parse_args(argv)
+
+    report = DataPipeline().run(write=args.write, snapshot=args.snapshot)
+
+    if not args.quiet:
+        for warning in report.warnings:
+            print(f"  ⚠️ {warning}")
+    for error in report.errors:
+        print(f"  ❌ {error}")
+    for label, reasons in report.changed.items():
+        mark = "✏️" if label in report.written else "⏳"
+        print(f"  {mark} {label} : {', '.join(reasons)}")
+
+    print(f"[PIPELINE] {len(report.errors)} erreur(s), {len(report.warnings)} avertissement(s), "
+          f"{len(report.written)}/{len(report.changed)} fichier(s) réécrit(s)")
+    if report.changed and not report.written:
+        print("[PIPELINE] Fichiers à normaliser : relancer avec --write")
+    if report.snapshot:
+        s = report.snapshot
+        print(f"[PIPELINE] Instantané : {s['files']} fichier(s), {s['indexes']} index → "
+              f"{s['bytes'] / 1024:.0f} Ko en {s['elapsed']:.2f}s")
+    elif args.snapshot:
+        print("[PIPELINE] Instantané non reconstruit (erreurs ou fichiers à normaliser)")
+    return 1 if report.errors or (report.changed and not report.written) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
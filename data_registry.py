@@ -0,0 +1,254 @@
+"""Registre des fichiers de données json/ : un chargement, des instances partagées.
+
+Chaque fichier est lu et décodé une seule fois ; tous les modules reçoivent
+le même objet. Ces objets sont partagés : ne jamais les modifier sur place
+(copier d'abord une fiche avant d'y écrire, cf. dict(p) / p.copy()).
+
+Démarrage : un fichier présent dans l'instantané compilé json/snapshot.bin
+(data_snapshot.py) est pris de son bloc pickle, index par nom compris,
+plutôt que décodé depuis le JSON ; un fichier modifié depuis le build est
+relu depuis son JSON.
+
+Rechargement à chaud : la tâche "data_watch" de l'ordonnanceur compare
+toutes les DATA_WATCH_INTERVAL secondes la date et la taille des fichiers
+déjà chargés. Un fichier modifié est décodé hors de la boucle, puis
+remplace l'ancien objet d'un coup : un lecteur voit l'ancienne version ou
+la nouvelle, jamais un mélange. Un JSON invalide est signalé et l'ancienne
+version reste en place.
+
+    registry.get("attack_data.json")                 → objet partagé (FileNotFoundError si absent)
+    registry.get("marche_noir/oeuf.json", [])        → [] si absent
+    registry.derived("pokemon_gen1_normal.json", water_only)
+                                                     → water_only(données), recalculé après un rechargement
+    registry.subscribe("attack_data.json", rebuild)  → rebuild(données) après chaque rechargement
+    !data_reload / !data_stats                       → commandes admin
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+
+import data_snapshot
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+json_dir = os.path.join(script_dir, "json")
+
+DATA_WATCH_INTERVAL = float(os.getenv("DATA_WATCH_INTERVAL", "5"))   # secondes, 0 = pas de surveillance
+
+_MISSING = object()
+
+
+def _signature(path: str) -> tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _decode(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class DataRegistry:
+    def __init__(self, root: str = json_dir):
+        self.root = root
+        self._entries: dict[str, tuple] = {}        # chemin → (données, signature, version)
+        self._rejected: dict[str, tuple] = {}       # chemin → signature d'une version invalide
+        self._derived: dict[tuple, tuple] = {}      # (chemin, fonction) → (version, valeur)
+        self._subscribers: dict[str, list] = {}     # chemin → [callback(données)]
+        self._snapshot: dict[str, tuple] = {}       # chemin → (manifeste, bloc) pas encore décodé
+        self._prebuilt: dict[tuple, object] = {}    # (chemin, nom et empreinte de la fonction) → index de l'instantané
+        self._lock = threading.RLock()              # lectures depuis les threads de run_db
+        self.stats = {"loads": 0, "hits": 0, "reloads": 0, "errors": 0, "load_ms": 0.0,
+                      "snapshot": 0, "snapshot_stale": 0, "snapshot_ms": 0.0}
+
+    def path(self, name: str) -> str:
+        return os.path.normpath(name if os.path.isabs(name) else os.path.join(self.root, name))
+
+    def _label(self, path: str) -> str:
+        return os.path.relpath(path, self.root)
+
+    # ── Lecture ──────────────────────────────────────────────────────────────
+    def get(self, name: str, default=_MISSING):
+        """Données partagées du fichier (chargé au premier appel).
+
+        Fichier absent : `default` s'il est donné, sinon FileNotFoundError.
+        """
+        path = self.path(name)
+        entry = self._entries.get(path)
+        if entry is not None:
+            self.stats["hits"] += 1
+            return entry[0]
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                entry = self._from_snapshot(path)
+                if entry is None:
+                    try:
+                        signature = _signature(path)
+                    except FileNotFoundError:
+                        if default is _MISSING:
+                            raise
+                        return default
+                    start = time.perf_counter()
+                    data = _decode(path)
+                    self.stats["load_ms"] += (time.perf_counter() - start) * 1000
+                    self.stats["loads"] += 1
+                    entry = (data, signature, 1)
+                self._entries[path] = entry
+            return entry[0]
+
+    def version(self, name: str) -> int:
+        """Numéro de version du fichier (0 tant qu'il n'est pas chargé)."""
+        entry = self._entries.get(self.path(name))
+        return entry[2] if entry else 0
+
+    def derived(self, name: str, builder, default=_MISSING):
+        """builder(données), mis en cache jusqu'au prochain rechargement du fichier.
+
+        `builder` doit être une fonction de module (la clé du cache), pas un lambda recréé à chaque appel.
+        """
+        path = self.path(name)
+        data = self.get(path, default)
+        version = self.version(path)
+        cached = self._derived.get((path, builder))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        value = self._prebuilt.pop((path, data_snapshot.builder_name(builder)), _MISSING)
+        if value is _MISSING or version != 1:
+            value = builder(data)
+        self._derived[(path, builder)] = (version, value)
+        return value
+
+    def subscribe(self, name: str, callback):
+        """callback(données) est appelé après chaque rechargement du fichier."""
+        self._subscribers.setdefault(self.path(name), []).append(callback)
+
+    # ── Instantané ───────────────────────────────────────────────────────────
+    def load_snapshot(self, path: str = data_snapshot.SNAPSHOT_PATH) -> int:
+        """Lit l'instantané ; ses blocs ne sont décodés qu'à la première lecture de chaque fichier.
+
+        Retourne le nombre de fichiers qu'il contient (0 si absent ou d'un autre format).
+        """
+        start = time.perf_counter()
+        snapshot = data_snapshot.read_snapshot(path)
+        if snapshot is None:
+            return 0
+        with self._lock:
+            for label, manifest in snapshot["files"].items():
+                self._snapshot[self.path(label)] = (manifest, snapshot["blobs"][label])
+        self.stats["snapshot_ms"] += (time.perf_counter() - start) * 1000
+        print(f"[DATA] Instantané : {len(snapshot['files'])} fichier(s) disponibles")
+        return len(snapshot["files"])
+
+    def _from_snapshot(self, path: str) -> tuple | None:
+        """Entrée du registre depuis l'instantané, None si absent ou périmé (→ JSON)."""
+        item = self._snapshot.pop(path, None)
+        if item is None:
+            return None
+        manifest, blob = item
+        signature = data_snapshot.fresh_signature(path, manifest)
+        if signature is None:
+            self.stats["snapshot_stale"] += 1
+            print(f"[DATA] {self._label(path)} modifié depuis l'instantané, relu depuis le JSON")
+            return None
+        start = time.perf_counter()
+        data, indexes = data_snapshot.decode_blob(blob)
+        for name, value in indexes.items():
+            self._prebuilt[(path, name)] = value
+        self.stats["snapshot"] += 1
+        self.stats["snapshot_ms"] += (time.perf_counter() - start) * 1000
+        return data, signature, 1
+
+    # ── Rechargement ─────────────────────────────────────────────────────────
+    def _scan(self) -> list[tuple]:
+        """Fichiers chargés modifiés sur disque → [(chemin, données, signature)] (décodés)."""
+        changes = []
+        for path, (_, signature, _) in list(self._entries.items()):
+            try:
+                current = _signature(path)
+            except FileNotFoundError:
+                continue   # fichier supprimé : on garde la dernière version connue
+            if current == signature or current == self._rejected.get(path):
+                continue
+            try:
+                changes.append((path, _decode(path), current))
+            except (OSError, ValueError) as e:
+                self._rejected[path] = current
+                self.stats["errors"] += 1
+                print(f"[DATA] ❌ {self._label(path)} invalide, ancienne version conservée : {e}")
+        return changes
+
+    def _apply(self, changes: list[tuple]) -> list[str]:
+        reloaded = []
+        for path, data, signature in changes:
+            with self._lock:
+                version = self._entries[path][2] + 1
+                self._entries[path] = (data, signature, version)
+                self._rejected.pop(path, None)
+            self.stats["reloads"] += 1
+            reloaded.append(self._label(path))
+            print(f"[DATA] 🔄 {self._label(path)} rechargé (version {version})")
+            for callback in self._subscribers.get(path, ()):
+                try:
+                    callback(data)
+                except Exception as e:
+                    print(f"[DATA] ❌ Abonné {getattr(callback, '__qualname__', callback)} "
+                          f"de {self._label(path)} : {e}")
+        return reloaded
+
+    def check(self) -> list[str]:
+        """Recharge les fichiers modifiés ; retourne leurs noms."""
+        return self._apply(self._scan())
+
+    async def check_async(self) -> list[str]:
+        """check() avec la lecture et le décodage hors de la boucle."""
+        return self._apply(await asyncio.to_thread(self._scan))
+
+    def report(self) -> dict:
+        return {
+            "files": len(self._entries),
+            "subscribers": sum(len(c) for c in self._subscribers.values()),
+            "derived": len(self._derived),
+            **self.stats,
+        }
+
+
+registry = DataRegistry()
+if data_snapshot.SNAPSHOT_ENABLED:
+    registry.load_snapshot()
+
+
+# ───────────────────────────────────────────────────────────────
+# 🛠️ Surveillance et commandes admin
+# ───────────────────────────────────────────────────────────────
+def setup_data_registry(bot):
+    from utils import is_croco   # utils lit la config du bot : pas à l'import (bench, combat.utils)
+
+    from scheduler import scheduler
+
+    @bot.listen("on_ready")
+    async def start_watch():
+        if DATA_WATCH_INTERVAL > 0 and scheduler.get("data_watch") is None:
+            scheduler.every(DATA_WATCH_INTERVAL, registry.check_async, name="data_watch")
+
+    @bot.command(name="data_reload")
+    @is_croco()
+    async def data_reload(ctx):
+        reloaded = await registry.check_async()
+        if reloaded:
+            await ctx.send("🔄 Rechargé : " + ", ".join(f"`{name}`" for name in reloaded))
+        else:
+            await ctx.send("✅ Aucun fichier modifié.")
+
+    @bot.command(name="data_stats")
+    @is_croco()
+    async def data_stats(ctx):
+        r = registry.report()
+        await ctx.send(
+            f"📚 **Données** : {r['files']} fichier(s) — {r['snapshot']} depuis l'instantané "
+            f"({r['snapshot_ms']:.0f} ms), {r['loads']} depuis le JSON ({r['load_ms']:.0f} ms) · "
+            f"{r['hits']} lectures partagées · {r['reloads']} rechargement(s) · {r['errors']} erreur(s) · "
+            f"{r['subscribers']} abonné(s) · {r['derived']} vue(s) dérivée(s)"
+        )
@@ -0,0 +1,210 @@
+"""Instantané compilé des données json/ pour un démarrage rapide.
+
+Tous les fichiers .json de json/ (catalogues des générations, attaques,
+pools des pokéballs, objets, badges…) sont décodés une fois au build et
+écrits dans un seul fichier binaire json/snapshot.bin (hors git) : un bloc
+pickle par fichier, avec ses index par nom déjà construits
+(data_pipeline.snapshot_indexes). Au démarrage, le registre (data_registry) lit
+l'instantané d'un coup puis ne décode que les blocs des fichiers
+réellement demandés — environ deux fois plus vite que json.load.
+
+Le manifeste de l'instantané garde, par fichier, la date, la taille et
+l'empreinte SHA-1 du source. Un fichier dont la date a changé mais pas le
+contenu (checkout git) reste valide ; un fichier réellement modifié depuis
+le build est relu depuis le JSON, les autres restent servis par
+l'instantané. Format ou version de Python différents → instantané ignoré.
+Chaque index précalculé est rangé sous le nom de sa fonction et l'empreinte
+du source de son module : un index dont le code a changé depuis le build
+est reconstruit au démarrage, sans avoir à incrémenter SNAPSHOT_FORMAT.
+
+    python data_snapshot.py            → (re)construit json/snapshot.bin
+    python data_snapshot.py --status   → fichiers à jour / périmés / absents de l'instantané
+    DATA_SNAPSHOT=0                    → désactive l'instantané (JSON uniquement)
+
+Banc d'essai du démarrage : bench/bench_startup.py.
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sys
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+json_dir = os.path.join(script_dir, "json")
+
+SNAPSHOT_PATH = os.getenv("DATA_SNAPSHOT_PATH", os.path.join(json_dir, "snapshot.bin"))
+SNAPSHOT_ENABLED = os.getenv("DATA_SNAPSHOT", "1").lower() in ("1", "true", "yes")
+SNAPSHOT_FORMAT = 2   # à incrémenter si la structure de l'instantané change
+
+
+def signature(path: str) -> tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+_module_digests: dict[str, str] = {}
+
+
+def _module_digest(module_name: str) -> str:
+    """Empreinte du source d'un module (ses fonctions auxiliaires et constantes comprises)."""
+    digest = _module_digests.get(module_name)
+    if digest is None:
+        source = getattr(sys.modules.get(module_name), "__file__", None)
+        try:
+            digest = file_digest(source)[:12] if source else "?"
+        except OSError:
+            digest = "?"
+        _module_digests[module_name] = digest
+    return digest
+
+
+def builder_name(builder) -> str:
+    """Clé d'une fonction d'index : nom et empreinte du code (clé des index précalculés)."""
+    return f"{builder.__module__}.{builder.__qualname__}@{_module_digest(builder.__module__)}"
+
+
+def _json_files(root: str):
+    for folder, _, files in os.walk(root):
+        for filename in sorted(files):
+            if filename.endswith(".json"):
+                path = os.path.join(folder, filename)
+                yield os.path.relpath(path, root), path
+
+
+# ───────────────────────────────────────────────────────────────
+# 🏗️ Construction
+# ───────────────────────────────────────────────────────────────
+def build_snapshot(root: str = json_dir, path: str = SNAPSHOT_PATH, indexes: dict | None = None) -> dict:
+    """Décode tous les json/ de `root` et écrit l'instantané.
+
+    indexes : {fonction: [fichiers]} → index précalculés fonction(données).
+    Retourne un résumé (fichiers, erreurs, taille, durée).
+    """
+    start = time.perf_counter()
+    builders = {}
+    for builder, labels in (indexes or {}).items():
+        for label in labels:
+            builders.setdefault(os.path.normpath(label), []).append(builder)
+
+    files, blobs, errors, nb_indexes = {}, {}, [], 0
+    for label, source in _json_files(root):
+        with open(source, "rb") as f:
+            raw = f.read()
+        try:
+            data = json.loads(raw)
+        except ValueError as e:
+            errors.append(f"{label} : {e}")
+            continue
+        prebuilt = {builder_name(b): b(data) for b in builders.get(label, ())}
+        nb_indexes += len(prebuilt)
+        files[label] = (signature(source), hashlib.sha1(raw).hexdigest())
+        # Données et index dans le même bloc : les index pointent sur les mêmes fiches
+        blobs[label] = pickle.dumps((data, prebuilt), protocol=pickle.HIGHEST_PROTOCOL)
+
+    snapshot = {
+        "format": SNAPSHOT_FORMAT,
+        "python": sys.version_info[:2],
+        "built_at": time.time(),
+        "files": files,
+        "blobs": blobs,
+    }
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    return {
+        "files": len(files),
+        "indexes": nb_indexes,
+        "errors": errors,
+        "bytes": os.path.getsize(path),
+        "elapsed": time.perf_counter() - start,
+    }
+
+
+# ───────────────────────────────────────────────────────────────
+# 📥 Lecture
+# ───────────────────────────────────────────────────────────────
+def read_snapshot(path: str = SNAPSHOT_PATH) -> dict | None:
+    """Instantané (blocs encore encodés), None s'il est absent, illisible ou d'un autre format."""
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"[SNAPSHOT] Instantané illisible, repli sur le JSON : {e}")
+        return None
+    if snapshot.get("format") != SNAPSHOT_FORMAT or tuple(snapshot.get("python", ())) != sys.version_info[:2]:
+        print("[SNAPSHOT] Instantané d'un autre format, repli sur le JSON (relancer `python data_snapshot.py`)")
+        return None
+    return snapshot
+
+
+def decode_blob(blob: bytes) -> tuple:
+    """Bloc d'un fichier → (données, {nom de fonction: index})."""
+    return pickle.loads(blob)
+
+
+def fresh_signature(source: str, manifest: tuple) -> tuple | None:
+    """Signature actuelle du source s'il a le contenu enregistré au build, sinon None."""
+    built_signature, digest = manifest
+    try:
+        current = signature(source)
+    except FileNotFoundError:
+        return None
+    if current == tuple(built_signature) or file_digest(source) == digest:
+        return current
+    return None
+
+
+def snapshot_status(root: str = json_dir, path: str = SNAPSHOT_PATH) -> dict:
+    """{"fresh": [...], "stale": [...], "missing": [...]} (missing : json/ absents de l'instantané)."""
+    snapshot = read_snapshot(path)
+    manifest = snapshot["files"] if snapshot else {}
+    status = {"fresh": [], "stale": [], "missing": []}
+    for label, source in _json_files(root):
+        if label not in manifest:
+            status["missing"].append(label)
+        elif fresh_signature(source, manifest[label]) is None:
+            status["stale"].append(label)
+        else:
+            status["fresh"].append(label)
+    return status
+
+
+# ───────────────────────────────────────────────────────────────
+# 🖥️ CLI
+# ───────────────────────────────────────────────────────────────
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Instantané compilé des données json/.")
+    parser.add_argument("--status", action="store_true", help="compare l'instantané aux fichiers json/")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        status = snapshot_status()
+        print(f"[SNAPSHOT] {len(status['fresh'])} à jour, {len(status['stale'])} périmé(s), "
+              f"{len(status['missing'])} absent(s)")
+        for label in status["stale"]:
+            print(f"  ⏳ {label}")
+        for label in status["missing"]:
+            print(f"  ➕ {label}")
+        return 1 if status["stale"] or status["missing"] else 0
+
+    from data_pipeline import snapshot_indexes
+    report = build_snapshot(indexes=snapshot_indexes())
+    for error in report["errors"]:
+        print(f"  ❌ {error}")
+    print(f"[SNAPSHOT] {report['files']} fichier(s), {report['indexes']} index → "
+          f"{report['bytes'] / 1024:.0f} Ko en {report['elapsed']:.2f}s")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
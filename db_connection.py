@@ -1,25 +1,160 @@
-"""Module centralisé pour gérer la connexion à la base de données."""
+"""Module centralisé pour gérer les connexions à la base de données.
+
+Toutes les connexions passent par un pool borné (psycopg2 ThreadedConnectionPool) :
+- taille min/max configurable via DB_POOL_MIN / DB_POOL_MAX
+- health check (SELECT 1) des connexions restées inactives trop longtemps
+- reconnexion automatique si une connexion est morte ou si le pool tombe
+"""
 import os
+import time
+import threading
+from contextlib import contextmanager
+
 import psycopg2
+from psycopg2 import pool as pg_pool
 from dotenv import load_dotenv
 
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
+DB_SSLMODE = os.getenv("DB_SSLMODE", "require")
+
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "8"))
+# Délai max (secondes) pour obtenir une connexion quand le pool est plein
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Une connexion inactive depuis plus longtemps est vérifiée avant d'être prêtée
+DB_HEALTHCHECK_IDLE = float(os.getenv("DB_HEALTHCHECK_IDLE", "60"))
+
+_pool = None
+_pool_lock = threading.Lock()
+# Borne le nombre d'emprunts simultanés : on attend au lieu de lever PoolError
+_slots = threading.BoundedSemaphore(DB_POOL_MAX)
+# id(connexion) -> dernier retour au pool (time.monotonic)
+_last_used = {}
+
+
+# ───────────────────────────────────────────────────────────────
+# 🔌 Pool
+# ───────────────────────────────────────────────────────────────
+def _get_pool():
+    """Crée le pool à la première utilisation (ou après un reset)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = pg_pool.ThreadedConnectionPool(
+                    DB_POOL_MIN,
+                    DB_POOL_MAX,
+                    DATABASE_URL,
+                    sslmode=DB_SSLMODE,
+                )
+                print(f"[DB] Pool initialisé ({DB_POOL_MIN}-{DB_POOL_MAX} connexions)")
+    return _pool
+
+
+def _reset_pool():
+    """Ferme toutes les connexions du pool, il sera recréé au prochain emprunt."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            try:
+                _pool.closeall()
+            except Exception as e:
+                print(f"[DB] Erreur à la fermeture du pool : {e}")
+            _pool = None
+            _last_used.clear()
+
+
+def _is_alive(conn):
+    """Health check : connexion ouverte et capable de répondre à SELECT 1."""
+    if conn.closed:
+        return False
+    last = _last_used.get(id(conn))
+    if last is not None and time.monotonic() - last < DB_HEALTHCHECK_IDLE:
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        return False
+
 
-# Connexion unique et partagée
-conn = psycopg2.connect(DATABASE_URL, sslmode="require")
-cur = conn.cursor()
+def _checkout():
+    """Emprunte une connexion saine au pool (avec une tentative de reconnexion)."""
+    for attempt in range(2):
+        try:
+            pool = _get_pool()
+            conn = pool.getconn()
+        except psycopg2.OperationalError as e:
+            print(f"[DB] Connexion impossible ({e}), nouvelle tentative…")
+            _reset_pool()
+            if attempt:
+                raise
+            continue
 
+        if _is_alive(conn):
+            return pool, conn
+
+        print("[DB] Connexion morte détectée, reconnexion…")
+        _last_used.pop(id(conn), None)
+        pool.putconn(conn, close=True)
+
+    # Deuxième connexion morte d'affilée : le serveur a probablement redémarré
+    _reset_pool()
+    pool = _get_pool()
+    return pool, pool.getconn()
+
+
+def _release(pool, conn):
+    """Rend une connexion au pool (fermée si elle est inutilisable)."""
+    broken = conn.closed or conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN
+    if broken:
+        _last_used.pop(id(conn), None)
+    else:
+        _last_used[id(conn)] = time.monotonic()
+    try:
+        pool.putconn(conn, close=broken)
+    except pg_pool.PoolError:
+        # Le pool a été reset entre-temps : la connexion n'en fait plus partie
+        conn.close()
+
+
+# ───────────────────────────────────────────────────────────────
+# 🧰 API publique
+# ───────────────────────────────────────────────────────────────
+@contextmanager
 def get_connection():
-    """Retourne la connexion centralisée."""
-    global conn
+    """Prête une connexion du pool le temps d'un bloc `with`.
+
+    Commit automatique en sortie, rollback si une exception remonte.
+    """
+    if not _slots.acquire(timeout=DB_POOL_TIMEOUT):
+        raise pg_pool.PoolError(f"Aucune connexion libre après {DB_POOL_TIMEOUT}s")
     try:
-        conn.isolation_level
-    except psycopg2.OperationalError:
-        # Reconnexion si la connexion a été fermée
-        conn = psycopg2.connect(DATABASE_URL, sslmode="require")
-    return conn
+        pool, conn = _checkout()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            _release(pool, conn)
+    finally:
+        _slots.release()
+
 
+@contextmanager
 def get_cursor():
-    """Retourne le curseur centralisé."""
-    return get_connection().cursor()
+    """Raccourci : curseur sur une connexion du pool, dans une transaction."""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            yield cur
+
+
+def close_pool():
+    """Ferme proprement toutes les connexions (arrêt du bot)."""
+    _reset_pool()
@@ -3,11 +3,11 @@ from discord.ext import commands
 from discord.ui import View, Button
 import asyncio
 import random
-import json
 import os
-import aiohttp
 import io
 from utils import is_croco
+from sprites import fetch_sprite
+from data_registry import registry
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 json_dir = os.path.join(script_dir, "json")
@@ -25,28 +25,23 @@ def load_pokemon_data():
     ]
     all_pokemon = []
     for fname in normal_files:
-        file_path = os.path.join(json_dir, fname)
-        if not os.path.exists(file_path):
-            print(f"[AVERTISSEMENT] Fichier introuvable : {file_path}")
+        data = registry.get(fname, None)   # fiches partagées, chargées une fois
+        if data is None:
+            print(f"[AVERTISSEMENT] Fichier introuvable : {os.path.join(json_dir, fname)}")
             continue
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            all_pokemon.extend(data)
+        all_pokemon.extend(data)
     return all_pokemon
 
 
 def load_shiny_data():
-    file_path = os.path.join(json_dir, "pokemon_shiny_data.json")
-    if not os.path.exists(file_path):
-        print(f"[ERREUR] Fichier shiny introuvable : {file_path}")
+    data = registry.get("pokemon_shiny_data.json", None)
+    if data is None:
+        print(f"[ERREUR] Fichier shiny introuvable : {os.path.join(json_dir, 'pokemon_shiny_data.json')}")
         return []
-    with open(file_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return data
 
 
 def setup_guess_pokemon_command(bot, spawn_pokemon=None, role_id=None, authorized_user_id=None, is_under_ban_func=None):
-    base_data = load_pokemon_data()
-    all_pokemon = base_data
 
     class GuessButton(Button):
         def __init__(self, label, correct_answer):
@@ -104,6 +99,7 @@ def setup_guess_pokemon_command(bot, spawn_pokemon=None, role_id=None, authorize
         answered_users = set()
         quiz_winner = None
 
+        all_pokemon = load_pokemon_data()   # version à jour du registre
         if not all_pokemon or len(all_pokemon) < 4:
             await channel.send("Pas assez de Pokémon pour générer un quiz.")
             return
@@ -127,14 +123,12 @@ def setup_guess_pokemon_command(bot, spawn_pokemon=None, role_id=None, authorize
             await channel.send(f"<@&{role_id}>")
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(image_url) as resp:
-                    if resp.status != 200:
-                        await channel.send("❌ Impossible de charger l'image du Pokémon.")
-                        return
-                    data = await resp.read()
-                    file = discord.File(fp=io.BytesIO(data), filename="pokemon.png")
-                    await channel.send(file=file)
+            data = await fetch_sprite(image_url)
+            if data is None:
+                await channel.send("❌ Impossible de charger l'image du Pokémon.")
+                return
+            file = discord.File(fp=io.BytesIO(data), filename="pokemon.png")
+            await channel.send(file=file)
         except Exception as e:
             await channel.send("❌ Erreur lors de la récupération de l'image.")
             print(f"[ERREUR IMAGE] : {e}")
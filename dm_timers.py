@@ -0,0 +1,173 @@
+"""Minuteries de spawn DM persistées en base, pilotées par l'ordonnanceur.
+
+Chaque membre a une minuterie (table dm_spawn_timers) : une échéance quand
+il est en vocal, un reste en secondes quand il en est sorti. Elle est mise
+en pause au départ du vocal et reprend là où elle en était au retour ; un
+redémarrage du bot ne fait plus perdre la progression. En mémoire, seule
+une tâche de l'ordonnanceur par membre présent ("dm_spawn:<id>") attend
+l'échéance.
+
+Au démarrage, la synchro de presence annonce les membres présents : leur
+minuterie reprend (une échéance dépassée pendant l'arrêt part tout de
+suite) ; celles des absents sont mises en pause.
+
+    !dm_timers → commande admin (minuteries actives / en pause, retard des déclenchements)
+"""
+import asyncio
+import random
+import time
+
+from db_connection import get_cursor
+from async_db import run_db
+from presence import presence, JOIN
+from scheduler import scheduler, format_delay
+
+## Intervalle spawn MP
+MIN_SPAWN = 14400 #4h
+MAX_SPAWN = 18000 #5h
+
+# Une tâche de l'ordonnanceur par membre en vocal, nommée f"{DM_SPAWN_JOB}{member.id}"
+DM_SPAWN_JOB = "dm_spawn:"
+
+stats = {"fired": 0, "resumed": 0, "paused": 0, "late_total": 0.0, "late_max": 0.0}
+
+_lock = asyncio.Lock()   # arrivées, départs et réhydratation appliqués dans l'ordre
+_spawning: set[int] = set()   # membres dont le spawn DM est en cours (la relance suit)
+
+
+# ──────────────────────────────────────────────
+# FONCTIONS BASE DE DONNÉES
+# ──────────────────────────────────────────────
+
+def resume_dm_timer(user_id: str, wait: float) -> float:
+    """Reprend la minuterie (ou en crée une de `wait` secondes) ; retourne l'échéance (timestamp)."""
+    with get_cursor() as cur:
+        cur.execute("""
+            INSERT INTO dm_spawn_timers (user_id, due_at)
+            VALUES (%(user_id)s, now() + make_interval(secs => %(wait)s))
+            ON CONFLICT (user_id) DO UPDATE SET
+                due_at     = COALESCE(dm_spawn_timers.due_at,
+                                      now() + make_interval(secs => COALESCE(dm_spawn_timers.remaining, %(wait)s))),
+                remaining  = NULL,
+                updated_at = now()
+            RETURNING EXTRACT(EPOCH FROM due_at)
+        """, {"user_id": user_id, "wait": wait})
+        return float(cur.fetchone()[0])
+
+
+def pause_dm_timers(user_ids: list[str], absent: bool = False) -> int:
+    """Met en pause les minuteries de user_ids (absent : de tous les autres) en gardant le temps restant."""
+    with get_cursor() as cur:
+        cur.execute(f"""
+            UPDATE dm_spawn_timers
+            SET remaining  = GREATEST(0, EXTRACT(EPOCH FROM due_at - now())),
+                due_at     = NULL,
+                updated_at = now()
+            WHERE due_at IS NOT NULL AND {"NOT" if absent else ""} (user_id = ANY(%s))
+        """, (list(user_ids),))
+        return cur.rowcount
+
+
+def rearm_dm_timer(user_id: str, wait: float) -> float | None:
+    """Nouvelle minuterie après un spawn ; None si le membre est parti entre-temps (elle démarre en pause)."""
+    with get_cursor() as cur:
+        cur.execute("""
+            UPDATE dm_spawn_timers
+            SET due_at     = CASE WHEN due_at IS NULL THEN NULL ELSE now() + make_interval(secs => %(wait)s) END,
+                remaining  = CASE WHEN due_at IS NULL THEN %(wait)s END,
+                updated_at = now()
+            WHERE user_id = %(user_id)s
+            RETURNING EXTRACT(EPOCH FROM due_at)
+        """, {"user_id": user_id, "wait": wait})
+        row = cur.fetchone()
+    return float(row[0]) if row and row[0] is not None else None
+
+
+def count_dm_timers() -> tuple[int, int]:
+    """(actives, en pause)."""
+    with get_cursor() as cur:
+        cur.execute("""
+            SELECT COUNT(*) FILTER (WHERE due_at IS NOT NULL), COUNT(*) FILTER (WHERE due_at IS NULL)
+            FROM dm_spawn_timers
+        """)
+        return cur.fetchone()
+
+
+def is_dm_spawning(member_id: int) -> bool:
+    """Spawn DM du membre en cours : sa tâche a déjà quitté l'ordonnanceur, la relance suit."""
+    return member_id in _spawning
+
+
+# ──────────────────────────────────────────────
+# SETUP
+# ──────────────────────────────────────────────
+
+def setup_dm_timers(bot, text_channel_id: int, voice_channel_id: int, spawn_func):
+    """spawn_func : async def spawn_pokemon(channel, dm_user=..., shiny_rate=...)."""
+    from utils import is_croco   # utils lit la config du bot : pas à l'import
+
+    def schedule(member, due_ts: float):
+        job = scheduler.call_at(due_ts, spawn_dm, member, due_ts, name=f"{DM_SPAWN_JOB}{member.id}")
+        print(f"[INFO] Spawn DM prévu pour {member.display_name} dans {format_delay(job.remaining())}.")
+
+    async def spawn_dm(member, due_ts: float):
+        """Échéance du spawn DM d'un membre : spawn s'il est toujours en vocal, puis nouvelle minuterie."""
+        late = max(0.0, time.time() - due_ts)
+        stats["fired"] += 1
+        stats["late_total"] += late
+        stats["late_max"] = max(stats["late_max"], late)
+
+        channel = bot.get_channel(text_channel_id)
+        if channel is None or not presence.in_voice(member.id, voice_channel_id):
+            return   # le départ du vocal a mis la minuterie en pause
+
+        _spawning.add(member.id)
+        try:
+            # Spawn dans les DM du membre, shiny rate = 1/32
+            await spawn_func(channel=channel, dm_user=member, shiny_rate=32)
+            print(f"[INFO] Pokémon spawné en DM pour {member.display_name}.")
+        finally:
+            # Relance automatiquement un nouveau compteur (même si le spawn a échoué)
+            async with _lock:
+                _spawning.discard(member.id)
+                due = await run_db(rearm_dm_timer, str(member.id), random.randint(MIN_SPAWN, MAX_SPAWN))
+                if due is not None and presence.in_voice(member.id, voice_channel_id):
+                    schedule(member, due)
+
+    async def on_dm_presence(event, member, voice_channel):
+        async with _lock:
+            if event == JOIN:
+                due = await run_db(resume_dm_timer, str(member.id), random.randint(MIN_SPAWN, MAX_SPAWN))
+                stats["resumed"] += 1
+                if member.id in _spawning:
+                    return   # parti et revenu pendant son spawn : la relance de spawn_dm le reprogramme
+                schedule(member, due)
+            else:
+                # Membre parti : sa minuterie est mise en pause (elle reprend à son retour)
+                scheduler.cancel(f"{DM_SPAWN_JOB}{member.id}")
+                await run_db(pause_dm_timers, [str(member.id)])
+                stats["paused"] += 1
+                print(f"[INFO] Spawn DM en pause pour {member.display_name} (plus en vocal).")
+
+    presence.subscribe(on_dm_presence, voice_channel_id)
+
+    @bot.listen("on_ready")
+    async def rehydrate_dm_timers():
+        # Les présents reprennent via la synchro de presence ; les absents passent en pause
+        async with _lock:
+            present = [str(m.id) for m in presence.members(voice_channel_id)]
+            paused = await run_db(pause_dm_timers, present, True)
+        if paused:
+            print(f"[INFO] {paused} minuterie(s) de spawn DM mise(s) en pause (membres hors vocal).")
+
+    @bot.command(name="dm_timers")
+    @is_croco()
+    async def dm_timers_command(ctx):
+        active, paused = await run_db(count_dm_timers)
+        average = stats["late_total"] / stats["fired"] if stats["fired"] else 0.0
+        await ctx.send(
+            f"⏱️ **Spawns DM** : {active} minuterie(s) active(s) · {paused} en pause · "
+            f"{len(scheduler.jobs(DM_SPAWN_JOB))} en attente dans l'ordonnanceur\n"
+            f"🔔 {stats['fired']} déclenchement(s) · retard moyen {average:.1f} s · max {stats['late_max']:.1f} s · "
+            f"{stats['resumed']} reprise(s) · {stats['paused']} pause(s)"
+        )
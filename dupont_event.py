@@ -4,8 +4,7 @@ import aiohttp
 import asyncio
 import random
 import io
-from inventory_db import get_inventory, use_item
-from money_db import add_money, remove_money, get_balance
+from async_db import get_inventory, use_item, add_money, remove_money, get_balance, run_db
 
 from discord.ui import View, Button, Select
 
@@ -310,8 +309,8 @@ async def run_interaction_personnage(channel: discord.TextChannel, riche_or_not:
                     child.disabled = True
                 await interaction.response.edit_message(view=self.view)
 
-                add_money(interaction.user.id, somme)
-                new_balance = get_balance(interaction.user.id)
+                await add_money(interaction.user.id, somme, reason="dupont")
+                new_balance = await get_balance(interaction.user.id)
                 await channel.send(f"**{personnage['name']}** : {texte_fin}")
                 await channel.send(
                     f"💰 {interaction.user.mention} a pris **{somme:,}** Croco dollars à {personnage['name']} !\n"
@@ -372,7 +371,7 @@ async def run_interaction_personnage(channel: discord.TextChannel, riche_or_not:
                     return
 
                 chosen_item = interaction.data["values"][0]
-                new_qty, _ = use_item(interaction.user.id, chosen_item, quantity=1)
+                new_qty, _ = await use_item(interaction.user.id, chosen_item, quantity=1)
 
                 if new_qty is None:
                     await interaction.response.send_message(
@@ -392,7 +391,7 @@ async def run_interaction_personnage(channel: discord.TextChannel, riche_or_not:
                 )
 
                 # ← MANQUANT
-                item_nom = donner_recompense(interaction.user.id, personnage)
+                item_nom = await run_db(donner_recompense, interaction.user.id, personnage)
                 if item_nom:
                     await channel.send(f"🎁 En remerciement, **{personnage['name']}** t'offre **{item_nom}** !")
 
@@ -430,9 +429,9 @@ async def run_interaction_personnage(channel: discord.TextChannel, riche_or_not:
                 self._disable_all()
                 await interaction.response.edit_message(view=self)
 
-                success = remove_money(interaction.user.id, somme)
+                success = await remove_money(interaction.user.id, somme, reason="dupont")
                 if not success:
-                    balance = get_balance(interaction.user.id)
+                    balance = await get_balance(interaction.user.id)
                     await channel.send(
                         f"❌ {interaction.user.mention} tu n'as pas assez de Croco dollars !\n"
                         f"🐊 Solde actuel : **{balance:,}** Croco dollars."
@@ -440,7 +439,7 @@ async def run_interaction_personnage(channel: discord.TextChannel, riche_or_not:
                     interaction_done.set()
                     return
 
-                new_balance = get_balance(interaction.user.id)
+                new_balance = await get_balance(interaction.user.id)
                 await channel.send(f"**{personnage['name']}** : {texte_fin}")
                 await channel.send(
                     f"🤝 {interaction.user.mention} a donné **{somme:,}** Croco dollars à {personnage['name']} !\n"
@@ -448,7 +447,7 @@ async def run_interaction_personnage(channel: discord.TextChannel, riche_or_not:
                 )
 
                 # ← MANQUANT
-                item_nom = donner_recompense(interaction.user.id, personnage)
+                item_nom = await run_db(donner_recompense, interaction.user.id, personnage)
                 if item_nom:
                     await channel.send(f"🎁 En remerciement, **{personnage['name']}** t'offre **{item_nom}** !")
 
@@ -456,7 +455,7 @@ async def run_interaction_personnage(channel: discord.TextChannel, riche_or_not:
 
             async def item_callback(self, interaction: discord.Interaction):
                 # Filtre uniquement les items dont le nom commence par "Baie"
-                all_items = get_inventory(interaction.user.id)
+                all_items = await get_inventory(interaction.user.id)
                 baies = [item for item in all_items if item["name"].startswith("Baie")]
 
                 if not baies:
@@ -0,0 +1,157 @@
+"""Encodage des images rendues, avec une politique par type d'image.
+
+Le PNG par défaut (zlib niveau 6) coûtait jusqu'à 1,2 s par carte de
+spawn pour 1,7 Mo envoyés. Chaque type de job de cards.py a maintenant sa
+politique :
+
+    spawn, pokedex_card, item_card → WebP avec pertes (texte et photos)
+    mosaic                         → WebP sans perte, pixels exacts : la
+                                     grille du pokédex est ré-éditée tuile
+                                     par tuile, elle ne doit pas se dégrader
+
+Une politique peut viser une taille (target_kb) : en WebP avec pertes la
+qualité baisse par paliers jusqu'à min_quality, en PNG l'image passe en
+palette. Surcharge par variable d'environnement, par type :
+
+    ENCODING_SPAWN="format=webp,quality=80,method=4,target_kb=150"
+    ENCODING_MOSAIC="format=png,compress_level=1"
+    ENCODING_ITEM_CARD="format=png-palette,colors=256"
+
+Les octets produits portent leur format : filename_for() donne le nom de
+pièce jointe discord correspondant. Banc d'essai : bench/bench_encoding.py.
+"""
+import os
+from dataclasses import dataclass, fields, replace
+from io import BytesIO
+
+from PIL import Image
+
+FORMATS = ("webp", "webp-lossless", "png", "png-palette")
+
+
+@dataclass(frozen=True)
+class EncodingPolicy:
+    format: str = "png"
+    quality: int = 90          # WebP : qualité (avec pertes) ou effort (sans perte)
+    method: int = 4            # WebP : 0 (rapide) … 6 (compact)
+    compress_level: int = 6    # PNG : zlib 0 … 9
+    colors: int = 256          # png-palette
+    exact: bool = False        # WebP sans perte : garde le RGB des pixels transparents
+    target_kb: int = 0         # 0 = pas de cible
+    min_quality: int = 40
+
+    def describe(self) -> str:
+        if self.format == "webp":
+            text = f"webp q{self.quality} m{self.method}"
+        elif self.format == "webp-lossless":
+            text = f"webp sans perte q{self.quality} m{self.method}"
+        elif self.format == "png-palette":
+            text = f"png {self.colors} couleurs"
+        else:
+            text = f"png z{self.compress_level}"
+        return text + (f" ≤ {self.target_kb} Ko" if self.target_kb else "")
+
+
+DEFAULT_POLICIES = {
+    "spawn":        EncodingPolicy("webp", quality=85, method=4, target_kb=200),
+    "pokedex_card": EncodingPolicy("webp", quality=90, method=2),
+    "item_card":    EncodingPolicy("webp", quality=90, method=2),
+    "mosaic":       EncodingPolicy("webp-lossless", quality=0, method=0, exact=True),
+}
+FALLBACK_POLICY = EncodingPolicy("png")
+
+
+def parse_policy(text: str, base: EncodingPolicy = FALLBACK_POLICY) -> EncodingPolicy:
+    """"format=webp,quality=80" → EncodingPolicy (les champs absents gardent ceux de `base`)."""
+    types = {f.name: f.type for f in fields(EncodingPolicy)}
+    values = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        key, _, raw = part.partition("=")
+        key = key.strip()
+        if key not in types:
+            raise ValueError(f"option d'encodage inconnue : {key}")
+        if key == "format":
+            if raw not in FORMATS:
+                raise ValueError(f"format inconnu : {raw} (attendu : {', '.join(FORMATS)})")
+            values[key] = raw
+        elif types[key] in (bool, "bool"):
+            values[key] = raw.strip().lower() in ("1", "true", "yes")
+        else:
+            values[key] = int(raw)
+    return replace(base, **values)
+
+
+def _load_policies() -> dict:
+    policies = dict(DEFAULT_POLICIES)
+    for kind, base in DEFAULT_POLICIES.items():
+        raw = os.getenv(f"ENCODING_{kind.upper()}")
+        if raw:
+            try:
+                policies[kind] = parse_policy(raw, base)
+            except ValueError as e:
+                print(f"[ENCODING] ENCODING_{kind.upper()} ignorée : {e}")
+    return policies
+
+
+POLICIES = _load_policies()
+
+
+def policy_for(kind: str) -> EncodingPolicy:
+    return POLICIES.get(kind, FALLBACK_POLICY)
+
+
+# ───────────────────────────────────────────────────────────────
+# 🗜️ Encodage
+# ───────────────────────────────────────────────────────────────
+def _save(img: Image.Image, policy: EncodingPolicy, quality: int | None = None) -> bytes:
+    output = BytesIO()
+    if policy.format == "webp":
+        img.save(output, format="WEBP", quality=quality or policy.quality, method=policy.method)
+    elif policy.format == "webp-lossless":
+        img.save(output, format="WEBP", lossless=True, quality=policy.quality,
+                 method=policy.method, exact=policy.exact)
+    elif policy.format == "png-palette":
+        _quantize(img, policy.colors).save(output, format="PNG", compress_level=policy.compress_level)
+    else:
+        img.save(output, format="PNG", compress_level=policy.compress_level)
+    return output.getvalue()
+
+
+def _quantize(img: Image.Image, colors: int) -> Image.Image:
+    if img.mode == "RGBA" and img.getextrema()[3][0] == 255:
+        img = img.convert("RGB")   # opaque : pas besoin de garder l'alpha
+    method = Image.Quantize.FASTOCTREE
+    return img.quantize(colors, method=method)
+
+
+def encode(img: Image.Image, kind: str, policy: EncodingPolicy | None = None) -> bytes:
+    """Octets de `img` selon la politique du type `kind` (ou `policy`)."""
+    policy = policy or policy_for(kind)
+    data = _save(img, policy)
+    target = policy.target_kb * 1024
+    if not target or len(data) <= target:
+        return data
+
+    if policy.format == "webp":
+        quality = policy.quality
+        while len(data) > target and quality > policy.min_quality:
+            quality = max(policy.min_quality, quality - 15)
+            data = _save(img, policy, quality)
+    elif policy.format == "png":
+        data = min(data, _save(img, replace(policy, format="png-palette")), key=len)
+    return data
+
+
+def extension_of(data: bytes) -> str:
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    if data[:3] == b"GIF":
+        return "gif"
+    if data[:3] == b"\xff\xd8\xff":
+        return "jpg"
+    return "png"
+
+
+def filename_for(data: bytes, stem: str) -> str:
+    """Nom de pièce jointe dont l'extension correspond au format réel des octets."""
+    return f"{stem}.{extension_of(data)}"
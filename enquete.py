@@ -1,8 +1,9 @@
-import json
 import os
 import discord
-from preuve_db import add_preuve, has_preuve, get_preuves, init_preuves_db
+from preuve_db import add_preuve, has_preuve, get_preuves
 from utils import is_croco
+from async_db import run_db
+from data_registry import registry
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 ENQUETE_JSON_PATH = os.path.join(script_dir, "json", "enquete.json")
@@ -15,10 +16,9 @@ REGION_COMMANDS = {
 }
 
 def load_item(item_name):
-    if not os.path.exists(ENQUETE_JSON_PATH):
+    data = registry.get(ENQUETE_JSON_PATH, None)
+    if data is None:
         return None
-    with open(ENQUETE_JSON_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
     return next(
         (item for item in data if item["item_name"].lower() == item_name.lower()),
         None
@@ -28,7 +28,7 @@ def make_command(bot, command_name, required_region, item_name, get_user_region)
     @bot.command(name=command_name)
     async def _command(ctx):
         user_id = ctx.author.id
-        region = get_user_region(user_id)
+        region = await run_db(get_user_region, user_id)
 
         if region != required_region:
             await ctx.send(
@@ -37,7 +37,7 @@ def make_command(bot, command_name, required_region, item_name, get_user_region)
             )
             return
 
-        if has_preuve(user_id, item_name):
+        if await run_db(has_preuve, user_id, item_name):
             await ctx.send("🔍 Tu as déjà fouillé ici... il n'y a plus rien à trouver.")
             return
 
@@ -46,7 +46,7 @@ def make_command(bot, command_name, required_region, item_name, get_user_region)
             await ctx.send(f"⚠️ L'item **{item_name}** est introuvable dans le fichier JSON.")
             return
 
-        add_preuve(
+        await run_db(add_preuve,
             user_id=user_id,
             item_name=item_data["item_name"],
             region=required_region,
@@ -126,7 +126,6 @@ class PreuvesView(discord.ui.View):
 
 
 def setup_enquete(bot, get_user_region):
-    init_preuves_db()
 
     for command_name, config in REGION_COMMANDS.items():
         make_command(
@@ -139,7 +138,7 @@ def setup_enquete(bot, get_user_region):
 
     @bot.command(name="preuves")
     async def preuves(ctx):
-        liste = get_preuves(ctx.author.id)
+        liste = await run_db(get_preuves, ctx.author.id)
         if not liste:
             await ctx.send("🗂️ Tu n'as encore trouvé aucune preuve.")
             return
@@ -151,5 +150,5 @@ def setup_enquete(bot, get_user_region):
     @is_croco()
     async def supprimer_preuves(ctx, user: discord.User):
         from preuve_db import delete_preuves
-        delete_preuves(user.id)
+        await run_db(delete_preuves, user.id)
         await ctx.send(f"🗑️ Les preuves de **{user.display_name}** ont été supprimées.")    
@@ -1,10 +1,14 @@
 import asyncio
 import random
-import json
 import os
 import discord
 from discord.ext import commands
 
+from regions import get_user_region
+from async_db import run_db
+from data_registry import registry
+from presence import presence
+
 # -----------------------
 # CONFIGURATION PÊCHE
 # -----------------------
@@ -44,6 +48,14 @@ REGION_TO_GEN = {
 
 fishing_in_progress: set[int] = set()
 
+def _water_pool(data: list | None) -> list | None:
+    """Fiches de type Eau d'un fichier de génération (calculé une fois par version du fichier)."""
+    if data is None:
+        return None
+    eau_types = {"eau", "water"}
+    return [p for p in data if any(t.lower() in eau_types for t in p.get("type", []))]
+
+
 def load_rod_data(rod_name: str, region: str):
     gen = REGION_TO_GEN.get(region)
     if not gen:
@@ -51,20 +63,11 @@ def load_rod_data(rod_name: str, region: str):
         return [], []
 
     def _load(filename):
-        filepath = os.path.join(JSON_DIR, filename)
-        try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            eau_types = {"eau", "water"}
-            filtered = [
-                p for p in data
-                if any(t.lower() in eau_types for t in p.get("type", []))
-            ]
-            print(f"[DEBUG] {filename} → {len(data)} total, {len(filtered)} de type Eau")
-            return filtered
-        except FileNotFoundError:
-            print(f"[DEBUG] Fichier introuvable : {filepath}")
+        pool = registry.derived(filename, _water_pool, None)
+        if pool is None:
+            print(f"[DEBUG] Fichier introuvable : {os.path.join(JSON_DIR, filename)}")
             return []
+        return pool
 
     normal = _load(f"pokemon_{gen}_normal.json")
     shiny  = _load(f"pokemon_{gen}_shiny.json")
@@ -75,17 +78,7 @@ def load_fishing_items(rod_name: str) -> list:
     filepath = ROD_ITEMS_FILES.get(rod_name)
     if not filepath:
         return []
-    try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
-
-
-def get_user_region(cur, user_id: str) -> str | None:
-    cur.execute("SELECT region FROM user_regions WHERE user_id = %s", (user_id,))
-    row = cur.fetchone()
-    return row[0] if row else None
+    return registry.get(filepath, [])
 
 
 def get_available_rods(user_id: str) -> list[str]:
@@ -155,7 +148,7 @@ async def ask_rod_choice(ctx, available_rods: list[str]) -> str | None:
 # -----------------------
 # COMMANDE !peche
 # -----------------------
-def setup_fishing(bot: commands.Bot, cur):
+def setup_fishing(bot: commands.Bot):
 
     @bot.command()
     async def peche(ctx):
@@ -171,7 +164,7 @@ def setup_fishing(bot: commands.Bot, cur):
             return
 
         # Vérif région
-        region = get_user_region(cur, user_id_str)
+        region = await run_db(get_user_region, user_id_str)
         if not region:
             await ctx.send(
                 f"{ctx.author.mention} ❌ Pas de région choisie ! Utilise `!region`.",
@@ -180,7 +173,7 @@ def setup_fishing(bot: commands.Bot, cur):
             return
 
         # Vérif cannes disponibles
-        available_rods = get_available_rods(user_id_str)
+        available_rods = await run_db(get_available_rods, user_id_str)
         if not available_rods:
             await ctx.send(
                 f"{ctx.author.mention} ❌ Tu n'as aucune canne à pêche ! "
@@ -211,12 +204,7 @@ def setup_fishing(bot: commands.Bot, cur):
         print(f"[DEBUG PECHE] channel_id={member.voice.channel.id if member.voice and member.voice.channel else 'None'}")
         print(f"[DEBUG PECHE] VOICE_CHANNEL_ID cible={VOICE_CHANNEL_ID}")
 
-        voice_state = member.voice
-        in_correct_channel = (
-            voice_state is not None
-            and voice_state.channel is not None
-            and voice_state.channel.id == VOICE_CHANNEL_ID
-        )
+        in_correct_channel = presence.in_voice(member.id, VOICE_CHANNEL_ID)
 
         if not in_correct_channel:
             await ctx.send(
@@ -292,8 +280,8 @@ def setup_fishing(bot: commands.Bot, cur):
             fishing_items = load_fishing_items(chosen_rod)
             if fishing_items:
                 found_item = random.choice(fishing_items)
-                from inventory_db import add_item
-                add_item(
+                from async_db import add_item
+                await add_item(
                     user_id=user_id_str,
                     name=found_item["item_name"],
                     quantity=1,
@@ -325,7 +313,7 @@ def setup_fishing(bot: commands.Bot, cur):
             is_shiny = False
             pokemon = random.choice(normal_pool)
 
-        ivs, final_stats = save_fish_capture(user_id_str, pokemon, is_shiny)
+        ivs, final_stats = await run_db(save_fish_capture, user_id_str, pokemon, is_shiny)
 
         color = discord.Color.gold() if is_shiny else discord.Color.blue()
         embed = discord.Embed(
@@ -1,62 +1,20 @@
 # inventory_db.py
-import os
-import psycopg2
-
-from dotenv import load_dotenv
-
-# Charge les variables d’environnement
-load_dotenv()
-
-DATABASE_URL = os.getenv("DATABASE_URL")
-
-# Connexion globale à la base
-conn = psycopg2.connect(DATABASE_URL, sslmode="require")
-cur = conn.cursor()
-
-
-
-
-
-
-
-# Création de la table inventaire
-cur.execute("""
-CREATE TABLE IF NOT EXISTS inventory (
-    user_id TEXT,
-    item_name TEXT,
-    quantity INTEGER,
-    rarity TEXT,
-    description TEXT,
-    image TEXT,
-    extra TEXT,
-    price INTEGER
-);
-""")
-conn.commit()
+from db_connection import get_cursor
 
 
 def add_item(user_id, name, quantity=1, rarity="commun", description="", image="", extra=None, price=0):
     """Ajoute un item à l’inventaire ou augmente sa quantité."""
     user_id = str(user_id)
 
-    # Vérifie si l’item existe déjà
-    cur.execute("""
-        SELECT quantity FROM inventory
-        WHERE user_id = %s AND item_name = %s
-    """, (user_id, name))
-    row = cur.fetchone()
-
-    if row:  # Mise à jour
-        new_qty = row[0] + quantity
-        cur.execute("""
-            UPDATE inventory SET quantity = %s
-            WHERE user_id = %s AND item_name = %s
-        """, (new_qty, user_id, name))
-    else:  # Insertion
+    # Une seule requête : la contrainte unique (user_id, item_name) fait l'arbitrage,
+    # deux ajouts simultanés du même item ne créent plus de doublon
+    with get_cursor() as cur:
         cur.execute("""
-        INSERT INTO inventory (user_id, item_name, quantity, rarity, description, image, extra, price)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
+            INSERT INTO inventory (user_id, item_name, quantity, rarity, description, image, extra, price)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (user_id, item_name)
+            DO UPDATE SET quantity = inventory.quantity + EXCLUDED.quantity
+        """, (
             user_id,
             name,
             quantity,
@@ -65,22 +23,20 @@ def add_item(user_id, name, quantity=1, rarity="commun", description="", image="
             image,
             str(extra) if extra is not None else None,
             price,
-            
         ))
 
-    conn.commit()
-
 
 def get_inventory(user_id):
     """Retourne tout l’inventaire du joueur."""
-    cur.execute("""
-        SELECT item_name, quantity, rarity, description, image, extra, price
-        FROM inventory
-        WHERE user_id = %s
-        ORDER BY item_name ASC
-    """, (str(user_id),))
-
-    rows = cur.fetchall()
+    with get_cursor() as cur:
+        cur.execute("""
+            SELECT item_name, quantity, rarity, description, image, extra, price
+            FROM inventory
+            WHERE user_id = %s
+            ORDER BY item_name ASC
+        """, (str(user_id),))
+
+        rows = cur.fetchall()
     items = []
 
     for row in rows:
@@ -98,11 +54,11 @@ def get_inventory(user_id):
 
 def delete_inventory(user_id):
     """Supprime tous les items d'un utilisateur."""
-    cur.execute("""
-        DELETE FROM inventory
-        WHERE user_id = %s
-    """, (str(user_id),))
-    conn.commit()
+    with get_cursor() as cur:
+        cur.execute("""
+            DELETE FROM inventory
+            WHERE user_id = %s
+        """, (str(user_id),))
 
 
 def use_item(user_id, item_name, quantity=1):
@@ -111,36 +67,37 @@ def use_item(user_id, item_name, quantity=1):
     Retourne la nouvelle quantité et l'extra ou (None, None) si l'item n'existe pas.
     """
     user_id = str(user_id)
-    cur.execute("""
-        UPDATE inventory
-        SET quantity = quantity - %s
-        WHERE user_id = %s AND item_name = %s
-        RETURNING quantity, extra
-    """, (quantity, user_id, item_name))
-
-    row = cur.fetchone()
-    if row is None:
-        return None, None
-
-    new_qty, extra = row
-
-    if new_qty <= 0:
+    with get_cursor() as cur:
         cur.execute("""
-            DELETE FROM inventory
+            UPDATE inventory
+            SET quantity = quantity - %s
             WHERE user_id = %s AND item_name = %s
-        """, (user_id, item_name))
+            RETURNING quantity, extra
+        """, (quantity, user_id, item_name))
+
+        row = cur.fetchone()
+        if row is None:
+            return None, None
+
+        new_qty, extra = row
+
+        if new_qty <= 0:
+            cur.execute("""
+                DELETE FROM inventory
+                WHERE user_id = %s AND item_name = %s
+            """, (user_id, item_name))
 
-    conn.commit()
     return max(new_qty, 0), extra
 
 def get_items(user_id, item_name):
     """Retourne un item spécifique de l'inventaire du joueur, ou None s'il n'existe pas."""
-    cur.execute("""
-        SELECT item_name, quantity, rarity, description, image, extra, price
-        FROM inventory
-        WHERE user_id = %s AND item_name = %s
-    """, (str(user_id), item_name))
-    row = cur.fetchone()
+    with get_cursor() as cur:
+        cur.execute("""
+            SELECT item_name, quantity, rarity, description, image, extra, price
+            FROM inventory
+            WHERE user_id = %s AND item_name = %s
+        """, (str(user_id), item_name))
+        row = cur.fetchone()
     if row is None:
         return None
     return {
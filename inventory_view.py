@@ -1,45 +1,44 @@
 # inventory_view.py
 import discord
 from discord.ui import View, Button
-from PIL import Image, ImageDraw, ImageFont
-import requests, io, os
+import io, os
 from io import BytesIO
 from utils import is_croco
 
-from inventory_db import add_item
-from inventory_db import get_inventory
-from inventory_db import delete_inventory
-import json
-from inventory_db import use_item
+from async_db import add_item
+from async_db import get_inventory
+from async_db import delete_inventory
+from async_db import use_item
 from utils import spawn_pokemon_for_user
 script_dir = os.path.dirname(os.path.abspath(__file__))
 images_dir = os.path.join(script_dir, "images")
 from buff_iv import BuffPokemonView
-from new_db_avantmodif import get_new_captures
-
-# Chargement du fichier item.json
+from async_db import get_new_captures
+from sprites import fetch_sprite, resolve_image_path, SpriteUnavailable
+from cards import ItemCardJob
+from render_service import render_for
+from encoding import filename_for
+from catalog import catalog
+from data_registry import registry
+
+# item.json : registre partagé (data_registry)
 item_json_path = os.path.join(script_dir, "json", "item.json")
-with open(item_json_path, "r", encoding="utf-8") as f:
-    ITEM_LIST = json.load(f)
 
 
 import discord
 from io import BytesIO
-import requests
 
 async def get_pokemon_image_embed(pokemon_name: str, json_file: str, is_shiny: bool = False) -> (discord.Embed, discord.File):
-    with open(json_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    pokemon_data = next((p for p in data if p["name"].lower() == pokemon_name.lower()), None)
+    pokemon_data = catalog.find_in_file(json_file, pokemon_name)
     if not pokemon_data:
         return None, None
 
     image_url = pokemon_data.get("image")
     if image_url.startswith("http"):
-        resp = requests.get(image_url)
-        resp.raise_for_status()
-        buffer = BytesIO(resp.content)
+        content = await fetch_sprite(image_url)
+        if content is None:
+            raise SpriteUnavailable(image_url)
+        buffer = BytesIO(content)
         file = discord.File(buffer, filename=f"{pokemon_name}.png")
     else:
         file = None
@@ -149,7 +148,7 @@ class UseItemButton(Button):
             await interaction.followup.send("⏳ Chaque chose en son temps…", ephemeral=True)
             return
 
-        new_qty, extra = use_item(self.user_id, self.item["name"])
+        new_qty, extra = await use_item(self.user_id, self.item["name"])
 
         if new_qty is None:
             await interaction.response.send_message(
@@ -218,7 +217,7 @@ class UseItemButton(Button):
             stat_key = EXTRA_TO_STAT[extra]
             stat_label = STAT_LABELS[stat_key]
 
-            captures = get_new_captures(str(interaction.user.id))
+            captures = await get_new_captures(str(interaction.user.id))
             pokemons = [entry["name"] for entry in captures]
 
             if not pokemons:
@@ -248,31 +247,6 @@ class UseItemButton(Button):
 
 
 
-# ─── Utilitaire texte ─────────────────────────────────────────────────────────
-
-def draw_multiline_text(draw, text, position, font, max_width, fill=(0, 0, 0)):
-    words = text.split()
-    lines = []
-    current_line = ""
-    for word in words:
-        test_line = current_line + " " + word if current_line else word
-        bbox = font.getbbox(test_line)
-        w = bbox[2] - bbox[0]
-        if w <= max_width:
-            current_line = test_line
-        else:
-            lines.append(current_line)
-            current_line = word
-    if current_line:
-        lines.append(current_line)
-
-    x, y = position
-    line_height = font.getbbox("A")[3] - font.getbbox("A")[1] + 10
-    for line in lines:
-        draw.text((x, y), line, font=font, fill=fill)
-        y += line_height
-
-
 # ─── Bouton item inventaire ───────────────────────────────────────────────────
 
 class InventoryItemButton(Button):
@@ -292,50 +266,19 @@ class InventoryItemButton(Button):
         description = self.item["description"]
         image_url = self.item["image"]
 
-        width, height = 600, 400
-        try:
-            card = Image.open(os.path.join(images_dir, "image_item.png")).convert("RGBA")
-            card = card.resize((width, height), Image.Resampling.LANCZOS)
-        except Exception as e:
-            print(f"[ERREUR] Impossible de charger le fond image_item.png : {e}")
-            card = Image.new("RGBA", (width, height), (245, 245, 245, 255))
-
-        draw = ImageDraw.Draw(card)
-        font_path = os.path.join(script_dir, "fonts", "DejaVuSans-Bold.ttf")
-        try:
-            font = ImageFont.truetype(font_path, 22)
-            font_small = ImageFont.truetype(font_path, 18)
-        except:
-            font = ImageFont.load_default()
-            font_small = font
-
-        draw.text((70, 130), f"{name}", fill="black", font=font)
-        draw.text((70, 180), f"Quantité : {quantity}", fill="black", font=font_small)
-        draw_multiline_text(draw, description or "Aucune description.", (70, 230), font_small, max_width=240)
-
-        # APRÈS
-        if image_url:
-            try:
-                if image_url.startswith("http"):
-                    resp = requests.get(image_url)
-                    resp.raise_for_status()
-                    item_img = Image.open(BytesIO(resp.content)).convert("RGBA")
-                else:
-                    local_path = os.path.join(script_dir, image_url)
-                    item_img = Image.open(local_path).convert("RGBA")
-
-                item_img = item_img.resize((100, 100), Image.Resampling.LANCZOS)
-                card.paste(item_img, (385, 120), item_img if item_img.mode == "RGBA" else None)
-            except Exception as e:
-                print(f"Erreur lors du chargement de l'image : {e}")
-
-        with BytesIO() as buffer:
-            card.save(buffer, "PNG")
-            buffer.seek(0)
-            file = discord.File(buffer, filename="item.png")
+        png = await render_for(interaction, ItemCardJob(
+            theme="inventory",
+            name=name,
+            description=description,
+            quantity=quantity,
+            image_path=await resolve_image_path(image_url or ""),
+        ))
+        if png is None:
+            return
+        file = discord.File(BytesIO(png), filename=filename_for(png, "item"))
 
         embed = discord.Embed(title=name)
-        embed.set_image(url="attachment://item.png")
+        embed.set_image(url=f"attachment://{file.filename}")
 
         view = View()
         view.add_item(UseItemButton(
@@ -353,7 +296,7 @@ def setup_inventory(bot, spawn_func=None):
 
     @bot.command(name="inventaire")
     async def inventaire(ctx):
-        items = get_inventory(ctx.author.id)
+        items = await get_inventory(ctx.author.id)
         if not items:
             await ctx.send("🎒 Votre inventaire est vide.")
             return
@@ -365,14 +308,14 @@ def setup_inventory(bot, spawn_func=None):
     @bot.command(name="give")
     async def give(ctx, user: discord.User, *, item_name: str):
         found_item = next(
-            (i for i in ITEM_LIST if i["item_name"].lower() == item_name.lower()),
+            (i for i in registry.get(item_json_path) if i["item_name"].lower() == item_name.lower()),
             None
         )
         if not found_item:
             await ctx.send(f"❌ Grand Maître suprême des Crocodiles, l'item `{item_name}` n'existe pas.")
             return
 
-        add_item(
+        await add_item(
             user_id=user.id,
             name=found_item["item_name"],
             quantity=1,
@@ -391,5 +334,5 @@ def setup_inventory(bot, spawn_func=None):
     @is_croco()
     @bot.command(name="inventaire_vide")
     async def inventaire_vide(ctx, user: discord.User):
-        delete_inventory(user.id)
+        await delete_inventory(user.id)
         await ctx.send(f"🗑️ Grand Maître suprême des Crocodiles, l'inventaire de {user.mention} a été vidé !")
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""Watchdog de la boucle asyncio.
+
+Une tâche « heartbeat » tourne sur la boucle toutes les HEARTBEAT_INTERVAL
+secondes ; un thread de surveillance vérifie qu'elle avance. Si la boucle
+ne répond plus depuis plus de LOOP_LAG_THRESHOLD secondes, le thread logge
+la pile du callback en cours (celui qui bloque), puis la durée totale du
+blocage est loggée quand la boucle reprend la main.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.5"))   # secondes
+HEARTBEAT_INTERVAL = 0.1                                               # secondes
+
+_watchdog = None
+
+
+class LoopWatchdog:
+    def __init__(self, loop, threshold=LOOP_LAG_THRESHOLD):
+        self.loop      = loop
+        self.threshold = threshold
+        self.loop_thread_id = threading.get_ident()   # construit depuis la boucle
+
+        self.last_beat = time.monotonic()
+        self.stalls    = 0        # nombre de blocages détectés
+        self.max_lag   = 0.0      # pire blocage observé (secondes)
+        self._reported = False
+        self._stop     = threading.Event()
+        self._task     = None
+        self._thread   = None
+
+    # ── Côté boucle ──────────────────────────────────────────────────────────
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + HEARTBEAT_INTERVAL
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            now = time.monotonic()
+            lag = now - expected
+            self.last_beat = now
+            if lag > self.threshold:
+                self.stalls += 1
+                self.max_lag = max(self.max_lag, lag)
+                print(f"[LOOP] Boucle asyncio bloquée pendant {lag * 1000:.0f} ms")
+            self._reported = False
+
+    # ── Côté thread de surveillance ──────────────────────────────────────────
+    def _watch(self):
+        while not self._stop.wait(self.threshold / 2):
+            lag = time.monotonic() - self.last_beat - HEARTBEAT_INTERVAL
+            if lag <= self.threshold or self._reported:
+                continue
+            self._reported = True
+            frame = sys._current_frames().get(self.loop_thread_id)
+            stack = "".join(traceback.format_stack(frame, limit=10)) if frame else "  (pile indisponible)\n"
+            print(f"[LOOP] ⚠️ Callback bloquant depuis {lag * 1000:.0f} ms :\n{stack}", end="")
+
+    def start(self):
+        self._task   = self.loop.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        print(f"[LOOP] Watchdog démarré (seuil {self.threshold * 1000:.0f} ms)")
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "threshold_ms": round(self.threshold * 1000),
+            "stalls":       self.stalls,
+            "max_lag_ms":   round(self.max_lag * 1000),
+        }
+
+
+def start_loop_watchdog(threshold: float = LOOP_LAG_THRESHOLD) -> LoopWatchdog:
+    """Démarre le watchdog sur la boucle courante (idempotent, à appeler depuis on_ready)."""
+    global _watchdog
+    if _watchdog is None:
+        _watchdog = LoopWatchdog(asyncio.get_running_loop(), threshold)
+        _watchdog.start()
+    return _watchdog
+
+
+def get_loop_stats() -> dict | None:
+    return _watchdog.stats() if _watchdog else None
@@ -1,47 +1,24 @@
 import asyncio
 import discord
 from discord.ui import View, Button
-from PIL import Image, ImageDraw, ImageFont
-import requests
 import os
-import json
 import random
 from io import BytesIO
-from inventory_db import add_item
-from money_db import get_balance, remove_money
-from db_connection import get_connection
+from sprites import fetch_sprite_path, resolve_image_path
+from cards import ItemCardJob, rarity_color
+from render_service import render_for
+from data_registry import registry
+from encoding import filename_for
+from async_db import add_item, get_balance, remove_money, run_db
+from db_connection import get_cursor
 from datetime import datetime
 
-conn = get_connection()
-cur  = conn.cursor()
-
 script_dir = os.path.dirname(os.path.abspath(__file__))
 marche_noir_json_path = os.path.join(script_dir, "json","marche_noir.json")
 images_dir = os.path.join(script_dir, "images")
 images_json_path = os.path.join(script_dir, "json", "images.json")
 
-# ─── Table pour tracer les achats du marché noir ───────────────────────────────
-cur.execute("""
-CREATE TABLE IF NOT EXISTS marche_noir_purchases (
-    user_id TEXT,
-    purchase_date DATE,
-    item_name TEXT,
-    PRIMARY KEY (user_id, purchase_date)
-);
-""")
-conn.commit()
-
-# ─── Chargement des items du marché noir ───────────────────────────────────────
-with open(marche_noir_json_path, "r", encoding="utf-8") as f:
-    MARCHE_NOIR_ITEMS = json.load(f)
-
-# ─── Chargement des images de fond ────────────────────────────────────────────
-try:
-    with open(images_json_path, "r", encoding="utf-8") as f:
-        IMAGES_DATA = json.load(f)
-except Exception as e:
-    print(f"[MARCHE NOIR] Erreur lors du chargement de images.json : {e}")
-    IMAGES_DATA = {}
+# ─── Items du marché noir et images de fond : registre partagé (data_registry) ─
 
 # ─── Stock disponible pour cette session ──────────────────────────────────────
 # Le marché noir tire aléatoirement N items à chaque ouverture
@@ -52,14 +29,13 @@ def has_bought_today(user_id: str) -> bool:
     """Vérifie si l'utilisateur a déjà acheté quelque chose aujourd'hui."""
     user_id = str(user_id)
     today = datetime.now().date()
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT 1 FROM marche_noir_purchases
-        WHERE user_id = %s AND purchase_date = %s
-        LIMIT 1
-    """, (user_id, today))
-    return cur.fetchone() is not None
+    with get_cursor() as cur:
+        cur.execute("""
+            SELECT 1 FROM marche_noir_purchases
+            WHERE user_id = %s AND purchase_date = %s
+            LIMIT 1
+        """, (user_id, today))
+        return cur.fetchone() is not None
 
 
 def record_purchase(user_id: str, item_name: str) -> bool:
@@ -67,17 +43,14 @@ def record_purchase(user_id: str, item_name: str) -> bool:
     user_id = str(user_id)
     today = datetime.now().date()
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO marche_noir_purchases (user_id, purchase_date, item_name)
-            VALUES (%s, %s, %s)
-        """, (user_id, today, item_name))
-        conn.commit()
+        with get_cursor() as cur:
+            cur.execute("""
+                INSERT INTO marche_noir_purchases (user_id, purchase_date, item_name)
+                VALUES (%s, %s, %s)
+            """, (user_id, today, item_name))
         return True
     except Exception as e:
         print(f"[MARCHE NOIR] Erreur lors de l'enregistrement de l'achat : {e}")
-        conn.rollback()
         return False
 
 
@@ -88,8 +61,9 @@ NB_ITEMS_AFFICHES = 4  # Nombre d'items affichés au marché noir
 
 def get_stock_du_jour():
     """Tire aléatoirement des items parmi ceux du marché noir."""
-    nb = min(NB_ITEMS_AFFICHES, len(MARCHE_NOIR_ITEMS))
-    return random.sample(MARCHE_NOIR_ITEMS, nb)
+    items = registry.get(marche_noir_json_path)
+    nb = min(NB_ITEMS_AFFICHES, len(items))
+    return random.sample(items, nb)
 
 
 
@@ -107,7 +81,7 @@ class MarcheNoirIntroView(View):
 
         try:
             user_id = str(interaction.user.id)
-            balance = await asyncio.to_thread(get_balance, user_id)
+            balance = await get_balance(user_id)
             stock   = await asyncio.to_thread(get_stock_du_jour)  # ← thread séparé
 
             if not stock:
@@ -176,130 +150,43 @@ class MarcheNoirItemButton(Button):
         self.item = item
         self.user_id = user_id
 
-    def resize_keep_aspect(self, img, max_size):
-        w, h = img.size
-        ratio = min(max_size / w, max_size / h)
-        return img.resize((int(w * ratio), int(h * ratio)), Image.Resampling.LANCZOS)
-
     async def callback(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
 
-        name        = self.item["item_name"]
-        price       = self.item["price"]
-        rarity      = self.item.get("rarity", "common")
-        description = self.item.get("description", "Aucune description.")
-        image_url   = self.item.get("image", "")
-        balance     = await asyncio.to_thread(get_balance, self.user_id)
-
-        # Couleurs par rareté
-        rarity_colors = {
-            "common":    (200, 200, 200),
-            "uncommon":  (50, 205, 50),
-            "rare":      (30, 144, 255),
-            "epic":      (138, 43, 226),
-            "legendary": (255, 215, 0)
-        }
-        rarity_color = rarity_colors.get(rarity.lower(), (200, 200, 200))
-
-        width, height = 850, 600
-
-        # ── Fond ────────────────────────────────────────────────────────────────
-        background = None
+        name  = self.item["item_name"]
+        price = self.item["price"]
+        images_data = registry.get(images_json_path, {})
         fond_url = (
-            IMAGES_DATA.get("fond_marche_noir")
-            or IMAGES_DATA.get("fond_shop")
-            or IMAGES_DATA.get("background")
+            images_data.get("fond_marche_noir")
+            or images_data.get("fond_shop")
+            or images_data.get("background")
         )
 
-        if fond_url and fond_url.startswith("http"):
-            try:
-                resp = requests.get(fond_url, timeout=5)
-                resp.raise_for_status()
-                background = Image.open(BytesIO(resp.content)).convert("RGBA")
-                background = background.resize((width, height), Image.Resampling.LANCZOS)
-            except Exception as e:
-                print(f"[MARCHE NOIR] Erreur fond URL : {e}")
-
-        if background is None:
-            try:
-                background = Image.open(
-                    os.path.join(images_dir, "marche_noir", "marche_noir.png")
-                ).convert("RGBA")
-                background = background.resize((width, height), Image.Resampling.LANCZOS)
-            except Exception:
-                # Fond sombre par défaut, ambiance underground
-                background = Image.new("RGBA", (width, height), (20, 20, 20, 255))
-
-        draw = ImageDraw.Draw(background)
-
-        # ── Polices ─────────────────────────────────────────────────────────────
-        font_path_bold = os.path.join(script_dir, "fonts", "DejaVuSans-Bold.ttf")
-        try:
-            font_title  = ImageFont.truetype(font_path_bold, 28)
-            font_normal = ImageFont.truetype(font_path_bold, 18)
-            font_small  = ImageFont.truetype(font_path_bold, 16)
-        except Exception:
-            font_title = font_normal = font_small = ImageFont.load_default()
-
-        # ── Textes ──────────────────────────────────────────────────────────────
-        draw.text((540, 115), name,                                     font=font_title,  fill="white")
-        draw.text((450, 340), f"Rareté : {rarity.capitalize()}",        font=font_normal, fill="white")
-        draw.text((450, 380), f"Prix : {price:,} Croco dollars",        font=font_normal, fill="white")
-
-        balance_color = (50, 205, 50) if balance >= price else (255, 69, 0)
-        draw.text((450, 420), f"Votre solde : {balance:,} Croco dollars", font=font_normal, fill=balance_color)
-
-        # Description multi-lignes
-        x, y = 450, 460
-        draw.text((x, y), "Description :", font=font_normal, fill="white")
-        y += 30
-
-        words, lines, current_line = description.split(), [], ""
-        for word in words:
-            test = current_line + word + " "
-            if len(test) * 10 < 350:
-                current_line = test
-            else:
-                if current_line:
-                    lines.append(current_line.strip())
-                current_line = word + " "
-        if current_line:
-            lines.append(current_line.strip())
-
-        for line in lines[:4]:
-            draw.text((x, y), line, font=font_small, fill="white")
-            y += 25
-
-        # ── Image de l'item ─────────────────────────────────────────────────────
-        if image_url:
-            try:
-                if image_url.startswith("http"):
-                    # URL distante
-                    resp = requests.get(image_url, timeout=5)
-                    resp.raise_for_status()
-                    item_img = Image.open(BytesIO(resp.content)).convert("RGBA")
-                else:
-                    # Chemin local relatif au dossier du script
-                    local_path = os.path.join(script_dir, image_url)
-                    item_img = Image.open(local_path).convert("RGBA")
-
-                item_img = self.resize_keep_aspect(item_img, 200)
-                img_x = 530 + (200 - item_img.width) // 2
-                background.paste(item_img, (img_x, 140), item_img)
-            except Exception as e:
-                print(f"[MARCHE NOIR] Erreur image item : {e}")
-
-        # ── Envoi ────────────────────────────────────────────────────────────────
-        with BytesIO() as buffer:
-            background.save(buffer, "PNG")
-            buffer.seek(0)
-            file = discord.File(buffer, filename="marche_noir_card.png")
+        # Solde et images récupérés ici, la carte est dessinée par le pool de rendu
+        balance, fond_path, item_path = await asyncio.gather(
+            get_balance(self.user_id),
+            fetch_sprite_path(fond_url or ""),
+            resolve_image_path(self.item.get("image", "")),
+        )
+        png = await render_for(interaction, ItemCardJob(
+            theme="marche_noir",
+            name=name,
+            rarity=self.item.get("rarity", "common"),
+            description=self.item.get("description", "Aucune description."),
+            price=price,
+            balance=balance,
+            background_path=fond_path,
+            image_path=item_path,
+        ))
+        if png is None:
+            return
+        file = discord.File(BytesIO(png), filename=filename_for(png, "marche_noir_card"))
 
         embed = discord.Embed(
             title=f"🖤 {name}",
-            color=discord.Color.from_rgb(*rarity_color)
+            color=discord.Color.from_rgb(*rarity_color(self.item.get("rarity", "common")))
         )
-        embed.set_image(url="attachment://marche_noir_card.png")
+        embed.set_image(url=f"attachment://{file.filename}")
 
         view = View()
         view.add_item(AcheterMarcheNoirButton(self.item, self.user_id))
@@ -318,7 +205,7 @@ class AcheterMarcheNoirButton(Button):
         await interaction.response.defer(ephemeral=True)
 
         # Vérifie si l'utilisateur a déjà acheté aujourd'hui
-        if await asyncio.to_thread(has_bought_today, self.user_id):
+        if await run_db(has_bought_today, self.user_id):
             await interaction.followup.send(
                 f"❌ Tu as déjà acheté quelque chose au marché noir aujourd'hui.\n"
                 f"🔄 Reviens demain pour continuer tes achats secrets !",
@@ -328,7 +215,7 @@ class AcheterMarcheNoirButton(Button):
 
         price   = self.item.get("price", 0)
         name    = self.item["item_name"]
-        balance = await asyncio.to_thread(get_balance, self.user_id)
+        balance = await get_balance(self.user_id)
 
         if balance < price:
             await interaction.followup.send(
@@ -339,13 +226,12 @@ class AcheterMarcheNoirButton(Button):
             )
             return
 
-        success = await asyncio.to_thread(remove_money, self.user_id, price)
+        success = await remove_money(self.user_id, price, reason="marche_noir")
         if not success:
             await interaction.followup.send("❌ Erreur lors de la transaction.", ephemeral=True)
             return
 
-        await asyncio.to_thread(
-            add_item,
+        await add_item(
             self.user_id,
             self.item["item_name"],
             1,
@@ -357,9 +243,9 @@ class AcheterMarcheNoirButton(Button):
         )
 
         # Enregistre l'achat pour aujourd'hui
-        await asyncio.to_thread(record_purchase, self.user_id, name)
+        await run_db(record_purchase, self.user_id, name)
 
-        new_balance = await asyncio.to_thread(get_balance, self.user_id)
+        new_balance = await get_balance(self.user_id)
         await interaction.followup.send(
             f"🖤 Transaction secrète effectuée...\n"
             f"🎁 Vous avez obtenu **{name}** pour **{price:,}** Croco dollars.\n"
@@ -0,0 +1,180 @@
+"""Migrations du schéma PostgreSQL.
+
+Le schéma n'est plus créé à l'import des modules : chaque évolution est un
+fichier numéroté de migrations/, appliqué une seule fois et enregistré dans
+la table schema_version. Le démarrage du bot ne fait plus aucun DDL, il
+vérifie seulement qu'aucune migration n'est en attente.
+
+    python migrate.py                      → applique les migrations en attente
+    python migrate.py --status             → liste appliquées / en attente
+    python migrate.py --refresh-collation  → ALTER DATABASE … REFRESH COLLATION VERSION
+                                             (après une mise à jour de la glibc du serveur)
+
+Format des fichiers : NNNN_description.sql (exécuté tel quel) ou
+NNNN_description.py (fonction `upgrade(cur)`). Chaque migration tourne dans
+sa propre transaction, sous un verrou advisory : deux déploiements lancés
+en même temps ne l'appliquent pas deux fois.
+"""
+import argparse
+import importlib.util
+import os
+import re
+import sys
+
+from psycopg2 import sql
+
+from db_connection import get_connection, get_cursor
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+MIGRATIONS_DIR = os.path.join(script_dir, "migrations")
+
+MIGRATION_FILE = re.compile(r"^(\d+)_(.+)\.(sql|py)$")
+# Clé arbitraire du verrou advisory (pg_advisory_xact_lock) des migrations
+MIGRATION_LOCK_KEY = 7_240_915
+# Applique les migrations en attente au démarrage du bot (désactivé par défaut)
+MIGRATE_ON_START = os.getenv("MIGRATE_ON_START", "0").lower() in ("1", "true", "yes")
+
+
+# ───────────────────────────────────────────────────────────────
+# 🔎 Découverte
+# ───────────────────────────────────────────────────────────────
+def discover() -> list[tuple[int, str, str]]:
+    """[(version, nom, chemin)] triées par version."""
+    migrations = {}
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise RuntimeError(f"Migration {version} en double : {migrations[version][1]} / {filename}")
+        migrations[version] = (version, filename, os.path.join(MIGRATIONS_DIR, filename))
+    return [migrations[v] for v in sorted(migrations)]
+
+
+def _ensure_version_table(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version    INT PRIMARY KEY,
+        name       TEXT NOT NULL,
+        applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+    """)
+
+
+def applied_versions() -> dict[int, tuple]:
+    """{version: (nom, applied_at)} ; vide si la table n'existe pas encore."""
+    with get_cursor() as cur:
+        cur.execute("SELECT to_regclass('schema_version') IS NOT NULL;")
+        if not cur.fetchone()[0]:
+            return {}
+        cur.execute("SELECT version, name, applied_at FROM schema_version;")
+        return {version: (name, applied_at) for version, name, applied_at in cur.fetchall()}
+
+
+def pending_migrations() -> list[tuple[int, str, str]]:
+    applied = applied_versions()
+    return [m for m in discover() if m[0] not in applied]
+
+
+# ───────────────────────────────────────────────────────────────
+# ⬆️ Application
+# ───────────────────────────────────────────────────────────────
+def _run_python(cur, path):
+    spec = importlib.util.spec_from_file_location(f"migration_{os.path.basename(path)[:-3]}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.upgrade(cur)
+
+
+def _run_sql(cur, path):
+    with open(path, "r", encoding="utf-8") as f:
+        cur.execute(f.read())
+
+
+def migrate() -> list[str]:
+    """Applique les migrations en attente, dans l'ordre. Retourne leurs noms."""
+    with get_cursor() as cur:
+        _ensure_version_table(cur)
+
+    done = []
+    for version, name, path in discover():
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_xact_lock(%s);", (MIGRATION_LOCK_KEY,))
+                # Revérifié sous le verrou : un autre processus a pu l'appliquer
+                cur.execute("SELECT 1 FROM schema_version WHERE version = %s;", (version,))
+                if cur.fetchone():
+                    continue
+
+                print(f"[MIGRATE] {name}…")
+                if path.endswith(".py"):
+                    _run_python(cur, path)
+                else:
+                    _run_sql(cur, path)
+                cur.execute(
+                    "INSERT INTO schema_version (version, name) VALUES (%s, %s);",
+                    (version, name),
+                )
+        done.append(name)
+
+    print(f"[MIGRATE] {len(done)} migration(s) appliquée(s)" if done else "[MIGRATE] Schéma à jour")
+    return done
+
+
+def check_schema():
+    """Appelé au démarrage du bot : un SELECT, aucun DDL. Retourne les migrations en attente.
+
+    Avec MIGRATE_ON_START=1, les migrations en attente sont appliquées à la place.
+    """
+    try:
+        pending = pending_migrations()
+    except Exception as e:
+        print(f"[MIGRATE] Impossible de vérifier le schéma : {e}")
+        return []
+    if pending and MIGRATE_ON_START:
+        migrate()
+        return []
+    if pending:
+        names = ", ".join(name for _, name, _ in pending)
+        print(f"[MIGRATE] ⚠️ {len(pending)} migration(s) en attente : {names} → lancer `python migrate.py`")
+    return pending
+
+
+def refresh_collation():
+    """Met à jour la version de collation enregistrée (ex-ALTER DATABASE de db.py, lancé à chaque boot)."""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT current_database();")
+            dbname = cur.fetchone()[0]
+            cur.execute(sql.SQL("ALTER DATABASE {} REFRESH COLLATION VERSION;").format(sql.Identifier(dbname)))
+            print(f"[MIGRATE] Collation de {dbname} rafraîchie")
+
+
+# ───────────────────────────────────────────────────────────────
+# 🖥️ CLI
+# ───────────────────────────────────────────────────────────────
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migrations du schéma PokeMouille.")
+    parser.add_argument("--status", action="store_true", help="affiche les migrations appliquées et en attente")
+    parser.add_argument("--refresh-collation", action="store_true", help="ALTER DATABASE … REFRESH COLLATION VERSION")
+    args = parser.parse_args(argv)
+
+    if args.refresh_collation:
+        refresh_collation()
+        return
+
+    if args.status:
+        applied = applied_versions()
+        for version, name, _ in discover():
+            if version in applied:
+                print(f"  ✅ {name}  ({applied[version][1]:%Y-%m-%d %H:%M})")
+            else:
+                print(f"  ⏳ {name}")
+        return
+
+    migrate()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+-- 0001 — Schéma de départ (tables créées jusqu'ici à l'import des modules).
+-- Idempotent : une base déjà en production passe cette migration sans rien changer.
+
+CREATE TABLE IF NOT EXISTS captures (
+    user_id TEXT,
+    name    TEXT,
+    ivs     JSONB,
+    stats   JSONB,
+    image   TEXT,
+    type    JSONB,
+    attacks JSONB
+);
+
+CREATE TABLE IF NOT EXISTS new_captures (
+    user_id     TEXT,
+    name        TEXT,
+    ivs         JSONB,
+    stats       JSONB,
+    image       TEXT,
+    type        JSONB,
+    attacks     JSONB,
+    current_xp  INT DEFAULT 0,
+    xp_evo      INT DEFAULT 0,
+    evo         JSONB DEFAULT '{"name": "pas evo", "file": "pas evo"}'::jsonb
+);
+
+CREATE TABLE IF NOT EXISTS argent (
+    user_id TEXT PRIMARY KEY,
+    balance INTEGER DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS inventory (
+    user_id     TEXT,
+    item_name   TEXT,
+    quantity    INTEGER,
+    rarity      TEXT,
+    description TEXT,
+    image       TEXT,
+    extra       TEXT,
+    price       INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS badges (
+    user_id  TEXT,
+    badge_id INT,
+    UNIQUE (user_id, badge_id)
+);
+
+CREATE TABLE IF NOT EXISTS chenil (
+    user_id      TEXT PRIMARY KEY,
+    pokemon_name TEXT NOT NULL,
+    is_egg       BOOLEAN DEFAULT FALSE,
+    egg_xp       INTEGER DEFAULT 0,
+    egg_xp_evo   INTEGER DEFAULT 400
+);
+ALTER TABLE chenil ADD COLUMN IF NOT EXISTS is_egg     BOOLEAN DEFAULT FALSE;
+ALTER TABLE chenil ADD COLUMN IF NOT EXISTS egg_xp     INTEGER DEFAULT 0;
+ALTER TABLE chenil ADD COLUMN IF NOT EXISTS egg_xp_evo INTEGER DEFAULT 400;
+
+CREATE TABLE IF NOT EXISTS marche_noir_purchases (
+    user_id       TEXT,
+    purchase_date DATE,
+    item_name     TEXT,
+    PRIMARY KEY (user_id, purchase_date)
+);
+
+CREATE TABLE IF NOT EXISTS battle_attempts (
+    user_id       TEXT NOT NULL,
+    attempt_date  DATE NOT NULL,
+    attempt_count INTEGER DEFAULT 0,
+    PRIMARY KEY (user_id, attempt_date)
+);
+
+CREATE TABLE IF NOT EXISTS user_regions (
+    user_id TEXT PRIMARY KEY,
+    region  TEXT
+);
+
+CREATE TABLE IF NOT EXISTS preuves (
+    id          SERIAL PRIMARY KEY,
+    user_id     TEXT NOT NULL,
+    item_name   TEXT NOT NULL,
+    region      TEXT NOT NULL,
+    description TEXT,
+    image       TEXT,
+    obtained_at TIMESTAMP DEFAULT NOW()
+);
@@ -0,0 +1,62 @@
+"""0002 — Identité des captures : clé technique, espèce et compteur par espèce.
+
+Migration Python : l'espèce des anciennes lignes de `captures` dépend du
+catalogue (Porygon2 est une espèce, Pikachu2 un doublon de Pikachu).
+"""
+from catalog import catalog
+
+
+def upgrade(cur):
+    for table in ("new_captures", "captures"):
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS id BIGSERIAL;")
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS species TEXT;")
+        cur.execute(f"""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint
+                WHERE conrelid = '{table}'::regclass AND contype = 'p'
+            ) THEN
+                ALTER TABLE {table} ADD PRIMARY KEY (id);
+            END IF;
+        END $$;
+        """)
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {table}_user_species_idx ON {table} (user_id, species);")
+
+    # new_captures : un seul exemplaire par espèce (les doublons boostent les IV)
+    cur.execute("UPDATE new_captures SET species = name WHERE species IS NULL;")
+
+    # captures : le nom s'il existe tel quel dans le catalogue, sinon sans le numéro de doublon
+    cur.execute("SELECT DISTINCT name FROM captures WHERE species IS NULL;")
+    for (name,) in cur.fetchall():
+        species = name if catalog.get(name) else (name.rstrip("0123456789") or name)
+        cur.execute(
+            "UPDATE captures SET species = %s WHERE species IS NULL AND name = %s;",
+            (species, name),
+        )
+
+    for table in ("new_capture_counters", "capture_counters"):
+        cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            user_id  TEXT NOT NULL,
+            species  TEXT NOT NULL,
+            seq      INT  NOT NULL,
+            PRIMARY KEY (user_id, species)
+        );
+        """)
+
+    cur.execute("""
+    INSERT INTO new_capture_counters (user_id, species, seq)
+    SELECT user_id, species, COUNT(*) FROM new_captures
+    GROUP BY user_id, species
+    ON CONFLICT (user_id, species) DO NOTHING;
+    """)
+    # Au moins le nombre de lignes et le plus grand suffixe déjà attribué
+    cur.execute("""
+    INSERT INTO capture_counters (user_id, species, seq)
+    SELECT user_id, species,
+           GREATEST(COUNT(*), MAX(COALESCE(NULLIF(substr(name, length(species) + 1), '')::INT, 1)))
+    FROM captures
+    GROUP BY user_id, species
+    ON CONFLICT (user_id, species) DO NOTHING;
+    """)
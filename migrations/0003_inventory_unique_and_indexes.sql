@@ -0,0 +1,31 @@
+-- 0003 — Une ligne par (user_id, item_name) dans inventory + index manquants.
+
+-- Fusion des doublons : on garde la première ligne et on y cumule les quantités
+WITH ranked AS (
+    SELECT ctid,
+           user_id,
+           item_name,
+           ROW_NUMBER() OVER (PARTITION BY user_id, item_name ORDER BY ctid) AS rn,
+           SUM(quantity) OVER (PARTITION BY user_id, item_name)             AS total
+    FROM inventory
+), merged AS (
+    UPDATE inventory i
+    SET quantity = r.total
+    FROM ranked r
+    WHERE i.ctid = r.ctid AND r.rn = 1 AND i.quantity IS DISTINCT FROM r.total
+)
+DELETE FROM inventory i
+USING ranked r
+WHERE i.ctid = r.ctid AND r.rn > 1;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'inventory_user_item_key'
+    ) THEN
+        ALTER TABLE inventory
+            ADD CONSTRAINT inventory_user_item_key UNIQUE (user_id, item_name);
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS preuves_user_item_idx ON preuves (user_id, item_name);
@@ -0,0 +1,32 @@
+-- 0004 — Journal des mouvements d'argent (ajout seul) avec code raison.
+
+CREATE TABLE IF NOT EXISTS argent_ledger (
+    id            BIGSERIAL PRIMARY KEY,
+    user_id       TEXT        NOT NULL,
+    delta         INTEGER     NOT NULL,
+    balance_after INTEGER     NOT NULL,
+    reason        TEXT        NOT NULL,
+    counterparty  TEXT,
+    created_at    TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS argent_ledger_user_idx ON argent_ledger (user_id, created_at);
+
+-- Écriture d'ouverture : le solde existant devient le premier mouvement,
+-- SUM(delta) par joueur est ainsi égal à argent.balance dès le départ
+INSERT INTO argent_ledger (user_id, delta, balance_after, reason)
+SELECT a.user_id, COALESCE(a.balance, 0), COALESCE(a.balance, 0), 'ouverture'
+FROM argent a
+WHERE NOT EXISTS (SELECT 1 FROM argent_ledger l WHERE l.user_id = a.user_id);
+
+-- Journal en ajout seul : ni modification ni suppression
+CREATE OR REPLACE FUNCTION argent_ledger_append_only() RETURNS trigger AS $$
+BEGIN
+    RAISE EXCEPTION 'argent_ledger est en ajout seul';
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS argent_ledger_no_update ON argent_ledger;
+CREATE TRIGGER argent_ledger_no_update
+    BEFORE UPDATE OR DELETE ON argent_ledger
+    FOR EACH ROW EXECUTE FUNCTION argent_ledger_append_only();
@@ -0,0 +1,7 @@
+-- 0005 — XP du chenil calculée à partir du temps de vocal (plus de tick par minute).
+
+-- Début du temps de vocal pas encore crédité (NULL : hors vocal)
+ALTER TABLE chenil ADD COLUMN IF NOT EXISTS voice_since TIMESTAMPTZ;
+
+-- Le règlement groupé ne parcourt que les sessions ouvertes
+CREATE INDEX IF NOT EXISTS chenil_voice_since_idx ON chenil (voice_since) WHERE voice_since IS NOT NULL;
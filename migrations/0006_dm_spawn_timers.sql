@@ -0,0 +1,8 @@
+-- 0006 — Minuteries de spawn DM persistées (reprise après redémarrage, pause hors vocal).
+
+CREATE TABLE IF NOT EXISTS dm_spawn_timers (
+    user_id    TEXT PRIMARY KEY,
+    due_at     TIMESTAMPTZ,          -- échéance de la minuterie en cours (NULL : en pause)
+    remaining  DOUBLE PRECISION,     -- secondes restantes d'une minuterie en pause
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
@@ -0,0 +1,11 @@
+-- 0007 — Explorations d'actu persistées : tirages faits au départ, reprise après redémarrage.
+
+CREATE TABLE IF NOT EXISTS explorations (
+    user_id     TEXT PRIMARY KEY,               -- dernière exploration du joueur
+    lieu_key    TEXT        NOT NULL,
+    started_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+    duration    INTEGER     NOT NULL,           -- secondes
+    schedule    JSONB       NOT NULL,           -- [{"at": secondes, "kind": "pokemon" | "item" | "rien", "shiny": bool}]
+    next_step   INTEGER     NOT NULL DEFAULT 0, -- prochain tirage à émettre (= longueur du schedule : terminée)
+    explored_on DATE        NOT NULL            -- jour de l'exploration (une par jour)
+);
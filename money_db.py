@@ -1,128 +1,157 @@
 # money_db.py
-from db_connection import get_connection
+"""Soldes en Croco dollars.
 
-# Création de la table argent
-conn = get_connection()
-cur = conn.cursor()
+Chaque opération est une seule requête atomique (UPDATE … RETURNING /
+INSERT … ON CONFLICT) : le garde `balance >= montant` est vérifié par
+PostgreSQL au moment de l'écriture, deux clics simultanés au casino ne
+peuvent plus dépenser deux fois le même argent.
 
-cur.execute("""
-CREATE TABLE IF NOT EXISTS argent (
-    user_id TEXT PRIMARY KEY,
-    balance INTEGER DEFAULT 0
-);
-""")
-conn.commit()
+Chaque mouvement est aussi écrit dans argent_ledger (journal en ajout
+seul) avec un code raison : pour tout joueur, SUM(delta) = balance.
+
+Codes raison utilisés : capture, combat_badge, combat_victoire,
+casino_mise, casino_gain, casino_remboursement, roue, boutique,
+marche_noir, receleur, dupont, transfert, admin_ajout, admin_retrait,
+admin_solde, autre (défaut).
+
+Les montants de add_money / remove_money / transfer_money sont strictement
+positifs (ValueError sinon) : le sens du mouvement vient de la fonction.
+"""
+from db_connection import get_cursor
 
 
 def get_balance(user_id):
-    """Retourne le solde d'un utilisateur."""
+    """Retourne le solde d'un utilisateur (compte créé à 0 s'il n'existe pas)."""
     user_id = str(user_id)
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT balance FROM argent
-        WHERE user_id = %s
-    """, (user_id,))
-    row = cur.fetchone()
-    
-    if row:
-        return row[0]
-    else:
-        # Si l'utilisateur n'existe pas, on le crée avec 0
+    with get_cursor() as cur:
         cur.execute("""
-            INSERT INTO argent (user_id, balance)
-            VALUES (%s, 0)
-        """, (user_id,))
-        conn.commit()
-        return 0
+            WITH created AS (
+                INSERT INTO argent (user_id, balance)
+                VALUES (%(user_id)s, 0)
+                ON CONFLICT (user_id) DO NOTHING
+                RETURNING balance
+            )
+            SELECT balance FROM created
+            UNION ALL
+            SELECT balance FROM argent WHERE user_id = %(user_id)s
+        """, {"user_id": user_id})
+        return cur.fetchone()[0]
 
 
-def add_money(user_id, amount):
-    """Ajoute de l'argent à un utilisateur."""
+def add_money(user_id, amount, reason="autre"):
+    """Ajoute de l'argent à un utilisateur. Retourne le nouveau solde."""
     user_id = str(user_id)
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    # Vérifie si l'utilisateur existe
-    cur.execute("""
-        SELECT balance FROM argent
-        WHERE user_id = %s
-    """, (user_id,))
-    row = cur.fetchone()
-    
-    if row:
-        # Mise à jour
-        new_balance = row[0] + amount
+    if amount <= 0:
+        raise ValueError(f"montant invalide : {amount} (doit être positif)")
+    with get_cursor() as cur:
         cur.execute("""
-            UPDATE argent SET balance = %s
-            WHERE user_id = %s
-        """, (new_balance, user_id))
-    else:
-        # Insertion
-        cur.execute("""
-            INSERT INTO argent (user_id, balance)
-            VALUES (%s, %s)
-        """, (user_id, amount))
-    
-    conn.commit()
-    return get_balance(user_id)
+            WITH updated AS (
+                INSERT INTO argent (user_id, balance)
+                VALUES (%(user_id)s, %(amount)s)
+                ON CONFLICT (user_id)
+                DO UPDATE SET balance = argent.balance + EXCLUDED.balance
+                RETURNING balance
+            ), ledger AS (
+                INSERT INTO argent_ledger (user_id, delta, balance_after, reason)
+                SELECT %(user_id)s, %(amount)s, balance, %(reason)s FROM updated
+            )
+            SELECT balance FROM updated
+        """, {"user_id": user_id, "amount": amount, "reason": reason})
+        return cur.fetchone()[0]
 
 
-def remove_money(user_id, amount):
+def remove_money(user_id, amount, reason="autre"):
     """Retire de l'argent à un utilisateur. Retourne False si solde insuffisant."""
     user_id = str(user_id)
-    current_balance = get_balance(user_id)
-    
-    if current_balance < amount:
-        return False  # Solde insuffisant
-    
-    new_balance = current_balance - amount
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        UPDATE argent SET balance = %s
-        WHERE user_id = %s
-    """, (new_balance, user_id))
-    conn.commit()
-    return True
-
-
-def set_money(user_id, amount):
+    if amount <= 0:
+        raise ValueError(f"montant invalide : {amount} (doit être positif)")
+    with get_cursor() as cur:
+        cur.execute("""
+            WITH updated AS (
+                UPDATE argent SET balance = balance - %(amount)s
+                WHERE user_id = %(user_id)s AND balance >= %(amount)s
+                RETURNING balance
+            ), ledger AS (
+                INSERT INTO argent_ledger (user_id, delta, balance_after, reason)
+                SELECT %(user_id)s, -(%(amount)s), balance, %(reason)s FROM updated
+            )
+            SELECT balance FROM updated
+        """, {"user_id": user_id, "amount": amount, "reason": reason})
+        return cur.fetchone() is not None
+
+
+def set_money(user_id, amount, reason="admin_solde"):
     """Définit le solde exact d'un utilisateur."""
     user_id = str(user_id)
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute("""
-        SELECT balance FROM argent
-        WHERE user_id = %s
-    """, (user_id,))
-    row = cur.fetchone()
-    
-    if row:
-        cur.execute("""
-            UPDATE argent SET balance = %s
-            WHERE user_id = %s
-        """, (amount, user_id))
-    else:
+    with get_cursor() as cur:
+        # Ligne verrouillée d'abord : l'ancien solde lu ensuite (pour le delta) est exact
         cur.execute("""
-            INSERT INTO argent (user_id, balance)
-            VALUES (%s, %s)
-        """, (user_id, amount))
-    
-    conn.commit()
-    return amount
+            SELECT 1 FROM argent WHERE user_id = %(user_id)s FOR UPDATE;
 
+            WITH previous AS (
+                SELECT balance FROM argent WHERE user_id = %(user_id)s
+            ), updated AS (
+                INSERT INTO argent (user_id, balance)
+                VALUES (%(user_id)s, %(amount)s)
+                ON CONFLICT (user_id)
+                DO UPDATE SET balance = EXCLUDED.balance
+                RETURNING balance
+            ), ledger AS (
+                INSERT INTO argent_ledger (user_id, delta, balance_after, reason)
+                SELECT %(user_id)s, balance - COALESCE((SELECT balance FROM previous), 0),
+                       balance, %(reason)s
+                FROM updated
+            )
+            SELECT balance FROM updated
+        """, {"user_id": user_id, "amount": amount, "reason": reason})
+        return cur.fetchone()[0]
 
-def transfer_money(from_user_id, to_user_id, amount):
-    """Transfère de l'argent entre deux utilisateurs."""
+
+def transfer_money(from_user_id, to_user_id, amount, reason="transfert"):
+    """Transfère de l'argent entre deux utilisateurs, en une seule transaction."""
     from_user_id = str(from_user_id)
     to_user_id = str(to_user_id)
-    
-    # Vérifie le solde de l'expéditeur
-    if not remove_money(from_user_id, amount):
-        return False  # Solde insuffisant
-    
-    # Ajoute à l'utilisateur destinataire
-    add_money(to_user_id, amount)
-    return True
\ No newline at end of file
+    if amount <= 0:
+        raise ValueError(f"montant invalide : {amount} (doit être positif)")
+    if from_user_id == to_user_id:
+        return False
+
+    with get_cursor() as cur:
+        # Verrous pris dans un ordre fixe : deux virements croisés A→B / B→A
+        # ne peuvent pas s'interbloquer
+        cur.execute("""
+            SELECT 1 FROM argent
+            WHERE user_id IN (%(from_user)s, %(to_user)s)
+            ORDER BY user_id
+            FOR UPDATE;
+
+            WITH debited AS (
+                UPDATE argent SET balance = balance - %(amount)s
+                WHERE user_id = %(from_user)s AND balance >= %(amount)s
+                RETURNING balance
+            ), credited AS (
+                INSERT INTO argent (user_id, balance)
+                SELECT %(to_user)s, %(amount)s FROM debited
+                ON CONFLICT (user_id)
+                DO UPDATE SET balance = argent.balance + EXCLUDED.balance
+                RETURNING balance
+            ), ledger AS (
+                INSERT INTO argent_ledger (user_id, delta, balance_after, reason, counterparty)
+                SELECT %(from_user)s, -(%(amount)s), balance, %(reason)s, %(to_user)s FROM debited
+                UNION ALL
+                SELECT %(to_user)s, %(amount)s, balance, %(reason)s, %(from_user)s FROM credited
+            )
+            SELECT balance FROM debited
+        """, {"from_user": from_user_id, "to_user": to_user_id, "amount": amount, "reason": reason})
+        return cur.fetchone() is not None
+
+
+def get_richest(limit=10):
+    """Retourne les `limit` plus gros soldes : liste de (user_id, balance)."""
+    with get_cursor() as cur:
+        cur.execute("""
+            SELECT user_id, balance FROM argent
+            ORDER BY balance DESC
+            LIMIT %s
+        """, (limit,))
+        return cur.fetchall()
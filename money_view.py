@@ -1,6 +1,6 @@
 # money_commands.py
 import discord
-from money_db import get_balance, add_money, remove_money, set_money, transfer_money
+from async_db import get_balance, add_money, remove_money, set_money, transfer_money
 from utils import is_croco
 
 
@@ -11,7 +11,7 @@ def setup_money(bot):
     async def money(ctx, user: discord.User = None):
         """Affiche le solde d'un utilisateur."""
         target = user or ctx.author
-        balance = get_balance(target.id)
+        balance = await get_balance(target.id)
         
         if target == ctx.author:
             await ctx.send(f"💰🐊 Vous avez **{balance:,}** Croco dollars.")
@@ -27,7 +27,7 @@ def setup_money(bot):
             await ctx.send("❌ Le montant doit être positif.")
             return
         
-        new_balance = add_money(user.id, amount)
+        new_balance = await add_money(user.id, amount, reason="admin_ajout")
         await ctx.send(
             f"✅ **{amount:,}** Croco dollars ont été ajoutées à {user.mention}.\n"
             f"💰🐊 Nouveau solde : **{new_balance:,}** Croco dollars."
@@ -42,16 +42,16 @@ def setup_money(bot):
             await ctx.send("❌ Le montant doit être positif.")
             return
         
-        success = remove_money(user.id, amount)
+        success = await remove_money(user.id, amount, reason="admin_retrait")
         
         if not success:
-            balance = get_balance(user.id)
+            balance = await get_balance(user.id)
             await ctx.send(
                 f"❌ {user.mention} tu es pauvre, tu n'as pas assez de Croco dollars.\n"
                 f"💰🐊 Solde actuel : **{balance:,}** Croco dollars."
             )
         else:
-            new_balance = get_balance(user.id)
+            new_balance = await get_balance(user.id)
             await ctx.send(
                 f"✅ **{amount:,}** Croco dollars ont été retirées à {user.mention}.\n"
                 f"💰🐊 Nouveau solde : **{new_balance:,}** Croco dollars."
@@ -66,7 +66,7 @@ def setup_money(bot):
             await ctx.send("❌ Le montant ne peut pas être négatif.")
             return
         
-        set_money(user.id, amount)
+        await set_money(user.id, amount)
         await ctx.send(
             f"✅ Le solde de {user.mention} a été défini à **{amount:,}** Croco dollars."
         )
@@ -83,17 +83,17 @@ def setup_money(bot):
             await ctx.send("❌ Vous ne pouvez pas vous envoyer de l'argent à vous-même.")
             return
         
-        success = transfer_money(ctx.author.id, user.id, amount)
+        success = await transfer_money(ctx.author.id, user.id, amount)
         
         if not success:
-            balance = get_balance(ctx.author.id)
+            balance = await get_balance(ctx.author.id)
             await ctx.send(
                 f"❌ Sale pauvre, tu n'as pas assez de Croco dollars.\n"
                 f"💰🐊 Votre solde : **{balance:,}** Croco dollars."
             )
         else:
-            sender_balance = get_balance(ctx.author.id)
-            receiver_balance = get_balance(user.id)
+            sender_balance = await get_balance(ctx.author.id)
+            receiver_balance = await get_balance(user.id)
             await ctx.send(
                 f"✅ Vous avez envoyé **{amount:,}** Croco dollars à {user.mention}.\n"
                 f"💰🐊 Votre nouveau solde : **{sender_balance:,}** Croco dollars.\n"
@@ -104,19 +104,12 @@ def setup_money(bot):
     @bot.command(name="richest")
     async def richest(ctx, limit: int = 10):
         """Affiche le classement des utilisateurs les plus riches."""
-        from money_db import cur
+        from async_db import get_richest
         
         if limit > 25:
             limit = 25
         
-        cur.execute("""
-            SELECT user_id, balance
-            FROM argent
-            ORDER BY balance DESC
-            LIMIT %s
-        """, (limit,))
-        
-        rows = cur.fetchall()
+        rows = await get_richest(limit)
         
         if not rows:
             await ctx.send("📊 Aucun utilisateur n'a d'argent pour le moment.")
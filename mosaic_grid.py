@@ -0,0 +1,125 @@
+"""Mosaïque du pokédex, rendue page par page.
+
+Le pokédex s'affiche par pages de PAGE_SIZE Pokémon (3 rangées de 5) :
+get_page() rend une page à la demande, prefetch_page() prépare la suivante
+en tâche de fond. Une page ne dépend que des noms qu'elle affiche : elle
+est composée à partir de ses seules tuiles (quel que soit le filtre ou le
+tri) et mise en cache sous leur empreinte. Le cache des pages déborde sur
+disque (images/cache/pokedex_pages, POKEDEX_PAGES_DISK_MB) et y est recopié
+à l'arrêt du bot : les pages rendues survivent aux redémarrages.
+
+La composition elle-même part dans le pool de rendu (render_service).
+Une page dont une tuile est tombée sur l'image par défaut (sprite
+indisponible) n'est pas mise en cache : elle est retentée à l'affichage
+suivant.
+"""
+import asyncio
+import os
+
+from cache import ByteLRUCache, CACHE_DIR, MB, fingerprint
+from cards import MosaicJob
+from catalog import catalog
+from render_service import render
+from sprites import fetch_sprite_variant_path
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+images_dir = os.path.join(script_dir, "images")
+DEFAULT_TILE = os.path.join(images_dir, "default.png")
+
+TILE = 64
+COLS = 5
+PAGE_SIZE = 3 * COLS
+
+# empreinte des noms d'une page → image de la page (mémoire, puis disque)
+_page_cache = ByteLRUCache(
+    "pokedex_pages",
+    max_bytes=int(os.getenv("POKEDEX_PAGES_CACHE_MB", "32")) * MB,
+    ttl=24 * 3600,
+    spill_dir=os.path.join(CACHE_DIR, "pokedex_pages"),
+    disk_max_bytes=int(os.getenv("POKEDEX_PAGES_DISK_MB", "256")) * MB,
+)
+_page_tasks: dict[str, asyncio.Future] = {}   # empreinte → rendu en cours
+
+stats = {"pages_composed": 0, "pages_prefetched": 0}
+
+
+# ───────────────────────────────────────────────────────────────
+# 🧩 Tuiles
+# ───────────────────────────────────────────────────────────────
+async def _load_tile(name: str) -> tuple[str | None, bool]:
+    """(chemin de la tuile 64 px ou None pour l'image par défaut, True si c'est le vrai sprite)."""
+    # Nom exact, sinon nom sans le numéro final (pikachu_shiny2 → pikachu_shiny)
+    p_data = catalog.find(name)
+    if not p_data:
+        print(f"[IGNORÉ] {name} non trouvé dans le JSON. Utilisation de l'image par défaut.")
+        return None, True   # définitif : inutile de retenter
+    try:
+        return await fetch_sprite_variant_path(p_data["image"], TILE), True
+    except Exception as e:
+        print(f"[ERREUR] Image introuvable pour {p_data['name']}, fallback utilisé. → {e}")
+        return None, False
+
+
+# ───────────────────────────────────────────────────────────────
+# 🖼️ Composition
+# ───────────────────────────────────────────────────────────────
+def _compose(count: int, tiles: dict) -> MosaicJob:
+    """Job qui colle les tuiles `tiles` {index: chemin} sur une grille vide."""
+    return MosaicJob(count=count, tiles=tuple(tiles.items()), base_png=None,
+                     tile=TILE, cols=COLS, fallback_path=DEFAULT_TILE)
+
+
+# ───────────────────────────────────────────────────────────────
+# 📄 Pages
+# ───────────────────────────────────────────────────────────────
+def page_count(total: int) -> int:
+    return max(1, (total + PAGE_SIZE - 1) // PAGE_SIZE)
+
+
+async def _render_page(page_names: list) -> bytes:
+    results = await asyncio.gather(*(_load_tile(name) for name in page_names))
+    tiles = {i: tile for i, (tile, _) in enumerate(results)}
+    page_png = await render(_compose(len(page_names), tiles))
+    stats["pages_composed"] += 1
+
+    if all(ok for _, ok in results):
+        _page_cache.put(fingerprint(page_names), page_png)
+    return page_png
+
+
+def _page_key(names: list, page: int) -> tuple[str, list]:
+    page_names = list(names[page * PAGE_SIZE:(page + 1) * PAGE_SIZE])
+    return fingerprint(page_names), page_names
+
+
+async def _load_page(key: str, page_names: list) -> bytes:
+    # Lecture du cache (éventuellement sur disque) hors de la boucle, sinon rendu
+    png = await asyncio.to_thread(_page_cache.get, key)
+    if png is not None:
+        return png
+    return await _render_page(page_names)
+
+
+def _page_task(names: list, page: int) -> asyncio.Future:
+    """Chargement de la page, partagé par les demandes simultanées de la même page."""
+    key, page_names = _page_key(names, page)
+    task = _page_tasks.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_load_page(key, page_names))
+        _page_tasks[key] = task
+        task.add_done_callback(lambda t: (_page_tasks.pop(key, None), t.cancelled() or t.exception()))
+    return task
+
+
+async def get_page(names: list, page: int) -> bytes | None:
+    """Image de la page `page` de `names`. Lève RenderBusy / RenderExpired (render_service)."""
+    if not names:
+        return None
+    return await asyncio.shield(_page_task(names, page))
+
+
+def prefetch_page(names: list, page: int):
+    """Prépare une page en tâche de fond (sans effet si hors limites)."""
+    if 0 <= page < page_count(len(names)) and names:
+        _page_task(names, page)
+        stats["pages_prefetched"] += 1
@@ -1,44 +1,15 @@
 import os
-import json
 import discord
-import psycopg2
 from psycopg2.extras import Json
-from dotenv import load_dotenv
 from discord.ext import commands
 from utils import is_croco
-
-# Charge les variables d'environnement
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
+from db_connection import get_cursor
+from catalog import catalog
 
 # Chemin absolu vers le dossier json
 script_dir = os.path.dirname(os.path.abspath(__file__))
 json_dir   = os.path.join(script_dir, "json")
 
-# Connexion globale à la base
-conn = psycopg2.connect(DATABASE_URL, sslmode="require")
-cur = conn.cursor()
-
-# Crée la table si elle n'existe pas
-cur.execute("""
-CREATE TABLE IF NOT EXISTS new_captures (
-    user_id     TEXT,
-    name        TEXT,
-    ivs         JSONB,
-    stats       JSONB,
-    image       TEXT,
-    type        JSONB,
-    attacks     JSONB,
-    current_xp  INT DEFAULT 0,
-    xp_evo      INT DEFAULT 0,
-    evo         JSONB DEFAULT '{"name": "pas evo", "file": "pas evo"}'::jsonb
-);
-""")
-conn.commit()
-
-
-
-
 
 # ──────────────────────────────────────────────
 # FONCTIONS BASE DE DONNÉES
@@ -46,7 +17,7 @@ conn.commit()
 
 def save_new_capture(user_id, pokemon_name, ivs, final_stats, pokemon):
     """
-    Enregistre une nouvelle capture et invalide le cache du pokédex pour cet utilisateur.
+    Enregistre une nouvelle capture.
 
     pokemon peut contenir les clés optionnelles :
         - current_xp (int)
@@ -59,51 +30,62 @@ def save_new_capture(user_id, pokemon_name, ivs, final_stats, pokemon):
     if evo in (None, "pas evo", ""):
         evo = {"name": "pas evo", "file": "pas evo"}
 
-    cur.execute("""
-        SELECT COUNT(*) FROM new_captures
-        WHERE user_id = %s AND name LIKE %s || '%%'
-    """, (user_id, pokemon_name))
-    existing_count = cur.fetchone()[0]
+    # Une seule requête indexée : le compteur (user_id, species) est incrémenté
+    # atomiquement, la ligne n'est insérée qu'à la première capture (seq = 1)
+    with get_cursor() as cur:
+        cur.execute("""
+            WITH counter AS (
+                INSERT INTO new_capture_counters (user_id, species, seq)
+                VALUES (%(user_id)s, %(species)s, 1)
+                ON CONFLICT (user_id, species)
+                DO UPDATE SET seq = new_capture_counters.seq + 1
+                RETURNING seq
+            ), inserted AS (
+                INSERT INTO new_captures
+                    (user_id, name, species, ivs, stats, image, type, attacks, current_xp, xp_evo, evo)
+                SELECT %(user_id)s, %(species)s, %(species)s, %(ivs)s, %(stats)s, %(image)s,
+                       %(type)s, %(attacks)s, %(current_xp)s, %(xp_evo)s, %(evo)s
+                FROM counter
+                WHERE seq = 1
+            )
+            SELECT seq FROM counter
+        """, {
+            "user_id":    user_id,
+            "species":    pokemon_name,
+            "ivs":        Json(ivs),
+            "stats":      Json(final_stats),
+            "image":      pokemon.get("image", ""),
+            "type":       Json(pokemon.get("type", [])),
+            "attacks":    Json(pokemon.get("attacks", [])),
+            "current_xp": pokemon.get("current_xp", 0),
+            "xp_evo":     pokemon.get("xp_evo", 0),
+            "evo":        Json(evo),
+        })
+        existing_count = cur.fetchone()[0] - 1
 
     if existing_count == 0:
-        cur.execute("""
-            INSERT INTO new_captures
-                (user_id, name, ivs, stats, image, type, attacks, current_xp, xp_evo, evo)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            user_id,
-            pokemon_name,
-            Json(ivs),
-            Json(final_stats),
-            pokemon.get("image", ""),
-            Json(pokemon.get("type", [])),
-            Json(pokemon.get("attacks", [])),
-            pokemon.get("current_xp", 0),
-            pokemon.get("xp_evo", 0),
-            Json(evo),
-        ))
-        conn.commit()
         print(f"[INFO] Pokémon {pokemon_name} enregistré pour l'utilisateur {user_id}")
-    else:
-        increase_pokemon_iv(user_id, pokemon_name, 4)
+    elif increase_pokemon_iv(user_id, pokemon_name, 4):
         print(f"[INFO] Pokémon {pokemon_name} a eu ses IVs augmentés de 3 pour {user_id}")
-
-    try:
-        from new_pokedex import invalidate_new_pokedex_cache
-        invalidate_new_pokedex_cache(user_id)
-        print(f"[CACHE] Cache du pokédex invalidé pour {user_id}")
-    except ImportError:
-        print("[WARNING] Impossible d'importer invalidate_new_pokedex_cache")
+    else:
+        # Compteur sans ligne (suppression hors delete_capture) : on le remet à zéro
+        with get_cursor() as cur:
+            cur.execute("""
+                DELETE FROM new_capture_counters WHERE user_id = %s AND species = %s
+            """, (user_id, pokemon_name))
+        return save_new_capture(user_id, pokemon_name, ivs, final_stats, pokemon)
 
 
 def get_new_captures(user_id):
     """Récupère toutes les captures d'un utilisateur."""
-    cur.execute("""
-        SELECT name, ivs, stats, image, type, attacks, current_xp, xp_evo, evo
-        FROM new_captures
-        WHERE user_id = %s
-    """, (str(user_id),))
-    rows = cur.fetchall()
+    with get_cursor() as cur:
+        cur.execute("""
+            SELECT name, ivs, stats, image, type, attacks, current_xp, xp_evo, evo
+            FROM new_captures
+            WHERE user_id = %s
+            ORDER BY id
+        """, (str(user_id),))
+        rows = cur.fetchall()
 
     captures = []
     for row in rows:
@@ -123,24 +105,29 @@ def get_new_captures(user_id):
 
 
 def delete_capture(user_id, pokemon_name):
-    """Supprime un Pokémon capturé pour un utilisateur et invalide le cache du Pokédex."""
+    """Supprime un Pokémon capturé pour un utilisateur."""
     user_id = str(user_id)
 
-    cur.execute("""
-        DELETE FROM new_captures
-        WHERE user_id = %s AND name = %s
-    """, (user_id, pokemon_name))
-    conn.commit()
+    with get_cursor() as cur:
+        cur.execute("""
+            DELETE FROM new_captures
+            WHERE user_id = %s AND name = %s
+            RETURNING species
+        """, (user_id, pokemon_name))
+        species = {row[0] for row in cur.fetchall()}
+
+        # Plus aucun exemplaire : le compteur repart de zéro (prochaine capture = nouvelle ligne)
+        cur.execute("""
+            DELETE FROM new_capture_counters c
+            WHERE c.user_id = %s AND c.species = ANY(%s)
+              AND NOT EXISTS (
+                  SELECT 1 FROM new_captures n
+                  WHERE n.user_id = c.user_id AND n.species = c.species
+              )
+        """, (user_id, list(species)))
 
     print(f"[INFO] Pokémon {pokemon_name} supprimé pour l'utilisateur {user_id}")
 
-    try:
-        from new_pokedex import invalidate_new_pokedex_cache
-        invalidate_new_pokedex_cache(user_id)
-        print(f"[CACHE] Cache du pokédex invalidé pour {user_id}")
-    except ImportError:
-        print("[WARNING] Impossible d'importer invalidate_new_pokedex_cache")
-
 
 def increase_pokemon_iv(user_id, pokemon_name, iv_increase, stat_name=None):
     """
@@ -154,48 +141,43 @@ def increase_pokemon_iv(user_id, pokemon_name, iv_increase, stat_name=None):
     """
     user_id = str(user_id)
 
-    cur.execute("""
-        SELECT ivs, stats FROM new_captures
-        WHERE user_id = %s AND name = %s
-    """, (user_id, pokemon_name))
-    row = cur.fetchone()
+    # Lecture + écriture dans la même transaction (FOR UPDATE : pas de perte d'IV en concurrence)
+    with get_cursor() as cur:
+        cur.execute("""
+            SELECT ivs, stats FROM new_captures
+            WHERE user_id = %s AND name = %s
+            FOR UPDATE
+        """, (user_id, pokemon_name))
+        row = cur.fetchone()
 
-    if not row:
-        print(f"[WARNING] Pokémon {pokemon_name} non trouvé pour {user_id}")
-        return False
+        if not row:
+            print(f"[WARNING] Pokémon {pokemon_name} non trouvé pour {user_id}")
+            return False
 
-    ivs   = row[0]
-    stats = row[1]
+        ivs   = row[0]
+        stats = row[1]
+
+        if stat_name is not None:
+            if stat_name not in ivs:
+                print(f"[WARNING] Stat '{stat_name}' introuvable pour {pokemon_name} "
+                      f"(stats disponibles : {list(ivs.keys())})")
+                return False
+            old_iv = ivs[stat_name]
+            ivs[stat_name]   = min(31, ivs[stat_name] + iv_increase)
+            stats[stat_name] = stats.get(stat_name, 0) + (ivs[stat_name] - old_iv)
+            print(f"[INFO] IV '{stat_name}' du Pokémon {pokemon_name} de {user_id} augmenté de {iv_increase}")
+        else:
+            for stat in ivs:
+                old_iv = ivs[stat]
+                ivs[stat]   = min(31, ivs[stat] + iv_increase)
+                stats[stat] = stats.get(stat, 0) + (ivs[stat] - old_iv)
+            print(f"[INFO] Tous les IV du Pokémon {pokemon_name} de {user_id} augmentés de {iv_increase}")
 
-    if stat_name is not None:
-        if stat_name not in ivs:
-            print(f"[WARNING] Stat '{stat_name}' introuvable pour {pokemon_name} "
-                  f"(stats disponibles : {list(ivs.keys())})")
-            return False
-        old_iv = ivs[stat_name]
-        ivs[stat_name]   = min(31, ivs[stat_name] + iv_increase)
-        stats[stat_name] = stats.get(stat_name, 0) + (ivs[stat_name] - old_iv)
-        print(f"[INFO] IV '{stat_name}' du Pokémon {pokemon_name} de {user_id} augmenté de {iv_increase}")
-    else:
-        for stat in ivs:
-            old_iv = ivs[stat]
-            ivs[stat]   = min(31, ivs[stat] + iv_increase)
-            stats[stat] = stats.get(stat, 0) + (ivs[stat] - old_iv)
-        print(f"[INFO] Tous les IV du Pokémon {pokemon_name} de {user_id} augmentés de {iv_increase}")
-
-    cur.execute("""
-        UPDATE new_captures
-        SET ivs = %s, stats = %s
-        WHERE user_id = %s AND name = %s
-    """, (Json(ivs), Json(stats), user_id, pokemon_name))
-    conn.commit()
-
-    try:
-        from new_pokedex import invalidate_new_pokedex_cache
-        invalidate_new_pokedex_cache(user_id)
-        print(f"[CACHE] Cache du pokédex invalidé pour {user_id}")
-    except ImportError:
-        print("[WARNING] Impossible d'importer invalidate_new_pokedex_cache")
+        cur.execute("""
+            UPDATE new_captures
+            SET ivs = %s, stats = %s
+            WHERE user_id = %s AND name = %s
+        """, (Json(ivs), Json(stats), user_id, pokemon_name))
 
     return True
 
@@ -203,37 +185,78 @@ def increase_pokemon_iv(user_id, pokemon_name, iv_increase, stat_name=None):
 def add_xp(user_id, pokemon_name, xp_gained):
     user_id = str(user_id)
 
-    cur.execute("""
-        SELECT current_xp, xp_evo FROM new_captures
-        WHERE user_id = %s AND name = %s
-    """, (user_id, pokemon_name))
-    row = cur.fetchone()
+    with get_cursor() as cur:
+        cur.execute("""
+            SELECT current_xp, xp_evo FROM new_captures
+            WHERE user_id = %s AND name = %s
+            FOR UPDATE
+        """, (user_id, pokemon_name))
+        row = cur.fetchone()
 
-    if not row:
-        print(f"[WARNING] Pokémon {pokemon_name} non trouvé pour {user_id}")
-        return False
+        if not row:
+            print(f"[WARNING] Pokémon {pokemon_name} non trouvé pour {user_id}")
+            return False
 
-    current_xp, xp_evo = row
+        current_xp, xp_evo = row
 
-    # ── Bloqué définitivement ────────────────────────────────────────────────
-    if xp_evo == -1:
-        print(f"[INFO] {pokemon_name} ne peut plus gagner d'XP (bloqué).")
-        return "blocked"
+        # ── Bloqué définitivement ────────────────────────────────────────────────
+        if xp_evo == -1:
+            print(f"[INFO] {pokemon_name} ne peut plus gagner d'XP (bloqué).")
+            return "blocked"
 
-    new_xp = current_xp + xp_gained
+        new_xp = current_xp + xp_gained
 
-    cur.execute("""
-        UPDATE new_captures
-        SET current_xp = %s
-        WHERE user_id = %s AND name = %s
-    """, (new_xp, user_id, pokemon_name))
-    conn.commit()
+        cur.execute("""
+            UPDATE new_captures
+            SET current_xp = %s
+            WHERE user_id = %s AND name = %s
+        """, (new_xp, user_id, pokemon_name))
 
     print(f"[INFO] {pokemon_name} a maintenant {new_xp} XP (seuil évolution : {xp_evo})")
 
     can_evolve = xp_evo > 0 and new_xp >= xp_evo
     return can_evolve
 
+
+def set_evo(user_id, pokemon_name, evo):
+    """Remplace l'évolution ({"name": ..., "file": ...}) d'un Pokémon."""
+    with get_cursor() as cur:
+        cur.execute("""
+            UPDATE new_captures
+            SET evo = %s
+            WHERE user_id = %s AND name = %s
+        """, (Json(evo), str(user_id), pokemon_name))
+
+
+def set_attacks(user_id, pokemon_name, attacks):
+    """Remplace la liste d'attaques d'un Pokémon."""
+    with get_cursor() as cur:
+        cur.execute("""
+            UPDATE new_captures
+            SET attacks = %s
+            WHERE user_id = %s AND name = %s
+        """, (Json(attacks), str(user_id), pokemon_name))
+
+
+def set_xp_evo(user_id, pokemon_name, xp_evo, reset_xp=True):
+    """
+    Définit le seuil d'XP d'évolution (-1 = bloqué définitivement).
+    Si reset_xp, l'XP actuelle repart à 0.
+    """
+    with get_cursor() as cur:
+        if reset_xp:
+            cur.execute("""
+                UPDATE new_captures
+                SET xp_evo = %s, current_xp = 0
+                WHERE user_id = %s AND name = %s
+            """, (xp_evo, str(user_id), pokemon_name))
+        else:
+            cur.execute("""
+                UPDATE new_captures
+                SET xp_evo = %s
+                WHERE user_id = %s AND name = %s
+            """, (xp_evo, str(user_id), pokemon_name))
+
 # ──────────────────────────────────────────────
 # ÉVOLUTION
 # ──────────────────────────────────────────────
@@ -259,17 +282,11 @@ def evolve_pokemon(user_id, pokemon):
     if evo_name == "pas evo" or evo_file == "pas evo":
         return {"success": False, "reason": "Ce Pokémon n'a pas d'évolution."}
 
-    # Charge le fichier JSON de l'évolution
-    try:
-        with open(os.path.join(json_dir, evo_file), "r", encoding="utf-8") as f:
-            all_pokemons = json.load(f)
-    except FileNotFoundError:
+    # Fiche de l'évolution (fichier JSON chargé une seule fois par le catalogue)
+    if catalog.file_entries(evo_file) is None:
         return {"success": False, "reason": f"Fichier `json/{evo_file}` introuvable."}
 
-    evo_data = next(
-        (p for p in all_pokemons if p["name"].lower() == evo_name.lower()),
-        None
-    )
+    evo_data = catalog.find_in_file(evo_file, evo_name)
     if not evo_data:
         return {"success": False, "reason": f"**{evo_name}** introuvable dans `json/{evo_file}`."}
 
@@ -304,7 +321,8 @@ def evolve_pokemon(user_id, pokemon):
 # ──────────────────────────────────────────────
 
 def setupxp(bot):
-
+    # Import local : async_db importe ce module
+    from async_db import run_db
 
     is_croco()
     @bot.command(name="setevo")
@@ -316,7 +334,7 @@ def setupxp(bot):
         Utilise "pas_evo" comme nom et fichier pour supprimer l'évolution.
         """
         user_id  = str(member.id)
-        captures = get_new_captures(user_id)
+        captures = await run_db(get_new_captures, user_id)
         pokemon  = next((p for p in captures if p["name"].lower() == pokemon_name.lower()), None)
 
         if not pokemon:
@@ -337,12 +355,9 @@ def setupxp(bot):
                 return
 
             # ── Vérifie que le Pokémon existe dans ce fichier ───────────────────
-            with open(json_path, "r", encoding="utf-8") as f:
-                all_pokemons = json.load(f)
-
-            evo_data = next((p for p in all_pokemons if p["name"].lower() == evo_name.lower()), None)
+            evo_data = catalog.find_in_file(evo_file, evo_name)
             if not evo_data:
-                noms = [p["name"] for p in all_pokemons]
+                noms = [p["name"] for p in catalog.file_entries(evo_file)]
                 await ctx.send(
                     f"❌ **{evo_name}** introuvable dans `json/{evo_file}`.\n"
                     f"📋 Pokémon disponibles : `{', '.join(noms)}`"
@@ -351,18 +366,7 @@ def setupxp(bot):
 
             new_evo = {"name": evo_name, "file": evo_file}
 
-        cur.execute("""
-            UPDATE new_captures
-            SET evo = %s
-            WHERE user_id = %s AND name = %s
-        """, (Json(new_evo), user_id, pokemon["name"]))
-        conn.commit()
-
-        try:
-            from new_pokedex import invalidate_new_pokedex_cache
-            invalidate_new_pokedex_cache(user_id)
-        except ImportError:
-            pass
+        await run_db(set_evo, user_id, pokemon["name"], new_evo)
 
         if evo_name.lower() == "pas_evo":
             await ctx.send(
@@ -383,7 +387,7 @@ def setupxp(bot):
         demande laquelle remplacer.
         """
         user_id  = str(member.id)
-        captures = get_new_captures(user_id)
+        captures = await run_db(get_new_captures, user_id)
         pokemon  = next((p for p in captures if p["name"].lower() == pokemon_name.lower()), None)
 
         if not pokemon:
@@ -395,18 +399,7 @@ def setupxp(bot):
         # ── Moins de 4 attaques : ajout direct ──────────────────────────────────
         if len(attacks) < 4:
             attacks.append(attack_name)
-            cur.execute("""
-                UPDATE new_captures
-                SET attacks = %s
-                WHERE user_id = %s AND name = %s
-            """, (Json(attacks), user_id, pokemon["name"]))
-            conn.commit()
-
-            try:
-                from new_pokedex import invalidate_new_pokedex_cache
-                invalidate_new_pokedex_cache(user_id)
-            except ImportError:
-                pass
+            await run_db(set_attacks, user_id, pokemon["name"], attacks)
 
             await ctx.send(
                 f"✅ L'attaque **{attack_name}** a été ajoutée à **{pokemon['name']}** "
@@ -444,18 +437,7 @@ def setupxp(bot):
         replaced      = attacks[slot]
         attacks[slot] = attack_name
 
-        cur.execute("""
-            UPDATE new_captures
-            SET attacks = %s
-            WHERE user_id = %s AND name = %s
-        """, (Json(attacks), user_id, pokemon["name"]))
-        conn.commit()
-
-        try:
-            from new_pokedex import invalidate_new_pokedex_cache
-            invalidate_new_pokedex_cache(user_id)
-        except ImportError:
-            pass
+        await run_db(set_attacks, user_id, pokemon["name"], attacks)
 
         await ctx.send(
             f"✅ L'attaque **{replaced}** de **{pokemon['name']}** ({member.mention}) "
@@ -467,14 +449,14 @@ def setupxp(bot):
     async def addxp(ctx, member: discord.Member, pokemon_name: str, xp: int):
         user_id = str(member.id)
 
-        captures = get_new_captures(user_id)
+        captures = await run_db(get_new_captures, user_id)
         pokemon  = next((p for p in captures if p["name"].lower() == pokemon_name.lower()), None)
 
         if not pokemon:
             await ctx.send(f"❌ **{pokemon_name}** introuvable dans la collection de {member.display_name}.")
             return
 
-        can_evolve = add_xp(user_id, pokemon["name"], xp)
+        can_evolve = await run_db(add_xp, user_id, pokemon["name"], xp)
 
         # ── Bloqué définitivement ────────────────────────────────────────────────
         if can_evolve == "blocked":
@@ -483,7 +465,8 @@ def setupxp(bot):
 
         # ── Seuil pas encore atteint ─────────────────────────────────────────────
         if not can_evolve:
-            updated    = next((p for p in get_new_captures(user_id) if p["name"] == pokemon["name"]), None)
+            captures   = await run_db(get_new_captures, user_id)
+            updated    = next((p for p in captures if p["name"] == pokemon["name"]), None)
             current_xp = updated["current_xp"] if updated else "?"
             xp_evo     = updated["xp_evo"]     if updated else "?"
             await ctx.send(
@@ -493,16 +476,11 @@ def setupxp(bot):
             return
 
         # ── Seuil atteint → tente l'évolution ───────────────────────────────────
-        result = evolve_pokemon(user_id, pokemon)
+        result = await run_db(evolve_pokemon, user_id, pokemon)
 
         if not result["success"]:
-            increase_pokemon_iv(user_id, pokemon["name"], 4)
-            cur.execute("""
-                UPDATE new_captures
-                SET xp_evo = -1
-                WHERE user_id = %s AND name = %s
-            """, (user_id, pokemon["name"]))
-            conn.commit()
+            await run_db(increase_pokemon_iv, user_id, pokemon["name"], 4)
+            await run_db(set_xp_evo, user_id, pokemon["name"], -1, reset_xp=False)
             await ctx.send(
                 f"⚡ **{pokemon['name']}** de {member.mention} n'a pas d'évolution → **+4 IV** sur toutes les stats !\n"
                 f"🔒 **{pokemon['name']}** ne peut plus gagner d'XP."
@@ -525,19 +503,14 @@ def setupxp(bot):
         """
         user_id = str(member.id)
 
-        captures = get_new_captures(user_id)
+        captures = await run_db(get_new_captures, user_id)
         pokemon  = next((p for p in captures if p["name"].lower() == pokemon_name.lower()), None)
 
         if not pokemon:
             await ctx.send(f"❌ **{pokemon_name}** introuvable dans la collection de {member.display_name}.")
             return
 
-        cur.execute("""
-            UPDATE new_captures
-            SET xp_evo = %s, current_xp = 0
-            WHERE user_id = %s AND name = %s
-        """, (xp_evo, user_id, pokemon["name"]))
-        conn.commit()
+        await run_db(set_xp_evo, user_id, pokemon["name"], xp_evo)
 
         await ctx.send(
             f"✅ Seuil XP de **{pokemon['name']}** ({member.mention}) mis à jour : `0 / {xp_evo}`"
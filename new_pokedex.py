@@ -1,146 +1,162 @@
 # new_pokedex.py
 import discord
-from discord.ui import View, Button
-from PIL import Image, ImageDraw, ImageFont
-import requests, io, os
+from discord.ui import View, Button, Select
+import io, os
 from io import BytesIO
 import json
-from new_db import get_new_captures
+from async_db import get_new_captures
 from utils import is_croco
 from combat.utils import normalize_text
-from new_db import delete_capture
-from new_db import increase_pokemon_iv
+from catalog import catalog
+from async_db import delete_capture
+from async_db import increase_pokemon_iv
+from mosaic_grid import PAGE_SIZE, get_page, page_count, prefetch_page
+from pokedex_index import SORTS, build_index, describe, parse_query, query
+from pokedex import pokedex_card_job
+from render_service import BUSY_MESSAGE, RenderBusy, RenderExpired, render_for
+from encoding import filename_for
 
 
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 images_dir = os.path.join(script_dir, "images")
 
-# --- CACHE POKEDEX DYNAMIQUE ---
-NEW_POKEDEX_CACHE = {}   # { user_id: { "pokemons": [...], "mosaic": bytes } }
-
-
-def invalidate_new_pokedex_cache(user_id):
-    """Invalide le cache du pokédex pour un utilisateur donné"""
-    user_id = str(user_id)
-    if user_id in NEW_POKEDEX_CACHE:
-        del NEW_POKEDEX_CACHE[user_id]
-        print(f"[CACHE] Cache invalidé pour l'utilisateur {user_id}")
-
-
-async def create_mosaic(pokemon_names, full_pokemon_data, full_pokemon_shiny_data):
-    images = []
-    nb_total = len(pokemon_names)
-    nb_ignores = 0
-
-    for name in pokemon_names:
-        clean_name = normalize_text(name)
-        # 🔥 CORRECTION : Extraire le nom de base sans le numéro final
-        # Enlève les chiffres à la fin (pikachu_shiny2 → pikachu_shiny)
-        clean_base = clean_name.rstrip('0123456789')
-        
-        # Cherche d'abord avec le nom exact
-        p_data = next((p for p in full_pokemon_data + full_pokemon_shiny_data 
-                      if normalize_text(p["name"]) == clean_name), None)
-        
-        # 🔥 CORRECTION : Si pas trouvé, chercher avec le nom sans le numéro final
-        if not p_data:
-            p_data = next((p for p in full_pokemon_data + full_pokemon_shiny_data 
-                          if normalize_text(p["name"]) == clean_base), None)
-
-        if not p_data:
-            print(f"[IGNORÉ] {name} (base: {clean_base}) non trouvé dans le JSON. Utilisation de l'image par défaut.")
-            try:
-                fallback = Image.open(os.path.join(images_dir, "default.png")).convert("RGBA").resize((64, 64))
-                images.append(fallback)
-                continue
-            except Exception as e:
-                print(f"[ERREUR] Image par défaut manquante ou corrompue : {e}")
-                nb_ignores += 1
-                continue
-
-        try:
-            response = requests.get(p_data["image"])
-            img = Image.open(BytesIO(response.content)).convert("RGBA").resize((64, 64))
-            images.append(img)
-        except Exception as e:
-            print(f"[ERREUR] Image introuvable pour {p_data['name']}, fallback utilisé. → {e}")
-            try:
-                fallback = Image.open(os.path.join(images_dir, "default.png")).convert("RGBA").resize((64, 64))
-                images.append(fallback)
-            except Exception as e:
-                print(f"[ERREUR] Image par défaut manquante ou corrompue : {e}")
-                nb_ignores += 1
-
-    if not images:
-        return None, 0
-
-    cols = 5
-    rows = (len(images) + cols - 1) // cols
-    mosaic = Image.new("RGBA", (cols * 64, rows * 64))
-    for i, img in enumerate(images):
-        x = (i % cols) * 64
-        y = (i // cols) * 64
-        mosaic.paste(img, (x, y))
-
-    output = BytesIO()
-    mosaic.save(output, format="PNG")
-    output.seek(0)
-    return output, len(images)
 
 # 👉 Les Views et Buttons du Pokédex
 class PokedexView(View):
-    def __init__(self, pokemons, shiny_data, full_pokemon_data, type_sprites, attack_type_map, capture_data):
+    """Pokédex paginé : une mosaïque par page, filtres et tri sur l'index en mémoire."""
+
+    def __init__(self, user_id, owner_name, index, filters, sort, shiny_data, full_pokemon_data, type_sprites, attack_type_map, capture_data):
         super().__init__(timeout=180)
-        self.pokemons = pokemons
+        self.user_id = str(user_id)
+        self.owner_name = owner_name
+        self.index = index
+        self.filters = filters
+        self.sort = sort
         self.shiny_data = shiny_data
         self.full_pokemon_data = full_pokemon_data
         self.type_sprites = type_sprites
         self.attack_type_map = attack_type_map
         self.capture_data = capture_data
         self.page = 0
-        self.max_per_page = 23
+        self.max_per_page = PAGE_SIZE
+        self.attachment_name = "pokedex_mosaic.png"   # extension selon l'encodage de la page
+        self.apply_query()
+        self.shown = (self.sort, self.page)           # tri et page de l'image affichée
+
+    def apply_query(self):
+        """Filtre et trie l'index (aucune requête à la base), retour en page 1."""
+        self.pokemons = [e["name"] for e in query(self.index, self.filters, self.sort)]
+        self.page = 0
         self.update_buttons()
 
+    @property
+    def page_total(self):
+        return page_count(len(self.pokemons))
+
     def update_buttons(self):
         self.clear_items()
         start = self.page * self.max_per_page
         end = start + self.max_per_page
         page_pokemons = self.pokemons[start:end]
-        for pkmn in page_pokemons:
-            self.add_item(PokemonButton(pkmn, self.shiny_data, self.full_pokemon_data, self.type_sprites, self.attack_type_map, self.capture_data))
+        for i, pkmn in enumerate(page_pokemons):
+            self.add_item(PokemonButton(pkmn, self.shiny_data, self.full_pokemon_data, self.type_sprites, self.attack_type_map, self.capture_data, row=i // 5))
+        self.add_item(PokedexSortSelect(self))
         if self.page > 0:
             self.add_item(PokedexPrevButton(self))
+        self.add_item(Button(label=f"Page {self.page + 1}/{self.page_total}", style=discord.ButtonStyle.secondary, disabled=True, row=4))
         if end < len(self.pokemons):
             self.add_item(PokedexNextButton(self))
 
+    def build_embed(self):
+        details = describe(self.filters, self.sort)
+        description = f"Voici la mosaïque de tes {len(self.pokemons)} Pokémon !"
+        if details:
+            description = f"{len(self.pokemons)} Pokémon ({details})"
+        embed = discord.Embed(
+            title=f"📘 Nouveau Pokédex de {self.owner_name}",
+            description=description,
+            color=0x3498db
+        )
+        embed.set_footer(text=f"Page {self.page + 1}/{self.page_total}")
+        embed.set_image(url=f"attachment://{self.attachment_name}")
+        return embed
+
+    async def render(self):
+        """Mosaïque de la page courante (la suivante est préparée en tâche de fond)."""
+        png = await get_page(self.pokemons, self.page)
+        prefetch_page(self.pokemons, self.page + 1)
+        if png is None:
+            return None
+        self.attachment_name = filename_for(png, "pokedex_mosaic")
+        return discord.File(io.BytesIO(png), filename=self.attachment_name)
+
+    def restore_shown(self):
+        """Revient au tri et à la page de l'image affichée (rendu refusé)."""
+        sort, page = self.shown
+        if sort != self.sort:
+            self.sort = sort
+            self.apply_query()
+        self.page = page
+        self.update_buttons()
+
+    async def show(self, interaction):
+        await interaction.response.defer()
+        try:
+            file = await self.render()
+        except (RenderBusy, RenderExpired):
+            # Message inchangé : la vue revient à ce qu'il affiche
+            self.restore_shown()
+            await interaction.followup.send(BUSY_MESSAGE, ephemeral=True)
+            return
+        self.shown = (self.sort, self.page)
+        await interaction.edit_original_response(
+            embed=self.build_embed(),
+            attachments=[file] if file else [],
+            view=self,
+        )
+
     async def on_timeout(self):
         for item in self.children:
             item.disabled = True
 
+class PokedexSortSelect(Select):
+    def __init__(self, view_ref):
+        options = [
+            discord.SelectOption(label=label, value=key, default=(key == view_ref.sort))
+            for key, label in SORTS.items()
+        ]
+        super().__init__(placeholder="Trier…", options=options, row=3)
+        self.view_ref = view_ref
+
+    async def callback(self, interaction):
+        self.view_ref.sort = self.values[0]
+        self.view_ref.apply_query()
+        await self.view_ref.show(interaction)
+
 class PokedexPrevButton(Button):
     def __init__(self, view_ref):
-        super().__init__(label="⬅️ Précédent", style=discord.ButtonStyle.secondary)
+        super().__init__(label="⬅️ Précédent", style=discord.ButtonStyle.secondary, row=4)
         self.view_ref = view_ref
 
     async def callback(self, interaction):
         self.view_ref.page -= 1
         self.view_ref.update_buttons()
-        await interaction.response.edit_message(view=self.view_ref)
+        await self.view_ref.show(interaction)
 
 class PokedexNextButton(Button):
     def __init__(self, view_ref):
-        super().__init__(label="Suivant ➡️", style=discord.ButtonStyle.secondary)
+        super().__init__(label="Suivant ➡️", style=discord.ButtonStyle.secondary, row=4)
         self.view_ref = view_ref
 
     async def callback(self, interaction):
         self.view_ref.page += 1
         self.view_ref.update_buttons()
-        await interaction.response.edit_message(view=self.view_ref)
+        await self.view_ref.show(interaction)
 
 class PokemonButton(Button):
-    def __init__(self, pokemon_name, shiny_data, full_pokemon_data, type_sprites, attack_type_map, capture_data):
-        super().__init__(label=pokemon_name, style=discord.ButtonStyle.primary)
+    def __init__(self, pokemon_name, shiny_data, full_pokemon_data, type_sprites, attack_type_map, capture_data, row=None):
+        super().__init__(label=pokemon_name, style=discord.ButtonStyle.primary, row=row)
         self.pokemon_name = pokemon_name
         self.shiny_data = shiny_data
         self.full_pokemon_data = full_pokemon_data
@@ -148,231 +164,80 @@ class PokemonButton(Button):
         self.attack_type_map = attack_type_map
         self.capture_data = capture_data
 
-    def resize_keep_aspect(self, img, max_size):
-        w, h = img.size
-        ratio = min(max_size / w, max_size / h)
-        return img.resize((int(w * ratio), int(h * ratio)), Image.Resampling.LANCZOS)
-
     async def callback(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
 
         # Vérifie si c'est un shiny
-        is_shiny = any(normalize_text(p.get("name", "")) == normalize_text(self.pokemon_name) for p in self.shiny_data)
+        is_shiny = catalog.is_shiny(self.pokemon_name)
         display_name = self.pokemon_name 
 
         # Cherche les données de ce Pokémon
         p_data = next((p for p in self.capture_data if normalize_text(p["name"]) == normalize_text(self.pokemon_name)), None)
         if not p_data:
-            p_data = next((p for p in self.full_pokemon_data + self.shiny_data if normalize_text(p["name"]) == normalize_text(self.pokemon_name)), None)
+            p_data = catalog.get(self.pokemon_name)
         if not p_data:
             await interaction.followup.send("❌ Pokémon introuvable.", ephemeral=True)
             return
 
-        type_ = p_data.get("type", [])
-        if isinstance(type_, str):
-            type_ = [type_]
-
-        stats = p_data.get("stats_iv", p_data.get("stats", {}))
-        ivs = p_data.get("ivs", {})
-        attacks = p_data.get("attacks", [])
-
-        width, height = 850, 600
-        try:
-            image = Image.open(os.path.join(images_dir, "fond_pokedex_3.png")).convert("RGBA")
-            image = image.resize((width, height), Image.Resampling.LANCZOS)
-        except Exception as e:
-            print(f"[ERREUR] Impossible de charger le fond : {e}")
-            image = Image.new("RGBA", (width, height), (245, 245, 245, 255))
-
-        draw = ImageDraw.Draw(image)
-        try:
-            font_path_bold = os.path.join(script_dir, "fonts", "DejaVuSans-Bold.ttf")
-            font = ImageFont.truetype(font_path_bold, 15)
-            font_bold = ImageFont.truetype(font_path_bold, 20) 
-        except:
-            font = ImageFont.load_default()
-            font_bold = font
-
-        pos_nom_type = (75, 140)
-        pos_ivs = (75, 275)
-        pos_stats = (80, 385)
-        pos_sprite = (550, 165)
-        pos_attaques = (590, 365)#(535, 365)
-
-        # --- Nom + Types ---
-        x, y = pos_nom_type
-        draw.text((x, y), display_name, font=font_bold, fill="black")
-        y += 30
-        for t in type_:
-            url = self.type_sprites.get(t.lower())
-            if url:
-                try:
-                    response = requests.get(url)
-                    icon = Image.open(io.BytesIO(response.content)).convert("RGBA")
-                    icon = self.resize_keep_aspect(icon, 70)
-                    image.paste(icon, (x, y), icon)
-                    draw.text((x + icon.width + 5, y), t.capitalize(), font=font_bold, fill="black")
-                    y += icon.height + 5
-                except:
-                    draw.text((x, y), t.capitalize(), font=font, fill="black")
-                    y += 20
-            else:
-                draw.text((x, y), t.capitalize(), font=font, fill="black")
-                y += 20
-
-        # --- IVs ---
- 
-        x, y = pos_ivs
-        draw.text((x, y), "IVs :", font=font_bold, fill="black")
-        y += 25
-        for line in [
-            f"PV : {ivs.get('hp', '?')}  Atk : {ivs.get('attack', '?')}   AtkSpé : {ivs.get('special_attack', '?')}",
-            f"Def : {ivs.get('defense', '?')}   DefSpé : {ivs.get('special_defense', '?')}   Vit : {ivs.get('speed', '?')}",
-        ]:
-            draw.text((x, y), line, font=font, fill="black")
-            y += 25
-
-        # --- XP (à droite des types) ---
-        # --- XP ---
-        current_xp = p_data.get("current_xp", 0)
-        xp_evo     = p_data.get("xp_evo", 0)
-        xp_x, xp_y = 450, 365
-        if xp_evo == -1:
-            draw.text((xp_x, xp_y),      "XP actuel :", font=font_bold, fill="black")
-            draw.text((xp_x, xp_y + 25), "Pas d'évo",   font=font,      fill="black")
-        elif xp_evo > 0:
-            draw.text((xp_x, xp_y),      "XP actuel :",              font=font_bold, fill="black")
-            draw.text((xp_x, xp_y + 25), f"{current_xp} / {xp_evo}", font=font,      fill="black")
-        else:
-            draw.text((xp_x, xp_y),      "Pas d'évo", font=font_bold, fill="black")
-
-        # --- Stats ---
-        x, y = pos_stats
-        draw.text((x, y), "Stats :", font=font_bold, fill="black")
-        y += 30
-        for line in [
-            f"PV : {stats.get('hp', '?')}  Atk : {stats.get('attack', '?')}   AtkSpé : {stats.get('special_attack', '?')}",
-            f"Def : {stats.get('defense', '?')}   DefSpé : {stats.get('special_defense', '?')}   Vit : {stats.get('speed', '?')}",
-        ]:
-            draw.text((x, y), line, font=font, fill="black")
-            y += 25
-
-        # --- Sprite et Attaques ---
-        poke_img_url = p_data.get("image", "")
-        if poke_img_url.startswith("http"):
-            try:
-                response = requests.get(poke_img_url)
-                poke_img = Image.open(io.BytesIO(response.content)).convert("RGBA")
-                poke_img = self.resize_keep_aspect(poke_img, 150)
-                image.paste(poke_img, pos_sprite, poke_img)
-            except:
-                pass
-
-        # Attaques
-        x, y = pos_attaques
-        draw.text((x, y), "Attaques :", font=font_bold, fill="black")
-        y += 30
-        for atk_name in attacks:
-            atk_type = self.attack_type_map.get(normalize_text(atk_name))
-            atk_sprite_url = self.type_sprites.get(atk_type.lower()) if atk_type else None
-            if atk_sprite_url:
-                try:
-                    response = requests.get(atk_sprite_url)
-                    icon = Image.open(io.BytesIO(response.content)).convert("RGBA")
-                    icon = self.resize_keep_aspect(icon, 50)
-                    image.paste(icon, (x, y), icon)
-                    draw.text((x + icon.width + 8, y), atk_name, font=font, fill="black")
-                except:
-                    draw.text((x, y), atk_name, font=font, fill="black")
-            else:
-                draw.text((x, y), atk_name, font=font, fill="black")
-            y += 20
-
-        # --- Envoi du résultat ---
-        with io.BytesIO() as img_binary:
-            image.save(img_binary, "PNG")
-            img_binary.seek(0)
-            file = discord.File(img_binary, filename=f"{self.pokemon_name}.png")
+        job = await pokedex_card_job("new_pokedex", display_name, p_data, self.type_sprites, self.attack_type_map)
+        png = await render_for(interaction, job)
+        if png is None:
+            return
+        file = discord.File(BytesIO(png), filename=filename_for(png, self.pokemon_name))
 
         embed = discord.Embed(title=display_name)
-        embed.set_image(url=f"attachment://{self.pokemon_name}.png")
+        embed.set_image(url=f"attachment://{file.filename}")
         await interaction.followup.send(file=file, embed=embed, ephemeral=True)
 
 
 def setup_new_pokedex(bot, full_pokemon_shiny_data, full_pokemon_data, type_sprites, attack_type_map, json_dir):
     @bot.command()
-    async def pokedex(ctx):
+    async def pokedex(ctx, *filtres):
+        """!pokedex [gen1…gen5|région] [type] [shiny|non-shiny] [tri:capture|iv|nom|gen]"""
         user_id = str(ctx.author.id)
-        captures = get_new_captures(user_id)
-
-        if not captures:
-            await ctx.send("Tu n'as encore rien capturé dans la nouvelle table.")
-            return
-
-        pokemons = [entry["name"] for entry in captures]
-
-        # ----- 🔥 Vérification du cache -----
-        cache = NEW_POKEDEX_CACHE.get(user_id)
-
-        if cache and cache["pokemons"] == pokemons:
-            print("[CACHE] Nouveau Pokédex envoyé depuis le cache !")
-
-            mosaic_image = io.BytesIO(cache["mosaic"])
-            mosaic_image.seek(0)
-
-            file = discord.File(mosaic_image, filename="pokedex_mosaic.png")
-
-            embed = discord.Embed(
-                title=f"📘 Nouveau Pokédex de {ctx.author.display_name}",
-                description=f"(Cache) Voici ton Pokédex avec {len(pokemons)} Pokémon !",
-                color=0x3498db
-            )
-            embed.set_image(url="attachment://pokedex_mosaic.png")
-
-            view = PokedexView(
-                pokemons,
-                full_pokemon_shiny_data,
-                full_pokemon_data,
-                type_sprites,
-                attack_type_map,
-                captures
+        filters, sort, unknown = parse_query(filtres)
+        if unknown:
+            await ctx.send(
+                f"❌ Filtre inconnu : `{' '.join(unknown)}`\n"
+                f"Filtres : `gen1`…`gen5` ou une région, un type, `shiny` / `non-shiny`, "
+                f"tri : {', '.join(f'`tri:{key}`' for key in SORTS)}."
             )
-
-            await ctx.send(embed=embed, file=file, view=view)
             return
 
-        # ----- 🛠 PAS DE CACHE → Génération normale -----
-        mosaic_image, displayed_count = await create_mosaic(pokemons, full_pokemon_data, full_pokemon_shiny_data)
-        
-        if mosaic_image is None:
-            await ctx.send("Erreur lors de la création de la mosaïque.")
-            return
-
-        # ----- 💾 Mise en cache -----
-        NEW_POKEDEX_CACHE[user_id] = {
-            "pokemons": pokemons,
-            "mosaic": mosaic_image.getvalue()
-        }
-
-        file = discord.File(mosaic_image, filename="pokedex_mosaic.png")
+        captures = await get_new_captures(user_id)
 
-        embed = discord.Embed(
-            title=f"📘 Nouveau Pokédex de {ctx.author.display_name}",
-            description=f"Voici la mosaïque de tes {displayed_count} Pokémon !",
-            color=0x3498db
-        )
-        embed.set_image(url="attachment://pokedex_mosaic.png")
+        if not captures:
+            await ctx.send("Tu n'as encore rien capturé dans la nouvelle table.")
+            return
 
+        # ----- 🗂️ Index en mémoire : filtres, tri et pages sans nouvelle requête -----
         view = PokedexView(
-            pokemons,
+            user_id,
+            ctx.author.display_name,
+            build_index(captures),
+            filters,
+            sort,
             full_pokemon_shiny_data,
             full_pokemon_data,
             type_sprites,
             attack_type_map,
             captures
         )
+        if not view.pokemons:
+            await ctx.send(f"Aucun Pokémon ne correspond à ces filtres ({describe(filters, sort)}).")
+            return
+
+        # ----- 🧩 Mosaïque de la première page (la suivante est préparée en fond) -----
+        try:
+            file = await view.render()
+        except (RenderBusy, RenderExpired):
+            await ctx.send(BUSY_MESSAGE)
+            return
+        if file is None:
+            await ctx.send("Erreur lors de la création de la mosaïque.")
+            return
 
-        await ctx.send(embed=embed, file=file, view=view)
+        await ctx.send(embed=view.build_embed(), file=file, view=view)
 
 
 
@@ -392,8 +257,7 @@ def setup_new_pokedex(bot, full_pokemon_shiny_data, full_pokemon_data, type_spri
         member = ctx.guild.get_member(user_id)
         display_name = member.display_name if member else str(user_id)
 
-        delete_capture(user_id, pokemon_name)
-        invalidate_new_pokedex_cache(str(user_id))  # ← filet de sécurité explicite
+        await delete_capture(user_id, pokemon_name)
         await ctx.send(f"❌ Pokémon **{pokemon_name}** supprimé du Pokédex de {display_name}.")
         
 
@@ -411,7 +275,7 @@ def setup_new_pokedex(bot, full_pokemon_shiny_data, full_pokemon_data, type_spri
             await ctx.send("❌ Le nombre d'IV à augmenter doit être au moins 1.")
             return
 
-        success = increase_pokemon_iv(user.id, pokemon_name, iv_increase)
+        success = await increase_pokemon_iv(user.id, pokemon_name, iv_increase)
 
         if success:
             await ctx.send(f"✅ Les IV du Pokémon **{pokemon_name}** de {user.display_name} ont été augmentés de {iv_increase} points ! (max 31)")
@@ -2,7 +2,7 @@
 import discord
 from discord.ui import View, Button
 import random
-from money_db import get_balance, add_money, remove_money
+from async_db import get_balance, add_money, remove_money
 
 # Mise et gains
 BET_AMOUNT = 10
@@ -78,9 +78,9 @@ class DiceGame(View):
     async def resolve_bet(self, interaction: discord.Interaction, bet_type: str, bet_value):
         """Vérifie le solde, retire la mise, lance les dés, calcule le résultat."""
 
-        # Vérification du solde
-        balance = get_balance(self.user_id)
-        if balance < BET_AMOUNT:
+        # Retire la mise (refusé par la base si le solde est insuffisant)
+        if not await remove_money(self.user_id, BET_AMOUNT, reason="casino_mise"):
+            balance = await get_balance(self.user_id)
             embed = discord.Embed(
                 title="❌ Solde insuffisant",
                 description=f"Vous avez besoin de **{BET_AMOUNT} 💰🐊** pour jouer.\n"
@@ -91,9 +91,6 @@ class DiceGame(View):
             await interaction.response.edit_message(embed=embed, view=self)
             return
 
-        # Retire la mise
-        remove_money(self.user_id, BET_AMOUNT)
-
         # Lance les dés
         die1 = random.randint(1, 6)
         die2 = random.randint(1, 6)
@@ -127,9 +124,9 @@ class DiceGame(View):
 
         # Mise à jour du solde
         if won:
-            add_money(self.user_id, gain)
+            await add_money(self.user_id, gain, reason="casino_gain")
 
-        new_balance = get_balance(self.user_id)
+        new_balance = await get_balance(self.user_id)
 
         # Construction de l'embed résultat
         if won:
@@ -274,7 +271,7 @@ class ReplayButton(Button):
 
     async def callback(self, interaction: discord.Interaction):
         new_game = DiceGame(user_id=self.user_id)
-        balance = get_balance(self.user_id)
+        balance = await get_balance(self.user_id)
 
         embed = discord.Embed(
             title="🎲 Jeu de Dés",
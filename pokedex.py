@@ -1,15 +1,22 @@
 # pokedex.py
 import discord
 from discord.ui import View, Button
-from PIL import Image, ImageDraw, ImageFont
-import requests, io, os
+import io, os
+import asyncio
 from io import BytesIO
 import json
 from db import get_captures
+from async_db import run_db
 
 
 
 from combat.utils import normalize_text
+from sprites import fetch_sprite_variant_path
+from catalog import catalog
+from cache import ByteLRUCache, CACHE_DIR, MB
+from cards import MosaicJob, POKEDEX_LAYOUTS, PokedexCardJob
+from render_service import render, render_for
+from encoding import filename_for
 
 
 
@@ -17,62 +24,95 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 images_dir = os.path.join(script_dir, "images")
 
 # --- CACHE POKEDEX ---
-POKEDEX_CACHE = {}   # { user_id: { "pokemons": [...], "mosaic": bytes, "timestamp": time } }
+# user_id → PNG de la mosaïque, valable pour la liste de Pokémon qui l'a produite
+POKEDEX_CACHE = ByteLRUCache(
+    "pokedex",
+    max_bytes=int(os.getenv("POKEDEX_CACHE_MB", "32")) * MB,
+    ttl=24 * 3600,
+    spill_dir=os.path.join(CACHE_DIR, "pokedex"),
+)
 
 
 
 
-async def create_mosaic(pokemon_names, full_pokemon_data, full_pokemon_shiny_data):
-    images = []
-    nb_total = len(pokemon_names)
-    nb_ignores = 0
+async def create_mosaic(pokemon_names):
+    default_path = os.path.join(images_dir, "default.png")
+    has_default = os.path.exists(default_path)
+    paths = []     # chemin de la tuile, None si rien à afficher
+    pending = []   # (position dans paths, p_data) des sprites à télécharger
 
     for name in pokemon_names:
-        clean_name = normalize_text(name)
-        clean_base = ''.join(filter(str.isalpha, clean_name))
-        p_data = next((p for p in full_pokemon_data + full_pokemon_shiny_data if normalize_text(p["name"]) == clean_name), None)
-        if not p_data:
-            p_data = next((p for p in full_pokemon_data + full_pokemon_shiny_data if normalize_text(p["name"]) == clean_base), None)
+        # Nom exact, sinon nom sans le numéro final (pikachu_shiny2 → pikachu_shiny)
+        p_data = catalog.find(name)
 
         if not p_data:
             print(f"[IGNORÉ] {name} non trouvé dans le JSON. Utilisation de l'image par défaut.")
-            try:
-                fallback = Image.open(os.path.join(images_dir, "default.png")).convert("RGBA").resize((64, 64))
-                images.append(fallback)
-                continue
-            except Exception as e:
-                print(f"[ERREUR] Image par défaut manquante ou corrompue : {e}")
-                nb_ignores += 1
-                continue
-
-        try:
-            response = requests.get(p_data["image"])
-            img = Image.open(BytesIO(response.content)).convert("RGBA").resize((64, 64))
-            images.append(img)
-        except Exception as e:
-            print(f"[ERREUR] Image introuvable pour {p_data['name']}, fallback utilisé. → {e}")
-            try:
-                fallback = Image.open(os.path.join(images_dir, "default.png")).convert("RGBA").resize((64, 64))
-                images.append(fallback)
-            except Exception as e:
-                print(f"[ERREUR] Image par défaut manquante ou corrompue : {e}")
-                nb_ignores += 1
-
-    if not images:
+            paths.append(default_path if has_default else None)
+            continue
+
+        # Placeholder remplacé après les téléchargements parallèles
+        pending.append((len(paths), p_data))
+        paths.append(None)
+
+    # Tous les sprites sont récupérés en parallèle via la session partagée
+    results = await asyncio.gather(
+        *(fetch_sprite_variant_path(p_data["image"], 64) for _, p_data in pending),
+        return_exceptions=True,
+    )
+    for (index, p_data), result in zip(pending, results):
+        if isinstance(result, Exception):
+            print(f"[ERREUR] Image introuvable pour {p_data['name']}, fallback utilisé. → {result}")
+            result = default_path if has_default else None
+        paths[index] = result
+
+    if not has_default:
+        print(f"[ERREUR] Image par défaut manquante : {default_path}")
+    paths = [path for path in paths if path is not None]
+    if not paths:
         return None, 0
 
-    cols = 5
-    rows = (len(images) + cols - 1) // cols
-    mosaic = Image.new("RGBA", (cols * 64, rows * 64))
-    for i, img in enumerate(images):
-        x = (i % cols) * 64
-        y = (i // cols) * 64
-        mosaic.paste(img, (x, y))
-
-    output = BytesIO()
-    mosaic.save(output, format="PNG")
-    output.seek(0)
-    return output, len(images) 
+    png = await render(MosaicJob(count=len(paths), tiles=tuple(enumerate(paths)), fallback_path=default_path))
+    return BytesIO(png), len(paths)
+
+
+# ───────────────────────────────────────────────────────────────
+# 📇 Fiche détaillée (pokedex et new_pokedex)
+# ───────────────────────────────────────────────────────────────
+async def _icon_path(url, size):
+    if not url:
+        return None
+    try:
+        return await fetch_sprite_variant_path(url, size, fit=True)
+    except Exception:
+        return None
+
+
+async def pokedex_card_job(layout, title, p_data, type_sprites, attack_type_map) -> PokedexCardJob:
+    """Job de la fiche d'un Pokémon : icônes et sprite récupérés en parallèle."""
+    sizes = POKEDEX_LAYOUTS[layout]
+    types = p_data.get("type", [])
+    if isinstance(types, str):
+        types = [types]
+    attacks = p_data.get("attacks", [])
+    attack_types = [attack_type_map.get(atk_name) or attack_type_map.get(normalize_text(atk_name)) for atk_name in attacks]
+    poke_img_url = p_data.get("image", "")
+
+    paths = await asyncio.gather(
+        *(_icon_path(type_sprites.get(t.lower()), sizes["type_icon"]) for t in types),
+        *(_icon_path(type_sprites.get(t.lower()) if t else None, sizes["attack_icon"]) for t in attack_types),
+        _icon_path(poke_img_url if poke_img_url.startswith("http") else None, sizes["sprite_size"]),
+    )
+    return PokedexCardJob(
+        layout=layout,
+        title=title,
+        types=tuple(zip(types, paths[:len(types)])),
+        ivs=p_data.get("ivs", {}),
+        stats=p_data.get("stats_iv", p_data.get("stats", {})),
+        current_xp=p_data.get("current_xp", 0),
+        xp_evo=p_data.get("xp_evo", 0),
+        sprite_path=paths[-1],
+        attacks=tuple(zip(attacks, paths[len(types):-1])),
+    )
 
 
 # 👉 Les Views et Buttons du Pokédex
@@ -135,142 +175,29 @@ class PokemonButton(Button):
         self.attack_type_map = attack_type_map
         self.capture_data = capture_data
 
-    def resize_keep_aspect(self, img, max_size):
-        w, h = img.size
-        ratio = min(max_size / w, max_size / h)
-        return img.resize((int(w * ratio), int(h * ratio)), Image.Resampling.LANCZOS)
-
     async def callback(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
 
         # Vérifie si c’est un shiny
-        is_shiny = any(normalize_text(p.get("name", "")) == normalize_text(self.pokemon_name) for p in self.shiny_data)
+        is_shiny = catalog.is_shiny(self.pokemon_name)
         display_name = self.pokemon_name + " ✨" if is_shiny else self.pokemon_name
 
         # Cherche les données de ce Pokémon
         p_data = next((p for p in self.capture_data if normalize_text(p["name"]) == normalize_text(self.pokemon_name)), None)
         if not p_data:
-            p_data = next((p for p in self.full_pokemon_data + self.shiny_data if normalize_text(p["name"]) == normalize_text(self.pokemon_name)), None)
+            p_data = catalog.get(self.pokemon_name)
         if not p_data:
             await interaction.followup.send("❌ Pokémon introuvable.", ephemeral=True)
             return
 
-        type_ = p_data.get("type", [])
-        if isinstance(type_, str):
-            type_ = [type_]
-
-        stats = p_data.get("stats_iv", p_data.get("stats", {}))
-        ivs = p_data.get("ivs", {})
-        attacks = p_data.get("attacks", [])
-
-        width, height = 850, 600
-        try:
-            image = Image.open(os.path.join(images_dir, "fond_pokedex.png")).convert("RGBA")
-            image = image.resize((width, height), Image.Resampling.LANCZOS)
-        except Exception as e:
-            print(f"[ERREUR] Impossible de charger le fond : {e}")
-            image = Image.new("RGBA", (width, height), (245, 245, 245, 255))
-
-        draw = ImageDraw.Draw(image)
-        try:
-            font_path_bold = os.path.join(script_dir, "fonts", "DejaVuSans-Bold.ttf")
-            font = ImageFont.truetype(font_path_bold, 15)       # texte normal ou gras selon ton besoin
-            font_bold = ImageFont.truetype(font_path_bold, 20) 
-        except:
-            font = ImageFont.load_default()
-            font_bold = font
-
-        pos_nom_type = (90, 70)
-        pos_ivs = (90, 270)
-        pos_stats = (90, 420)
-        pos_sprite = (520, 40)
-        pos_attaques = (535, 340)
-
-        # --- Nom + Types ---
-        x, y = pos_nom_type
-        draw.text((x, y), display_name, font=font_bold, fill="black")
-        y += 30
-        for t in type_:
-            url = self.type_sprites.get(t.lower())
-            if url:
-                try:
-                    response = requests.get(url)
-                    icon = Image.open(io.BytesIO(response.content)).convert("RGBA")
-                    icon = self.resize_keep_aspect(icon, 70)
-                    image.paste(icon, (x, y), icon)
-                    draw.text((x + icon.width + 5, y), t.capitalize(), font=font_bold, fill="black")
-                    y += icon.height + 5
-                except:
-                    draw.text((x, y), t.capitalize(), font=font, fill="black")
-                    y += 20
-            else:
-                draw.text((x, y), t.capitalize(), font=font, fill="black")
-                y += 20
-
-        # --- IVs ---
-        x, y = pos_ivs
-        draw.text((x, y), "IVs :", font=font_bold, fill="black")
-        y += 25
-        for line in [
-            f"PV : {ivs.get('hp', '?')}",
-            f"Atk : {ivs.get('attack', '?')} | AtkSpé : {ivs.get('special_attack', '?')}",
-            f"Def : {ivs.get('defense', '?')} | DefSpé : {ivs.get('special_defense', '?')} | Vit : {ivs.get('speed', '?')}",
-        ]:
-            draw.text((x, y), line, font=font, fill="black")
-            y += 25
-
-        # --- Stats ---
-        x, y = pos_stats
-        draw.text((x, y), "Stats :", font=font_bold, fill="black")
-        y += 30
-        for line in [
-            f"PV : {stats.get('hp', '?')}",
-            f"Atk : {stats.get('attack', '?')} | AtkSpé : {stats.get('special_attack', '?')}",
-            f"Def : {stats.get('defense', '?')} | DefSpé : {stats.get('special_defense', '?')}",
-            f"Vit : {stats.get('speed', '?')}"
-        ]:
-            draw.text((x, y), line, font=font, fill="black")
-            y += 25
-
-        # --- Sprite et Attaques ---
-        poke_img_url = p_data.get("image", "")
-        if poke_img_url.startswith("http"):
-            try:
-                response = requests.get(poke_img_url)
-                poke_img = Image.open(io.BytesIO(response.content)).convert("RGBA")
-                poke_img = self.resize_keep_aspect(poke_img, 250)
-                image.paste(poke_img, pos_sprite, poke_img)
-            except:
-                pass
-
-        # Attaques
-        x, y = pos_attaques
-        draw.text((x, y), "Attaques :", font=font_bold, fill="black")
-        y += 40
-        for atk_name in attacks:
-            atk_type = self.attack_type_map.get(normalize_text(atk_name))
-            atk_sprite_url = self.type_sprites.get(atk_type.lower()) if atk_type else None
-            if atk_sprite_url:
-                try:
-                    response = requests.get(atk_sprite_url)
-                    icon = Image.open(io.BytesIO(response.content)).convert("RGBA")
-                    icon = self.resize_keep_aspect(icon, 80)
-                    image.paste(icon, (x, y), icon)
-                    draw.text((x + icon.width + 8, y), atk_name, font=font, fill="black")
-                except:
-                    draw.text((x, y), atk_name, font=font, fill="black")
-            else:
-                draw.text((x, y), atk_name, font=font, fill="black")
-            y += 40
-
-        # --- Envoi du résultat ---
-        with io.BytesIO() as img_binary:
-            image.save(img_binary, "PNG")
-            img_binary.seek(0)
-            file = discord.File(img_binary, filename=f"{self.pokemon_name}.png")
+        job = await pokedex_card_job("pokedex", display_name, p_data, self.type_sprites, self.attack_type_map)
+        png = await render_for(interaction, job)
+        if png is None:
+            return
+        file = discord.File(BytesIO(png), filename=filename_for(png, self.pokemon_name))
 
         embed = discord.Embed(title=display_name)
-        embed.set_image(url=f"attachment://{self.pokemon_name}.png")
+        embed.set_image(url=f"attachment://{file.filename}")
         await interaction.followup.send(file=file, embed=embed, ephemeral=True)
 
 def setup_pokedex(bot, full_pokemon_shiny_data, full_pokemon_data, type_sprites, attack_type_map, json_dir):
@@ -279,26 +206,26 @@ def setup_pokedex(bot, full_pokemon_shiny_data, full_pokemon_data, type_sprites,
     async def ex_pokedex(ctx):
         user_id = str(ctx.author.id)
 
-        captures = get_captures(user_id)
+        captures = await run_db(get_captures, user_id)
         pokemons = [entry["name"] for entry in captures]
 
         # ----- 🔥 Vérification du cache -----
-        cache = POKEDEX_CACHE.get(user_id)
+        cached_mosaic = POKEDEX_CACHE.get(user_id, fingerprint=pokemons)
 
-        if cache and cache["pokemons"] == pokemons:
+        if cached_mosaic is not None:
             print("[CACHE] Pokédex envoyé sans recalcul !")
 
-            mosaic_image = io.BytesIO(cache["mosaic"])
+            mosaic_image = io.BytesIO(cached_mosaic)
             mosaic_image.seek(0)
 
-            file = discord.File(mosaic_image, filename="pokedex_mosaic.png")
+            file = discord.File(mosaic_image, filename=filename_for(mosaic_image.getvalue(), "pokedex_mosaic"))
 
             embed = discord.Embed(
                 title=f"📘 Pokédex de {ctx.author.display_name}",
                 description=f"(Cache) Voici ton Pokédex avec {len(pokemons)} Pokémon !",
                 color=0x3498db
             )
-            embed.set_image(url="attachment://pokedex_mosaic.png")
+            embed.set_image(url=f"attachment://{file.filename}")
 
             view = PokedexView(
                 pokemons,
@@ -314,29 +241,22 @@ def setup_pokedex(bot, full_pokemon_shiny_data, full_pokemon_data, type_sprites,
 
         # ----- 🛠 PAS DE CACHE → Génération normale -----
 
-        mosaic_image, displayed_count = await create_mosaic(
-            pokemons,
-            full_pokemon_data,
-            full_pokemon_shiny_data
-        )
+        mosaic_image, displayed_count = await create_mosaic(pokemons)
 
         if mosaic_image is None:
             await ctx.send("Erreur lors de la création de la mosaïque.")
             return
 
-        POKEDEX_CACHE[user_id] = {
-            "pokemons": pokemons,
-            "mosaic": mosaic_image.getvalue()
-        }
+        POKEDEX_CACHE.put(user_id, mosaic_image.getvalue(), fingerprint=pokemons)
 
-        file = discord.File(mosaic_image, filename="pokedex_mosaic.png")
+        file = discord.File(mosaic_image, filename=filename_for(mosaic_image.getvalue(), "pokedex_mosaic"))
 
         embed = discord.Embed(
             title=f"📘 Pokédex de {ctx.author.display_name}",
             description=f"Voici la mosaïque de tes {displayed_count} Pokémon !",
             color=0x3498db
         )
-        embed.set_image(url="attachment://pokedex_mosaic.png")
+        embed.set_image(url=f"attachment://{file.filename}")
 
         view = PokedexView(
             pokemons,
@@ -0,0 +1,106 @@
+"""Index en mémoire des captures d'un joueur pour le pokédex paginé.
+
+Construit une fois par affichage à partir de get_new_captures : filtres et
+tris (commande, menu de tri, pages) travaillent sur cet index sans nouvelle
+requête à la base.
+
+    !pokedex                       → toutes les captures, ordre de capture
+    !pokedex johto feu             → génération 2, type feu
+    !pokedex shiny tri:iv          → shiny uniquement, meilleurs IV d'abord
+    !pokedex gen1 non-shiny tri:nom
+
+Filtres : gen1…gen5 (ou kanto, johto, hoenn, sinnoh, unys), un nom de type
+(feu, normal…), shiny / non-shiny.
+Tris : tri:capture (défaut), tri:iv, tri:nom, tri:gen.
+"""
+from catalog import REGION_FILES, catalog, catalog_key
+from combat.utils import TYPE_NAMES
+
+GENERATIONS = {f"gen{i}": region for i, region in enumerate(REGION_FILES, start=1)}
+GENERATION_OF = {region: i for i, region in enumerate(REGION_FILES, start=1)}
+REGION_ALIASES = {catalog_key(region): region for region in REGION_FILES}
+
+SORTS = {
+    "capture": "Ordre de capture",
+    "iv":      "IV total (décroissant)",
+    "nom":     "Nom (A → Z)",
+    "gen":     "Génération",
+}
+DEFAULT_SORT = "capture"
+
+
+def build_index(captures: list) -> list[dict]:
+    """Une entrée par capture : nom, région, types, shiny, IV total, rang de capture."""
+    index = []
+    for order, capture in enumerate(captures):
+        name = capture["name"]
+        types = capture.get("type") or []
+        if isinstance(types, str):
+            types = [types]
+        ivs = capture.get("ivs") or {}
+        region = catalog.region_of(name)
+        index.append({
+            "name":     name,
+            "order":    order,
+            "region":   region,
+            "gen":      GENERATION_OF.get(region, len(GENERATION_OF) + 1),
+            "types":    {catalog_key(t) for t in types},
+            "shiny":    catalog.is_shiny(name) or "_shiny" in name.lower(),
+            "iv_total": sum(v for v in ivs.values() if isinstance(v, (int, float))),
+        })
+    return index
+
+
+def parse_query(args) -> tuple[dict, str, list]:
+    """Arguments de la commande → (filtres, tri, arguments non reconnus)."""
+    filters = {"region": None, "type": None, "shiny": None}
+    sort = DEFAULT_SORT
+    unknown = []
+    for raw in args:
+        token = catalog_key(raw)
+        if token.startswith("tri:"):
+            key = token[4:]
+            if key in SORTS:
+                sort = key
+            else:
+                unknown.append(raw)
+        elif token in GENERATIONS:
+            filters["region"] = GENERATIONS[token]
+        elif token in REGION_ALIASES:
+            filters["region"] = REGION_ALIASES[token]
+        elif token in ("shiny", "non-shiny"):
+            filters["shiny"] = token == "shiny"
+        elif token in TYPE_NAMES:
+            filters["type"] = token
+        else:
+            unknown.append(raw)
+    return filters, sort, unknown
+
+
+def describe(filters: dict, sort: str) -> str:
+    parts = []
+    if filters["region"]:
+        parts.append(f"{filters['region']} (gen {GENERATION_OF[filters['region']]})")
+    if filters["type"]:
+        parts.append(f"type {filters['type']}")
+    if filters["shiny"] is not None:
+        parts.append("shiny" if filters["shiny"] else "non shiny")
+    if sort != DEFAULT_SORT:
+        parts.append(f"tri : {SORTS[sort].lower()}")
+    return ", ".join(parts)
+
+
+def query(index: list, filters: dict, sort: str = DEFAULT_SORT) -> list[dict]:
+    entries = [
+        e for e in index
+        if (filters["region"] is None or e["region"] == filters["region"])
+        and (filters["type"] is None or filters["type"] in e["types"])
+        and (filters["shiny"] is None or e["shiny"] == filters["shiny"])
+    ]
+    if sort == "iv":
+        entries.sort(key=lambda e: (-e["iv_total"], e["order"]))
+    elif sort == "nom":
+        entries.sort(key=lambda e: (catalog_key(e["name"]), e["order"]))
+    elif sort == "gen":
+        entries.sort(key=lambda e: (e["gen"], e["order"]))
+    return entries
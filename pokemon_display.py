@@ -1,7 +1,8 @@
-import json
 from discord import Embed
 import os
 
+from data_registry import registry
+
 def create_pokemon_embed(pokemon_name: str, json_file: str, is_shiny: bool = False) -> Embed:
     """
     Crée un embed Discord pour un Pokémon donné depuis un fichier JSON spécifique.
@@ -18,8 +19,7 @@ def create_pokemon_embed(pokemon_name: str, json_file: str, is_shiny: bool = Fal
 
     # Charger le JSON
     try:
-        with open(json_file, "r", encoding="utf-8") as f:
-            pokemons = json.load(f)
+        pokemons = registry.get(json_file)
     except Exception as e:
         return Embed(
             title="❌ Erreur JSON",
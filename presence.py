@@ -0,0 +1,174 @@
+"""Présence vocale tenue à jour par les événements on_voice_state_update.
+
+Plus aucun parcours de `voice_channel.members` à chaque minute : le service
+garde, par salon vocal, l'heure d'arrivée de chaque membre (hors bots) et
+répond en O(1). Les abonnés reçoivent les arrivées et les départs au moment
+où Discord les signale ; un changement de salon donne un départ puis une
+arrivée. Au (re)démarrage (on_ready), l'index est réconcilié avec l'état
+des salons : les membres déjà présents sont annoncés comme arrivés, les
+absents comme partis.
+
+    presence.in_voice(user_id, VOICE_CHANNEL_ID)         → bool
+    presence.seconds_present(user_id, VOICE_CHANNEL_ID)  → secondes depuis l'arrivée (0 si absent)
+    presence.members(VOICE_CHANNEL_ID)                   → [discord.Member] présents
+    presence.count(VOICE_CHANNEL_ID)                     → nombre de présents
+    presence.subscribe(on_voice, VOICE_CHANNEL_ID)       → await on_voice(event, member, channel)
+                                                           event = "join" | "leave"
+    !presence                                            → commande admin
+"""
+import time
+
+JOIN = "join"
+LEAVE = "leave"
+
+
+class Presence:
+    """Un membre dans un salon vocal."""
+    __slots__ = ("member", "channel_id", "joined_at")
+
+    def __init__(self, member, channel_id: int, joined_at: float):
+        self.member = member
+        self.channel_id = channel_id
+        self.joined_at = joined_at      # time.time() de l'arrivée (ou du démarrage du bot)
+
+
+class VoicePresence:
+    def __init__(self):
+        self._channels: dict[int, dict[int, Presence]] = {}    # salon → {membre: présence}
+        self._where: dict[tuple, Presence] = {}                # (serveur, membre) → présence
+        self._subscribers: list[tuple] = []                    # (callback, salon ou None)
+        self.stats = {"joins": 0, "leaves": 0, "syncs": 0, "errors": 0}
+
+    # ── Requêtes ─────────────────────────────────────────────────────────────
+    def in_voice(self, user_id: int, channel_id: int) -> bool:
+        return user_id in self._channels.get(channel_id, ())
+
+    def seconds_present(self, user_id: int, channel_id: int) -> float:
+        entry = self._channels.get(channel_id, {}).get(user_id)
+        return max(0.0, time.time() - entry.joined_at) if entry else 0.0
+
+    def joined_at(self, user_id: int, channel_id: int) -> float | None:
+        entry = self._channels.get(channel_id, {}).get(user_id)
+        return entry.joined_at if entry else None
+
+    def members(self, channel_id: int) -> list:
+        return [entry.member for entry in self._channels.get(channel_id, {}).values()]
+
+    def count(self, channel_id: int) -> int:
+        return len(self._channels.get(channel_id, ()))
+
+    def channel_of(self, guild_id: int, user_id: int) -> int | None:
+        entry = self._where.get((guild_id, user_id))
+        return entry.channel_id if entry else None
+
+    def subscribe(self, callback, channel_id: int | None = None):
+        """await callback(event, member, channel) à chaque arrivée / départ (d'un salon, ou de tous)."""
+        self._subscribers.append((callback, channel_id))
+
+    # ── Mise à jour ──────────────────────────────────────────────────────────
+    def _add(self, member, channel, joined_at: float | None = None) -> bool:
+        key = (member.guild.id, member.id)
+        if key in self._where:
+            return False
+        entry = Presence(member, channel.id, joined_at or time.time())
+        self._channels.setdefault(channel.id, {})[member.id] = entry
+        self._where[key] = entry
+        self.stats["joins"] += 1
+        return True
+
+    def _remove(self, member) -> int | None:
+        entry = self._where.pop((member.guild.id, member.id), None)
+        if entry is None:
+            return None
+        channel = self._channels.get(entry.channel_id, {})
+        channel.pop(member.id, None)
+        if not channel:
+            self._channels.pop(entry.channel_id, None)
+        self.stats["leaves"] += 1
+        return entry.channel_id
+
+    async def _publish(self, event: str, member, channel):
+        for callback, channel_id in list(self._subscribers):
+            if channel_id is not None and channel_id != channel.id:
+                continue
+            try:
+                await callback(event, member, channel)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"[PRESENCE] ❌ Abonné {getattr(callback, '__qualname__', callback)} ({event}) : {e}")
+
+    async def on_voice_state_update(self, member, before, after):
+        if member.bot or before.channel == after.channel:
+            return   # micro / casque / partage d'écran : pas un mouvement
+        if before.channel is not None and self._remove(member) is not None:
+            await self._publish(LEAVE, member, before.channel)
+        if after.channel is not None and self._add(member, after.channel):
+            await self._publish(JOIN, member, after.channel)
+
+    async def sync(self, guilds):
+        """Réconcilie l'index avec les salons vocaux (démarrage, reconnexion)."""
+        self.stats["syncs"] += 1
+        seen = set()
+        for guild in guilds:
+            for channel in list(guild.voice_channels) + list(guild.stage_channels):
+                for member in channel.members:
+                    if member.bot:
+                        continue
+                    seen.add((guild.id, member.id))
+                    current = self._where.get((guild.id, member.id))
+                    if current is not None and current.channel_id == channel.id:
+                        current.member = member
+                        continue
+                    if current is not None:
+                        self._remove(member)
+                        await self._publish(LEAVE, member, guild.get_channel(current.channel_id) or channel)
+                    self._add(member, channel)
+                    await self._publish(JOIN, member, channel)
+        for key in [key for key in self._where if key not in seen]:
+            entry = self._where[key]
+            self._remove(entry.member)
+            channel = entry.member.guild.get_channel(entry.channel_id)
+            if channel is not None:
+                await self._publish(LEAVE, entry.member, channel)
+
+    def report(self) -> dict:
+        return {
+            "channels": len(self._channels),
+            "members": len(self._where),
+            "subscribers": len(self._subscribers),
+            **self.stats,
+        }
+
+
+presence = VoicePresence()
+
+
+# ───────────────────────────────────────────────────────────────
+# 🛠️ Écoute des événements et commande admin
+# ───────────────────────────────────────────────────────────────
+def setup_presence(bot):
+    from utils import is_croco   # utils lit la config du bot : pas à l'import
+
+    bot.add_listener(presence.on_voice_state_update, "on_voice_state_update")
+
+    @bot.listen("on_ready")
+    async def sync_presence():
+        await presence.sync(bot.guilds)
+        print(f"[PRESENCE] {presence.report()['members']} membre(s) en vocal au démarrage")
+
+    @bot.command(name="presence")
+    @is_croco()
+    async def presence_command(ctx):
+        r = presence.report()
+        lines = [
+            f"🎧 **Présence vocale** : {r['members']} membre(s) dans {r['channels']} salon(s) · "
+            f"{r['joins']} arrivée(s) · {r['leaves']} départ(s) · {r['syncs']} synchro(s) · "
+            f"{r['subscribers']} abonné(s) · {r['errors']} erreur(s)"
+        ]
+        for channel_id, entries in presence._channels.items():
+            channel = bot.get_channel(channel_id)
+            for entry in sorted(entries.values(), key=lambda e: e.joined_at):
+                minutes = int(time.time() - entry.joined_at) // 60
+                lines.append(f"• {getattr(channel, 'name', channel_id)} — {entry.member.display_name} "
+                             f"depuis {minutes} min")
+        await ctx.send("\n".join(lines)[:2000])
@@ -1,26 +1,4 @@
-import psycopg2
-import os
-
-DATABASE_URL = os.getenv("DATABASE_URL")
-
-def get_connection():
-    return psycopg2.connect(DATABASE_URL)
-
-def init_preuves_db():
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS preuves (
-                    id SERIAL PRIMARY KEY,
-                    user_id TEXT NOT NULL,
-                    item_name TEXT NOT NULL,
-                    region TEXT NOT NULL,
-                    description TEXT,
-                    image TEXT,
-                    obtained_at TIMESTAMP DEFAULT NOW()
-                )
-            """)
-        conn.commit()
+from db_connection import get_connection
 
 def add_preuve(user_id, item_name, region, description="", image=""):
     with get_connection() as conn:
@@ -29,7 +7,6 @@ def add_preuve(user_id, item_name, region, description="", image=""):
                 INSERT INTO preuves (user_id, item_name, region, description, image)
                 VALUES (%s, %s, %s, %s, %s)
             """, (str(user_id), item_name, region, description, image))
-        conn.commit()
 
 def get_preuves(user_id):
     with get_connection() as conn:
@@ -56,7 +33,6 @@ def delete_preuves(user_id):
     with get_connection() as conn:
         with conn.cursor() as cur:
             cur.execute("DELETE FROM preuves WHERE user_id = %s", (str(user_id),))
-        conn.commit()
 
 def has_preuve(user_id, item_name):
     with get_connection() as conn:
@@ -0,0 +1,171 @@
+"""Pré-chargement des sprites référencés par les fichiers json/.
+
+Parcourt tous les JSON, télécharge chaque image en parallèle (borné) dans le
+cache de sprites.py et prépare les variantes redimensionnées réellement
+utilisées par les vues : le premier pokédex après un déploiement n'attend
+plus des centaines de téléchargements.
+
+    !prewarm                       → commande admin (progression + échecs)
+    SPRITE_PREWARM_ON_START=1      → lancé en tâche de fond au démarrage
+"""
+import asyncio
+import json
+import os
+import time
+
+from utils import is_croco
+from sprites import fetch_sprite, fetch_sprite_variant
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+json_dir = os.path.join(script_dir, "json")
+
+PREWARM_CONCURRENCY = int(os.getenv("SPRITE_PREWARM_CONCURRENCY", "8"))
+PREWARM_ON_START    = os.getenv("SPRITE_PREWARM_ON_START", "0").lower() in ("1", "true", "yes")
+
+IMAGE_EXTENSIONS = (".png", ".gif", ".jpg", ".jpeg", ".webp")
+
+# Variantes (taille, fit) effectivement affichées par les vues
+POKEMON_VARIANTS = (
+    (64,  False),   # mosaïque du pokédex
+    (150, True),    # fiche !pokedex
+    (250, True),    # fiche !ex_pokedex
+    (392, False),   # carte de spawn
+)
+TYPE_ICON_VARIANTS = (
+    (50, True),     # icône d'attaque (!pokedex)
+    (70, True),     # icône de type
+    (80, True),     # icône d'attaque (!ex_pokedex)
+)
+POKEMON_FILE_PREFIXES = ("pokemon_", "pokemons", "captures", "oeuf")
+
+_running = None   # tâche de pré-chargement en cours (une seule à la fois)
+
+
+# ───────────────────────────────────────────────────────────────
+# 🔎 Collecte des URLs
+# ───────────────────────────────────────────────────────────────
+def _variants_for(filename: str) -> tuple:
+    if filename == "pokemon_type_sprites.json":
+        return TYPE_ICON_VARIANTS
+    if filename.startswith(POKEMON_FILE_PREFIXES):
+        return POKEMON_VARIANTS
+    return ()   # items, adversaires… : image brute uniquement
+
+
+def _iter_urls(obj):
+    if isinstance(obj, dict):
+        for value in obj.values():
+            yield from _iter_urls(value)
+    elif isinstance(obj, list):
+        for value in obj:
+            yield from _iter_urls(value)
+    elif isinstance(obj, str) and obj.startswith("http") and obj.lower().split("?")[0].endswith(IMAGE_EXTENSIONS):
+        yield obj
+
+
+def collect_sprite_urls() -> dict[str, set]:
+    """{ url: {(taille, fit), ...} } pour toutes les images des fichiers json/."""
+    urls = {}
+    for root, _, files in os.walk(json_dir):
+        for filename in sorted(files):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(root, filename), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"[PREWARM] JSON illisible {filename} : {e}")
+                continue
+            variants = _variants_for(filename)
+            for url in _iter_urls(data):
+                urls.setdefault(url, set()).update(variants)
+    return urls
+
+
+# ───────────────────────────────────────────────────────────────
+# ⬇️ Pré-chargement
+# ───────────────────────────────────────────────────────────────
+async def prewarm_sprites(concurrency: int = PREWARM_CONCURRENCY, progress=None) -> dict:
+    """Télécharge et redimensionne toutes les images.
+
+    progress : coroutine optionnelle appelée avec (faits, total) environ
+    toutes les 5 % d'avancement.
+    Retourne { "total", "ok", "failed": [(url, erreur)], "elapsed" }.
+    """
+    urls = collect_sprite_urls()
+    total = len(urls)
+    sem = asyncio.Semaphore(concurrency)
+    failed = []
+    done = 0
+    step = max(1, total // 20)
+    start = time.monotonic()
+
+    async def warm(url, variants):
+        nonlocal done
+        async with sem:
+            try:
+                if await fetch_sprite(url) is None:
+                    raise RuntimeError("téléchargement impossible")
+                for size, fit in sorted(variants):
+                    await fetch_sprite_variant(url, size, fit)
+            except Exception as e:
+                failed.append((url, str(e)))
+        done += 1
+        if progress and (done % step == 0 or done == total):
+            await progress(done, total)
+
+    print(f"[PREWARM] {total} images à pré-charger ({concurrency} en parallèle)")
+    await asyncio.gather(*(warm(url, variants) for url, variants in urls.items()))
+
+    elapsed = time.monotonic() - start
+    print(f"[PREWARM] Terminé en {elapsed:.1f}s : {total - len(failed)}/{total} OK, {len(failed)} échec(s)")
+    for url, err in failed:
+        print(f"[PREWARM] ❌ {url} → {err}")
+    return {"total": total, "ok": total - len(failed), "failed": failed, "elapsed": elapsed}
+
+
+def start_prewarm(progress=None) -> asyncio.Task:
+    """Lance le pré-chargement en tâche de fond (réutilise celle en cours)."""
+    global _running
+    if _running is None or _running.done():
+        _running = asyncio.create_task(prewarm_sprites(progress=progress))
+    return _running
+
+
+# ───────────────────────────────────────────────────────────────
+# 🛠️ Commande admin
+# ───────────────────────────────────────────────────────────────
+def setup_prewarm(bot):
+
+    @bot.listen("on_ready")
+    async def prewarm_on_start():
+        if PREWARM_ON_START:
+            start_prewarm()
+
+    @bot.command(name="prewarm")
+    @is_croco()
+    async def prewarm(ctx):
+        if _running is not None and not _running.done():
+            await ctx.send("⏳ Un pré-chargement est déjà en cours.")
+            return
+
+        message = await ctx.send("🖼️ Pré-chargement des sprites…")
+
+        async def progress(done, total):
+            try:
+                await message.edit(content=f"🖼️ Pré-chargement des sprites… {done}/{total} ({done * 100 // total}%)")
+            except Exception:
+                pass
+
+        report = await start_prewarm(progress)
+
+        lines = [
+            f"✅ Pré-chargement terminé en {report['elapsed']:.1f}s : "
+            f"**{report['ok']}/{report['total']}** images en cache."
+        ]
+        if report["failed"]:
+            lines.append(f"❌ {len(report['failed'])} échec(s) :")
+            lines += [f"• `{url}` → {err}" for url, err in report["failed"][:10]]
+            if len(report["failed"]) > 10:
+                lines.append(f"… et {len(report['failed']) - 10} autre(s) (voir les logs).")
+        await ctx.send("\n".join(lines)[:2000])
@@ -3,9 +3,10 @@ from discord.ext import commands
 from discord.ui import View, Button
 import asyncio
 import random
-import json
 import os
 
+from data_registry import registry
+
 script_dir = os.path.dirname(os.path.abspath(__file__))
 json_dir = os.path.join(script_dir, "json")
 
@@ -14,12 +15,11 @@ quiz_winner = None
 
 
 def load_questions(file_name):
-    file_path = os.path.join(json_dir, file_name)
-    if not os.path.exists(file_path):
-        print(f"[ERREUR] Fichier questions introuvable : {file_path}")
+    questions = registry.get(file_name, None)
+    if questions is None:
+        print(f"[ERREUR] Fichier questions introuvable : {os.path.join(json_dir, file_name)}")
         return []
-    with open(file_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return questions
 
 
 def setup_quiz_commands(bot, spawn_pokemon, role_id, is_under_ban_func, questions_file="questions.json", authorized_user_id=None):
@@ -82,6 +82,7 @@ def setup_quiz_commands(bot, spawn_pokemon, role_id, is_under_ban_func, question
         answered_users = set()
         quiz_winner = None
 
+        questions = load_questions(questions_file)   # version à jour du registre
         if not questions:
             await channel.send("❌ Le quiz ne peut pas démarrer car aucune question n'a été chargée.")
             return
@@ -1,32 +1,25 @@
 import asyncio
 import discord
 from discord.ui import View, Button, Select
-from PIL import Image, ImageDraw, ImageFont
-import requests
 import os
-import json
 from io import BytesIO
 from inventory_db import delete_inventory, get_inventory  # adapte si tes fonctions s'appellent autrement
 from money_db import get_balance, add_money
-from db_connection import get_connection
 from inventory_db import use_item, get_inventory
+from async_db import run_db
+from sprites import fetch_sprite_path, resolve_image_path
+from cards import ItemCardJob, rarity_color
+from render_service import render_for
+from data_registry import registry
+from encoding import filename_for
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 receleur_json_path = os.path.join(script_dir, "json", "receleur.json")
 images_dir = os.path.join(script_dir, "images")
 images_json_path = os.path.join(script_dir, "json", "images.json")
 
-# ─── Chargement des prix de rachat ────────────────────────────────────────────
-with open(receleur_json_path, "r", encoding="utf-8") as f:
-    RECELEUR_PRIX = json.load(f)  # { "item_name": prix_rachat, ... }
-
-# ─── Chargement des images de fond ────────────────────────────────────────────
-try:
-    with open(images_json_path, "r", encoding="utf-8") as f:
-        IMAGES_DATA = json.load(f)
-except Exception as e:
-    print(f"[RECELEUR] Erreur lors du chargement de images.json : {e}")
-    IMAGES_DATA = {}
+# ─── Prix de rachat ({ "item_name": prix_rachat, ... }) et images de fond ─────
+# registre partagé (data_registry), relus à chaque usage
 
 
 def get_items_vendables(user_id: str) -> list[dict]:
@@ -36,14 +29,15 @@ def get_items_vendables(user_id: str) -> list[dict]:
     Retourne une liste de dicts avec les infos enrichies du prix de rachat.
     """
     inventory = get_inventory(user_id)  # liste de dicts : item_name, quantity, rarity, description, image, price...
+    rachat_prix = registry.get(receleur_json_path)
     vendables = []
     for item in inventory:
         name = item.get("name", "")  # get_inventory retourne "name", pas "item_name"
-        if name in RECELEUR_PRIX:
+        if name in rachat_prix:
             vendables.append({
                 **item,
                 "item_name": name,  # on normalise ici pour le reste du code
-                "rachat_price": RECELEUR_PRIX[name]
+                "rachat_price": rachat_prix[name]
             })
     return vendables
 
@@ -59,8 +53,8 @@ class ReceleurIntroView(View):
 
         try:
             user_id = str(interaction.user.id)
-            balance = await asyncio.to_thread(get_balance, user_id)
-            items_vendables = await asyncio.to_thread(get_items_vendables, user_id)
+            balance = await run_db(get_balance, user_id)
+            items_vendables = await run_db(get_items_vendables, user_id)
 
             if not items_vendables:
                 await interaction.followup.send(
@@ -147,10 +141,27 @@ class ReceleurSelectView(View):
             return
 
       
-        # Génère la carte (image + embed) dans le thread
-        file, embed = await asyncio.to_thread(
-            build_item_card, item, self.user_id
+        # Solde et images récupérés côté async (pool DB + session HTTP partagée),
+        # le rendu PIL part dans le pool de rendu
+        balance, fond_path, item_path = await asyncio.gather(
+            run_db(get_balance, self.user_id),
+            fetch_sprite_path(get_fond_url() or ""),
+            resolve_image_path(item.get("image", "")),
         )
+        png = await render_for(interaction, ItemCardJob(
+            theme="receleur",
+            name=item["item_name"],
+            rarity=item.get("rarity", "common"),
+            description=item.get("description", "Aucune description."),
+            quantity=item.get("quantity", 1),
+            price=item["rachat_price"],
+            balance=balance,
+            background_path=fond_path,
+            image_path=item_path,
+        ))
+        if png is None:
+            return
+        file, embed = build_item_card(item, png)
         # Crée la View dans le contexte async principal
         view = View()
         view.add_item(VendreButton(item, self.user_id))
@@ -162,126 +173,23 @@ class ReceleurSelectView(View):
 
 
 # ─── Génération de la carte item ──────────────────────────────────────────────
-def build_item_card(item: dict, user_id: str):
-    """
-    Génère l'image PIL de la fiche item + l'embed + la vue avec le bouton de vente.
-    Exécuté dans un thread séparé (asyncio.to_thread).
-    """
-    name        = item["item_name"]
-    rachat      = item["rachat_price"]
-    rarity      = item.get("rarity", "common").lower()
-    description = item.get("description", "Aucune description.")
-    image_url   = item.get("image", "")
-    quantity    = item.get("quantity", 1)
-    balance     = get_balance(user_id)
-
-    rarity_colors = {
-        "common":    (200, 200, 200),
-        "uncommon":  (50, 205, 50),
-        "rare":      (30, 144, 255),
-        "epic":      (138, 43, 226),
-        "legendary": (255, 215, 0)
-    }
-    rarity_color = rarity_colors.get(rarity, (200, 200, 200))
-
-    width, height = 850, 600
-
-    # ── Fond ──────────────────────────────────────────────────────────────────
-    background = None
-    fond_url = (
-        IMAGES_DATA.get("fond_receleur")
-        or IMAGES_DATA.get("fond_marche_noir")
-        or IMAGES_DATA.get("fond_shop")
+def get_fond_url() -> str | None:
+    images_data = registry.get(images_json_path, {})
+    return (
+        images_data.get("fond_receleur")
+        or images_data.get("fond_marche_noir")
+        or images_data.get("fond_shop")
     )
 
-    if fond_url and fond_url.startswith("http"):
-        try:
-            resp = requests.get(fond_url, timeout=5)
-            resp.raise_for_status()
-            background = Image.open(BytesIO(resp.content)).convert("RGBA")
-            background = background.resize((width, height), Image.Resampling.LANCZOS)
-        except Exception as e:
-            print(f"[RECELEUR] Erreur fond URL : {e}")
-
-    if background is None:
-        try:
-            background = Image.open(
-                os.path.join(images_dir, "receleur", "receleur.png")
-            ).convert("RGBA")
-            background = background.resize((width, height), Image.Resampling.LANCZOS)
-        except Exception:
-            background = Image.new("RGBA", (width, height), (30, 20, 10, 255))
-
-    draw = ImageDraw.Draw(background)
-
-    # ── Polices ───────────────────────────────────────────────────────────────
-    font_path_bold = os.path.join(script_dir, "fonts", "DejaVuSans-Bold.ttf")
-    try:
-        font_title  = ImageFont.truetype(font_path_bold, 28)
-        font_normal = ImageFont.truetype(font_path_bold, 18)
-        font_small  = ImageFont.truetype(font_path_bold, 16)
-    except Exception:
-        font_title = font_normal = font_small = ImageFont.load_default()
-
-    # ── Textes ────────────────────────────────────────────────────────────────
-    draw.text((540, 115), name,                                          font=font_title,  fill="white")
-    draw.text((450, 320), f"Rareté : {rarity.capitalize()}",            font=font_normal, fill="white")
-    draw.text((450, 360), f"Quantité possédée : {quantity}",            font=font_normal, fill="white")
-    draw.text((450, 400), f"Rachat : {rachat:,} Croco dollars",         font=font_normal, fill=(255, 215, 0))
-
-    balance_color = (50, 205, 50)
-    draw.text((450, 440), f"Votre solde : {balance:,} Croco dollars",  font=font_normal, fill=balance_color)
-
-    # Description multi-lignes
-    x, y = 450, 480
-    draw.text((x, y), "Description :", font=font_normal, fill="white")
-    y += 28
-    words, lines, current_line = description.split(), [], ""
-    for word in words:
-        test = current_line + word + " "
-        if len(test) * 10 < 350:
-            current_line = test
-        else:
-            if current_line:
-                lines.append(current_line.strip())
-            current_line = word + " "
-    if current_line:
-        lines.append(current_line.strip())
-    for line in lines[:3]:
-        draw.text((x, y), line, font=font_small, fill="white")
-        y += 24
-
-    # ── Image de l'item ───────────────────────────────────────────────────────
-    if image_url:
-        try:
-            if image_url.startswith("http"):
-                resp = requests.get(image_url, timeout=5)
-                resp.raise_for_status()
-                item_img = Image.open(BytesIO(resp.content)).convert("RGBA")
-            else:
-                item_img = Image.open(os.path.join(script_dir, image_url)).convert("RGBA")
-
-            # resize proportionnel
-            w, h = item_img.size
-            ratio = min(200 / w, 200 / h)
-            item_img = item_img.resize((int(w * ratio), int(h * ratio)), Image.Resampling.LANCZOS)
-            img_x = 530 + (200 - item_img.width) // 2
-            background.paste(item_img, (img_x, 140), item_img)
-        except Exception as e:
-            print(f"[RECELEUR] Erreur image item : {e}")
-
-    # ── Fichier Discord ───────────────────────────────────────────────────────
-    buffer = BytesIO()
-    background.save(buffer, "PNG")
-    buffer.seek(0)
-    file = discord.File(buffer, filename="receleur_card.png")
 
+def build_item_card(item: dict, png: bytes):
+    """Fichier + embed de la fiche item (image rendue par render_service)."""
+    file = discord.File(BytesIO(png), filename=filename_for(png, "receleur_card"))
     embed = discord.Embed(
-        title=f"🤫 {name}",
-        color=discord.Color.from_rgb(*rarity_color)
+        title=f"🤫 {item['item_name']}",
+        color=discord.Color.from_rgb(*rarity_color(item.get("rarity", "common")))
     )
-    embed.set_image(url="attachment://receleur_card.png")
-
+    embed.set_image(url=f"attachment://{file.filename}")
     return file, embed  # ← plus de view ici
 
 
@@ -303,7 +211,7 @@ class VendreButton(Button):
         quantity = self.item.get("quantity", 1)
 
         # Retire 1 exemplaire de l'inventaire
-        new_qty, _ = await asyncio.to_thread(use_item, self.user_id, name, 1)
+        new_qty, _ = await run_db(use_item, self.user_id, name, 1)
         if new_qty is None:
             await interaction.followup.send(
                 "❌ Impossible de retirer l'item de ton inventaire. Tu l'as encore ?",
@@ -312,8 +220,8 @@ class VendreButton(Button):
             return
 
         # Crédite l'argent
-        await asyncio.to_thread(add_money, self.user_id, rachat)
-        new_balance = await asyncio.to_thread(get_balance, self.user_id)
+        await run_db(add_money, self.user_id, rachat, reason="receleur")
+        new_balance = await run_db(get_balance, self.user_id)
 
         await interaction.followup.send(
             f"🤝 Marché conclu dans l'ombre...\n"
@@ -1,13 +1,8 @@
 import os
-import psycopg2
 import discord
 from discord.ui import Select, View
-from dotenv import load_dotenv
 
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
-conn = psycopg2.connect(DATABASE_URL, sslmode="require")
-cur = conn.cursor()
+from db_connection import get_cursor
 
 # -----------------------
 # REGIONS DISPONIBLES
@@ -29,38 +24,27 @@ REGION_IMAGES = {
     "Unys":  "images/regions/unys.png",
 }
 
-# -----------------------
-# SETUP TABLE
-# -----------------------
-def setup_regions():
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS user_regions (
-            user_id TEXT PRIMARY KEY,
-            region TEXT
-        );
-    """)
-    conn.commit()
-
 # -----------------------
 # SET REGION
 # -----------------------
 def set_user_region(user_id, region):
-    cur.execute("""
-        INSERT INTO user_regions (user_id, region)
-        VALUES (%s, %s)
-        ON CONFLICT (user_id)
-        DO UPDATE SET region = EXCLUDED.region
-    """, (str(user_id), region))
-    conn.commit()
+    with get_cursor() as cur:
+        cur.execute("""
+            INSERT INTO user_regions (user_id, region)
+            VALUES (%s, %s)
+            ON CONFLICT (user_id)
+            DO UPDATE SET region = EXCLUDED.region
+        """, (str(user_id), region))
 
 # -----------------------
 # GET REGION
 # -----------------------
 def get_user_region(user_id):
-    cur.execute("""
-        SELECT region FROM user_regions WHERE user_id = %s
-    """, (str(user_id),))
-    result = cur.fetchone()
+    with get_cursor() as cur:
+        cur.execute("""
+            SELECT region FROM user_regions WHERE user_id = %s
+        """, (str(user_id),))
+        result = cur.fetchone()
     return result[0] if result else None
 
 # -----------------------
@@ -80,8 +64,9 @@ class RegionSelect(Select):
         )
 
     async def callback(self, interaction: discord.Interaction):
+        from async_db import run_db
         region = self.values[0]
-        set_user_region(interaction.user.id, region)
+        await run_db(set_user_region, interaction.user.id, region)
 
         # Réponse éphémère dans le salon
         await interaction.response.send_message(
@@ -0,0 +1,241 @@
+"""Service de rendu d'images : toute la composition PIL hors de la boucle asyncio.
+
+Les vues préparent un job de cards.py (textes + chemins d'images déjà en
+cache disque) puis attendent `await render(job)`. Le rendu part dans un
+pool de processus (RENDER_MODE=process, défaut) : décodage,
+redimensionnement, dessin et encodage (encoding.py) ne prennent plus ni la boucle ni
+le GIL du bot. RENDER_MODE=thread, ou un pool de processus impossible à
+démarrer, bascule sur un pool de threads ; un worker mort
+(BrokenProcessPool) relance le pool et le job une fois.
+
+- file bornée : au plus RENDER_WORKERS * 2 jobs confiés aux workers,
+  RENDER_QUEUE en attente ; au-delà RenderBusy est levée tout de suite
+  plutôt que d'empiler des rendus que personne n'attendra plus
+- échéance : un job dont l'interaction a expiré (deadline_for) n'est pas
+  lancé, et n'est plus attendu s'il la dépasse (RenderExpired)
+- métriques par type de job : rendus, erreurs, rejets, expirés, annulés,
+  attente dans la file et durée de rendu → !render_stats
+
+Le pool est démarré par start_render_service() juste avant bot.run : les
+fonds et polices (assets.py) sont chargés d'abord, puis les workers sont
+forkés avant que les threads du bot n'existent.
+
+    png = await render(ItemCardJob(...), deadline=deadline_for(interaction))
+    png = await render_for(interaction, job)   # répond « occupé » tout seul
+"""
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import discord
+
+import cards
+from utils import is_croco
+
+RENDER_MODE    = os.getenv("RENDER_MODE", "process").lower()      # process | thread
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))
+RENDER_QUEUE   = int(os.getenv("RENDER_QUEUE", "32"))             # jobs en attente max
+RENDER_TIMEOUT = float(os.getenv("RENDER_TIMEOUT", "30"))         # secondes par rendu
+INTERACTION_LIFETIME = 15 * 60   # validité du jeton d'une interaction différée (secondes)
+BUSY_MESSAGE = "⏳ Trop d'images en préparation, réessaie dans un instant."
+
+
+class RenderBusy(Exception):
+    """File de rendu pleine : réessayer plus tard."""
+
+
+class RenderExpired(Exception):
+    """Échéance dépassée : plus personne n'attend ce rendu."""
+
+
+_executor = None
+_mode = None                                   # "process" | "thread"
+_slots = asyncio.Semaphore(RENDER_WORKERS * 2)
+_waiting = 0
+
+metrics: dict[str, dict] = {}
+
+
+def _metrics_for(kind: str) -> dict:
+    m = metrics.get(kind)
+    if m is None:
+        m = metrics[kind] = {"rendered": 0, "errors": 0, "rejected": 0, "expired": 0,
+                             "cancelled": 0, "wait_ms": 0.0, "render_ms": 0.0, "max_ms": 0.0}
+    return m
+
+
+# ───────────────────────────────────────────────────────────────
+# ⚙️ Pool
+# ───────────────────────────────────────────────────────────────
+def _start_executor():
+    global _executor, _mode
+    if RENDER_MODE != "thread":
+        try:
+            executor = ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("fork"),
+            )
+            executor.submit(cards.warmup).result(timeout=60)
+            _executor, _mode = executor, "process"
+            return
+        except Exception as e:
+            print(f"[RENDER] Pool de processus indisponible ({e}), repli sur des threads")
+    _executor = ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix="render")
+    _mode = "thread"
+
+
+def start_render_service():
+    """Démarre le pool (à appeler avant bot.run)."""
+    if _executor is None:
+        cards.preload_assets()   # avant le fork : les workers héritent du registre
+        _start_executor()
+        print(f"[RENDER] {RENDER_WORKERS} worker(s) en mode {_mode}")
+
+
+def stop_render_service():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _restart_executor(broken):
+    global _executor
+    if _executor is broken:
+        print("[RENDER] Worker mort, redémarrage du pool")
+        broken.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        _start_executor()
+
+
+# ───────────────────────────────────────────────────────────────
+# 🎨 Rendu
+# ───────────────────────────────────────────────────────────────
+def deadline_for(interaction) -> float:
+    """Échéance (horloge monotone) au-delà de laquelle l'interaction ne peut plus répondre."""
+    age = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+    return time.monotonic() + INTERACTION_LIFETIME - age
+
+
+async def _acquire(deadline: float | None):
+    if deadline is None:
+        await _slots.acquire()
+        return
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise RenderExpired
+    try:
+        await asyncio.wait_for(_slots.acquire(), remaining)
+    except asyncio.TimeoutError:
+        raise RenderExpired from None
+
+
+async def _execute(job, deadline: float | None) -> bytes:
+    """Un essai. Le créneau n'est rendu que lorsque le worker a réellement fini."""
+    loop = asyncio.get_running_loop()
+    if _executor is None:
+        start_render_service()
+    executor = _executor
+    try:
+        future = executor.submit(cards.render_job, job)
+    except BaseException as e:
+        _slots.release()
+        if isinstance(e, BrokenProcessPool):
+            _restart_executor(executor)
+        raise
+
+    def _release(_):
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(_slots.release)
+    future.add_done_callback(_release)
+
+    timeout = RENDER_TIMEOUT if deadline is None else min(RENDER_TIMEOUT, deadline - time.monotonic())
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), max(timeout, 0))
+    except asyncio.TimeoutError:
+        raise RenderExpired from None
+    except BrokenProcessPool:
+        _restart_executor(executor)
+        raise
+
+
+async def render(job, deadline: float | None = None) -> bytes:
+    """Octets encodés du job. Lève RenderBusy (file pleine) ou RenderExpired (échéance dépassée)."""
+    global _waiting
+    m = _metrics_for(job.kind)
+    if _waiting >= RENDER_QUEUE:
+        m["rejected"] += 1
+        raise RenderBusy(job.kind)
+
+    queued_at = time.monotonic()
+    started = None
+    try:
+        for attempt in (1, 2):
+            _waiting += 1
+            try:
+                await _acquire(deadline)
+            finally:
+                _waiting -= 1
+            if started is None:
+                started = time.monotonic()
+                m["wait_ms"] += (started - queued_at) * 1000
+            try:
+                png = await _execute(job, deadline)
+                break
+            except BrokenProcessPool:
+                if attempt == 2:
+                    raise
+    except RenderExpired:
+        m["expired"] += 1
+        raise
+    except asyncio.CancelledError:
+        m["cancelled"] += 1
+        raise
+    except Exception:
+        m["errors"] += 1
+        raise
+
+    elapsed = (time.monotonic() - started) * 1000
+    m["rendered"] += 1
+    m["render_ms"] += elapsed
+    m["max_ms"] = max(m["max_ms"], elapsed)
+    return png
+
+
+async def render_for(interaction: discord.Interaction, job) -> bytes | None:
+    """render() borné par la vie de l'interaction (déjà différée).
+
+    None si le rendu n'a pas pu se faire ; le joueur est prévenu quand il
+    peut encore l'être.
+    """
+    try:
+        return await render(job, deadline=deadline_for(interaction))
+    except RenderBusy:
+        await interaction.followup.send(BUSY_MESSAGE, ephemeral=True)
+    except RenderExpired:
+        print(f"[RENDER] {job.kind} abandonné : interaction expirée")
+    return None
+
+
+# ───────────────────────────────────────────────────────────────
+# 🛠️ Commande admin
+# ───────────────────────────────────────────────────────────────
+def setup_render_service(bot):
+
+    @bot.command(name="render_stats")
+    @is_croco()
+    async def render_stats(ctx):
+        lines = [f"🎨 **Rendus** — mode {_mode or 'non démarré'}, {RENDER_WORKERS} worker(s), "
+                 f"{_waiting} en attente"]
+        for kind, m in sorted(metrics.items()):
+            done = m["rendered"] or 1
+            lines.append(
+                f"**{kind}** : {m['rendered']} rendus · moyenne {m['render_ms'] / done:.0f} ms · "
+                f"max {m['max_ms']:.0f} ms · attente {m['wait_ms'] / done:.0f} ms\n"
+                f"  erreurs {m['errors']} · rejetés {m['rejected']} · expirés {m['expired']} · "
+                f"annulés {m['cancelled']}"
+            )
+        await ctx.send("\n".join(lines)[:2000])
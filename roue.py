@@ -2,8 +2,7 @@
 import discord
 from discord.ui import View, Button
 import random
-from inventory_db import get_items, use_item
-from money_db import get_balance, add_money
+from async_db import get_items, use_item, get_balance, add_money
 
 # Nom de l'objet jeton dans l'inventaire
 JETON_NAME = "Jeton"
@@ -70,7 +69,7 @@ class RoueView(View):
         """Vérifie le jeton, consomme-le et résout la roue."""
 
         # Vérifie que le joueur a un jeton
-        item = get_items(self.user_id, JETON_NAME)
+        item = await get_items(self.user_id, JETON_NAME)
         if item is None or item["quantity"] < 1:
             embed = discord.Embed(
                 title="❌ Pas de jeton !",
@@ -83,7 +82,7 @@ class RoueView(View):
             return
 
         # Consomme 1 jeton
-        use_item(self.user_id, JETON_NAME, quantity=1)
+        await use_item(self.user_id, JETON_NAME, quantity=1)
 
         # Lance la roue
         label, gain, is_token = spin_wheel()
@@ -93,8 +92,8 @@ class RoueView(View):
         # Applique le gain
         if is_token:
             # Redonne 1 jeton au joueur
-            from inventory_db import add_item
-            add_item(
+            from async_db import add_item
+            await add_item(
                 self.user_id,
                 JETON_NAME,
                 quantity=1,
@@ -104,11 +103,11 @@ class RoueView(View):
             )
             result_line = "🎰 **Vous regagnez 1 Jeton de roue !**"
         else:
-            add_money(self.user_id, gain)
+            await add_money(self.user_id, gain, reason="roue")
             result_line = f"💰 **+{gain} 💰🐊** ajoutés à votre solde !"
 
-        balance = get_balance(self.user_id)
-        jetons_restants = get_items(self.user_id, JETON_NAME)
+        balance = await get_balance(self.user_id)
+        jetons_restants = await get_items(self.user_id, JETON_NAME)
         jetons_qty = jetons_restants["quantity"] if jetons_restants else 0
 
         embed = discord.Embed(
@@ -153,9 +152,9 @@ class SpinAgainButton(Button):
 
     async def callback(self, interaction: discord.Interaction):
         new_view = RoueView(user_id=self.user_id)
-        item = get_items(self.user_id, JETON_NAME)
+        item = await get_items(self.user_id, JETON_NAME)
         qty = item["quantity"] if item else 0
-        balance = get_balance(self.user_id)
+        balance = await get_balance(self.user_id)
 
         embed = discord.Embed(
             title="🎡 Roue de la Fortune",
@@ -192,9 +191,9 @@ class WheelButton(Button):
 
     async def callback(self, interaction: discord.Interaction):
         user_id = interaction.user.id
-        item = get_items(user_id, JETON_NAME)
+        item = await get_items(user_id, JETON_NAME)
         qty = item["quantity"] if item else 0
-        balance = get_balance(user_id)
+        balance = await get_balance(user_id)
 
         view = RoueView(user_id=user_id)
         embed = discord.Embed(
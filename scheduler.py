@@ -0,0 +1,271 @@
+"""Ordonnanceur central : un tas de minuteries à la place des boucles de polling.
+
+Les fonctionnalités enregistrent des tâches à échéance au lieu de faire
+tourner chacune sa boucle `while True: sleep(…)` :
+
+    scheduler.call_later(3600, spawn_dm, member, name=f"dm_spawn:{member.id}")   → une fois dans 1 h
+    scheduler.call_at(datetime(…), publish)                                      → une fois à une date
+    scheduler.every(600, settle_chenil_batch, name="chenil_settle")               → toutes les 10 min
+    scheduler.every(lambda: random.randint(1500, 2100), croco_fire, jitter=5)     → délai tiré à chaque tour
+    scheduler.cancel("dm_spawn:42") / job.cancel()                                → annulation
+    scheduler.get("dm_spawn:42").remaining()                                      → compte à rebours
+
+Toutes les échéances sont rangées dans un seul tas (heapq) : ajout et
+annulation en O(log n), même avec des milliers de minuteries par membre.
+Une seule minuterie asyncio (loop.call_at) est armée sur la plus proche
+échéance : rien ne se réveille tant qu'aucune tâche n'est due (zéro réveil
+à vide). Une tâche nommée remplace la précédente du même nom.
+
+Chaque exécution tourne dans sa propre tâche asyncio : une tâche lente ne
+retarde pas les autres. Une tâche récurrente est replanifiée après la fin
+de son exécution (jamais deux exécutions en parallèle). Une exception est
+loggée, la tâche récurrente continue. Les exécutions en cours sont gardées
+dans `_tasks` et annulées par `shutdown()` (arrêt du bot).
+
+    !sched_stats → commande admin (tâches en attente, prochaines échéances)
+"""
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from datetime import datetime
+
+
+class Job:
+    """Tâche planifiée (renvoyée par call_later / call_at / every)."""
+    __slots__ = ("name", "callback", "args", "interval", "jitter", "deadline",
+                 "runs", "cancelled", "running", "_scheduler", "_seq")
+
+    def __init__(self, scheduler, name, callback, args, interval, jitter):
+        self._scheduler = scheduler
+        self.name = name
+        self.callback = callback
+        self.args = args
+        self.interval = interval     # None (une fois), secondes, ou fonction → secondes
+        self.jitter = jitter         # secondes aléatoires ajoutées à chaque échéance (0..jitter)
+        self.deadline = 0.0          # horloge de la boucle (loop.time())
+        self.runs = 0
+        self.cancelled = False
+        self.running = False
+        self._seq = 0                # génération : les entrées périmées du tas sont ignorées
+
+    @property
+    def recurring(self) -> bool:
+        return self.interval is not None
+
+    def remaining(self) -> float:
+        """Secondes avant la prochaine exécution (0 si due ou en cours)."""
+        return max(0.0, self.deadline - self._scheduler.loop.time())
+
+    def due_at(self) -> float:
+        """Échéance en timestamp (time.time()), pour l'affichage."""
+        return time.time() + self.remaining()
+
+    def cancel(self):
+        self._scheduler.cancel(self)
+
+    def next_delay(self) -> float:
+        return float(self.interval() if callable(self.interval) else self.interval)
+
+    def __repr__(self):
+        return f"<Job {self.name} dans {self.remaining():.0f}s{' (récurrente)' if self.recurring else ''}>"
+
+
+class Scheduler:
+    def __init__(self):
+        self._heap: list[tuple] = []                 # (échéance, génération, Job)
+        self._jobs: dict[str, Job] = {}              # nom → tâche en attente ou en cours
+        self._counter = itertools.count()
+        self._handle: asyncio.TimerHandle | None = None
+        self._armed_at: float | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stale = 0                              # entrées annulées encore dans le tas
+        self._tasks: set[asyncio.Task] = set()       # exécutions en cours (références gardées)
+        self.stats = {"scheduled": 0, "runs": 0, "errors": 0, "cancelled": 0, "wakeups": 0}
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()   # planifier depuis la boucle (on_ready, commandes…)
+        return self._loop
+
+    # ── Planification ────────────────────────────────────────────────────────
+    def call_later(self, delay: float, callback, *args, name: str | None = None, jitter: float = 0) -> Job:
+        """callback(*args) une fois dans `delay` secondes (+ 0..jitter)."""
+        job = self._new_job(name, callback, args, None, jitter)
+        self._push(job, delay)
+        return job
+
+    def call_at(self, when, callback, *args, name: str | None = None, jitter: float = 0) -> Job:
+        """callback(*args) une fois à `when` (datetime ou timestamp time.time())."""
+        timestamp = when.timestamp() if isinstance(when, datetime) else float(when)
+        return self.call_later(max(0.0, timestamp - time.time()), callback, *args, name=name, jitter=jitter)
+
+    def every(self, interval, callback, *args, name: str | None = None, jitter: float = 0,
+              first_delay: float | None = None) -> Job:
+        """callback(*args) toutes les `interval` secondes (nombre ou fonction → secondes).
+
+        Première exécution après `first_delay` (par défaut : un intervalle).
+        """
+        job = self._new_job(name, callback, args, interval, jitter)
+        self._push(job, job.next_delay() if first_delay is None else first_delay)
+        return job
+
+    def cancel(self, job_or_name) -> bool:
+        """Annule une tâche (objet ou nom). Une exécution en cours va à son terme."""
+        job = self._jobs.get(job_or_name) if isinstance(job_or_name, str) else job_or_name
+        if job is None or job.cancelled:
+            return False
+        job.cancelled = True
+        if not job.running:
+            self._stale += 1         # son entrée reste dans le tas jusqu'au prochain passage
+        self.stats["cancelled"] += 1
+        if self._jobs.get(job.name) is job:
+            del self._jobs[job.name]
+        self._compact()
+        return True
+
+    def cancel_prefix(self, prefix: str) -> int:
+        """Annule toutes les tâches dont le nom commence par `prefix` (ex. "dm_spawn:")."""
+        return sum(self.cancel(job) for job in [j for n, j in self._jobs.items() if n.startswith(prefix)])
+
+    async def shutdown(self):
+        """Annule toutes les tâches et les exécutions en cours (arrêt du bot)."""
+        for job in list(self._jobs.values()):
+            self.cancel(job)
+        if self._handle:
+            self._handle.cancel()
+        self._handle = self._armed_at = None
+        self._heap.clear()
+        self._stale = 0
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get(self, name: str) -> Job | None:
+        return self._jobs.get(name)
+
+    def jobs(self, prefix: str = "") -> list[Job]:
+        """Tâches en attente (les plus proches d'abord)."""
+        return sorted((j for n, j in self._jobs.items() if n.startswith(prefix)), key=lambda j: j.deadline)
+
+    # ── Interne ──────────────────────────────────────────────────────────────
+    def _new_job(self, name, callback, args, interval, jitter) -> Job:
+        if name is None:
+            name = f"{getattr(callback, '__qualname__', 'job')}#{next(self._counter)}"
+        previous = self._jobs.get(name)
+        if previous is not None:
+            self.cancel(previous)
+        job = Job(self, name, callback, args, interval, jitter)
+        self._jobs[name] = job
+        self.stats["scheduled"] += 1
+        return job
+
+    def _push(self, job: Job, delay: float):
+        if job.jitter:
+            delay += random.uniform(0, job.jitter)
+        job.deadline = self.loop.time() + max(0.0, delay)
+        job._seq = next(self._counter)
+        heapq.heappush(self._heap, (job.deadline, job._seq, job))
+        self._arm()
+
+    def _live(self, entry) -> bool:
+        _, seq, job = entry
+        return not job.cancelled and seq == job._seq
+
+    def _arm(self):
+        """Arme l'unique minuterie de la boucle sur l'échéance la plus proche."""
+        while self._heap and not self._live(self._heap[0]):
+            heapq.heappop(self._heap)
+            self._stale = max(0, self._stale - 1)
+        if not self._heap:
+            if self._handle:
+                self._handle.cancel()
+            self._handle = self._armed_at = None
+            return
+        deadline = self._heap[0][0]
+        if self._handle is not None and self._armed_at == deadline:
+            return
+        if self._handle:
+            self._handle.cancel()
+        self._armed_at = deadline
+        self._handle = self.loop.call_at(deadline, self._fire)
+
+    def _fire(self):
+        self._handle = self._armed_at = None
+        self.stats["wakeups"] += 1
+        now = self.loop.time()
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if not self._live(entry):
+                self._stale = max(0, self._stale - 1)
+                continue
+            job = entry[2]
+            job.running = True
+            if not job.recurring and self._jobs.get(job.name) is job:
+                del self._jobs[job.name]   # le callback peut replanifier sous le même nom
+            task = self.loop.create_task(self._execute(job), name=f"sched:{job.name}")
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        self._arm()
+
+    async def _execute(self, job: Job):
+        job.runs += 1
+        self.stats["runs"] += 1
+        try:
+            await job.callback(*job.args)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"[SCHED] ❌ Tâche {job.name} : {e}")
+        finally:
+            job.running = False
+        if job.recurring and not job.cancelled:
+            self._push(job, job.next_delay())
+
+    def _compact(self):
+        """Reconstruit le tas quand les entrées annulées y sont majoritaires."""
+        if self._stale > 64 and self._stale * 2 > len(self._heap):
+            self._heap = [entry for entry in self._heap if self._live(entry)]
+            heapq.heapify(self._heap)
+            self._stale = 0
+        if self._loop is not None:
+            self._arm()
+
+    def report(self) -> dict:
+        return {"pending": len(self._jobs), "heap": len(self._heap), "running": len(self._tasks), **self.stats}
+
+
+scheduler = Scheduler()
+
+
+def format_delay(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours:
+        return f"{hours}h {minutes} min {seconds} sec"
+    return f"{minutes} min {seconds} sec"
+
+
+# ───────────────────────────────────────────────────────────────
+# 🛠️ Commande admin
+# ───────────────────────────────────────────────────────────────
+def setup_scheduler(bot):
+    from utils import is_croco   # utils lit la config du bot : pas à l'import
+
+    @bot.command(name="sched_stats")
+    @is_croco()
+    async def sched_stats(ctx):
+        r = scheduler.report()
+        lines = [
+            f"⏱️ **Ordonnanceur** : {r['pending']} tâche(s) en attente · {r['running']} en cours · {r['runs']} exécution(s) · "
+            f"{r['wakeups']} réveil(s) · {r['cancelled']} annulation(s) · {r['errors']} erreur(s)"
+        ]
+        for job in scheduler.jobs()[:15]:
+            state = "▶️ en cours" if job.running else f"dans {format_delay(job.remaining())}"
+            lines.append(f"• `{job.name}` — {state}{' 🔁' if job.recurring else ''}")
+        await ctx.send("\n".join(lines)[:2000])
@@ -1,29 +1,21 @@
+import asyncio
 import discord
 from discord.ui import View, Button
-from PIL import Image, ImageDraw, ImageFont
-import requests
 import os
-import json
 from io import BytesIO
-from inventory_db import add_item
-from money_db import get_balance, remove_money
+from sprites import fetch_sprite_path
+from cards import ItemCardJob, rarity_color
+from render_service import render_for
+from data_registry import registry
+from encoding import filename_for
+from async_db import add_item, get_balance, remove_money
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 item_json_path = os.path.join(script_dir, "json", "item.json")
 images_dir = os.path.join(script_dir, "images")
 images_json_path = os.path.join(script_dir, "json", "images.json")
 
-# Chargement du fichier item.json
-with open(item_json_path, "r", encoding="utf-8") as f:
-    ITEM_LIST = json.load(f)
-
-# Chargement du fichier images.json pour les URLs des images de fond
-try:
-    with open(images_json_path, "r", encoding="utf-8") as f:
-        IMAGES_DATA = json.load(f)
-except Exception as e:
-    print(f"[SHOP] Erreur lors du chargement de images.json : {e}")
-    IMAGES_DATA = {}
+# item.json et images.json : registre partagé (data_registry), relus à chaque usage
 
 
 class ShopView(View):
@@ -34,7 +26,7 @@ class ShopView(View):
         self.max_per_page = 10
         
         # Filtrer uniquement les items avec un prix > 0
-        self.items = [item for item in ITEM_LIST if item.get("price", 0) > 0]
+        self.items = [item for item in registry.get(item_json_path) if item.get("price", 0) > 0]
         
         self.update_buttons()
 
@@ -97,12 +89,6 @@ class ShopItemButton(Button):
         self.item = item
         self.user_id = user_id
 
-    def resize_keep_aspect(self, img, max_size):
-        """Redimensionne une image en gardant les proportions"""
-        w, h = img.size
-        ratio = min(max_size / w, max_size / h)
-        return img.resize((int(w * ratio), int(h * ratio)), Image.Resampling.LANCZOS)
-
     async def callback(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
 
@@ -110,153 +96,40 @@ class ShopItemButton(Button):
         name = self.item["item_name"]
         price = self.item["price"]
         rarity = self.item.get("rarity", "common")
-        description = self.item.get("description", "Aucune description.")
         image_url = self.item.get("image", "")
-        balance = get_balance(self.user_id)
-
-        # Couleurs par rareté
-        rarity_colors = {
-            "common": (200, 200, 200),
-            "uncommon": (50, 205, 50),
-            "rare": (30, 144, 255),
-            "epic": (138, 43, 226),
-            "legendary": (255, 215, 0)
-        }
-        rarity_color = rarity_colors.get(rarity.lower(), (200, 200, 200))
-
-        # Dimensions de la carte
-        width, height = 850, 600
-
-        # ----- 🎨 Chargement de l'image de fond depuis le JSON -----
-        background = None
-        
-        # Essaie de charger l'image depuis le JSON
-        fond_url = IMAGES_DATA.get("fond_shop") or IMAGES_DATA.get("fond_pokedex") or IMAGES_DATA.get("background")
-        
-        if fond_url and fond_url.startswith("http"):
-            try:
-                print(f"[SHOP] Chargement du fond depuis l'URL : {fond_url}")
-                resp = requests.get(fond_url, timeout=5)
-                resp.raise_for_status()
-                background = Image.open(BytesIO(resp.content)).convert("RGBA")
-                background = background.resize((width, height), Image.Resampling.LANCZOS)
-            except Exception as e:
-                print(f"[SHOP] Erreur lors du chargement du fond depuis l'URL : {e}")
-        
-        # Fallback : fichiers locaux
-        if background is None:
-            try:
-                background = Image.open(os.path.join(images_dir, "shop_item.png")).convert("RGBA")
-                background = background.resize((width, height), Image.Resampling.LANCZOS)
-            except Exception as e:
-                print(f"[SHOP] Fond local 'shop_item.png' introuvable : {e}")
-                try:
-                    background = Image.open(os.path.join(images_dir, "shop_item.png")).convert("RGBA")
-                    background = background.resize((width, height), Image.Resampling.LANCZOS)
-                except Exception as e2:
-                    print(f"[SHOP] Aucun fond disponible, création d'un fond uni : {e2}")
-                    background = Image.new("RGBA", (width, height), (245, 245, 245, 255))
-
-        draw = ImageDraw.Draw(background)
-
-        # ----- 📝 Chargement des polices -----
-        font_path_bold = os.path.join(script_dir, "fonts", "DejaVuSans-Bold.ttf")
-        try:
-            font_title = ImageFont.truetype(font_path_bold, 28)
-            font_normal = ImageFont.truetype(font_path_bold, 18)
-            font_small = ImageFont.truetype(font_path_bold, 16)
-        except:
-            font_title = ImageFont.load_default()
-            font_normal = font_title
-            font_small = font_title
-
-        # ----- 🖼️ Positions des éléments -----
-        pos_title = (540, 115)
-        pos_item_image = (530, 140)
-        pos_rarity = (450, 340)
-        pos_price = (450, 380)
-        pos_balance = (450, 420)
-        pos_description = (450, 460)
-        
-
-        # ----- ✍️ Nom de l'item -----
-        draw.text(pos_title, name, font=font_title, fill="black")
-
-        # ----- ✨ Rareté avec couleur -----
-        draw.text(pos_rarity, f"Rareté : {rarity.capitalize()}", font=font_normal, fill="black")
-
-        # ----- 💰 Prix -----
-        draw.text(pos_price, f"Prix : {price:,} Croco dollars", font=font_normal, fill="black")
-
-        # ----- 💼 Solde de l'utilisateur -----
-        balance_color = (34, 139, 34)  if balance >= price else (255, 69, 0)
-        draw.text(pos_balance, f"Votre solde : {balance:,} Croco dollars", font=font_normal, fill=balance_color)
-
-        # ----- 📜 Description (multi-lignes) -----
-        x, y = pos_description
-        draw.text((x, y), "Description :", font=font_normal, fill="black")
-        y += 30
-
-        words = description.split()
-        lines = []
-        current_line = ""
-        max_width = 350  # Largeur max pour le texte
-        
-        for word in words:
-            test_line = current_line + word + " "
-            # Estimation de la largeur (approximative)
-            if len(test_line) * 10 < max_width:
-                current_line = test_line
-            else:
-                if current_line:
-                    lines.append(current_line.strip())
-                current_line = word + " "
-        
-        if current_line:
-            lines.append(current_line.strip())
-        
-        # Affichage des lignes (max 4 lignes)
-        for line in lines[:4]:
-            draw.text((x, y), line, font=font_small, fill="black")
-            y += 25
-
-        # ----- 🖼️ Image de l'objet -----
-        if image_url and image_url.startswith("http"):
-            try:
-                resp = requests.get(image_url, timeout=5)
-                resp.raise_for_status()
-                item_img = Image.open(BytesIO(resp.content)).convert("RGBA")
-                
-                # Redimensionnement en gardant les proportions
-                item_img = self.resize_keep_aspect(item_img, 200)
-                
-                # Centrage de l'image
-                img_x = pos_item_image[0] + (200 - item_img.width) // 2
-                img_y = pos_item_image[1]
-                
-                background.paste(item_img, (img_x, img_y), item_img)
-            except Exception as e:
-                print(f"[SHOP] Erreur lors du chargement de l'image de l'item : {e}")
-                # Image par défaut si erreur
-                try:
-                    default_img = Image.open(os.path.join(images_dir, "default.png")).convert("RGBA")
-                    default_img = self.resize_keep_aspect(default_img, 150)
-                    background.paste(default_img, pos_item_image, default_img)
-                except:
-                    pass
+        remote_image = image_url.startswith("http")
+
+        # ----- 🎨 Solde, fond (images.json) et image de l'objet, en parallèle -----
+        images_data = registry.get(images_json_path, {})
+        fond_url = images_data.get("fond_shop") or images_data.get("fond_pokedex") or images_data.get("background")
+        balance, fond_path, item_path = await asyncio.gather(
+            get_balance(self.user_id),
+            fetch_sprite_path(fond_url or ""),
+            fetch_sprite_path(image_url) if remote_image else asyncio.sleep(0),
+        )
 
-        # ----- 📤 Conversion en fichier Discord -----
-        with BytesIO() as buffer:
-            background.save(buffer, "PNG")
-            buffer.seek(0)
-            file = discord.File(buffer, filename="shop_item_card.png")
+        # ----- 🖼️ Carte dessinée par le pool de rendu -----
+        png = await render_for(interaction, ItemCardJob(
+            theme="shop",
+            name=name,
+            rarity=rarity,
+            description=self.item.get("description", "Aucune description."),
+            price=price,
+            balance=balance,
+            background_path=fond_path,
+            image_path=item_path,
+            fallback_image_path=os.path.join(images_dir, "default.png") if remote_image else None,
+        ))
+        if png is None:
+            return
+        file = discord.File(BytesIO(png), filename=filename_for(png, "shop_item_card"))
 
         # ----- 📋 Création de l'embed -----
         embed = discord.Embed(
             title=f"🛒 {name}",
-            color=discord.Color.from_rgb(*rarity_color)
+            color=discord.Color.from_rgb(*rarity_color(rarity))
         )
-        embed.set_image(url="attachment://shop_item_card.png")
+        embed.set_image(url=f"attachment://{file.filename}")
 
         # ----- 🔘 Bouton d'achat -----
         view = View()
@@ -284,7 +157,7 @@ class BuyItemButton(Button):
         name = self.item["item_name"]
         
         # Vérifier le solde
-        balance = get_balance(self.user_id)
+        balance = await get_balance(self.user_id)
         
         if balance < price:
             await interaction.followup.send(
@@ -296,7 +169,7 @@ class BuyItemButton(Button):
             return
 
         # Retirer l'argent
-        success = remove_money(self.user_id, price)
+        success = await remove_money(self.user_id, price, reason="boutique")
         
         if not success:
             await interaction.followup.send(
@@ -306,7 +179,7 @@ class BuyItemButton(Button):
             return
 
         # Ajouter l'item à l'inventaire
-        add_item(
+        await add_item(
             user_id=self.user_id,
             name=self.item["item_name"],
             quantity=1,
@@ -317,7 +190,7 @@ class BuyItemButton(Button):
             price=self.item.get("price", 0)
         )
 
-        new_balance = get_balance(self.user_id)
+        new_balance = await get_balance(self.user_id)
         
         await interaction.followup.send(
             f"✅ Achat réussi !\n"
@@ -333,7 +206,7 @@ def setup_shop(bot):
     @bot.command(name="shop")
     async def shop(ctx):
         """Affiche la boutique."""
-        balance = get_balance(ctx.author.id)
+        balance = await get_balance(ctx.author.id)
         
         embed = discord.Embed(
             title="🛒 Boutique Croco",
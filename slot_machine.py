@@ -2,7 +2,7 @@
 import discord
 from discord.ui import View, Button
 import random
-from money_db import get_balance, add_money, remove_money
+from async_db import get_balance, add_money, remove_money
 
 class SlotMachine(View):
     def __init__(self, user_id, bet_amount=10):
@@ -70,10 +70,9 @@ class SlotMachine(View):
     
     async def play(self, interaction: discord.Interaction):
         """Lance la machine à sous."""
-        # Vérifie le solde
-        current_balance = get_balance(self.user_id)
-        
-        if current_balance < self.bet_amount:
+        # Retire la mise (refusé par la base si le solde est insuffisant)
+        if not await remove_money(self.user_id, self.bet_amount, reason="casino_mise"):
+            current_balance = await get_balance(self.user_id)
             embed = discord.Embed(
                 title="❌ Solde insuffisant",
                 description=f"Vous avez besoin de **{self.bet_amount} 💰🐊** pour jouer.\n"
@@ -87,9 +86,6 @@ class SlotMachine(View):
             await interaction.response.edit_message(embed=embed, view=self)
             return
         
-        # Retire la mise
-        remove_money(self.user_id, self.bet_amount)
-        
         # Fait tourner les rouleaux
         results = self.spin_reels()
         
@@ -101,8 +97,8 @@ class SlotMachine(View):
         
         # Détermine le résultat
         if win_amount > 0:
-            add_money(self.user_id, win_amount)
-            new_balance = get_balance(self.user_id)
+            await add_money(self.user_id, win_amount, reason="casino_gain")
+            new_balance = await get_balance(self.user_id)
             net_gain = win_amount - self.bet_amount
             
             # Message selon le gain
@@ -126,7 +122,7 @@ class SlotMachine(View):
             
             embed = discord.Embed(title=title, description=description, color=color)
         else:
-            new_balance = get_balance(self.user_id)
+            new_balance = await get_balance(self.user_id)
             
             embed = discord.Embed(
                 title="😢 Perdu !",
@@ -179,7 +175,7 @@ class PlayAgainButton(Button):
         # Crée une nouvelle machine à sous
         new_slot = SlotMachine(self.user_id, self.bet_amount)
         
-        balance = get_balance(self.user_id)
+        balance = await get_balance(self.user_id)
         
         embed = discord.Embed(
             title="🎰 Machine à Sous",
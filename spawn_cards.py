@@ -0,0 +1,258 @@
+"""Cartes d'apparition précomposées (fond du type + sprite 392 px).
+
+Une carte ne dépend que de l'espèce, du shiny et du fond de son premier
+type : elle est rendue une fois puis servie depuis SPAWN_CARDS (mémoire,
+débordement et persistance sur disque sous images/cache/spawn_cards).
+L'empreinte d'une carte couvre l'URL du sprite, la date du fond et la
+politique d'encodage (encoding.py) : un sprite, un fond ou un encodage
+changé donne une nouvelle carte.
+
+Une tâche de fond pré-rend les cartes du pool de chaque région (dans
+l'ordre de REGION_FILES, une à la fois pour laisser les workers de rendu
+aux joueurs) jusqu'à remplir le budget disque : un spawn se résume alors
+à une lecture de cache et un envoi.
+
+    SPAWN_CARDS_PRERENDER_ON_START=1   → lancé au démarrage (défaut)
+    SPAWN_CARDS_PRERENDER_SHINY=1      → shiny compris
+    !spawn_cards                       → commande admin (lance / état)
+"""
+import asyncio
+import os
+import time
+
+from cache import ByteLRUCache, CACHE_DIR, MB
+from cards import SpawnCardJob
+from encoding import policy_for
+from catalog import catalog
+from render_service import RenderBusy, render
+from sprites import fetch_sprite_variant_path
+from utils import is_croco
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+images_dir = os.path.join(script_dir, "images")
+
+SPAWN_SPRITE_SIZE = 392
+SPAWN_CARD_VERSION = 1   # à incrémenter si le rendu de la carte change
+
+PRERENDER_ON_START = os.getenv("SPAWN_CARDS_PRERENDER_ON_START", "1").lower() in ("1", "true", "yes")
+PRERENDER_SHINY    = os.getenv("SPAWN_CARDS_PRERENDER_SHINY", "0").lower() in ("1", "true", "yes")
+
+# (espèce, shiny, fond) → image encodée de la carte (WebP par défaut)
+SPAWN_CARDS = ByteLRUCache(
+    "spawn_cards",
+    max_bytes=int(os.getenv("SPAWN_CARDS_CACHE_MB", "64")) * MB,
+    spill_dir=os.path.join(CACHE_DIR, "spawn_cards"),
+    disk_max_bytes=int(os.getenv("SPAWN_CARDS_DISK_MB", "1024")) * MB,
+)
+
+_inflight: dict[str, asyncio.Future] = {}   # clé → rendu en cours
+_running = None                             # tâche de pré-rendu en cours
+
+stats = {"prerendered": 0, "already_cached": 0, "failed": 0, "disk_full": False, "elapsed": 0.0}
+
+
+# ───────────────────────────────────────────────────────────────
+# 🏞️ Fonds par type (fichiers dans /images)
+# ───────────────────────────────────────────────────────────────
+TYPE_BACKGROUNDS = {
+    "feu": "bg_feu.png",
+    "eau": "bg_eau.png",
+    "plante": "bg_plante.png",
+    "electrique": "bg_electrique.png",  # (clé sans accent pour simplifier)
+    "glace": "bg_glace.png",
+    "roche": "bg_roche.png",
+    "sol": "bg_sol.png",
+    "psy": "bg_psy.png",
+    "spectre": "bg_spectre.png",
+    "dragon": "bg_dragon.png",
+    "acier": "bg_acier.png",
+    "fee": "bg_fee.png",
+    "poison": "bg_poison.png",
+    "combat": "bg_combat.png",
+    "insecte": "bg_insecte.png",
+    "vol": "bg_vol.png",
+
+    "tenebres": "bg_tenebres.png",
+    "normal": "bg_normal.png",
+}
+DEFAULT_BACKGROUND = "arriere_plan_herbe.png"
+
+def _norm(s: str) -> str:
+    # normalise pour matcher les clés ci-dessus (sans accents)
+    return (s or "").lower()\
+        .replace("é","e").replace("è","e").replace("ê","e")\
+        .replace("à","a").replace("ù","u").replace("ï","i").replace("ô","o")
+
+
+def get_background_path_for_pokemon(pokemon) -> str:
+    """
+    Retourne le chemin du fond en fonction du premier type uniquement.
+    Repli sur DEFAULT_BACKGROUND si fichier manquant ou aucun type.
+    """
+    types = pokemon.get("type") or []
+    if not isinstance(types, list):
+        types = [types]
+
+    # On ne garde que le premier type s'il existe
+    first_type = _norm(types[0]) if types else None
+
+    # Résolution du fichier de fond
+    if first_type:
+        filename = TYPE_BACKGROUNDS.get(first_type, DEFAULT_BACKGROUND)
+    else:
+        filename = DEFAULT_BACKGROUND
+
+    path = os.path.join(images_dir, filename)
+    if not os.path.exists(path):
+        path = os.path.join(images_dir, DEFAULT_BACKGROUND)
+
+    return path
+
+
+# ───────────────────────────────────────────────────────────────
+# 🃏 Cartes
+# ───────────────────────────────────────────────────────────────
+def _card_key(pokemon) -> tuple[str, list, str]:
+    """(clé, empreinte, chemin du fond) de la carte d'un Pokémon du catalogue."""
+    background = get_background_path_for_pokemon(pokemon)
+    shiny = catalog.is_shiny(pokemon["name"])
+    key = f"{pokemon['name']}|{'shiny' if shiny else 'normal'}|{os.path.basename(background)}"
+    try:
+        background_mtime = os.stat(background).st_mtime_ns
+    except OSError:
+        background_mtime = None
+    policy = repr(policy_for(SpawnCardJob.kind))   # changer d'encodage re-rend les cartes
+    return key, [SPAWN_CARD_VERSION, policy, pokemon.get("image", ""), background_mtime], background
+
+
+def _cached_card(pokemon) -> tuple[str, list, str, bytes | None]:
+    """Clé de la carte et carte en cache (stat du fond, lecture disque : hors de la boucle)."""
+    key, fp, background = _card_key(pokemon)
+    return key, fp, background, SPAWN_CARDS.get(key, fingerprint=fp)
+
+
+async def _render_card(pokemon, key, fp, background) -> bytes:
+    png = await render(SpawnCardJob(
+        background_path=background,
+        sprite_path=await fetch_sprite_variant_path(pokemon["image"], SPAWN_SPRITE_SIZE),
+    ))
+    SPAWN_CARDS.put(key, png, fingerprint=fp)
+    return png
+
+
+async def get_spawn_card(pokemon) -> bytes:
+    """Image encodée de la carte d'apparition, depuis le cache si possible.
+
+    Lève SpriteUnavailable / RenderBusy / RenderExpired si la carte ne peut pas être rendue.
+    """
+    key, fp, background, png = await asyncio.to_thread(_cached_card, pokemon)
+    if png is not None:
+        return png
+
+    # Coalescence : deux spawns simultanés de la même espèce = un seul rendu
+    future = _inflight.get(key)
+    if future is None:
+        future = asyncio.ensure_future(_render_card(pokemon, key, fp, background))
+        _inflight[key] = future
+        future.add_done_callback(lambda f: (_inflight.pop(key, None), f.cancelled() or f.exception()))
+    return await asyncio.shield(future)
+
+
+# ───────────────────────────────────────────────────────────────
+# ⏩ Pré-rendu
+# ───────────────────────────────────────────────────────────────
+def _spawn_pools(shiny: bool) -> list:
+    """Pokémon des pools de spawn, région par région, sans doublon."""
+    seen, pokemons = set(), []
+    for normal, shinies in catalog.regions.values():
+        for pokemon in (*normal, *(shinies if shiny else ())):
+            if pokemon["name"] not in seen and pokemon.get("image", "").startswith("http"):
+                seen.add(pokemon["name"])
+                pokemons.append(pokemon)
+    return pokemons
+
+
+async def prerender_spawn_cards(shiny: bool = PRERENDER_SHINY, progress=None) -> dict:
+    """Rend les cartes manquantes, écrites directement sur disque.
+
+    progress : coroutine optionnelle appelée avec (faits, total) environ
+    toutes les 5 % d'avancement. S'arrête quand le budget disque est plein.
+    """
+    pokemons = _spawn_pools(shiny)
+    total = len(pokemons)
+    step = max(1, total // 20)
+    start = time.monotonic()
+    stats.update(prerendered=0, already_cached=0, failed=0, disk_full=False)
+    print(f"[SPAWN CARDS] Pré-rendu de {total} cartes")
+
+    for done, pokemon in enumerate(pokemons, start=1):
+        key, fp, background = await asyncio.to_thread(_card_key, pokemon)
+        if await asyncio.to_thread(SPAWN_CARDS.contains, key, fp):
+            stats["already_cached"] += 1
+        else:
+            try:
+                sprite_path = await fetch_sprite_variant_path(pokemon["image"], SPAWN_SPRITE_SIZE)
+                while True:
+                    try:
+                        png = await render(SpawnCardJob(background_path=background, sprite_path=sprite_path))
+                        break
+                    except RenderBusy:
+                        await asyncio.sleep(5)   # les joueurs d'abord
+                if not await asyncio.to_thread(SPAWN_CARDS.put_disk, key, png, fp, False):
+                    stats["disk_full"] = True
+                    print(f"[SPAWN CARDS] Budget disque atteint après {done - 1}/{total} cartes")
+                    break
+                stats["prerendered"] += 1
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"[SPAWN CARDS] ❌ {pokemon['name']} → {e}")
+        if progress and (done % step == 0 or done == total):
+            await progress(done, total)
+
+    stats["elapsed"] = time.monotonic() - start
+    print(f"[SPAWN CARDS] Terminé en {stats['elapsed']:.1f}s : {stats['prerendered']} rendues, "
+          f"{stats['already_cached']} déjà en cache, {stats['failed']} échec(s)")
+    return dict(stats, total=total)
+
+
+def start_prerender(progress=None) -> asyncio.Task:
+    """Lance le pré-rendu en tâche de fond (réutilise celui en cours)."""
+    global _running
+    if _running is None or _running.done():
+        _running = asyncio.create_task(prerender_spawn_cards(progress=progress))
+    return _running
+
+
+# ───────────────────────────────────────────────────────────────
+# 🛠️ Commande admin
+# ───────────────────────────────────────────────────────────────
+def setup_spawn_cards(bot):
+
+    @bot.listen("on_ready")
+    async def prerender_on_start():
+        if PRERENDER_ON_START:
+            start_prerender()
+
+    @bot.command(name="spawn_cards")
+    @is_croco()
+    async def spawn_cards(ctx):
+        if _running is not None and not _running.done():
+            await ctx.send("⏳ Un pré-rendu des cartes de spawn est déjà en cours.")
+            return
+
+        message = await ctx.send("🃏 Pré-rendu des cartes de spawn…")
+
+        async def progress(done, total):
+            try:
+                await message.edit(content=f"🃏 Pré-rendu des cartes de spawn… {done}/{total} ({done * 100 // total}%)")
+            except Exception:
+                pass
+
+        report = await start_prerender(progress)
+        lines = [
+            f"✅ Pré-rendu terminé en {report['elapsed']:.1f}s : **{report['prerendered']}** carte(s) rendue(s), "
+            f"{report['already_cached']} déjà en cache, {report['failed']} échec(s) sur {report['total']}."
+        ]
+        if report["disk_full"]:
+            lines.append("⚠️ Budget disque atteint (SPAWN_CARDS_DISK_MB) : le reste sera rendu à la demande.")
+        await ctx.send("\n".join(lines))
@@ -0,0 +1,324 @@
+"""Service de récupération des sprites (PokeAPI, GitHub, images des items…).
+
+- une seule session aiohttp partagée (connexions HTTP réutilisées, bornées)
+- cache disque adressé par contenu sous images/cache/sprites :
+    blobs/<sha256 du contenu>      → octets de l'image (dédupliqués)
+    urls/<sha256 de l'URL>.json    → {"url", "blob", "etag", "last_modified", "checked_at"}
+- revalidation ETag / Last-Modified après SPRITE_REVALIDATE_AFTER secondes
+- coalescence : deux demandes simultanées de la même URL = un seul téléchargement
+- mode hors-ligne (SPRITE_OFFLINE=1) : uniquement le cache disque
+- variantes redimensionnées (64 px mosaïque, 392 px spawn…) mises en cache :
+    variants/<sha256 du contenu>_<mode><taille>.png
+- fetch_sprite_path / fetch_sprite_variant_path : chemins disque, pour le
+  service de rendu (render_service) qui compose les images hors de la boucle
+"""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from io import BytesIO
+
+import aiohttp
+from PIL import Image
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+SPRITE_CACHE_DIR = os.path.join(script_dir, "images", "cache", "sprites")
+_BLOBS_DIR = os.path.join(SPRITE_CACHE_DIR, "blobs")
+_URLS_DIR  = os.path.join(SPRITE_CACHE_DIR, "urls")
+_VARIANTS_DIR = os.path.join(SPRITE_CACHE_DIR, "variants")
+
+SPRITE_OFFLINE          = os.getenv("SPRITE_OFFLINE", "0").lower() in ("1", "true", "yes")
+SPRITE_REVALIDATE_AFTER = int(os.getenv("SPRITE_REVALIDATE_AFTER", str(7 * 24 * 3600)))
+SPRITE_MAX_CONNECTIONS  = int(os.getenv("SPRITE_MAX_CONNECTIONS", "16"))
+SPRITE_TIMEOUT          = float(os.getenv("SPRITE_TIMEOUT", "15"))
+
+_session: aiohttp.ClientSession | None = None
+_inflight: dict[str, asyncio.Future] = {}     # url → téléchargement en cours
+_meta_cache: dict[str, dict] = {}             # url → métadonnées déjà lues sur disque
+
+class SpriteUnavailable(Exception):
+    """Image introuvable : ni en cache, ni téléchargeable."""
+
+
+stats = {"hits": 0, "downloads": 0, "revalidated": 0, "coalesced": 0, "errors": 0}
+
+
+# ───────────────────────────────────────────────────────────────
+# 🌐 Session HTTP
+# ───────────────────────────────────────────────────────────────
+def get_session() -> aiohttp.ClientSession:
+    """Session aiohttp partagée, créée à la première utilisation."""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=SPRITE_MAX_CONNECTIONS, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=SPRITE_TIMEOUT),
+            headers={"User-Agent": "PokeMouille-bot"},
+        )
+    return _session
+
+
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+# ───────────────────────────────────────────────────────────────
+# 💾 Cache disque
+# ───────────────────────────────────────────────────────────────
+def _url_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _meta_path(url: str) -> str:
+    key = _url_key(url)
+    return os.path.join(_URLS_DIR, key[:2], f"{key}.json")
+
+
+def _blob_path(blob: str) -> str:
+    return os.path.join(_BLOBS_DIR, blob[:2], blob)
+
+
+def _atomic_write(path: str, data: bytes):
+    """Écrit via un fichier temporaire unique du même dossier (écritures concurrentes sans collision)."""
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _read_meta(url: str) -> dict | None:
+    meta = _meta_cache.get(url)
+    if meta is not None:
+        return meta
+    try:
+        with open(_meta_path(url), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    _meta_cache[url] = meta
+    return meta
+
+
+def _write_meta(url: str, meta: dict):
+    _atomic_write(_meta_path(url), json.dumps(meta).encode("utf-8"))
+    _meta_cache[url] = meta
+
+
+def _read_blob(meta: dict) -> bytes | None:
+    try:
+        with open(_blob_path(meta["blob"]), "rb") as f:
+            return f.read()
+    except (FileNotFoundError, KeyError):
+        return None
+
+
+def _store(url: str, content: bytes, etag: str | None, last_modified: str | None) -> dict:
+    blob = hashlib.sha256(content).hexdigest()
+    path = _blob_path(blob)
+    if not os.path.exists(path):
+        _atomic_write(path, content)
+    meta = {
+        "url":           url,
+        "blob":          blob,
+        "etag":          etag,
+        "last_modified": last_modified,
+        "checked_at":    time.time(),
+    }
+    _write_meta(url, meta)
+    return meta
+
+
+def get_cached_sprite(url: str) -> bytes | None:
+    """Lecture synchrone du cache disque uniquement (aucun accès réseau)."""
+    meta = _read_meta(url)
+    return _read_blob(meta) if meta else None
+
+
+# ───────────────────────────────────────────────────────────────
+# ⬇️ Téléchargement
+# ───────────────────────────────────────────────────────────────
+async def _download(url: str, meta: dict | None) -> bytes | None:
+    cached = _read_blob(meta) if meta else None
+
+    headers = {}
+    if cached is not None:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        async with get_session().get(url, headers=headers) as resp:
+            if resp.status == 304 and cached is not None:
+                meta = dict(meta, checked_at=time.time())
+                _write_meta(url, meta)
+                stats["revalidated"] += 1
+                return cached
+
+            resp.raise_for_status()
+            content = await resp.read()
+            _store(url, content, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+            stats["downloads"] += 1
+            return content
+
+    except Exception as e:
+        stats["errors"] += 1
+        if cached is not None:
+            print(f"[SPRITES] Revalidation impossible pour {url} ({e}), copie locale utilisée.")
+            return cached
+        print(f"[SPRITES] Téléchargement impossible pour {url} : {e}")
+        return None
+
+
+async def fetch_sprite(url: str) -> bytes | None:
+    """Retourne les octets de l'image (cache disque, sinon téléchargement). None si indisponible."""
+    if not url or not url.startswith("http"):
+        return None
+
+    meta = _read_meta(url)
+    if meta is not None:
+        fresh = time.time() - meta.get("checked_at", 0) < SPRITE_REVALIDATE_AFTER
+        if fresh or SPRITE_OFFLINE:
+            data = _read_blob(meta)
+            if data is not None:
+                stats["hits"] += 1
+                return data
+
+    if SPRITE_OFFLINE:
+        return None
+
+    # Coalescence : on se greffe sur le téléchargement déjà en cours
+    future = _inflight.get(url)
+    if future is not None:
+        stats["coalesced"] += 1
+        return await asyncio.shield(future)
+
+    future = asyncio.ensure_future(_download(url, meta))
+    _inflight[url] = future
+    future.add_done_callback(lambda _: _inflight.pop(url, None))
+    return await asyncio.shield(future)
+
+
+async def fetch_sprite_image(url: str) -> Image.Image:
+    """Comme fetch_sprite, mais retourne une image PIL RGBA.
+
+    Lève SpriteUnavailable si l'image est indisponible ou illisible.
+    """
+    data = await fetch_sprite(url)
+    if data is None:
+        raise SpriteUnavailable(url)
+    try:
+        return Image.open(BytesIO(data)).convert("RGBA")
+    except Exception as e:
+        raise SpriteUnavailable(f"{url} : {e}") from e
+
+
+# ───────────────────────────────────────────────────────────────
+# 📐 Variantes redimensionnées
+# ───────────────────────────────────────────────────────────────
+def _variant_path(blob: str, size: int, fit: bool) -> str:
+    mode = "fit" if fit else "sq"
+    return os.path.join(_VARIANTS_DIR, blob[:2], f"{blob}_{mode}{size}.png")
+
+
+def resize_sprite(img: Image.Image, size: int, fit: bool) -> Image.Image:
+    """Redimensionnement identique à celui des vues.
+
+    fit=False : carré size×size (mosaïque, spawn)
+    fit=True  : plus grand côté = size, proportions conservées (fiches, icônes)
+    """
+    if not fit:
+        return img.resize((size, size))
+    w, h = img.size
+    ratio = min(size / w, size / h)
+    return img.resize((int(w * ratio), int(h * ratio)), Image.Resampling.LANCZOS)
+
+
+def _build_variant(data: bytes, path: str, size: int, fit: bool) -> Image.Image:
+    """Décodage + redimensionnement + écriture disque (exécuté dans un thread)."""
+    img = resize_sprite(Image.open(BytesIO(data)).convert("RGBA"), size, fit)
+    out = BytesIO()
+    img.save(out, format="PNG")
+    _atomic_write(path, out.getvalue())
+    return img
+
+
+def _load_variant(path: str) -> Image.Image | None:
+    try:
+        with Image.open(path) as img:
+            return img.convert("RGBA")
+    except (FileNotFoundError, OSError):
+        return None
+
+
+async def fetch_sprite_path(url: str) -> str | None:
+    """Chemin disque des octets de l'image (cache, sinon téléchargement). None si indisponible.
+
+    Pour les rendus hors processus : un chemin se transmet sans copier l'image.
+    """
+    if await fetch_sprite(url) is None:
+        return None
+    meta = _read_meta(url)
+    return _blob_path(meta["blob"]) if meta else None
+
+
+async def resolve_image_path(ref: str) -> str | None:
+    """URL → chemin dans le cache (téléchargée si besoin) ; chemin relatif → fichier local du bot."""
+    if not ref:
+        return None
+    if ref.startswith("http"):
+        return await fetch_sprite_path(ref)
+    return os.path.join(script_dir, ref)
+
+
+async def fetch_sprite_variant_path(url: str, size: int, fit: bool = False) -> str:
+    """Chemin disque de la variante redimensionnée (construite si absente).
+
+    Lève SpriteUnavailable si l'image source est indisponible ou illisible.
+    """
+    data = await fetch_sprite(url)
+    meta = _read_meta(url)
+    if data is None or meta is None:
+        raise SpriteUnavailable(url)
+
+    path = _variant_path(meta["blob"], size, fit)
+    if not os.path.exists(path):
+        try:
+            await asyncio.to_thread(_build_variant, data, path, size, fit)
+        except Exception as e:
+            raise SpriteUnavailable(f"{url} : {e}") from e
+    return path
+
+
+async def fetch_sprite_variant(url: str, size: int, fit: bool = False) -> Image.Image:
+    """Sprite déjà redimensionné, depuis le cache des variantes si possible.
+
+    Lève SpriteUnavailable si l'image source est indisponible ou illisible.
+    """
+    data = await fetch_sprite(url)
+    meta = _read_meta(url)
+    if data is None or meta is None:
+        raise SpriteUnavailable(url)
+
+    path = _variant_path(meta["blob"], size, fit)
+    img = _load_variant(path)
+    if img is not None:
+        return img
+    try:
+        return await asyncio.to_thread(_build_variant, data, path, size, fit)
+    except Exception as e:
+        raise SpriteUnavailable(f"{url} : {e}") from e
@@ -75,7 +75,7 @@ async def spawn_pokemon_for_user(user, json_file="pokemon_gen1_normal.json", shi
     Génère un Pokémon pour un utilisateur, d'abord en décidant s'il est shiny ou non,
     puis en le tirant dans le JSON correspondant.
     """
-    from new_db import save_new_capture
+    from async_db import save_new_capture
     # Roll shiny d'abord
     is_shiny = (random.randint(1, shiny_rate) == 1)
 
@@ -98,7 +98,7 @@ async def spawn_pokemon_for_user(user, json_file="pokemon_gen1_normal.json", shi
     stats_with_iv = apply_ivs(pokemon["stats"], ivs)
 
     # Sauvegarde
-    save_new_capture(user.id, pokemon["name"], ivs, stats_with_iv, pokemon)
+    await save_new_capture(user.id, pokemon["name"], ivs, stats_with_iv, pokemon)
 
     return pokemon["name"], is_shiny
 
@@ -118,11 +118,9 @@ def apply_ivs(base_stats, ivs):
     return { stat: base_stats[stat] + ivs[stat] for stat in base_stats }
 
 def load_json_file(filename):
-    path = os.path.join(json_dir, filename)
-    if not os.path.exists(path):
-        return None
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    """Fiches d'un fichier json/ via le catalogue (lu une seule fois). None si absent."""
+    from catalog import catalog
+    return catalog.file_entries(filename)
 
 def setup_addpokemon_command(bot):
     
@@ -133,7 +131,8 @@ def setup_addpokemon_command(bot):
         Donne un Pokémon aléatoire depuis un fichier JSON à un utilisateur.
         !addpokemon @user pokemon_gen1_normal.json 64
         """
-        from new_db import save_new_capture
+        from async_db import save_new_capture
+        from catalog import catalog
         data = load_json_file(json_file)
         if data is None:
             await ctx.send(f"❌ Fichier `{json_file}` introuvable.")
@@ -143,9 +142,9 @@ def setup_addpokemon_command(bot):
         pokemon = random.choice(data)
         is_shiny = (random.randint(1, shiny_rate) == 1)
 
-        if is_shiny and any(p["name"] == pokemon["name"] + "_shiny" for p in data):
-            # On remplace par la version shiny si elle existe
-            shiny_match = next((p for p in data if p["name"] == pokemon["name"] + "_shiny"), None)
+        if is_shiny:
+            # On remplace par la version shiny si elle existe dans ce fichier
+            shiny_match = catalog.find_in_file(json_file, pokemon["name"] + "_shiny")
             if shiny_match:
                 pokemon = shiny_match
 
@@ -154,7 +153,7 @@ def setup_addpokemon_command(bot):
         stats_with_iv = apply_ivs(pokemon["stats"], ivs)
 
         # Sauvegarde
-        save_new_capture(user.id, pokemon["name"], ivs, stats_with_iv, pokemon)
+        await save_new_capture(user.id, pokemon["name"], ivs, stats_with_iv, pokemon)
 
         shiny_text = "✨ " if is_shiny else ""
         await ctx.send(f"🎉 {user.mention} a reçu un Pokémon aléatoire {shiny_text}**{pokemon['name']}** !")